@@ -0,0 +1,187 @@
+"""
+Benchmark Harness
+Timing, peak-memory measurement, JSON history and regression comparison
+shared by the benchmark suites.
+"""
+
+import gc
+import json
+import platform
+import statistics
+import subprocess
+import time
+import tracemalloc
+from dataclasses import dataclass, asdict, field
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+
+@dataclass
+class BenchmarkResult:
+    """Outcome of one benchmark at one data scale."""
+    name: str
+    scale: int
+    seconds: float                     # median wall-clock time across repeats
+    peak_mib: Optional[float] = None   # tracemalloc peak during one extra run
+    repeats: int = 1
+    runs: List[float] = field(default_factory=list)
+    skipped: Optional[str] = None
+
+    @property
+    def key(self) -> str:
+        return f"{self.name}[{self.scale}]"
+
+
+@dataclass
+class Comparison:
+    """Current result set against a baseline result."""
+    key: str
+    seconds: float
+    baseline_seconds: Optional[float]
+    peak_mib: Optional[float]
+    baseline_peak_mib: Optional[float]
+    time_regressed: bool = False
+    memory_regressed: bool = False
+
+    @property
+    def regressed(self) -> bool:
+        return self.time_regressed or self.memory_regressed
+
+
+def measure(fn: Callable[[], object], repeats: int = 3, track_memory: bool = True,
+            setup: Optional[Callable[[], None]] = None) -> Dict[str, object]:
+    """
+    Time `fn` over several repeats and measure its peak traced memory.
+
+    Memory is taken from a separate run because tracemalloc slows
+    allocation-heavy code and would skew the timings.
+    """
+    runs = []
+    for _ in range(max(1, repeats)):
+        if setup:
+            setup()
+        gc.collect()
+        start = time.perf_counter()
+        fn()
+        runs.append(time.perf_counter() - start)
+
+    peak_mib = None
+    if track_memory:
+        if setup:
+            setup()
+        gc.collect()
+        tracemalloc.start()
+        try:
+            tracemalloc.reset_peak()
+            fn()
+            peak_mib = tracemalloc.get_traced_memory()[1] / (1024 * 1024)
+        finally:
+            tracemalloc.stop()
+
+    return {"seconds": statistics.median(runs), "runs": runs, "peak_mib": peak_mib}
+
+
+def _git_commit(cwd: Path) -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=cwd, capture_output=True, text=True, timeout=10, check=True
+        ).stdout.strip() or None
+    except Exception:
+        return None
+
+
+def load_history(path: Path) -> List[Dict]:
+    """Load the list of recorded runs (oldest first)."""
+    path = Path(path)
+    if not path.exists():
+        return []
+    with open(path, 'r') as f:
+        data = json.load(f)
+    return data.get("runs", []) if isinstance(data, dict) else data
+
+
+def build_run(results: List[BenchmarkResult], label: Optional[str] = None) -> Dict:
+    """Build a history entry for a set of results."""
+    return {
+        "timestamp": datetime.now().isoformat(timespec="seconds"),
+        "label": label,
+        "git_commit": _git_commit(Path(__file__).parent),
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "results": {r.key: asdict(r) for r in results if not r.skipped},
+    }
+
+
+def append_history(path: Path, run: Dict) -> None:
+    """Append a run to the JSON history file."""
+    path = Path(path)
+    runs = load_history(path)
+    runs.append(run)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_suffix(path.suffix + ".tmp")
+    with open(tmp_path, 'w') as f:
+        json.dump({"runs": runs}, f, indent=2)
+    tmp_path.replace(path)
+
+
+def compare(current: Dict, baseline: Optional[Dict], time_threshold: float = 0.2,
+            memory_threshold: float = 0.25, min_seconds: float = 0.02,
+            min_mib: float = 1.0) -> List[Comparison]:
+    """
+    Compare a run against a baseline run.
+
+    A result regresses when it is slower than the baseline by more than
+    `time_threshold` (fraction) and `min_seconds`, or uses more peak memory
+    by more than `memory_threshold` and `min_mib`. The absolute floors stop
+    sub-millisecond stages from flapping on timer noise.
+    """
+    baseline_results = (baseline or {}).get("results", {})
+    comparisons = []
+    for key, result in current.get("results", {}).items():
+        base = baseline_results.get(key)
+        comparison = Comparison(
+            key=key,
+            seconds=result["seconds"],
+            baseline_seconds=base["seconds"] if base else None,
+            peak_mib=result.get("peak_mib"),
+            baseline_peak_mib=base.get("peak_mib") if base else None,
+        )
+        if base:
+            delta = comparison.seconds - comparison.baseline_seconds
+            comparison.time_regressed = (
+                delta > min_seconds and comparison.seconds > comparison.baseline_seconds * (1 + time_threshold)
+            )
+            if comparison.peak_mib is not None and comparison.baseline_peak_mib is not None:
+                mem_delta = comparison.peak_mib - comparison.baseline_peak_mib
+                comparison.memory_regressed = (
+                    mem_delta > min_mib
+                    and comparison.peak_mib > comparison.baseline_peak_mib * (1 + memory_threshold)
+                )
+        comparisons.append(comparison)
+    return comparisons
+
+
+def format_report(comparisons: List[Comparison]) -> str:
+    """Render comparisons as a fixed-width table."""
+    def pct(value, base):
+        if value is None or not base:
+            return "-"
+        return f"{(value / base - 1) * 100:+.1f}%"
+
+    def num(value, fmt):
+        return "-" if value is None else format(value, fmt)
+
+    lines = [
+        f"{'benchmark':<48} {'seconds':>10} {'baseline':>10} {'change':>8} {'peak MiB':>10} {'change':>8}  status",
+        "-" * 108,
+    ]
+    for c in comparisons:
+        status = "REGRESSED" if c.regressed else ("new" if c.baseline_seconds is None else "ok")
+        lines.append(
+            f"{c.key:<48} {num(c.seconds, '.4f'):>10} {num(c.baseline_seconds, '.4f'):>10} "
+            f"{pct(c.seconds, c.baseline_seconds):>8} {num(c.peak_mib, '.1f'):>10} "
+            f"{pct(c.peak_mib, c.baseline_peak_mib):>8}  {status}"
+        )
+    return "\n".join(lines)
@@ -0,0 +1,425 @@
+"""
+RVTools Pipeline Benchmarks
+Times every stage of the pipeline at several data scales, records time and
+peak memory to a JSON history file and fails when a stage regresses.
+
+Usage (from RVToolAnalysisWithCursorAI/):
+    python -m benchmarks.run_benchmarks --scales 1000,10000
+    python -m benchmarks.run_benchmarks --scales 1000 --only generate_pcmo_dashboard,export_to_excel
+    python -m benchmarks.run_benchmarks --compare-only          # compare the last two recorded runs
+"""
+
+import argparse
+import json
+import logging
+import shutil
+import sys
+import tempfile
+from dataclasses import replace
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+import matplotlib
+matplotlib.use("Agg")  # headless chart rendering
+import matplotlib.pyplot as plt
+import numpy as np
+import pandas as pd
+
+MODULE_ROOT = Path(__file__).resolve().parent.parent
+PROJECT_ROOT = MODULE_ROOT.parent
+if str(MODULE_ROOT) not in sys.path:
+    sys.path.insert(0, str(MODULE_ROOT))
+
+from src.core.config import AppConfig
+from src.core.data_processor import RVToolsDataProcessor
+from src.core.dashboard_generator import DashboardGenerator
+from src.core.consolidation import HostProfile, simulate_consolidation
+from src.core.rightsizing import recommend_sizes
+from src.core.sheets import default_plugins, plugins_for, read_workbook
+from src.core.snapshot_diff import diff_snapshots
+from src.core.snapshot_store import SnapshotStore
+from src.utils.workbook_generator import WorkbookSpec, write_workbooks
+from benchmarks.harness import (
+    BenchmarkResult, append_history, build_run, compare, format_report, load_history, measure
+)
+
+DEFAULT_HISTORY = Path(__file__).resolve().parent / "history.json"
+DEFAULT_SCALES = [1000, 10000]
+
+
+class ScaleContext:
+    """Synthetic workbooks and lazily consolidated frames for one data scale."""
+
+    def __init__(self, vms: int, workdir: Path, seed: int = 42, vcenters: int = 2):
+        self.vms = vms
+        self.config = AppConfig()
+        self.spec = WorkbookSpec(vms=vms, vcenters=vcenters, seed=seed)
+        self.root = Path(workdir) / f"vms_{vms}_seed{seed}"
+        self.input_dir = self.root / "inputs"
+        self.output_dir = self.root / "outputs"
+        self._processor: Optional[RVToolsDataProcessor] = None
+
+    def prepare(self) -> None:
+        if not self.input_dir.exists() or not any(self.input_dir.glob("*.xlsx")):
+            self.input_dir.mkdir(parents=True, exist_ok=True)
+            write_workbooks(self.spec, self.input_dir)
+        self.output_dir.mkdir(parents=True, exist_ok=True)
+
+    def input_variant(self, output_format: str, zip_output: bool = False) -> Path:
+        """The same estate as CSV exports and/or a zip archive, written on first use."""
+        path = self.root / f"inputs_{output_format}{'_zip' if zip_output else ''}"
+        if not path.exists():
+            path.mkdir(parents=True)
+            write_workbooks(replace(self.spec, output_format=output_format, zip_output=zip_output), path)
+        return path
+
+    @property
+    def workbooks(self) -> List[Path]:
+        return sorted(self.input_dir.glob("*.xlsx"))
+
+    @property
+    def processor(self) -> RVToolsDataProcessor:
+        """A processor that has already consolidated this scale's workbooks."""
+        if self._processor is None:
+            self._processor = RVToolsDataProcessor(self.config)
+            self._processor.process_folder(self.input_dir)
+        return self._processor
+
+    @property
+    def data(self) -> Dict[str, pd.DataFrame]:
+        return self.processor.get_consolidated_data()
+
+    def fresh_processor(self) -> RVToolsDataProcessor:
+        processor = RVToolsDataProcessor(self.config)
+        processor._initialize_consolidated_data()
+        return processor
+
+    def scratch_dir(self, name: str) -> Path:
+        path = self.output_dir / name
+        shutil.rmtree(path, ignore_errors=True)
+        path.mkdir(parents=True)
+        return path
+
+
+# name -> factory(ctx) returning the zero-argument callable to time
+BENCHMARKS: Dict[str, Callable[[ScaleContext], Callable[[], object]]] = {}
+
+
+def benchmark(name: str):
+    """Register a benchmark factory under `name`."""
+    def decorator(factory):
+        BENCHMARKS[name] = factory
+        return factory
+    return decorator
+
+
+class SkipBenchmark(Exception):
+    """Raised by a factory when its dependencies are unavailable."""
+
+
+# --- Ingestion -------------------------------------------------------------
+
+@benchmark("process_folder")
+def bench_process_folder(ctx: ScaleContext):
+    return lambda: RVToolsDataProcessor(ctx.config).process_folder(ctx.input_dir)
+
+
+def _variant_benchmark(output_format: str, zip_output: bool):
+    def factory(ctx: ScaleContext):
+        input_dir = ctx.input_variant(output_format, zip_output)
+        return lambda: RVToolsDataProcessor(ctx.config).process_folder(input_dir)
+    return factory
+
+
+benchmark("process_folder:csv")(_variant_benchmark("csv", False))
+benchmark("process_folder:csv_zip")(_variant_benchmark("csv", True))
+benchmark("process_folder:xlsx_zip")(_variant_benchmark("xlsx", True))
+
+
+def _sheet_benchmark(sheet: str):
+    def factory(ctx: ScaleContext):
+        workbook = ctx.workbooks[0]
+        plugins = [plugin for plugin in default_plugins(ctx.config) if plugin.sheet == sheet]
+        return lambda: read_workbook(workbook, plugins, ctx.config)
+    return factory
+
+
+@benchmark("read_workbook")
+def bench_read_workbook(ctx: ScaleContext):
+    plugins = plugins_for(ctx.config)
+    return lambda: read_workbook(ctx.workbooks[0], plugins, ctx.config)
+
+
+for _sheet in ("vInfo", "vHost", "vMetaData", "vDisk", "vPartition", "vDatastore", "vCluster"):
+    benchmark(f"read_sheet:{_sheet}")(_sheet_benchmark(_sheet))
+
+
+# --- Metrics and charts ----------------------------------------------------
+
+@benchmark("generate_pcmo_dashboard")
+def bench_generate_pcmo_dashboard(ctx: ScaleContext):
+    data = ctx.data
+    generator = DashboardGenerator(ctx.config)
+    return lambda: generator.generate_pcmo_dashboard(
+        data['vinfo'], data['vhost'], vdisk_data=data['vdisk'], vpartition_data=data['vpartition'],
+        vdatastore_data=data['vdatastore'], vcluster_data=data['vcluster']
+    )
+
+
+@benchmark("simulate_consolidation")
+def bench_simulate_consolidation(ctx: ScaleContext):
+    data = ctx.data
+    profiles = [HostProfile(**profile) for profile in ctx.config.consolidation_host_profiles]
+    return lambda: simulate_consolidation(data['vinfo'], profiles, vhost=data['vhost'])
+
+
+@benchmark("simulate_consolidation:raw_memory")
+def bench_simulate_consolidation_raw_memory(ctx: ScaleContext):
+    # Exports often carry odd MiB sizes (hot-add, reservations): roughly one
+    # distinct RAM value per VM before rounding to the packing granularity
+    data = ctx.data
+    rng = np.random.default_rng(ctx.spec.seed)
+    memory = pd.to_numeric(data['vinfo']['Memory'], errors='coerce')
+    vinfo = data['vinfo'].assign(Memory=(memory * rng.uniform(0.75, 1.25, len(memory))).round())
+    profiles = [HostProfile(**profile) for profile in ctx.config.consolidation_host_profiles]
+    return lambda: simulate_consolidation(
+        vinfo, profiles, vhost=data['vhost'],
+        memory_granularity_mib=ctx.config.consolidation_memory_granularity_mib
+    )
+
+
+@benchmark("recommend_sizes")
+def bench_recommend_sizes(ctx: ScaleContext):
+    data = ctx.data
+    return lambda: recommend_sizes(data['vinfo'], data['vhost'], data['vcpu'], data['vmemory'])
+
+
+@benchmark("save_snapshot")
+def bench_save_snapshot(ctx: ScaleContext):
+    data = ctx.data
+    store = SnapshotStore(ctx.scratch_dir("snapshots") / "snapshots.db")
+    # Same customer and extract date every repeat, so each run replaces the last
+    return lambda: store.save_snapshot("benchmark", data['vinfo'], data['vhost'], {}, metadata=data['metadata'])
+
+
+@benchmark("diff_snapshots")
+def bench_diff_snapshots(ctx: ScaleContext):
+    data = ctx.data
+    old = data['vinfo']
+    # A later extract: every 50th VM removed, every 20th resized
+    new = old.drop(index=old.index[::50]).copy()
+    new.loc[new.index[::20], 'CPUs'] = pd.to_numeric(new.loc[new.index[::20], 'CPUs'], errors='coerce') * 2
+    return lambda: diff_snapshots(old, new, data['vhost'], data['vhost'])
+
+
+def _chart_benchmark(method_name: str, uses_vinfo: bool, uses_vhost: bool, output_is_file: bool = False):
+    def factory(ctx: ScaleContext):
+        data = ctx.data
+        generator = DashboardGenerator(ctx.config)
+        args = ([data['vinfo']] if uses_vinfo else []) + ([data['vhost']] if uses_vhost else [])
+
+        def run():
+            out = ctx.scratch_dir(method_name)
+            getattr(generator, method_name)(*args, out / "chart.png" if output_is_file else out)
+            plt.close('all')
+        return run
+    return factory
+
+
+benchmark("create_host_heatmap")(_chart_benchmark("create_host_heatmap", False, True, output_is_file=True))
+benchmark("create_vm_distribution_charts")(_chart_benchmark("create_vm_distribution_charts", True, False))
+benchmark("create_resource_utilization_charts")(_chart_benchmark("create_resource_utilization_charts", False, True))
+benchmark("create_advanced_analysis_charts")(_chart_benchmark("create_advanced_analysis_charts", True, True))
+benchmark("create_correlation_analysis")(_chart_benchmark("create_correlation_analysis", True, True))
+benchmark("create_performance_heatmaps")(_chart_benchmark("create_performance_heatmaps", True, True))
+
+
+# --- Export and end-to-end -------------------------------------------------
+
+@benchmark("export_to_excel")
+def bench_export_to_excel(ctx: ScaleContext):
+    processor = ctx.processor
+    return lambda: processor.export_to_excel(ctx.scratch_dir("export") / "report.xlsx")
+
+
+@benchmark("process_rvtools_data")
+def bench_process_rvtools_data(ctx: ScaleContext):
+    from rvtool_processor import process_rvtools_data
+
+    def run():
+        result = process_rvtools_data(
+            str(ctx.input_dir), str(ctx.scratch_dir("end_to_end")), log_level=logging.WARNING
+        )
+        if result.get("status") != "success":
+            raise RuntimeError(result.get("message"))
+        plt.close('all')
+    return run
+
+
+@benchmark("http_process_endpoint")
+def bench_http_process_endpoint(ctx: ScaleContext):
+    api_dir = PROJECT_ROOT / "api"
+    if str(api_dir) not in sys.path:
+        sys.path.insert(0, str(api_dir))
+    try:
+        from fastapi.testclient import TestClient
+        from rvtools.process import app
+    except ImportError as e:
+        raise SkipBenchmark(f"API dependencies unavailable: {e}")
+
+    client = TestClient(app)
+    workbook = ctx.workbooks[0]
+    payload = workbook.read_bytes()
+
+    def run():
+        response = client.post(
+            "/api/rvtools/process",
+            files={"file": (workbook.name, payload,
+                            "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet")},
+        )
+        if response.status_code != 200:
+            raise RuntimeError(f"HTTP {response.status_code}: {response.text[:200]}")
+        plt.close('all')
+    return run
+
+
+# --- API responses ---------------------------------------------------------
+
+def _api_responses():
+    api_dir = PROJECT_ROOT / "api"
+    if str(api_dir) not in sys.path:
+        sys.path.insert(0, str(api_dir))
+    try:
+        from rvtools import responses
+    except ImportError as e:
+        raise SkipBenchmark(f"API dependencies unavailable: {e}")
+    return responses
+
+
+def _response_benchmark(layout: str, encoding: Optional[str] = None):
+    """Encode the consolidated vInfo table (one row per VM) as an API response body."""
+    def factory(ctx: ScaleContext):
+        responses = _api_responses()
+        frame = ctx.data['vinfo']
+        if layout == "arrow" and not responses.ARROW_AVAILABLE:
+            raise SkipBenchmark("pyarrow is not installed")
+        if encoding == "br" and responses.brotli is None:
+            raise SkipBenchmark("brotli is not installed")
+
+        def encode() -> bytes:
+            if layout == "stdlib_records":
+                # Row dicts through the standard library encoder (what JSONResponse does)
+                rows = frame.astype(object).where(frame.notna(), None).to_dict(orient="records")
+                return json.dumps({"rows": rows}, ensure_ascii=False, allow_nan=False,
+                                  separators=(",", ":")).encode("utf-8")
+            if layout == "records":
+                return responses.json_with_raw({"rows": responses.table_records(frame)})
+            if layout == "columns":
+                return responses.dumps(responses.table_columns(frame))
+            return responses.arrow_stream(frame)
+
+        if encoding is None:
+            return encode
+        return lambda: responses.compress(encode(), encoding)
+    return factory
+
+
+benchmark("api_response:stdlib_records")(_response_benchmark("stdlib_records"))
+benchmark("api_response:records")(_response_benchmark("records"))
+benchmark("api_response:columns")(_response_benchmark("columns"))
+benchmark("api_response:columns_gzip")(_response_benchmark("columns", "gzip"))
+benchmark("api_response:columns_br")(_response_benchmark("columns", "br"))
+benchmark("api_response:arrow")(_response_benchmark("arrow"))
+
+
+def run_suite(scales: List[int], names: List[str], repeats: int, workdir: Path,
+              track_memory: bool = True, seed: int = 42) -> List[BenchmarkResult]:
+    """Run the selected benchmarks at every scale."""
+    logger = logging.getLogger(__name__)
+    results = []
+    for scale in scales:
+        ctx = ScaleContext(scale, workdir, seed=seed)
+        ctx.prepare()
+        for name in names:
+            try:
+                fn = BENCHMARKS[name](ctx)
+            except SkipBenchmark as e:
+                logger.warning(f"Skipping {name}[{scale}]: {e}")
+                results.append(BenchmarkResult(name=name, scale=scale, seconds=0.0, skipped=str(e)))
+                continue
+            measured = measure(fn, repeats=repeats, track_memory=track_memory)
+            result = BenchmarkResult(
+                name=name, scale=scale, seconds=measured["seconds"],
+                peak_mib=measured["peak_mib"], repeats=repeats, runs=measured["runs"],
+            )
+            print(f"  {result.key:<48} {result.seconds:10.4f}s"
+                  + (f" {result.peak_mib:10.1f} MiB" if result.peak_mib is not None else ""), flush=True)
+            results.append(result)
+    return results
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark the RVTools processing pipeline")
+    parser.add_argument("--scales", default=",".join(str(s) for s in DEFAULT_SCALES),
+                        help="Comma-separated VM counts (default: 1000,10000)")
+    parser.add_argument("--only", default=None, help="Comma-separated benchmark names to run")
+    parser.add_argument("--repeats", type=int, default=3, help="Timed repeats per benchmark (default: 3)")
+    parser.add_argument("--no-memory", action="store_true", help="Skip the tracemalloc peak-memory run")
+    parser.add_argument("--history", default=str(DEFAULT_HISTORY), help="JSON history file")
+    parser.add_argument("--label", default=None, help="Label stored with this run")
+    parser.add_argument("--no-record", action="store_true", help="Do not append this run to the history")
+    parser.add_argument("--compare-only", action="store_true",
+                        help="Compare the last two recorded runs without running anything")
+    parser.add_argument("--threshold", type=float, default=0.2,
+                        help="Allowed slowdown before failing, as a fraction (default: 0.2)")
+    parser.add_argument("--memory-threshold", type=float, default=0.25,
+                        help="Allowed peak-memory growth before failing, as a fraction (default: 0.25)")
+    parser.add_argument("--workdir", default=None,
+                        help="Directory for generated workbooks (default: a cached temp directory)")
+    parser.add_argument("--seed", type=int, default=42, help="Workbook generator seed (default: 42)")
+    parser.add_argument("--list", action="store_true", help="List benchmark names and exit")
+    args = parser.parse_args(argv)
+
+    if args.list:
+        print("\n".join(BENCHMARKS))
+        return 0
+
+    logging.basicConfig(level=logging.WARNING, format='%(levelname)s - %(message)s')
+    history_path = Path(args.history)
+    history = load_history(history_path)
+
+    if args.compare_only:
+        if len(history) < 2:
+            print("Need at least two recorded runs to compare")
+            return 0
+        current, baseline = history[-1], history[-2]
+    else:
+        names = [n.strip() for n in args.only.split(",")] if args.only else list(BENCHMARKS)
+        unknown = [n for n in names if n not in BENCHMARKS]
+        if unknown:
+            parser.error(f"Unknown benchmarks: {', '.join(unknown)} (see --list)")
+        scales = [int(s) for s in args.scales.split(",") if s.strip()]
+        workdir = Path(args.workdir) if args.workdir else Path(tempfile.gettempdir()) / "rvtools_benchmarks"
+
+        print(f"Running {len(names)} benchmarks at scales {scales} (repeats={args.repeats})")
+        results = run_suite(scales, names, args.repeats, workdir,
+                            track_memory=not args.no_memory, seed=args.seed)
+        current = build_run(results, label=args.label)
+        baseline = history[-1] if history else None
+        if not args.no_record:
+            append_history(history_path, current)
+
+    comparisons = compare(current, baseline, time_threshold=args.threshold,
+                          memory_threshold=args.memory_threshold)
+    print()
+    print(format_report(comparisons))
+
+    regressions = [c for c in comparisons if c.regressed]
+    if regressions:
+        print(f"\n{len(regressions)} benchmark(s) regressed beyond the threshold")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
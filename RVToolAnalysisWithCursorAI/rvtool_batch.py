@@ -0,0 +1,332 @@
+"""
+RV Tool Analysis - Batch Processing
+
+Runs process_rvtools_data over many customer folders from one long-lived
+process. Workers are forked after pandas, openpyxl and matplotlib are
+imported, so each customer pays only for its own data, not for interpreter
+and import startup.
+
+Usage:
+    python rvtool_batch.py customers/ --output-root outputs/batch
+    python rvtool_batch.py --manifest nightly.json --workers 8
+    python rvtool_batch.py customers/ --output-root outputs/batch --force
+    python rvtool_batch.py customers/ --snapshot-db outputs/snapshots.db
+
+A manifest is a JSON list (or {"customers": [...]}) of objects with "name",
+"input_dir" and an optional "output_dir"; relative paths are resolved
+against the manifest's directory.
+
+Progress is written to <output-root>/batch_index.json after every customer.
+Re-running the same command skips customers whose inputs are unchanged since
+their last successful run, so an interrupted batch resumes where it stopped.
+"""
+
+import argparse
+import hashlib
+import json
+import logging
+import multiprocessing
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from src.core.config import AppConfig
+from src.core.sources import discover_sources
+
+INDEX_FILENAME = "batch_index.json"
+
+
+def _warm_imports():
+    """Import the heavy pipeline dependencies once per process."""
+    import matplotlib
+    matplotlib.use("Agg")  # workers have no display
+    import matplotlib.pyplot  # noqa: F401
+    import openpyxl  # noqa: F401
+    import pandas  # noqa: F401
+    import rvtool_processor  # noqa: F401
+
+
+def _init_worker(log_level: int):
+    """Pool initializer: configure logging once and warm imports (no-op after fork)."""
+    logging.basicConfig(level=log_level, format='%(asctime)s - %(process)d - %(name)s - %(levelname)s - %(message)s')
+    _warm_imports()
+
+
+def input_fingerprint(input_dir: Path, extensions: List[str]) -> str:
+    """Hash of the input file names, sizes and modification times in a folder."""
+    digest = hashlib.sha256()
+    files = sorted(p for ext in extensions for p in Path(input_dir).glob(f"*{ext}"))
+    if '.csv' in extensions:    # CSV exports one folder down (see src/core/sources.py)
+        files += sorted(Path(input_dir).glob("*/*.csv"))
+    for path in files:
+        stat = path.stat()
+        name = path.relative_to(input_dir).as_posix()
+        digest.update(f"{name}\0{stat.st_size}\0{stat.st_mtime_ns}\n".encode())
+    return digest.hexdigest()
+
+
+def discover_customers(parent_dir: Path, output_root: Path, extensions: List[str]) -> List[Dict[str, str]]:
+    """
+    One job per subdirectory of `parent_dir` with at least one extract, as
+    found by discover_sources (CSV exports may sit one folder further down).
+    """
+    jobs = []
+    for folder in sorted(p for p in Path(parent_dir).iterdir() if p.is_dir()):
+        if discover_sources(folder, extensions):
+            jobs.append({
+                "name": folder.name,
+                "input_dir": str(folder.resolve()),
+                "output_dir": str((output_root / folder.name).resolve()),
+            })
+    return jobs
+
+
+def load_job_manifest(manifest_path: Path, output_root: Path) -> List[Dict[str, str]]:
+    """Read customer jobs from a JSON manifest."""
+    manifest_path = Path(manifest_path)
+    with open(manifest_path, 'r') as f:
+        data = json.load(f)
+    entries = data.get("customers", []) if isinstance(data, dict) else data
+
+    base = manifest_path.parent
+    jobs = []
+    seen = set()
+    for entry in entries:
+        if "input_dir" not in entry:
+            raise ValueError(f"Manifest entry is missing 'input_dir': {entry}")
+        input_dir = (base / entry["input_dir"]).resolve()
+        name = entry.get("name") or input_dir.name
+        if name in seen:
+            raise ValueError(f"Duplicate customer name in manifest: {name}")
+        seen.add(name)
+        output_dir = (base / entry["output_dir"]).resolve() if entry.get("output_dir") else (output_root / name).resolve()
+        jobs.append({"name": name, "input_dir": str(input_dir), "output_dir": str(output_dir)})
+    return jobs
+
+
+def load_index(index_path: Path) -> Dict[str, Any]:
+    """Load a previous batch index, or an empty one."""
+    if Path(index_path).exists():
+        with open(index_path, 'r') as f:
+            return json.load(f)
+    return {"customers": {}}
+
+
+def save_index(index_path: Path, index: Dict[str, Any]) -> None:
+    """Write the index atomically so an interrupted batch never leaves it truncated."""
+    index_path = Path(index_path)
+    index_path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = index_path.with_suffix(index_path.suffix + ".tmp")
+    with open(tmp_path, 'w') as f:
+        json.dump(index, f, indent=2)
+    tmp_path.replace(index_path)
+
+
+def process_customer(job: Dict[str, str], profile: bool = False, snapshot_db: Optional[str] = None) -> Dict[str, Any]:
+    """Run the pipeline for one customer and return its index entry."""
+    from rvtool_processor import process_rvtools_data
+
+    start = time.perf_counter()
+    try:
+        result = process_rvtools_data(
+            job["input_dir"],
+            job["output_dir"],
+            log_level=logging.getLogger().level,
+            profile=profile,
+            setup_logging=False,
+            snapshot_db=snapshot_db,
+            customer=job["name"]
+        )
+    except Exception as e:  # process_rvtools_data reports its own failures; this guards the worker
+        result = {"status": "error", "message": f"Worker failed: {str(e)}"}
+
+    entry = {
+        "name": job["name"],
+        "input_dir": job["input_dir"],
+        "output_dir": job["output_dir"],
+        "fingerprint": job.get("fingerprint"),
+        "status": result.get("status", "error"),
+        "completed_at": datetime.now().isoformat(),
+        "wall_seconds": round(time.perf_counter() - start, 4),
+        "worker_pid": os.getpid(),
+        "stage_timings": result.get("stage_timings", {}),
+    }
+    if entry["status"] == "success":
+        entry.update({
+            "manifest_path": str(Path(job["output_dir"]) / "rvtool_manifest.json"),
+            "files_processed": result.get("files_processed", 0),
+            "vms_processed": result.get("vms_processed", 0),
+            "hosts_processed": result.get("hosts_processed", 0),
+            "errors": result.get("errors", []),
+            "metrics": result.get("metrics", {}),
+        })
+        if "snapshot" in result:
+            entry["snapshot_id"] = result["snapshot"]["snapshot_id"]
+        if "profile" in result:
+            entry["profile_directory"] = result["profile"].get("directory")
+    else:
+        entry["message"] = result.get("message", "Unknown error")
+        entry["errors"] = result.get("errors", [])
+    return entry
+
+
+def _summarize(index: Dict[str, Any]) -> Dict[str, Any]:
+    customers = index["customers"].values()
+    succeeded = [c for c in customers if c["status"] == "success"]
+    stage_totals: Dict[str, float] = {}
+    for customer in succeeded:
+        for stage, seconds in customer.get("stage_timings", {}).items():
+            stage_totals[stage] = round(stage_totals.get(stage, 0.0) + seconds, 4)
+    return {
+        "customers": len(index["customers"]),
+        "succeeded": len(succeeded),
+        "failed": len(index["customers"]) - len(succeeded),
+        "vms_processed": sum(c.get("vms_processed", 0) for c in succeeded),
+        "hosts_processed": sum(c.get("hosts_processed", 0) for c in succeeded),
+        "stage_seconds": stage_totals,
+    }
+
+
+def run_batch(jobs: List[Dict[str, str]], output_root: Path, workers: Optional[int] = None,
+              force: bool = False, profile: bool = False, log_level: int = logging.WARNING,
+              snapshot_db: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Process customer jobs concurrently and maintain the combined batch index.
+
+    Args:
+        jobs: Dicts with "name", "input_dir" and "output_dir"
+        output_root: Directory holding batch_index.json
+        workers: Worker processes (default: CPU count, capped at the job count)
+        force: Reprocess customers even if their inputs are unchanged
+        profile: Profile every customer (artifacts in <output_dir>/profile)
+        log_level: Logging level for the workers
+        snapshot_db: SQLite snapshot store each customer's run is recorded in
+
+    Returns:
+        dict: The batch index
+    """
+    logger = logging.getLogger(__name__)
+    config = AppConfig()
+    index_path = Path(output_root) / INDEX_FILENAME
+    index = load_index(index_path)
+    previous = index.get("customers", {})
+    index["customers"] = {name: entry for name, entry in previous.items()
+                          if name in {job["name"] for job in jobs}}
+
+    pending = []
+    skipped = 0
+    for job in jobs:
+        job = dict(job, fingerprint=input_fingerprint(Path(job["input_dir"]), config.supported_file_extensions))
+        done = index["customers"].get(job["name"])
+        if (not force and done and done.get("status") == "success"
+                and done.get("fingerprint") == job["fingerprint"]
+                and Path(done.get("manifest_path", "")).exists()):
+            skipped += 1
+            continue
+        pending.append(job)
+
+    workers = max(1, min(workers or os.cpu_count() or 1, len(pending) or 1))
+    logger.info(f"{len(pending)} customers to process, {skipped} unchanged since the last run, {workers} workers")
+    print(f"Processing {len(pending)} customers with {workers} workers ({skipped} up to date)", flush=True)
+
+    batch_start = time.perf_counter()
+    index["batch"] = {"started_at": datetime.now().isoformat(), "workers": workers, "status": "running"}
+    save_index(index_path, index)
+
+    def record(entry: Dict[str, Any]):
+        index["customers"][entry["name"]] = entry
+        save_index(index_path, index)
+        marker = "ok" if entry["status"] == "success" else "FAILED"
+        print(f"  {entry['name']:<40} {marker:<6} {entry['wall_seconds']:8.2f}s", flush=True)
+
+    try:
+        if workers == 1:
+            _init_worker(log_level)
+            for job in pending:
+                record(process_customer(job, profile, snapshot_db))
+        else:
+            # Fork inherits the parent's warmed imports; spawn re-imports once per worker
+            method = "fork" if "fork" in multiprocessing.get_all_start_methods() else "spawn"
+            if method == "fork":
+                _warm_imports()
+            context = multiprocessing.get_context(method)
+            with ProcessPoolExecutor(max_workers=workers, mp_context=context,
+                                     initializer=_init_worker, initargs=(log_level,)) as executor:
+                futures = {executor.submit(process_customer, job, profile, snapshot_db): job for job in pending}
+                try:
+                    for future in as_completed(futures):
+                        record(future.result())
+                except KeyboardInterrupt:
+                    for future in futures:
+                        future.cancel()
+                    raise
+        index["batch"]["status"] = "complete"
+    except KeyboardInterrupt:
+        index["batch"]["status"] = "interrupted"
+        raise
+    finally:
+        index["batch"].update({
+            "finished_at": datetime.now().isoformat(),
+            "wall_seconds": round(time.perf_counter() - batch_start, 4),
+            "processed": len(pending),
+            "skipped_unchanged": skipped,
+            **_summarize(index),
+        })
+        save_index(index_path, index)
+
+    return index
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Process many RVTools customer folders in one run")
+    parser.add_argument("parent_dir", nargs="?", help="Directory whose subdirectories are customer folders")
+    parser.add_argument("--manifest", help="JSON manifest of customer folders (instead of parent_dir)")
+    parser.add_argument("--output-root", default="outputs/batch",
+                        help="Root for per-customer outputs and batch_index.json (default: outputs/batch)")
+    parser.add_argument("--workers", type=int, default=None, help="Worker processes (default: CPU count)")
+    parser.add_argument("--force", action="store_true", help="Reprocess customers whose inputs are unchanged")
+    parser.add_argument("--profile", action="store_true", help="Profile each customer run")
+    parser.add_argument("--snapshot-db", help="SQLite snapshot store to record every customer's run in")
+    parser.add_argument("--log-level", default="WARNING", help="Worker log level (default: WARNING)")
+    args = parser.parse_args(argv)
+
+    if bool(args.parent_dir) == bool(args.manifest):
+        parser.error("Provide either parent_dir or --manifest")
+
+    output_root = Path(args.output_root).resolve()
+    config = AppConfig()
+    if args.manifest:
+        jobs = load_job_manifest(Path(args.manifest), output_root)
+    else:
+        parent = Path(args.parent_dir)
+        if not parent.is_dir():
+            parser.error(f"Input directory does not exist: {parent}")
+        jobs = discover_customers(parent, output_root, config.supported_file_extensions)
+
+    if not jobs:
+        print("No customer folders found")
+        return 1
+
+    log_level = getattr(logging, args.log_level.upper(), logging.WARNING)
+    logging.basicConfig(level=log_level, format='%(levelname)s - %(message)s')
+    try:
+        index = run_batch(jobs, output_root, workers=args.workers, force=args.force,
+                          profile=args.profile, log_level=log_level,
+                          snapshot_db=str(Path(args.snapshot_db).resolve()) if args.snapshot_db else None)
+    except KeyboardInterrupt:
+        print(f"\nInterrupted. Completed customers are recorded in {output_root / INDEX_FILENAME}; "
+              f"re-run the same command to resume.")
+        return 130
+
+    batch = index["batch"]
+    print(f"\n{batch['succeeded']}/{batch['customers']} customers succeeded in {batch['wall_seconds']:.1f}s")
+    print(f"Index: {output_root / INDEX_FILENAME}")
+    return 0 if batch["failed"] == 0 else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,135 @@
+"""
+RV Tool Analysis - Snapshot Diff
+
+Compares two RVTools extracts of the same estate and reports the VMs that
+were added, removed, resized, powered on/off or moved between hosts,
+clusters and vCenters, plus host changes and per-cluster deltas.
+
+Usage:
+    python rvtool_diff.py inputs/2025-Q1 inputs/2025-Q2 --output outputs/diff
+    python rvtool_diff.py --snapshot-db snapshots.db --customer acme
+    python rvtool_diff.py --snapshot-db snapshots.db --customer acme --from 3 --to 7
+
+With --snapshot-db the diff is computed from stored snapshots (see
+src.core.snapshot_store), by default the customer's two latest extracts,
+without re-reading any workbook.
+
+Writes vm_changes.csv, host_changes.csv, cluster_deltas.csv and
+diff_summary.json to the output directory.
+"""
+
+import argparse
+import json
+import logging
+import sys
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+from src.core.config import AppConfig
+from src.core.data_processor import RVToolsDataProcessor
+from src.core.snapshot_diff import SnapshotDiff, diff_snapshots
+from src.core.snapshot_store import SnapshotStore
+
+
+def load_inputs(input_dir) -> Dict[str, Any]:
+    """Consolidated frames for a folder of RVTools workbooks."""
+    processor = RVToolsDataProcessor(AppConfig())
+    result = processor.process_folder(Path(input_dir))
+    if not result.success:
+        raise ValueError(f"{input_dir}: {result.message}")
+    if result.files_processed == 0:
+        raise ValueError(f"{input_dir}: no workbook could be read ({'; '.join(result.errors)})")
+    return processor.get_consolidated_data()
+
+
+def diff_inputs(old_dir, new_dir) -> SnapshotDiff:
+    """Diff two folders of RVTools workbooks."""
+    old, new = load_inputs(old_dir), load_inputs(new_dir)
+    return diff_snapshots(old['vinfo'], new['vinfo'], old['vhost'], new['vhost'])
+
+
+def diff_stored(store: SnapshotStore, customer: str, from_id: Optional[int] = None,
+                to_id: Optional[int] = None) -> Dict[str, Any]:
+    """
+    Diff two stored snapshots of a customer (default: the two latest extracts).
+
+    Returns:
+        dict: "from" and "to" snapshot summaries and the SnapshotDiff as "diff"
+    """
+    snapshots = {s["snapshot_id"]: s for s in store.list_snapshots(customer)}
+    if from_id is None or to_id is None:
+        ordered = list(snapshots)
+        if len(ordered) < 2:
+            raise ValueError(f"Customer '{customer}' has fewer than two snapshots")
+        from_id = ordered[-2] if from_id is None else from_id
+        to_id = ordered[-1] if to_id is None else to_id
+    for snapshot_id in (from_id, to_id):
+        if snapshot_id not in snapshots:
+            raise ValueError(f"Snapshot {snapshot_id} does not belong to customer '{customer}'")
+    old, new = store.load_consolidated(from_id), store.load_consolidated(to_id)
+    diff = diff_snapshots(old['vinfo'], new['vinfo'], old['vhost'], new['vhost'])
+    return {"from": snapshots[from_id], "to": snapshots[to_id], "diff": diff}
+
+
+def write_diff(diff: SnapshotDiff, output_dir) -> Dict[str, str]:
+    """Write the change sets and summary; returns the file paths."""
+    output_dir = Path(output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+    files = {
+        "vm_changes": output_dir / "vm_changes.csv",
+        "host_changes": output_dir / "host_changes.csv",
+        "cluster_deltas": output_dir / "cluster_deltas.csv",
+        "summary": output_dir / "diff_summary.json",
+    }
+    diff.vms.to_csv(files["vm_changes"], index=False)
+    diff.hosts.to_csv(files["host_changes"], index=False)
+    diff.clusters.to_csv(files["cluster_deltas"], index=False)
+    with open(files["summary"], 'w') as f:
+        json.dump(diff.summary, f, indent=2)
+    return {name: str(path.absolute()) for name, path in files.items()}
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Diff two RVTools extracts of the same estate")
+    parser.add_argument("old_dir", nargs="?", help="Folder with the earlier extract")
+    parser.add_argument("new_dir", nargs="?", help="Folder with the later extract")
+    parser.add_argument("--snapshot-db", help="Diff stored snapshots instead of workbook folders")
+    parser.add_argument("--customer", help="Customer whose snapshots to diff (with --snapshot-db)")
+    parser.add_argument("--from", dest="from_id", type=int, help="Earlier snapshot id (default: second latest)")
+    parser.add_argument("--to", dest="to_id", type=int, help="Later snapshot id (default: latest)")
+    parser.add_argument("--output", default="outputs/diff", help="Directory for the change sets (default: outputs/diff)")
+    parser.add_argument("--log-level", default="WARNING", help="Log level (default: WARNING)")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=getattr(logging, args.log_level.upper(), logging.WARNING),
+                        format='%(levelname)s - %(message)s')
+    try:
+        if args.snapshot_db:
+            if not args.customer:
+                parser.error("--customer is required with --snapshot-db")
+            stored = diff_stored(SnapshotStore(args.snapshot_db), args.customer, args.from_id, args.to_id)
+            diff = stored["diff"]
+            print(f"{args.customer}: {stored['from']['extract_date']} -> {stored['to']['extract_date']}")
+        elif args.old_dir and args.new_dir:
+            diff = diff_inputs(args.old_dir, args.new_dir)
+        else:
+            parser.error("Provide old_dir and new_dir, or --snapshot-db and --customer")
+    except ValueError as e:
+        print(f"❌ {e}")
+        return 1
+
+    files = write_diff(diff, args.output)
+    summary = diff.summary
+    print(f"VMs: {summary['old_vms']} -> {summary['new_vms']} ({summary['matched_vms']} matched, "
+          f"{summary['unchanged_vms']} unchanged)")
+    for category, count in summary["vms"].items():
+        print(f"   {category:<15} {count:>8}")
+    print("Hosts: " + ", ".join(f"{category} {count}" for category, count in summary["hosts"].items()))
+    for metric, delta in summary["delta"].items():
+        print(f"   {metric:<15} {delta['old']:>12,.0f} -> {delta['new']:>12,.0f}  ({delta['delta']:+,.0f})")
+    print(f"Change sets written to: {Path(files['vm_changes']).parent}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
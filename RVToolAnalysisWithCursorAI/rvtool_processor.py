@@ -11,21 +11,54 @@ Usage:
 """
 
 import json
+import time
+from contextlib import contextmanager
 from datetime import datetime
 from pathlib import Path
-from typing import Dict, Optional, Any
+from typing import Any, Callable, Dict, Optional
 import logging
 
+import pandas as pd
+
 from src.core.data_processor import RVToolsDataProcessor
 from src.core.dashboard_generator import DashboardGenerator
+from src.core.consolidation import HostProfile, simulate_consolidation
+from src.core.rightsizing import RightsizingPolicy, apply_recommendations, recommend_sizes, update_dashboard_metrics
+from src.core.snapshot_store import SnapshotStore
 from src.core.config import AppConfig
 from src.utils.logger import setup_logger
+from src.utils.profiling import PROFILE_MODES, ProfileSession
+from src.utils.progress import ProgressReporter
+
+
+@contextmanager
+def _timed_stage(stage_timings: Dict[str, float], stage: str, progress: Optional[ProgressReporter] = None):
+    """Record the wall-clock duration of a pipeline stage in seconds (and report its start and end)."""
+    if progress is not None:
+        progress.start_stage(stage)
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        stage_timings[stage] = stage_timings.get(stage, 0.0) + (time.perf_counter() - start)
+        if progress is not None:
+            progress.end_stage()
 
 
 def process_rvtools_data(
     input_dir: str,
     output_dir: str,
-    log_level: int = logging.INFO
+    log_level: int = logging.INFO,
+    profile: bool = False,
+    profile_mode: str = "deterministic",
+    profile_top_n: int = 20,
+    setup_logging: bool = True,
+    snapshot_db: Optional[str] = None,
+    customer: Optional[str] = None,
+    ingest_workers: Optional[int] = None,
+    progress_callback: Optional[Callable[[Dict[str, Any]], None]] = None,
+    progress_interval: float = 0.5,
+    data_callback: Optional[Callable[[Dict[str, Optional[pd.DataFrame]]], None]] = None
 ) -> Dict[str, Any]:
     """
     Process RVTools data and generate outputs.
@@ -38,16 +71,41 @@ def process_rvtools_data(
         input_dir: Path to directory containing RVTools Excel files
         output_dir: Path to output directory (will be created if it doesn't exist)
         log_level: Logging level (default: logging.INFO)
+        profile: Profile CPU and allocations and write the artifacts to
+            <output_dir>/profile (default: False)
+        profile_mode: "deterministic" (cProfile) or "sampling" (stack sampler)
+        profile_top_n: Number of hotspots kept in the summary
+        setup_logging: Configure root logging for this call; batch workers
+            configure logging once and pass False
+        snapshot_db: SQLite snapshot store to record this run in (see
+            src.core.snapshot_store); not recorded when None
+        customer: Customer the snapshot is stored under (default: the
+            input folder's name)
+        ingest_workers: Worker processes parsing the extracts concurrently
+            (default: AppConfig.ingest_workers; 0 = one per CPU)
+        progress_callback: Called with progress events (stage, percent,
+            rows, rows_per_second, ...; see src.utils.progress), at most
+            once per progress_interval seconds within a stage
+        progress_interval: Minimum seconds between progress events
+        data_callback: Called with the consolidated frames (vinfo, vhost,
+            ...; see RVToolsDataProcessor.get_consolidated_data) once ingest
+            succeeds, e.g. to keep them for follow-up queries
         
     Returns:
         dict: Processing results containing:
             - status: "success" or "error"
             - processing_date: ISO format timestamp
             - files_processed: Number of files processed
+            - files: Per-file status, VM/host/sheet row counts, parse seconds
+              and error
             - vms_processed: Number of VMs processed
             - hosts_processed: Number of hosts processed
+            - duplicates: Cross-file duplicate VMs/hosts and the policy applied
             - metrics: Dictionary of calculated metrics
             - output_files: Dictionary of generated output file paths
+            - stage_timings: Seconds spent in each pipeline stage
+            - profile: Hotspot summary and artifact paths when profile=True
+            - snapshot: Stored snapshot summary when snapshot_db is set
             - message: Error message if status is "error"
     
     Example:
@@ -57,8 +115,11 @@ def process_rvtools_data(
         ...     print(f"Metrics: {result['metrics']}")
     """
     # Setup logging
-    setup_logger(log_level=log_level, log_to_file=True)
+    if setup_logging:
+        setup_logger(log_level=log_level, log_to_file=True)
     logger = logging.getLogger(__name__)
+    stage_timings: Dict[str, float] = {}
+    progress = ProgressReporter(progress_callback, progress_interval) if progress_callback else None
     
     try:
         logger.info("Starting RVTools data processing (programmatic mode)")
@@ -77,94 +138,20 @@ def process_rvtools_data(
         
         # Create output directory if it doesn't exist
         output_path.mkdir(parents=True, exist_ok=True)
-        charts_dir = output_path / "charts"
-        charts_dir.mkdir(exist_ok=True)
-        
-        # Initialize components
-        config = AppConfig()
-        processor = RVToolsDataProcessor(config)
-        
-        # Process files
-        logger.info(f"Processing files from: {input_path}")
-        result = processor.process_folder(input_path)
-        
-        if not result.success:
-            return {
-                "status": "error",
-                "message": result.message,
-                "processing_date": datetime.now().isoformat(),
-                "errors": result.errors
-            }
-        
-        # Get consolidated data
-        data = processor.get_consolidated_data()
-        
-        # Generate metrics
-        logger.info("Generating PCMO dashboard metrics")
-        dashboard_gen = DashboardGenerator(config)
-        metrics = dashboard_gen.generate_pcmo_dashboard(
-            data['vinfo'],
-            data['vhost']
-        )
-        
-        # Export to Excel
-        excel_path = output_path / "RVTools_Consolidated_Report.xlsx"
-        logger.info(f"Exporting consolidated data to: {excel_path}")
-        export_success = processor.export_to_excel(excel_path)
-        
-        if not export_success:
-            return {
-                "status": "error",
-                "message": "Failed to export consolidated data to Excel",
-                "processing_date": datetime.now().isoformat()
-            }
         
-        # Generate summary report
-        summary_path = output_path / "summary_report.txt"
-        logger.info(f"Generating summary report: {summary_path}")
-        dashboard_gen.generate_summary_report(metrics, summary_path)
+        if profile:
+            profile_dir = output_path / "profile"
+            logger.info(f"Profiling enabled ({profile_mode}), writing to: {profile_dir}")
+            with ProfileSession(profile_dir, mode=profile_mode, top_n=profile_top_n) as session:
+                manifest = _run_pipeline(input_path, output_path, stage_timings, snapshot_db, customer,
+                                         ingest_workers, progress, data_callback)
+            manifest["profile"] = session.summary()
+        else:
+            manifest = _run_pipeline(input_path, output_path, stage_timings, snapshot_db, customer,
+                                     ingest_workers, progress, data_callback)
         
-        # Generate charts
-        logger.info(f"Generating charts in: {charts_dir}")
-        dashboard_gen.create_vm_distribution_charts(data['vinfo'], charts_dir)
-        dashboard_gen.create_resource_utilization_charts(data['vhost'], charts_dir)
-        dashboard_gen.create_advanced_analysis_charts(data['vinfo'], data['vhost'], charts_dir)
-        dashboard_gen.create_correlation_analysis(data['vinfo'], data['vhost'], charts_dir)
-        dashboard_gen.create_performance_heatmaps(data['vinfo'], data['vhost'], charts_dir)
-        
-        # Create JSON manifest for Cursor AI
-        manifest = {
-            "processing_date": datetime.now().isoformat(),
-            "files_processed": result.files_processed,
-            "vms_processed": result.vms_processed,
-            "hosts_processed": result.hosts_processed,
-            "errors": result.errors if result.errors else [],
-            "metrics": {
-                "total_powered_on_vms": int(metrics.total_powered_on_vms),
-                "total_vms_all": int(metrics.total_vms_all),
-                "total_hosts": int(metrics.total_hosts),
-                "total_physical_cores": float(metrics.total_physical_cores),
-                "avg_cores_per_host": float(metrics.avg_cores_per_host),
-                "avg_sockets_per_host": float(metrics.avg_sockets_per_host),
-                "avg_ram_gb_per_host": float(metrics.avg_ram_gb_per_host),
-                "total_vcpus": int(metrics.total_vcpus),
-                "avg_vcpus_per_vm": float(metrics.avg_vcpus_per_vm),
-                "avg_ram_gb_per_vm": float(metrics.avg_ram_gb_per_vm),
-                "avg_provisioned_gb_per_vm": float(metrics.avg_provisioned_gb_per_vm),
-                "total_ram_gb_vms": float(metrics.total_ram_gb_vms),
-                "total_provisioned_gb": float(metrics.total_provisioned_gb),
-                "total_host_ram_gb": float(metrics.total_host_ram_gb),
-                "vcpu_to_pcore_ratio": float(metrics.vcpu_to_pcore_ratio),
-                "avg_cpu_utilization": float(metrics.avg_cpu_utilization),
-                "avg_ram_utilization": float(metrics.avg_ram_utilization)
-            },
-            "output_files": {
-                "excel_report": str(excel_path.absolute()),
-                "summary_report": str(summary_path.absolute()),
-                "charts_directory": str(charts_dir.absolute())
-            },
-            "status": "success"
-        }
+        if manifest["status"] != "success":
+            return manifest
         
         # Save manifest
         manifest_path = output_path / "rvtool_manifest.json"
@@ -180,8 +167,265 @@ def process_rvtools_data(
         return {
             "status": "error",
             "message": f"Processing failed: {str(e)}",
-            "processing_date": datetime.now().isoformat()
+            "processing_date": datetime.now().isoformat(),
+            "stage_timings": stage_timings
+        }
+
+
+def _run_pipeline(input_path: Path, output_path: Path, stage_timings: Dict[str, float],
+                  snapshot_db: Optional[str] = None, customer: Optional[str] = None,
+                  ingest_workers: Optional[int] = None,
+                  progress: Optional[ProgressReporter] = None,
+                  data_callback: Optional[Callable[[Dict[str, Optional[pd.DataFrame]]], None]] = None) -> Dict[str, Any]:
+    """Run ingest, metrics, export, summary and charts (and store a snapshot); return the manifest."""
+    logger = logging.getLogger(__name__)
+    charts_dir = output_path / "charts"
+    charts_dir.mkdir(exist_ok=True)
+    
+    # Initialize components
+    config = AppConfig()
+    if ingest_workers is not None:
+        config.ingest_workers = ingest_workers
+    processor = RVToolsDataProcessor(config)
+    
+    # Process files
+    logger.info(f"Processing files from: {input_path}")
+    with _timed_stage(stage_timings, "ingest", progress):
+        if progress is None:
+            result = processor.process_folder(input_path)
+        else:
+            result = processor.process_folder(
+                input_path,
+                progress_callback=lambda percent, message: progress.update(percent / 100, message),
+                rows_callback=lambda sheet, rows: progress.update(message=f"Reading {sheet}", rows=rows)
+            )
+    
+    if not result.success:
+        return {
+            "status": "error",
+            "message": result.message,
+            "processing_date": datetime.now().isoformat(),
+            "errors": result.errors,
+            "files": result.file_stats,
+            "stage_timings": stage_timings
+        }
+    
+    # Get consolidated data
+    data = processor.get_consolidated_data()
+    if data_callback is not None:
+        data_callback(data)
+    
+    # Generate metrics
+    logger.info("Generating PCMO dashboard metrics")
+    dashboard_gen = DashboardGenerator(config)
+    with _timed_stage(stage_timings, "metrics", progress):
+        metrics = dashboard_gen.generate_pcmo_dashboard(
+            data['vinfo'],
+            data['vhost'],
+            vdisk_data=data['vdisk'],
+            vpartition_data=data['vpartition'],
+            vdatastore_data=data['vdatastore'],
+            vcluster_data=data['vcluster']
+        )
+    
+    # Right-size powered-on VMs from host (and per-VM sheet) utilization
+    rightsizing_path = output_path / "rightsizing_recommendations.csv"
+    rightsizing_clusters_path = output_path / "rightsizing_by_cluster.csv"
+    logger.info("Computing right-sizing recommendations")
+    with _timed_stage(stage_timings, "rightsizing", progress):
+        rightsizing = recommend_sizes(
+            data['vinfo'],
+            data['vhost'],
+            vcpu=data.get('vcpu'),
+            vmemory=data.get('vmemory'),
+            policy=RightsizingPolicy.from_config(config)
+        )
+        update_dashboard_metrics(metrics, rightsizing)
+        changed = rightsizing.vms[(rightsizing.vms['Reclaimable vCPUs'] > 0)
+                                  | (rightsizing.vms['Reclaimable RAM GB'] > 0)]
+        changed.drop(columns=['vinfo_index']).to_csv(rightsizing_path, index=False)
+        rightsizing.clusters.to_csv(rightsizing_clusters_path, index=False)
+    
+    # Simulate consolidation onto the configured target host profiles, as
+    # allocated and after right-sizing
+    consolidation_path = output_path / "consolidation_plan.csv"
+    logger.info("Simulating consolidation onto target host profiles")
+    with _timed_stage(stage_timings, "consolidation", progress):
+        host_profiles = [HostProfile(**profile) for profile in config.consolidation_host_profiles]
+        consolidation_options = dict(
+            vhost=data['vhost'],
+            ha_spare_hosts=config.consolidation_ha_spare_hosts,
+            ha_reserve_pct=config.consolidation_ha_reserve_pct,
+            max_hosts_per_cluster=config.consolidation_max_hosts_per_cluster,
+            memory_granularity_mib=config.consolidation_memory_granularity_mib
+        )
+        consolidation = simulate_consolidation(data['vinfo'], host_profiles, **consolidation_options)
+        rightsized_consolidation = simulate_consolidation(
+            apply_recommendations(data['vinfo'], rightsizing), host_profiles, **consolidation_options
+        )
+        consolidation_plans = consolidation.to_dict()["clusters"]
+        if consolidation_plans:
+            pd.DataFrame(consolidation_plans).to_csv(consolidation_path, index=False)
+    
+    # Export to Excel
+    excel_path = output_path / "RVTools_Consolidated_Report.xlsx"
+    logger.info(f"Exporting consolidated data to: {excel_path}")
+    with _timed_stage(stage_timings, "export", progress):
+        export_success = processor.export_to_excel(
+            excel_path,
+            progress_callback=progress.update if progress is not None else None
+        )
+    
+    if not export_success:
+        return {
+            "status": "error",
+            "message": "Failed to export consolidated data to Excel",
+            "processing_date": datetime.now().isoformat(),
+            "stage_timings": stage_timings
         }
+    
+    # Generate summary report
+    summary_path = output_path / "summary_report.txt"
+    logger.info(f"Generating summary report: {summary_path}")
+    with _timed_stage(stage_timings, "summary", progress):
+        dashboard_gen.generate_summary_report(metrics, summary_path)
+    
+    # Generate charts
+    logger.info(f"Generating charts in: {charts_dir}")
+    with _timed_stage(stage_timings, "charts", progress):
+        vinfo, vhost = data['vinfo'], data['vhost']
+        charts = [
+            ("VM distribution", lambda: dashboard_gen.create_vm_distribution_charts(vinfo, charts_dir)),
+            ("resource utilization", lambda: dashboard_gen.create_resource_utilization_charts(vhost, charts_dir)),
+            ("advanced analysis", lambda: dashboard_gen.create_advanced_analysis_charts(vinfo, vhost, charts_dir)),
+            ("correlation", lambda: dashboard_gen.create_correlation_analysis(vinfo, vhost, charts_dir)),
+            ("performance heatmap", lambda: dashboard_gen.create_performance_heatmaps(vinfo, vhost, charts_dir)),
+        ]
+        for i, (name, create) in enumerate(charts):
+            if progress is not None:
+                progress.update(i / len(charts), f"Creating {name} charts")
+            create()
+    
+    # Create JSON manifest for Cursor AI
+    manifest = {
+        "processing_date": datetime.now().isoformat(),
+        "files_processed": result.files_processed,
+        "vms_processed": result.vms_processed,
+        "hosts_processed": result.hosts_processed,
+        "errors": result.errors if result.errors else [],
+        "files": result.file_stats,
+        "duplicates": result.duplicates,
+        "metrics": _metrics_dict(metrics),
+        "rightsizing": {
+            **rightsizing.totals,
+            "recommendations_file": str(rightsizing_path.absolute()),
+            "clusters_file": str(rightsizing_clusters_path.absolute())
+        },
+        "consolidation": {
+            "profiles": consolidation.totals,
+            "rightsized_profiles": rightsized_consolidation.totals,
+            "shapes": consolidation.shapes,
+            "plan_file": str(consolidation_path.absolute()) if consolidation_plans else None
+        },
+        "output_files": {
+            "excel_report": str(excel_path.absolute()),
+            "summary_report": str(summary_path.absolute()),
+            "charts_directory": str(charts_dir.absolute())
+        },
+        "stage_timings": stage_timings,
+        "status": "success"
+    }
+    
+    # Record the run for trend queries across extracts
+    if snapshot_db:
+        logger.info(f"Storing snapshot in: {snapshot_db}")
+        with _timed_stage(stage_timings, "snapshot", progress):
+            store = SnapshotStore(snapshot_db)
+            snapshot = store.save_snapshot(
+                customer or input_path.resolve().name,
+                data['vinfo'],
+                data['vhost'],
+                manifest["metrics"],
+                metadata=data['metadata'],
+                source=str(input_path.absolute())
+            )
+        snapshot.pop("metrics")
+        manifest["snapshot"] = {**snapshot, "database": str(Path(snapshot_db).absolute())}
+    
+    return manifest
+
+
+def _metrics_dict(metrics) -> Dict[str, Any]:
+    """The manifest's "metrics" entry for a DashboardMetrics."""
+    return {
+        "total_powered_on_vms": int(metrics.total_powered_on_vms),
+        "total_vms_all": int(metrics.total_vms_all),
+        "total_hosts": int(metrics.total_hosts),
+        "total_physical_cores": float(metrics.total_physical_cores),
+        "avg_cores_per_host": float(metrics.avg_cores_per_host),
+        "avg_sockets_per_host": float(metrics.avg_sockets_per_host),
+        "avg_ram_gb_per_host": float(metrics.avg_ram_gb_per_host),
+        "total_vcpus": int(metrics.total_vcpus),
+        "avg_vcpus_per_vm": float(metrics.avg_vcpus_per_vm),
+        "avg_ram_gb_per_vm": float(metrics.avg_ram_gb_per_vm),
+        "avg_provisioned_gb_per_vm": float(metrics.avg_provisioned_gb_per_vm),
+        "total_ram_gb_vms": float(metrics.total_ram_gb_vms),
+        "total_provisioned_gb": float(metrics.total_provisioned_gb),
+        "total_host_ram_gb": float(metrics.total_host_ram_gb),
+        "vcpu_to_pcore_ratio": float(metrics.vcpu_to_pcore_ratio),
+        "avg_cpu_utilization": float(metrics.avg_cpu_utilization),
+        "avg_ram_utilization": float(metrics.avg_ram_utilization),
+        "reclaimable_vcpus": float(metrics.reclaimable_vcpus),
+        "reclaimable_ram_gb": float(metrics.reclaimable_ram_gb),
+        "rightsized_vcpus": float(metrics.rightsized_vcpus),
+        "rightsized_ram_gb": float(metrics.rightsized_ram_gb),
+        "rightsized_vcpu_to_pcore_ratio": float(metrics.rightsized_vcpu_to_pcore_ratio),
+        "total_disk_capacity_gb": float(metrics.total_disk_capacity_gb),
+        "total_guest_capacity_gb": float(metrics.total_guest_capacity_gb),
+        "total_guest_used_gb": float(metrics.total_guest_used_gb),
+        "guest_storage_utilization": float(metrics.guest_storage_utilization),
+        "used_to_provisioned_ratio": float(metrics.used_to_provisioned_ratio),
+        "total_datastores": int(metrics.total_datastores),
+        "datastore_capacity_gb": float(metrics.datastore_capacity_gb),
+        "datastore_used_gb": float(metrics.datastore_used_gb),
+        "datastore_provisioned_gb": float(metrics.datastore_provisioned_gb),
+        "datastore_utilization": float(metrics.datastore_utilization),
+        "datastore_overcommit_ratio": float(metrics.datastore_overcommit_ratio),
+        "datastores_over_threshold": int(metrics.datastores_over_threshold),
+        "total_clusters": int(metrics.total_clusters),
+        "ha_enabled_clusters": int(metrics.ha_enabled_clusters),
+        "threads_per_core": float(metrics.threads_per_core),
+        "ha_failover_hosts": float(metrics.ha_failover_hosts),
+        "ha_usable_cores": float(metrics.ha_usable_cores),
+        "ha_usable_ram_gb": float(metrics.ha_usable_ram_gb),
+        "ha_vcpu_to_usable_pcore_ratio": float(metrics.ha_vcpu_to_usable_pcore_ratio)
+    }
+
+
+def compute_metrics(data: Dict[str, Optional[pd.DataFrame]], config: Optional[AppConfig] = None) -> Dict[str, Any]:
+    """
+    Dashboard metrics, right-sizing included, for consolidated frames (as
+    returned by RVToolsDataProcessor.get_consolidated_data) without writing
+    any output: the manifest's "metrics" for e.g. a filtered subset.
+    """
+    config = config or AppConfig()
+    metrics = DashboardGenerator(config).generate_pcmo_dashboard(
+        data['vinfo'],
+        data['vhost'],
+        vdisk_data=data.get('vdisk'),
+        vpartition_data=data.get('vpartition'),
+        vdatastore_data=data.get('vdatastore'),
+        vcluster_data=data.get('vcluster')
+    )
+    rightsizing = recommend_sizes(
+        data['vinfo'],
+        data['vhost'],
+        vcpu=data.get('vcpu'),
+        vmemory=data.get('vmemory'),
+        policy=RightsizingPolicy.from_config(config)
+    )
+    update_dashboard_metrics(metrics, rightsizing)
+    return _metrics_dict(metrics)
 
 
 def get_metrics_from_manifest(manifest_path: str) -> Optional[Dict[str, Any]]:
@@ -206,17 +450,33 @@ def get_metrics_from_manifest(manifest_path: str) -> Optional[Dict[str, Any]]:
 
 if __name__ == "__main__":
     # Example usage when run directly
+    import argparse
     import sys
     
-    if len(sys.argv) >= 3:
-        input_dir = sys.argv[1]
-        output_dir = sys.argv[2]
-    else:
-        # Default to relative paths
-        input_dir = "inputs"
-        output_dir = "outputs"
+    parser = argparse.ArgumentParser(description="Process RVTools exports without the GUI")
+    parser.add_argument("input_dir", nargs="?", default="inputs", help="Directory of RVTools workbooks")
+    parser.add_argument("output_dir", nargs="?", default="outputs", help="Directory for generated outputs")
+    parser.add_argument("--profile", action="store_true",
+                        help="Write CPU and allocation profiles to <output_dir>/profile")
+    parser.add_argument("--profile-mode", choices=PROFILE_MODES, default="deterministic",
+                        help="cProfile (deterministic) or low-overhead stack sampling")
+    parser.add_argument("--profile-top", type=int, default=20, help="Hotspots to keep in the summary")
+    parser.add_argument("--snapshot-db", help="SQLite snapshot store to record this run in for trend queries")
+    parser.add_argument("--customer", help="Customer name for the snapshot (default: the input folder's name)")
+    parser.add_argument("--workers", type=int, default=None,
+                        help="Worker processes parsing extracts concurrently (0 = one per CPU)")
+    args = parser.parse_args()
     
-    result = process_rvtools_data(input_dir, output_dir)
+    result = process_rvtools_data(
+        args.input_dir,
+        args.output_dir,
+        profile=args.profile,
+        profile_mode=args.profile_mode,
+        profile_top_n=args.profile_top,
+        snapshot_db=args.snapshot_db,
+        customer=args.customer,
+        ingest_workers=args.workers
+    )
     
     if result["status"] == "success":
         print(f"✅ Processing completed successfully!")
@@ -224,7 +484,14 @@ if __name__ == "__main__":
         print(f"   VMs processed: {result['vms_processed']}")
         print(f"   Hosts processed: {result['hosts_processed']}")
         print(f"   Output directory: {result['output_files']['charts_directory']}")
+        if "snapshot" in result:
+            snapshot = result["snapshot"]
+            print(f"   Snapshot: {snapshot['customer']} @ {snapshot['extract_date']} ({snapshot['database']})")
+        if "profile" in result:
+            profile_summary = result["profile"]
+            print(f"   Profile ({profile_summary['mode']}): {profile_summary.get('directory')}")
+            for hotspot in profile_summary.get("hotspots", [])[:10]:
+                print(f"     {hotspot['self_seconds']:8.3f}s  {hotspot['function']}")
     else:
         print(f"❌ Processing failed: {result.get('message', 'Unknown error')}")
         sys.exit(1)
-
@@ -0,0 +1,149 @@
+"""
+Columnar Frame Files
+Writes DataFrames to disk one column per file, so they can be dropped from
+memory and read back (whole or a few columns) without re-parsing any
+RVTools extract.
+
+A frame is a directory:
+
+    schema.json         rows, columns in order, and how each one is stored
+    0.npy, 1.npy, ...   numeric / bool / datetime columns as plain arrays
+    2.codes.npy         text and nullable columns: int32 codes (-1 = missing)
+    2.values.pkl        ... and their distinct values, with the original dtype
+
+Every .npy file is opened memory-mapped by default, so reading a frame back
+costs page faults on the columns actually touched rather than a full load;
+only the small distinct-value files are unpickled. No optional dependency
+(pyarrow, fastparquet) is needed.
+
+Usage:
+    write_frames(processor.get_consolidated_data(), Path("spill/run1"))
+    data = read_frames(Path("spill/run1"))            # same keys, None kept
+    vinfo = read_frame(Path("spill/run1/vinfo"), columns=["VM", "CPUs"])
+"""
+
+import json
+import pickle
+import shutil
+from pathlib import Path
+from typing import Dict, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+SCHEMA_FILE = "schema.json"
+FRAMES_FILE = "frames.json"
+INDEX_COLUMN = "__index__"
+
+
+def frame_nbytes(frame: Optional[pd.DataFrame]) -> int:
+    """Approximate in-memory size of a frame (text columns counted deeply)."""
+    if frame is None:
+        return 0
+    return int(frame.memory_usage(index=True, deep=True).sum())
+
+
+def _is_plain(values) -> bool:
+    """Whether a column is a numpy array numpy can store and memory-map as is."""
+    return isinstance(values, np.ndarray) and values.dtype.kind in "biufcmM"
+
+
+def write_frame(frame: pd.DataFrame, directory: Path) -> int:
+    """
+    Write one frame as a directory of column files (replacing any existing one).
+
+    Returns:
+        Bytes written
+    """
+    directory = Path(directory)
+    if directory.exists():
+        shutil.rmtree(directory)
+    directory.mkdir(parents=True)
+
+    index = frame.index
+    default_index = isinstance(index, pd.RangeIndex) and index.start == 0 and index.step == 1
+    columns = list(frame.columns)
+    series = [frame.iloc[:, i] for i in range(len(columns))]
+    if not default_index:
+        columns.append(INDEX_COLUMN)
+        series.append(index.to_series(index=pd.RangeIndex(len(index))))
+
+    schema = {"rows": len(frame), "columns": [], "index_name": index.name if not default_index else None}
+    written = 0
+    for i, (name, column) in enumerate(zip(columns, series)):
+        values = column.array.to_numpy() if isinstance(column.dtype, np.dtype) else column.array
+        if _is_plain(values):
+            np.save(directory / f"{i}.npy", np.ascontiguousarray(values))
+            schema["columns"].append({"name": name, "kind": "array"})
+            written += values.nbytes
+        else:
+            codes, uniques = pd.factorize(values, use_na_sentinel=True)
+            np.save(directory / f"{i}.codes.npy", codes.astype(np.int32))
+            with open(directory / f"{i}.values.pkl", "wb") as f:
+                pickle.dump(uniques, f, protocol=pickle.HIGHEST_PROTOCOL)
+            schema["columns"].append({"name": name, "kind": "codes"})
+            written += codes.size * 4
+    with open(directory / SCHEMA_FILE, "w", encoding="utf-8") as f:
+        json.dump(schema, f)
+    return written
+
+
+def read_frame(directory: Path, columns: Optional[Sequence] = None, mmap: bool = True) -> pd.DataFrame:
+    """
+    Read a frame written by write_frame.
+
+    Args:
+        columns: Only these columns (default: all, in the original order)
+        mmap: Memory-map the array files (read-only, paged in on use)
+    """
+    directory = Path(directory)
+    with open(directory / SCHEMA_FILE, encoding="utf-8") as f:
+        schema = json.load(f)
+    wanted = None if columns is None else set(columns)
+    mode = "r" if mmap else None
+
+    data = {}
+    index = None
+    for i, column in enumerate(schema["columns"]):
+        name = column["name"]
+        if name != INDEX_COLUMN and wanted is not None and name not in wanted:
+            continue
+        if column["kind"] == "array":
+            values = np.load(directory / f"{i}.npy", mmap_mode=mode)
+        else:
+            codes = np.load(directory / f"{i}.codes.npy", mmap_mode=mode)
+            with open(directory / f"{i}.values.pkl", "rb") as f:
+                uniques = pickle.load(f)
+            values = pd.api.extensions.take(uniques, np.asarray(codes, dtype=np.intp), allow_fill=True)
+        if name == INDEX_COLUMN:
+            index = pd.Index(values, name=schema.get("index_name"))
+        else:
+            data[name] = values
+
+    frame = pd.DataFrame(data, index=index if index is not None else pd.RangeIndex(schema["rows"]), copy=False)
+    if wanted is not None:
+        frame = frame[[name for name in columns if name in frame.columns]]
+    return frame
+
+
+def write_frames(frames: Dict[str, Optional[pd.DataFrame]], directory: Path) -> int:
+    """Write named frames (None entries are recorded as None); return bytes written."""
+    directory = Path(directory)
+    directory.mkdir(parents=True, exist_ok=True)
+    written = 0
+    present = {}
+    for key, frame in frames.items():
+        present[key] = frame is not None
+        if frame is not None:
+            written += write_frame(frame, directory / key)
+    with open(directory / FRAMES_FILE, "w", encoding="utf-8") as f:
+        json.dump(present, f)
+    return written
+
+
+def read_frames(directory: Path, mmap: bool = True) -> Dict[str, Optional[pd.DataFrame]]:
+    """Read the named frames written by write_frames."""
+    directory = Path(directory)
+    with open(directory / FRAMES_FILE, encoding="utf-8") as f:
+        present = json.load(f)
+    return {key: read_frame(directory / key, mmap=mmap) if exists else None for key, exists in present.items()}
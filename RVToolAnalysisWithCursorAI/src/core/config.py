@@ -17,8 +17,16 @@ class AppConfig:
         self.author = "Advanced Analytics Team"
         
         # File processing settings
-        self.supported_file_extensions = ['.xls', '.xlsx', '.xlsm']
+        # Workbooks, RVTools per-tab CSV exports and zip archives of either
+        self.supported_file_extensions = ['.xls', '.xlsx', '.xlsm', '.csv', '.zip']
         self.required_sheets = ['vInfo', 'vHost', 'vMetaData']
+        # Extracts parsed concurrently (worker processes); 1 reads them in turn,
+        # 0 uses one worker per CPU
+        self.ingest_workers = 1
+        # How ingest workers start ("fork", "forkserver" or "spawn"); None forks
+        # from single-threaded processes and uses forkserver/spawn from threaded
+        # ones (the API server), where fork can deadlock the workers
+        self.ingest_start_method = None
         
         # Column mappings from VBA code
         self.required_vinfo_cols = [
@@ -28,17 +36,57 @@ class AppConfig:
             "OS according to the VMware Tools", "VI SDK Server", "OS Classification"
         ]
         
+        # Kept when the export has them: VM identity for snapshot diffs
+        self.optional_vinfo_cols = ["VM UUID"]
+        
         self.required_vhost_cols = [
             "Host", "Datacenter", "Cluster", "# CPU", "# Cores", 
             "CPU usage %", "# Memory", "Memory usage %", "ESX Version", 
             "Vendor", "Model"
         ]
         
+        # Optional per-VM usage sheets, used for right-sizing when present
+        self.optional_vcpu_cols = ["VM", "Powerstate", "CPUs", "Max", "Overall", "VI SDK Server"]
+        self.optional_vmemory_cols = ["VM", "Powerstate", "Size MiB", "Consumed", "Active", "VI SDK Server"]
+        
+        # Optional storage and cluster sheets (see src/core/sheets.py for dtypes)
+        self.optional_vdisk_cols = ["VM", "Powerstate", "Disk", "Capacity MiB", "Thin", "Datacenter",
+                                    "Cluster", "Host", "VI SDK Server"]
+        self.optional_vpartition_cols = ["VM", "Powerstate", "Disk", "Capacity MiB", "Consumed MiB",
+                                         "Free MiB", "Free %", "Datacenter", "Cluster", "Host", "VI SDK Server"]
+        self.optional_vdatastore_cols = ["Name", "Type", "# VMs", "Capacity MiB", "Provisioned MiB",
+                                         "In Use MiB", "Free MiB", "Free %", "# Hosts", "Cluster name",
+                                         "VI SDK Server"]
+        self.optional_vcluster_cols = ["Name", "NumHosts", "numEffectiveHosts", "TotalCpu", "NumCpuCores",
+                                       "NumCpuThreads", "Effective Cpu", "HA enabled", "Failover Level",
+                                       "AdmissionControlEnabled", "DRS enabled", "VI SDK Server"]
+        
+        # Metric groups to compute; only the sheets they need are read.
+        # inventory (vInfo, vHost, vMetaData) is always read.
+        # rightsizing: vCPU, vMemory | storage: vDisk, vPartition
+        # datastores: vDatastore | cluster_capacity: vCluster
+        self.enabled_metrics = ["inventory", "rightsizing", "storage", "datastores", "cluster_capacity"]
+        self.datastore_utilization_threshold = 0.8   # datastores fuller than this are counted
+        
+        # Cross-file duplicates (same vCenter exported twice, overlapping exports):
+        # "latest" / "first" keep one copy, "flag" keeps all and marks the extras
+        self.duplicate_policy = "latest"
+        self.duplicate_vm_keys = ["VI SDK Server", "VM"]
+        self.duplicate_host_keys = ["Host"]
+        self.duplicate_datastore_keys = ["VI SDK Server", "Name"]
+        self.duplicate_cluster_keys = ["VI SDK Server", "Name"]
+        
         # Output settings
         self.output_sheets = {
             'consolidated_vinfo': 'Consolidated_vInfo',
             'consolidated_vhost': 'Consolidated_vHost', 
             'consolidated_metadata': 'Consolidated_vMetaData',
+            'consolidated_vcpu': 'Consolidated_vCPU',
+            'consolidated_vmemory': 'Consolidated_vMemory',
+            'consolidated_vdisk': 'Consolidated_vDisk',
+            'consolidated_vpartition': 'Consolidated_vPartition',
+            'consolidated_vdatastore': 'Consolidated_vDatastore',
+            'consolidated_vcluster': 'Consolidated_vCluster',
             'pcmo_dashboard': 'PCMO_Dashboard',
             'host_heatmap': 'Host_Heatmap',
             'master_dashboard': 'Master_Dashboard'
@@ -60,6 +108,23 @@ class AppConfig:
             (0.8, float('inf'), "5. >80%+")
         ]
         
+        # Consolidation simulator: target host profiles (see HostProfile) and HA policy
+        self.consolidation_host_profiles = [
+            {"name": "2S-64C-1TB", "cores": 64, "ram_gb": 1024, "cpu_overcommit": 4.0},
+            {"name": "2S-96C-2TB", "cores": 96, "ram_gb": 2048, "cpu_overcommit": 4.0},
+        ]
+        self.consolidation_ha_spare_hosts = 1      # N+1 per target cluster
+        self.consolidation_ha_reserve_pct = 0      # or a percentage reserve, if larger
+        self.consolidation_max_hosts_per_cluster = 64
+        self.consolidation_memory_granularity_mib = 256   # VM RAM rounded up to this before packing
+        
+        # Right-sizing: utilization each VM is sized to and the smallest recommended size
+        self.rightsizing_target_cpu_utilization = 0.7
+        self.rightsizing_target_memory_utilization = 0.8
+        self.rightsizing_min_vcpus = 1
+        self.rightsizing_min_memory_gb = 1
+        self.rightsizing_memory_granularity_mib = 1024
+        
         # OS Classification rules (from VBA logic)
         self.os_classification_rules = {
             'server_keywords': ['server', 'rhel', 'centos', 'debian'],
@@ -0,0 +1,291 @@
+"""
+Consolidation Simulator
+Packs powered-on VMs from consolidated vInfo onto target host profiles to
+estimate the future-state host count per cluster.
+
+VMs are packed on vCPU (under a CPU overcommit ratio) and RAM. Storage is a
+shared datastore resource in vSphere, so it is applied as a per-cluster
+capacity floor rather than a per-host packing dimension. HA capacity (N+1 or
+a percentage reserve) is added per resulting cluster.
+
+Packing is first-fit decreasing over VM *shapes* (distinct vCPU/RAM pairs):
+each host is filled greedily from the largest remaining shape down, and the
+resulting fill pattern is repeated for as many hosts as the remaining VM
+counts allow. VM RAM is rounded up to memory_granularity_mib first, which
+keeps the shape count small even when exports carry odd MiB sizes, and a
+host's scan stops once no remaining shape fits, so the work depends on the
+number of shapes rather than the number of VMs.
+"""
+
+import logging
+import math
+import time
+from dataclasses import dataclass, field, asdict
+from typing import Any, Dict, List, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+NO_CLUSTER = "(no cluster)"
+
+
+@dataclass
+class HostProfile:
+    """Target host hardware and the limits VMs are packed under."""
+    name: str = "2S-64C-1TB"
+    cores: int = 64                   # physical cores per host
+    ram_gb: float = 1024
+    storage_gb: float = 0             # usable capacity contributed per host; 0 = external storage
+    cpu_overcommit: float = 4.0       # vCPUs per physical core
+    ram_overcommit: float = 1.0
+    target_utilization: float = 0.8   # share of CPU/RAM capacity that may be allocated
+
+    @property
+    def vcpu_capacity(self) -> float:
+        return self.cores * self.cpu_overcommit * self.target_utilization
+
+    @property
+    def ram_capacity_gb(self) -> float:
+        return self.ram_gb * self.ram_overcommit * self.target_utilization
+
+
+@dataclass
+class ClusterPlan:
+    """Packing result for one source cluster on one host profile."""
+    cluster: str
+    profile: str
+    vms: int = 0
+    vcpus: float = 0
+    ram_gb: float = 0
+    storage_gb: float = 0
+    current_hosts: Optional[int] = None
+    packed_hosts: int = 0              # hosts needed for vCPU and RAM
+    storage_hosts: int = 0             # hosts needed for storage capacity
+    lower_bound_hosts: int = 0         # vCPU/RAM hosts with perfect fractional packing
+    ha_hosts: int = 0
+    required_hosts: int = 0
+    target_clusters: int = 0
+    cpu_efficiency: float = 0          # allocated vCPU / usable vCPU on packed hosts
+    ram_efficiency: float = 0
+    unplaced_vms: int = 0              # VMs larger than one host of this profile
+
+
+@dataclass
+class ConsolidationResult:
+    """Per-cluster plans and estate totals for every host profile."""
+    plans: List[ClusterPlan] = field(default_factory=list)
+    totals: Dict[str, Dict[str, Any]] = field(default_factory=dict)
+    shapes: int = 0
+    seconds: float = 0
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "totals": self.totals,
+            "clusters": [asdict(plan) for plan in self.plans],
+            "shapes": self.shapes,
+            "seconds": self.seconds,
+        }
+
+
+def pack_shapes(vcpus: np.ndarray, ram_gb: np.ndarray, counts: np.ndarray,
+                vcpu_capacity: float, ram_capacity_gb: float) -> Dict[str, Any]:
+    """
+    First-fit decreasing packing of VM shapes onto identical hosts.
+
+    Args:
+        vcpus, ram_gb: Size of each shape
+        counts: Number of VMs of each shape
+        vcpu_capacity, ram_capacity_gb: Usable capacity of one host
+
+    Returns:
+        dict: hosts, unplaced VM count and the vCPU/RAM allocated on the hosts
+    """
+    vcpus = np.asarray(vcpus, dtype=np.float64)
+    ram_gb = np.asarray(ram_gb, dtype=np.float64)
+    remaining = np.asarray(counts, dtype=np.int64).copy()
+
+    oversized = (vcpus > vcpu_capacity) | (ram_gb > ram_capacity_gb)
+    unplaced = int(remaining[oversized].sum())
+    remaining[oversized] = 0
+
+    # Largest dominant dimension first, ties broken by combined size
+    cpu_share = vcpus / vcpu_capacity if vcpu_capacity else np.zeros_like(vcpus)
+    ram_share = ram_gb / ram_capacity_gb if ram_capacity_gb else np.zeros_like(ram_gb)
+    order = np.lexsort((-(cpu_share + ram_share), -np.maximum(cpu_share, ram_share)))
+    order = [int(i) for i in order if remaining[i] > 0]
+    sizes = [(float(vcpus[i]), float(ram_gb[i])) for i in range(len(vcpus))]
+
+    hosts = 0
+    while order:
+        free_cpu, free_ram = vcpu_capacity, ram_capacity_gb
+        # Smallest vCPU / RAM among the shapes from each position on: once the
+        # host cannot take either, no later shape fits
+        index = np.asarray(order)
+        min_cpu = np.minimum.accumulate(vcpus[index][::-1])[::-1].tolist()
+        min_ram = np.minimum.accumulate(ram_gb[index][::-1])[::-1].tolist()
+        pattern = []
+        for position, i in enumerate(order):
+            if free_cpu + 1e-9 < min_cpu[position] or free_ram + 1e-9 < min_ram[position]:
+                break
+            cpu, ram = sizes[i]
+            fit = int(remaining[i])
+            if cpu > 0:
+                fit = min(fit, int((free_cpu + 1e-9) // cpu))
+            if ram > 0:
+                fit = min(fit, int((free_ram + 1e-9) // ram))
+            if fit > 0:
+                pattern.append((i, fit))
+                free_cpu -= fit * cpu
+                free_ram -= fit * ram
+        # Fill as many hosts with this pattern as the remaining counts allow
+        repeats = min(int(remaining[i]) // fit for i, fit in pattern)
+        for i, fit in pattern:
+            remaining[i] -= repeats * fit
+        hosts += repeats
+        order = [i for i in order if remaining[i] > 0]
+
+    placed = np.asarray(counts, dtype=np.int64) - np.where(oversized, counts, 0)
+    return {
+        "hosts": hosts,
+        "unplaced": unplaced,
+        "vcpus": float((vcpus * placed).sum()),
+        "ram_gb": float((ram_gb * placed).sum()),
+    }
+
+
+def _ha_hosts(hosts: int, spare_hosts: int, reserve_pct: float, max_hosts_per_cluster: int) -> Dict[str, int]:
+    """HA capacity: split into clusters of at most max_hosts_per_cluster, each with its own spares."""
+    if hosts <= 0:
+        return {"clusters": 0, "ha_hosts": 0}
+    spares = max(spare_hosts, math.ceil(min(hosts, max_hosts_per_cluster) * reserve_pct / 100))
+    usable = max(max_hosts_per_cluster - spares, 1)
+    clusters = math.ceil(hosts / usable)
+    return {"clusters": clusters, "ha_hosts": clusters * spares}
+
+
+def simulate_consolidation(vinfo: pd.DataFrame,
+                           profiles: Sequence[HostProfile],
+                           vhost: Optional[pd.DataFrame] = None,
+                           group_by: Optional[str] = "Cluster",
+                           ha_spare_hosts: int = 1,
+                           ha_reserve_pct: float = 0,
+                           max_hosts_per_cluster: int = 64,
+                           powered_on_only: bool = True,
+                           memory_granularity_mib: float = 256) -> ConsolidationResult:
+    """
+    Estimate the hosts needed to run the VMs in `vinfo` on each host profile.
+
+    Args:
+        vinfo: Consolidated vInfo (CPUs, Memory in MiB, Provisioned MiB, Cluster, Powerstate)
+        profiles: Target host profiles to evaluate
+        vhost: Consolidated vHost, used to report the current host count per cluster
+        group_by: vInfo column VMs stay grouped by (None packs the whole estate together)
+        ha_spare_hosts: Spare hosts per target cluster (1 = N+1)
+        ha_reserve_pct: Percentage of each target cluster reserved for HA, if larger
+        max_hosts_per_cluster: Largest target cluster; bigger groups are split
+        powered_on_only: Only pack powered-on VMs
+        memory_granularity_mib: VM RAM is rounded up to a multiple of this
+            before packing (0 = exact sizes, at the cost of many more shapes)
+
+    Returns:
+        ConsolidationResult
+    """
+    logger = logging.getLogger(__name__)
+    start = time.perf_counter()
+    result = ConsolidationResult()
+    if vinfo.empty or not profiles:
+        return result
+
+    vms = vinfo
+    if powered_on_only and 'Powerstate' in vms.columns:
+        vms = vms[vms['Powerstate'].astype(str).str.lower() == 'poweredon']
+
+    memory_mib = pd.to_numeric(vms.get('Memory'), errors='coerce')
+    if memory_granularity_mib > 0:
+        memory_mib = np.ceil(memory_mib / memory_granularity_mib) * memory_granularity_mib
+    frame = pd.DataFrame({
+        'group': (vms[group_by].fillna(NO_CLUSTER).astype(str)
+                  if group_by and group_by in vms.columns else NO_CLUSTER),
+        'vcpus': pd.to_numeric(vms.get('CPUs'), errors='coerce'),
+        'ram_gb': memory_mib / 1024,
+        'storage_gb': pd.to_numeric(vms.get('Provisioned MiB'), errors='coerce') / 1024,
+    }, index=vms.index).fillna({'vcpus': 0, 'ram_gb': 0, 'storage_gb': 0})
+
+    shapes = frame.groupby(['group', 'vcpus', 'ram_gb'], sort=True).size().rename('count').reset_index()
+    storage = frame.groupby('group')['storage_gb'].sum()
+    result.shapes = len(shapes)
+
+    current_hosts: Dict[str, int] = {}
+    if vhost is not None and not vhost.empty and group_by and group_by in vhost.columns:
+        current_hosts = {name: int(count) for name, count in
+                         vhost[group_by].fillna(NO_CLUSTER).astype(str).value_counts().items()}
+
+    groups = [(group, group_shapes['vcpus'].values, group_shapes['ram_gb'].values, group_shapes['count'].values)
+              for group, group_shapes in shapes.groupby('group', sort=True)]
+
+    for profile in profiles:
+        totals = {"vms": 0, "current_hosts": 0, "packed_hosts": 0, "lower_bound_hosts": 0,
+                  "ha_hosts": 0, "required_hosts": 0, "target_clusters": 0, "unplaced_vms": 0,
+                  "vcpus": 0.0, "ram_gb": 0.0}
+        for group, vcpus, ram_gb, counts in groups:
+            packed = pack_shapes(vcpus, ram_gb, counts, profile.vcpu_capacity, profile.ram_capacity_gb)
+            storage_gb = float(storage.get(group, 0.0))
+            storage_hosts = math.ceil(storage_gb / profile.storage_gb) if profile.storage_gb > 0 else 0
+            lower_bound = max(
+                math.ceil(packed["vcpus"] / profile.vcpu_capacity - 1e-9) if profile.vcpu_capacity else 0,
+                math.ceil(packed["ram_gb"] / profile.ram_capacity_gb - 1e-9) if profile.ram_capacity_gb else 0,
+            )
+            hosts = max(packed["hosts"], storage_hosts)
+            ha = _ha_hosts(hosts, ha_spare_hosts, ha_reserve_pct, max_hosts_per_cluster)
+
+            plan = ClusterPlan(
+                cluster=group,
+                profile=profile.name,
+                vms=int(counts.sum()),
+                vcpus=packed["vcpus"],
+                ram_gb=round(packed["ram_gb"], 2),
+                storage_gb=round(storage_gb, 2),
+                current_hosts=current_hosts.get(group) if current_hosts else None,
+                packed_hosts=packed["hosts"],
+                storage_hosts=storage_hosts,
+                lower_bound_hosts=lower_bound,
+                ha_hosts=ha["ha_hosts"],
+                required_hosts=hosts + ha["ha_hosts"],
+                target_clusters=ha["clusters"],
+                cpu_efficiency=round(packed["vcpus"] / (packed["hosts"] * profile.vcpu_capacity), 4)
+                if packed["hosts"] else 0,
+                ram_efficiency=round(packed["ram_gb"] / (packed["hosts"] * profile.ram_capacity_gb), 4)
+                if packed["hosts"] else 0,
+                unplaced_vms=packed["unplaced"],
+            )
+            result.plans.append(plan)
+
+            totals["vms"] += plan.vms
+            totals["current_hosts"] += plan.current_hosts or 0
+            for key in ("packed_hosts", "lower_bound_hosts", "ha_hosts", "required_hosts",
+                        "target_clusters", "unplaced_vms"):
+                totals[key] += getattr(plan, key)
+            totals["vcpus"] += plan.vcpus
+            totals["ram_gb"] += packed["ram_gb"]
+
+        packed_hosts = totals["packed_hosts"]
+        totals.update({
+            "ram_gb": round(totals["ram_gb"], 2),
+            "packing_efficiency": round(totals["lower_bound_hosts"] / packed_hosts, 4) if packed_hosts else 0,
+            "cpu_efficiency": round(totals["vcpus"] / (packed_hosts * profile.vcpu_capacity), 4)
+            if packed_hosts else 0,
+            "ram_efficiency": round(totals["ram_gb"] / (packed_hosts * profile.ram_capacity_gb), 4)
+            if packed_hosts else 0,
+            "vms_per_host": round(totals["vms"] / totals["required_hosts"], 2) if totals["required_hosts"] else 0,
+            "profile": asdict(profile),
+        })
+        if not current_hosts:
+            totals.pop("current_hosts")
+        if totals["unplaced_vms"]:
+            logger.warning(f"{totals['unplaced_vms']} VMs do not fit on one {profile.name} host")
+        result.totals[profile.name] = totals
+
+    result.seconds = round(time.perf_counter() - start, 4)
+    logger.info(f"Consolidation simulated for {len(profiles)} profiles over {result.shapes} VM shapes "
+                f"in {result.seconds:.3f}s")
+    return result
@@ -47,6 +47,38 @@ class DashboardMetrics:
     total_ram_gb_vms: float = 0
     total_provisioned_gb: float = 0
     total_host_ram_gb: float = 0
+    
+    # Right-sizing (filled from a RightsizingResult; see src/core/rightsizing.py)
+    reclaimable_vcpus: float = 0
+    reclaimable_ram_gb: float = 0
+    rightsized_vcpus: float = 0
+    rightsized_ram_gb: float = 0
+    rightsized_vcpu_to_pcore_ratio: float = 0
+    
+    # Storage used vs provisioned (vDisk / vPartition, powered-on VMs)
+    total_disk_capacity_gb: float = 0
+    total_guest_capacity_gb: float = 0
+    total_guest_used_gb: float = 0
+    guest_storage_utilization: float = 0
+    used_to_provisioned_ratio: float = 0
+    
+    # Datastore utilization (vDatastore)
+    total_datastores: int = 0
+    datastore_capacity_gb: float = 0
+    datastore_used_gb: float = 0
+    datastore_provisioned_gb: float = 0
+    datastore_utilization: float = 0
+    datastore_overcommit_ratio: float = 0
+    datastores_over_threshold: int = 0
+    
+    # Cluster HA capacity (vCluster)
+    total_clusters: int = 0
+    ha_enabled_clusters: int = 0
+    threads_per_core: float = 0
+    ha_failover_hosts: float = 0
+    ha_usable_cores: float = 0
+    ha_usable_ram_gb: float = 0
+    ha_vcpu_to_usable_pcore_ratio: float = 0
 
 class DashboardGenerator:
     """Generates various dashboards from consolidated RVTools data."""
@@ -59,10 +91,18 @@ class DashboardGenerator:
         plt.style.use('default')
         sns.set_palette("husl")
     
-    def generate_pcmo_dashboard(self, vinfo_data: pd.DataFrame, vhost_data: pd.DataFrame) -> DashboardMetrics:
+    def generate_pcmo_dashboard(self, vinfo_data: pd.DataFrame, vhost_data: pd.DataFrame,
+                                vdisk_data: Optional[pd.DataFrame] = None,
+                                vpartition_data: Optional[pd.DataFrame] = None,
+                                vdatastore_data: Optional[pd.DataFrame] = None,
+                                vcluster_data: Optional[pd.DataFrame] = None) -> DashboardMetrics:
         """
         Generate comprehensive PCMO dashboard metrics matching the VBA macro output.
         Replicates the CalculateAndDisplayPCMODashboard VBA function with enhanced metrics.
+        
+        The optional sheets add storage (vDisk / vPartition), datastore
+        (vDatastore) and cluster HA capacity (vCluster) metrics; those
+        fields stay 0 when the sheet was not ingested.
         """
         try:
             self.logger.info("Generating comprehensive PCMO dashboard metrics")
@@ -138,6 +178,10 @@ class DashboardGenerator:
             if metrics.total_physical_cores > 0 and metrics.total_vcpus > 0:
                 metrics.vcpu_to_pcore_ratio = metrics.total_vcpus / metrics.total_physical_cores
             
+            self._add_storage_metrics(metrics, vinfo_data, vdisk_data, vpartition_data)
+            self._add_datastore_metrics(metrics, vdatastore_data)
+            self._add_cluster_metrics(metrics, vhost_data, vcluster_data)
+            
             self.logger.info("Comprehensive PCMO dashboard metrics generated successfully")
             return metrics
             
@@ -145,6 +189,116 @@ class DashboardGenerator:
             self.logger.error(f"Error generating PCMO dashboard: {str(e)}")
             return DashboardMetrics()
     
+    @staticmethod
+    def _powered_on(frame: pd.DataFrame) -> pd.DataFrame:
+        """Rows of powered-on VMs (all rows when the sheet has no Powerstate column)."""
+        if 'Powerstate' not in frame.columns:
+            return frame
+        return frame[frame['Powerstate'].astype(str).str.lower() == 'poweredon']
+    
+    @staticmethod
+    def _numeric_column(frame: pd.DataFrame, column: str) -> pd.Series:
+        """A column as numbers (NaN where missing or not numeric)."""
+        if column not in frame.columns:
+            return pd.Series(np.nan, index=frame.index)
+        return pd.to_numeric(frame[column], errors='coerce')
+    
+    @staticmethod
+    def _vm_identity(frame: pd.DataFrame, keys: List[str]) -> pd.MultiIndex:
+        return pd.MultiIndex.from_frame(frame[keys].astype(str))
+    
+    def _add_storage_metrics(self, metrics: DashboardMetrics, vinfo_data: pd.DataFrame,
+                             vdisk_data: Optional[pd.DataFrame], vpartition_data: Optional[pd.DataFrame]):
+        """In-guest used vs provisioned storage from vPartition, vDisk (or vInfo 'Provisioned MiB')."""
+        disks = None
+        if vdisk_data is not None and not vdisk_data.empty and 'Capacity MiB' in vdisk_data.columns:
+            disks = self._powered_on(vdisk_data)
+            metrics.total_disk_capacity_gb = self._numeric_column(disks, 'Capacity MiB').sum() / 1024
+        
+        if vpartition_data is None or vpartition_data.empty or 'Consumed MiB' not in vpartition_data.columns:
+            return
+        partitions = self._powered_on(vpartition_data)
+        consumed_mib = self._numeric_column(partitions, 'Consumed MiB')
+        metrics.total_guest_used_gb = consumed_mib.sum() / 1024
+        metrics.total_guest_capacity_gb = self._numeric_column(partitions, 'Capacity MiB').sum() / 1024
+        if metrics.total_guest_capacity_gb > 0:
+            metrics.guest_storage_utilization = metrics.total_guest_used_gb / metrics.total_guest_capacity_gb
+        
+        # Provisioned storage of the VMs that report partitions (Tools running),
+        # so VMs without guest data do not dilute the ratio
+        provisioned = disks if disks is not None else vinfo_data
+        size_col = 'Capacity MiB' if disks is not None else 'Provisioned MiB'
+        if provisioned.empty or size_col not in provisioned.columns:
+            return
+        keys = [key for key in ('VI SDK Server', 'VM') if key in partitions.columns and key in provisioned.columns]
+        if 'VM' not in keys:
+            return
+        reporting = self._vm_identity(provisioned, keys).isin(self._vm_identity(partitions, keys))
+        provisioned_mib = self._numeric_column(provisioned, size_col)[reporting].sum()
+        if provisioned_mib > 0:
+            metrics.used_to_provisioned_ratio = consumed_mib.sum() / provisioned_mib
+    
+    def _add_datastore_metrics(self, metrics: DashboardMetrics, vdatastore_data: Optional[pd.DataFrame]):
+        """Datastore capacity, used and provisioned space, and how many are past the threshold."""
+        if vdatastore_data is None or vdatastore_data.empty or 'Capacity MiB' not in vdatastore_data.columns:
+            return
+        capacity_mib = self._numeric_column(vdatastore_data, 'Capacity MiB')
+        if 'In Use MiB' in vdatastore_data.columns:
+            used_mib = self._numeric_column(vdatastore_data, 'In Use MiB')
+        else:
+            used_mib = capacity_mib - self._numeric_column(vdatastore_data, 'Free MiB')
+        
+        metrics.total_datastores = len(vdatastore_data)
+        metrics.datastore_capacity_gb = capacity_mib.sum() / 1024
+        metrics.datastore_used_gb = used_mib.sum() / 1024
+        metrics.datastore_provisioned_gb = self._numeric_column(vdatastore_data, 'Provisioned MiB').sum() / 1024
+        if metrics.datastore_capacity_gb > 0:
+            metrics.datastore_utilization = metrics.datastore_used_gb / metrics.datastore_capacity_gb
+            metrics.datastore_overcommit_ratio = metrics.datastore_provisioned_gb / metrics.datastore_capacity_gb
+        utilization = used_mib / capacity_mib.where(capacity_mib > 0)
+        metrics.datastores_over_threshold = int((utilization > self.config.datastore_utilization_threshold).sum())
+    
+    def _add_cluster_metrics(self, metrics: DashboardMetrics, vhost_data: pd.DataFrame,
+                             vcluster_data: Optional[pd.DataFrame]):
+        """
+        Threads per core and the capacity left with each HA cluster's failover
+        hosts held back: cores (and vHost RAM) x (hosts - failover) / hosts.
+        HA clusters without a failover level are assumed to tolerate one host.
+        """
+        if vcluster_data is None or vcluster_data.empty:
+            return
+        clusters = vcluster_data
+        hosts = self._numeric_column(clusters, 'NumHosts')
+        cores = self._numeric_column(clusters, 'NumCpuCores')
+        threads = self._numeric_column(clusters, 'NumCpuThreads')
+        ha = (clusters['HA enabled'].fillna(False).astype(bool) if 'HA enabled' in clusters.columns
+              else pd.Series(False, index=clusters.index))
+        
+        metrics.total_clusters = len(clusters)
+        metrics.ha_enabled_clusters = int(ha.sum())
+        known = (threads > 0) & (cores > 0)
+        if known.any():
+            metrics.threads_per_core = threads[known].sum() / cores[known].sum()
+        
+        # Host RAM per cluster (and cores / hosts where vCluster lacks them) from vHost
+        ram_gb = pd.Series(np.nan, index=clusters.index)
+        if 'Name' in clusters.columns and not vhost_data.empty and 'Cluster' in vhost_data.columns:
+            names = clusters['Name'].astype(str)
+            host_cluster = vhost_data['Cluster'].astype(str)
+            ram_gb = names.map(self._numeric_column(vhost_data, '# Memory').groupby(host_cluster).sum()) / 1024
+            cores = cores.fillna(names.map(self._numeric_column(vhost_data, '# Cores').groupby(host_cluster).sum()))
+            hosts = hosts.fillna(names.map(host_cluster.value_counts()))
+        
+        failover = self._numeric_column(clusters, 'Failover Level')
+        failover = failover.where(failover >= 1, 1).where(ha, 0).clip(upper=hosts.fillna(0))
+        usable = ((hosts - failover) / hosts.where(hosts > 0)).fillna(0).where(ha, 1)
+        
+        metrics.ha_failover_hosts = failover.sum()
+        metrics.ha_usable_cores = (cores * usable).sum()
+        metrics.ha_usable_ram_gb = (ram_gb * usable).sum()
+        if metrics.ha_usable_cores > 0 and metrics.total_vcpus > 0:
+            metrics.ha_vcpu_to_usable_pcore_ratio = metrics.total_vcpus / metrics.ha_usable_cores
+    
     def create_host_heatmap(self, vhost_data: pd.DataFrame, output_path: Optional[Path] = None) -> bool:
         """
         Create host utilization heatmap.
@@ -313,7 +467,9 @@ class DashboardGenerator:
                 f"vCPU to pCore ratio | {metrics.vcpu_to_pcore_ratio:.2f} | Total vCPUs (Powered On VMs) / Total Physical Cores (Visible Hosts)",
                 f"CPU Utilization % (Host Avg) | {metrics.avg_cpu_utilization*100:.1f}% | Average of 'CPU usage %' from visible Hosts",
                 f"RAM Utilization % (Host Avg) | {metrics.avg_ram_utilization*100:.1f}% | Average of 'Memory usage %' from visible Hosts",
-                f"Threads/Core (Cluster Avg) | N/A (Requires vCluster data) | vCluster data not processed by this application",
+                (f"Threads/Core (Cluster Avg) | {metrics.threads_per_core:.2f} | Sum 'NumCpuThreads' / Sum 'NumCpuCores' from 'vCluster'"
+                 if metrics.threads_per_core else
+                 "Threads/Core (Cluster Avg) | N/A (Requires vCluster data) | No vCluster sheet in the processed files"),
                 "",
                 "Additional Calculated Totals:",
                 f"Total vCPUs (Powered On VMs) | {metrics.total_vcpus:,} | Sum of vCPUs from all powered-on VMs",
@@ -321,6 +477,31 @@ class DashboardGenerator:
                 f"Total Provisioned Storage (GB) | {metrics.total_provisioned_gb:,.2f} | Total storage provisioned for all powered-on VMs",
                 f"Total Host RAM (GB) | {metrics.total_host_ram_gb:,.2f} | Total physical memory across all hosts",
                 "",
+                "Storage (Used vs Provisioned):",
+                f"Virtual Disk Capacity (GB) | {metrics.total_disk_capacity_gb:,.2f} | Sum of 'Capacity MiB' from 'vDisk' (powered-on VMs)",
+                f"Guest Used Storage (GB) | {metrics.total_guest_used_gb:,.2f} | Sum of 'Consumed MiB' from 'vPartition' (powered-on VMs)",
+                f"Guest Storage Utilization | {metrics.guest_storage_utilization*100:.1f}% | Guest used / guest partition capacity",
+                f"Used to Provisioned Ratio | {metrics.used_to_provisioned_ratio:.2f} | Guest used / provisioned, for VMs reporting partitions",
+                "",
+                "Datastores:",
+                f"Datastores | {metrics.total_datastores:,} | Rows of 'vDatastore'",
+                f"Datastore Capacity (GB) | {metrics.datastore_capacity_gb:,.2f} | Sum of 'Capacity MiB'",
+                f"Datastore Utilization | {metrics.datastore_utilization*100:.1f}% | Sum 'In Use MiB' / Sum 'Capacity MiB'",
+                f"Datastore Overcommit | {metrics.datastore_overcommit_ratio:.2f} | Sum 'Provisioned MiB' / Sum 'Capacity MiB'",
+                f"Datastores over {self.config.datastore_utilization_threshold:.0%} | {metrics.datastores_over_threshold:,} | Datastores by In Use / Capacity",
+                "",
+                "Cluster HA Capacity:",
+                f"Clusters (HA enabled) | {metrics.total_clusters:,} ({metrics.ha_enabled_clusters:,}) | Rows of 'vCluster'",
+                f"HA Failover Hosts | {metrics.ha_failover_hosts:,.0f} | 'Failover Level' per HA cluster (1 when not set)",
+                f"HA Usable Cores | {metrics.ha_usable_cores:,.0f} | Cores x (hosts - failover) / hosts per cluster",
+                f"HA Usable RAM (GB) | {metrics.ha_usable_ram_gb:,.2f} | vHost RAM x (hosts - failover) / hosts per cluster",
+                f"vCPU to HA Usable pCore ratio | {metrics.ha_vcpu_to_usable_pcore_ratio:.2f} | Total vCPUs / HA Usable Cores",
+                "",
+                "Right-Sizing:",
+                f"Reclaimable vCPUs | {metrics.reclaimable_vcpus:,.0f} | Allocated minus recommended vCPUs (powered-on VMs)",
+                f"Reclaimable RAM (GB) | {metrics.reclaimable_ram_gb:,.2f} | Allocated minus recommended RAM (powered-on VMs)",
+                f"Right-sized vCPU to pCore ratio | {metrics.rightsized_vcpu_to_pcore_ratio:.2f} | Recommended vCPUs / Total Physical Cores",
+                "",
                 f"Report generated on: {pd.Timestamp.now().strftime('%Y-%m-%d %H:%M:%S')}",
                 "",
                 "Note: This report replicates the PCMO Dashboard metrics from the original VBA macro.",
@@ -9,9 +9,18 @@ import numpy as np
 from pathlib import Path
 from typing import Dict, List, Tuple, Optional, Any
 import logging
+import multiprocessing
+import os
+import threading
+import time
 import traceback
+from concurrent.futures import ProcessPoolExecutor, as_completed
 from dataclasses import dataclass
 
+from .deduplication import deduplicate
+from .sheets import plugins_for
+from .sources import Source, discover_sources
+
 @dataclass
 class ProcessingResult:
     """Result of data processing operation."""
@@ -21,10 +30,32 @@ class ProcessingResult:
     vms_processed: int = 0
     hosts_processed: int = 0
     errors: Optional[List[str]] = None
+    duplicates: Optional[Dict[str, Any]] = None
+    file_stats: Optional[List[Dict[str, Any]]] = None
     
     def __post_init__(self):
         if self.errors is None:
             self.errors = []
+        if self.file_stats is None:
+            self.file_stats = []
+
+
+def _read_source(source: Source, config, plugins=None, logger: Optional[logging.Logger] = None,
+                 rows_callback=None) -> Tuple[Dict[str, pd.DataFrame], float]:
+    """
+    Read a single RVTools extract (workbook or CSV bundle): plugin key -> frame,
+    and the seconds taken. Replicates the ExtractDataFromExcel VBA function,
+    reading every sheet the enabled metrics need in one pass (see
+    src/core/sheets.py). Runs in ingest worker processes too.
+    """
+    start = time.perf_counter()
+    try:
+        frames = source.read(plugins if plugins is not None else plugins_for(config), config, logger,
+                             on_rows=rows_callback)
+    except Exception as e:
+        raise Exception(f"Error reading {'Excel file' if source.kind == 'workbook' else 'CSV export'}: {str(e)}")
+    return frames, time.perf_counter() - start
+
 
 class RVToolsDataProcessor:
     """Main data processing engine for RVTools files."""
@@ -37,6 +68,19 @@ class RVToolsDataProcessor:
         self.consolidated_vinfo = pd.DataFrame()
         self.consolidated_vhost = pd.DataFrame()
         self.consolidated_metadata = pd.DataFrame()
+        self.consolidated_vcpu = pd.DataFrame()
+        self.consolidated_vmemory = pd.DataFrame()
+        self.consolidated_vdisk = pd.DataFrame()
+        self.consolidated_vpartition = pd.DataFrame()
+        self.consolidated_vdatastore = pd.DataFrame()
+        self.consolidated_vcluster = pd.DataFrame()
+        self.processed_files: List[str] = []
+        self.file_stats: List[Dict[str, Any]] = []
+        self.duplicate_report = None
+        
+        # Sheets read from each workbook, and the per-workbook frames awaiting concatenation
+        self.plugins = plugins_for(config)
+        self._parts: Dict[str, List[pd.DataFrame]] = {}
         
         # Processing statistics
         self.stats = {
@@ -46,10 +90,16 @@ class RVToolsDataProcessor:
             'errors': []
         }
     
-    def process_folder(self, folder_path: Path, progress_callback=None) -> ProcessingResult:
+    def process_folder(self, folder_path: Path, progress_callback=None, rows_callback=None) -> ProcessingResult:
         """
-        Process all RVTools Excel files in the specified folder.
+        Process all RVTools extracts in the specified folder: Excel
+        workbooks, per-tab CSV exports and zip archives of either.
         Replicates the main ProcessRVToolsDataFromFolder VBA function.
+        
+        Args:
+            progress_callback: Called with (percent, message) per extract
+            rows_callback: Called with (sheet, rows read) while reading, every
+                sheets.PROGRESS_ROWS rows (per extract when read in workers)
         """
         try:
             self.logger.info(f"Starting folder processing: {folder_path}")
@@ -60,30 +110,38 @@ class RVToolsDataProcessor:
             # Initialize consolidated data structures
             self._initialize_consolidated_data()
             
-            # Find all Excel files
-            excel_files = self._find_excel_files(folder_path)
-            self.logger.info(f"Found {len(excel_files)} Excel files")
+            # Find all workbooks and CSV bundles (including those inside zip archives)
+            sources = self._find_sources(folder_path)
+            self.logger.info(f"Found {len(sources)} RVTools extracts")
             
-            if not excel_files:
+            if not sources:
                 return ProcessingResult(
                     success=False,
-                    message="No Excel files found in the specified folder"
+                    message="No Excel files, RVTools CSV exports or zip archives found in the specified folder"
                 )
             
-            # Process each file
-            for i, file_path in enumerate(excel_files):
-                try:
+            # Process each extract (concurrently when ingest_workers allows)
+            workers = self._ingest_workers(len(sources))
+            if workers > 1:
+                self._process_sources_parallel(sources, workers, progress_callback, rows_callback)
+            else:
+                for i, source in enumerate(sources):
                     if progress_callback:
-                        progress = int((i / len(excel_files)) * 100)
-                        progress_callback(progress, f"Processing {file_path.name}")
-                    
-                    self._process_single_file(file_path)
-                    self.stats['files_processed'] += 1
-                    
-                except Exception as e:
-                    error_msg = f"Error processing {file_path.name}: {str(e)}"
-                    self.logger.error(error_msg)
-                    self.stats['errors'].append(error_msg)
+                        progress = int((i / len(sources)) * 100)
+                        progress_callback(progress, f"Processing {source.name}")
+                    self.logger.info(f"Processing {source.kind}: {source.name}")
+                    try:
+                        frames, seconds = _read_source(source, self.config, self.plugins, self.logger,
+                                                       rows_callback)
+                    except Exception as e:
+                        self._record_failure(source, e)
+                        continue
+                    self._add_frames(source, frames, seconds)
+            
+            self._consolidate_parts()
+            
+            # Drop (or flag) VMs and hosts repeated across workbooks
+            self._remove_cross_file_duplicates()
             
             # Post-processing
             self._post_process_data()
@@ -97,7 +155,9 @@ class RVToolsDataProcessor:
                 files_processed=self.stats['files_processed'],
                 vms_processed=self.stats['vms_processed'],
                 hosts_processed=self.stats['hosts_processed'],
-                errors=self.stats['errors']
+                errors=self.stats['errors'],
+                duplicates=self.duplicate_report.to_dict() if self.duplicate_report else None,
+                file_stats=self.file_stats
             )
             
         except Exception as e:
@@ -122,181 +182,146 @@ class RVToolsDataProcessor:
         # Initialize metadata DataFrame
         self.consolidated_metadata = pd.DataFrame(columns=['SourceFile_Meta'])
         
+        # Optional sheets stay empty unless a workbook has them
+        self.consolidated_vcpu = pd.DataFrame()
+        self.consolidated_vmemory = pd.DataFrame()
+        self.consolidated_vdisk = pd.DataFrame()
+        self.consolidated_vpartition = pd.DataFrame()
+        self.consolidated_vdatastore = pd.DataFrame()
+        self.consolidated_vcluster = pd.DataFrame()
+        self._parts = {}
+        self.processed_files = []
+        self.file_stats = []
+        self.duplicate_report = None
+        
         self.logger.info("Initialized consolidated data structures")
     
-    def _find_excel_files(self, folder_path: Path) -> List[Path]:
-        """Find all Excel files in the folder."""
-        excel_files = []
-        for ext in self.config.supported_file_extensions:
-            excel_files.extend(folder_path.glob(f"*{ext}"))
-        return sorted(excel_files)
+    def _find_sources(self, folder_path: Path) -> List[Source]:
+        """Find all RVTools extracts in the folder (see src/core/sources.py)."""
+        return discover_sources(folder_path, self.config.supported_file_extensions, self.logger)
     
-    def _process_single_file(self, file_path: Path):
+    def _ingest_workers(self, source_count: int) -> int:
+        """Worker processes for this many extracts (config.ingest_workers, 0 = CPU count)."""
+        workers = getattr(self.config, 'ingest_workers', 1)
+        if not workers:
+            workers = os.cpu_count() or 1
+        return max(1, min(workers, source_count))
+    
+    def _ingest_start_method(self) -> str:
         """
-        Process a single RVTools Excel file.
-        Replicates the ExtractDataFromExcel VBA function.
+        How ingest workers are started: config.ingest_start_method if set, else
+        fork (shares the already imported pandas/openpyxl) from a single-threaded
+        process such as the CLI or a batch worker. Forking a threaded process
+        (the API server) can deadlock the child on a lock another thread held,
+        so there workers come from a forkserver, or spawn where that is missing.
         """
-        self.logger.info(f"Processing file: {file_path.name}")
+        available = multiprocessing.get_all_start_methods()
+        method = getattr(self.config, 'ingest_start_method', None)
+        if method:
+            if method not in available:
+                raise ValueError(f"Start method '{method}' is not available here; expected one of {available}")
+            return method
+        if "fork" in available and threading.active_count() == 1:
+            return "fork"
+        return "forkserver" if "forkserver" in available else "spawn"
+    
+    def _process_sources_parallel(self, sources: List[Source], workers: int, progress_callback=None,
+                                  rows_callback=None):
+        """
+        Read extracts in worker processes, then queue their frames in discovery
+        order so the consolidated frames match a sequential run.
+        """
+        method = self._ingest_start_method()
+        self.logger.info(f"Reading {len(sources)} extracts with {workers} worker processes ({method})")
+        context = multiprocessing.get_context(method)
+        if method == "forkserver":
+            context.set_forkserver_preload([__name__])     # workers fork with pandas/openpyxl imported
+        results: Dict[int, Any] = {}
+        with ProcessPoolExecutor(max_workers=workers, mp_context=context) as executor:
+            futures = {executor.submit(_read_source, source, self.config): i for i, source in enumerate(sources)}
+            for done, future in enumerate(as_completed(futures), start=1):
+                i = futures[future]
+                try:
+                    results[i] = future.result()
+                except Exception as e:
+                    results[i] = e
+                else:
+                    if rows_callback:
+                        rows_callback(sources[i].name, sum(len(frame) for frame in results[i][0].values()))
+                if progress_callback:
+                    progress_callback(int((done / len(sources)) * 100), f"Processed {sources[i].name}")
         
-        try:
-            # Read all sheets from the Excel file
-            xl_file = pd.ExcelFile(file_path)
-            
-            # Process vInfo sheet
-            if 'vInfo' in xl_file.sheet_names:
-                self._process_vinfo_sheet(xl_file, file_path.name)
-            else:
-                self.logger.warning(f"vInfo sheet not found in {file_path.name}")
-            
-            # Process vHost sheet
-            if 'vHost' in xl_file.sheet_names:
-                self._process_vhost_sheet(xl_file, file_path.name)
-            else:
-                self.logger.warning(f"vHost sheet not found in {file_path.name}")
-            
-            # Process vMetaData sheet
-            if 'vMetaData' in xl_file.sheet_names:
-                self._process_metadata_sheet(xl_file, file_path.name)
+        for i, source in enumerate(sources):
+            if isinstance(results[i], Exception):
+                self._record_failure(source, results[i])
             else:
-                self.logger.warning(f"vMetaData sheet not found in {file_path.name}")
-                
-        except Exception as e:
-            raise Exception(f"Error reading Excel file: {str(e)}")
+                frames, seconds = results[i]
+                self._add_frames(source, frames, seconds)
     
-    def _process_vinfo_sheet(self, xl_file: pd.ExcelFile, source_filename: str):
-        """Process vInfo sheet data."""
-        try:
-            df = pd.read_excel(xl_file, sheet_name='vInfo')
-            
-            if df.empty:
-                return
-            
-            # Find header row (look for first required column)
-            header_row = 0
-            first_col = self.config.required_vinfo_cols[0]
-            
-            for i, row in df.iterrows():
-                if first_col in row.values:
-                    header_row = i if isinstance(i, int) else 0
-                    break
-            
-            # Re-read with correct header
-            if header_row > 0:
-                df = pd.read_excel(xl_file, sheet_name='vInfo', header=header_row)
-            
-            # Extract required columns
-            extracted_data = {}
-            for col in self.config.required_vinfo_cols:
-                if col == 'OS Classification':
-                    # Calculate OS Classification
-                    os_config = df.get('OS according to the configuration file', pd.Series(dtype=str))
-                    os_tools = df.get('OS according to the VMware Tools', pd.Series(dtype=str))
-                    
-                    extracted_data[col] = [
-                        self.config.classify_os(config_val, tools_val)
-                        for config_val, tools_val in zip(os_config.fillna(''), os_tools.fillna(''))
-                    ]
-                else:
-                    extracted_data[col] = df.get(col, pd.Series(dtype=object)).values
-            
-            # Add source file column
-            extracted_data['SourceFile'] = [source_filename] * len(df)
-            
-            # Create DataFrame and append to consolidated data
-            new_data = pd.DataFrame(extracted_data)
-            self.consolidated_vinfo = pd.concat([self.consolidated_vinfo, new_data], ignore_index=True)
-            
-            self.stats['vms_processed'] += len(new_data)
-            self.logger.info(f"Processed {len(new_data)} VMs from vInfo sheet")
-            
-        except Exception as e:
-            raise Exception(f"Error processing vInfo sheet: {str(e)}")
+    def _add_frames(self, source: Source, frames: Dict[str, pd.DataFrame], seconds: float):
+        """Queue one extract's frames for consolidation and record its statistics."""
+        for key, frame in frames.items():
+            if not frame.empty:
+                self._parts.setdefault(key, []).append(frame)
+        vms, hosts = len(frames.get('vinfo', ())), len(frames.get('vhost', ()))
+        self.stats['vms_processed'] += vms
+        self.stats['hosts_processed'] += hosts
+        self.stats['files_processed'] += 1
+        self.processed_files.append(source.name)
+        self.file_stats.append({
+            'file': source.name,
+            'kind': source.kind,
+            'status': 'success',
+            'vms': vms,
+            'hosts': hosts,
+            'rows': {key: len(frame) for key, frame in frames.items()},
+            'seconds': round(seconds, 4),
+        })
     
-    def _process_vhost_sheet(self, xl_file: pd.ExcelFile, source_filename: str):
-        """Process vHost sheet data."""
-        try:
-            df = pd.read_excel(xl_file, sheet_name='vHost')
-            
-            if df.empty:
-                return
-            
-            # Find header row
-            header_row = 0
-            first_col = self.config.required_vhost_cols[0]
-            
-            for i, row in df.iterrows():
-                if first_col in row.values:
-                    header_row = i if isinstance(i, int) else 0
-                    break
-            
-            # Re-read with correct header
-            if header_row > 0:
-                df = pd.read_excel(xl_file, sheet_name='vHost', header=header_row)
-            
-            # Extract required columns
-            extracted_data = {}
-            for col in self.config.required_vhost_cols:
-                if col in ['CPU usage %', 'Memory usage %']:
-                    # Handle percentage columns (replicate VBA logic)
-                    series = df.get(col, pd.Series(dtype=object))
-                    processed_values = []
-                    
-                    for val in series:
-                        try:
-                            if pd.isna(val):
-                                processed_values.append(np.nan)
-                                continue
-                            
-                            # Remove % symbol and convert
-                            val_str = str(val).replace('%', '').strip()
-                            if val_str and val_str.replace('.', '').replace('-', '').isdigit():
-                                num_val = float(val_str)
-                                # Convert to decimal if needed
-                                if num_val > 1:
-                                    num_val = num_val / 100
-                                # Ensure between 0 and 1
-                                num_val = max(0, min(1, num_val))
-                                processed_values.append(num_val)
-                            else:
-                                processed_values.append(np.nan)
-                        except:
-                            processed_values.append(np.nan)
-                    
-                    extracted_data[col] = processed_values
-                else:
-                    extracted_data[col] = df.get(col, pd.Series(dtype=object)).values
-            
-            # Add source file column
-            extracted_data['SourceFile'] = [source_filename] * len(df)
-            
-            # Create DataFrame and append to consolidated data
-            new_data = pd.DataFrame(extracted_data)
-            self.consolidated_vhost = pd.concat([self.consolidated_vhost, new_data], ignore_index=True)
-            
-            self.stats['hosts_processed'] += len(new_data)
-            self.logger.info(f"Processed {len(new_data)} hosts from vHost sheet")
-            
-        except Exception as e:
-            raise Exception(f"Error processing vHost sheet: {str(e)}")
+    def _record_failure(self, source: Source, error: Exception):
+        """Record an extract that could not be read; the run continues without it."""
+        error_msg = f"Error processing {source.name}: {str(error)}"
+        self.logger.error(error_msg)
+        self.stats['errors'].append(error_msg)
+        self.file_stats.append({'file': source.name, 'kind': source.kind, 'status': 'error', 'error': str(error)})
     
-    def _process_metadata_sheet(self, xl_file: pd.ExcelFile, source_filename: str):
-        """Process vMetaData sheet."""
-        try:
-            df = pd.read_excel(xl_file, sheet_name='vMetaData')
-            
-            if df.empty:
-                return
-            
-            # Add source file column as first column
-            df.insert(0, 'SourceFile_Meta', source_filename)
-            
-            # Append to consolidated metadata
-            self.consolidated_metadata = pd.concat([self.consolidated_metadata, df], ignore_index=True)
-            
-            self.logger.info(f"Processed metadata with {len(df)} rows")
-            
-        except Exception as e:
-            raise Exception(f"Error processing vMetaData sheet: {str(e)}")
+    def _consolidate_parts(self):
+        """Concatenate the frames read from each workbook into the consolidated frames."""
+        for plugin in self.plugins:
+            parts = self._parts.pop(plugin.key, [])
+            if parts:
+                setattr(self, f"consolidated_{plugin.key}", pd.concat(parts, ignore_index=True))
+    
+    def _remove_cross_file_duplicates(self):
+        """Apply the configured duplicate policy to VMs, hosts and the optional sheets."""
+        vm_keys = self.config.duplicate_vm_keys
+        frames, self.duplicate_report = deduplicate(
+            {
+                'vms': self.consolidated_vinfo,
+                'hosts': self.consolidated_vhost,
+                'vcpu': self.consolidated_vcpu,
+                'vmemory': self.consolidated_vmemory,
+                'vdisk': self.consolidated_vdisk,
+                'vpartition': self.consolidated_vpartition,
+                'vdatastore': self.consolidated_vdatastore,
+                'vcluster': self.consolidated_vcluster,
+            },
+            keys={'vms': vm_keys, 'hosts': self.config.duplicate_host_keys, 'vcpu': vm_keys, 'vmemory': vm_keys,
+                  'vdisk': vm_keys, 'vpartition': vm_keys,
+                  'vdatastore': self.config.duplicate_datastore_keys,
+                  'vcluster': self.config.duplicate_cluster_keys},
+            sources=self.processed_files,
+            metadata=self.consolidated_metadata,
+            policy=self.config.duplicate_policy
+        )
+        self.consolidated_vinfo = frames['vms']
+        self.consolidated_vhost = frames['hosts']
+        self.consolidated_vcpu = frames['vcpu']
+        self.consolidated_vmemory = frames['vmemory']
+        self.consolidated_vdisk = frames['vdisk']
+        self.consolidated_vpartition = frames['vpartition']
+        self.consolidated_vdatastore = frames['vdatastore']
+        self.consolidated_vcluster = frames['vcluster']
     
     def _post_process_data(self):
         """Post-process consolidated data (add utilization buckets, etc.)."""
@@ -329,34 +354,44 @@ class RVToolsDataProcessor:
         return {
             'vinfo': self.consolidated_vinfo,
             'vhost': self.consolidated_vhost,
-            'metadata': self.consolidated_metadata
+            'metadata': self.consolidated_metadata,
+            'vcpu': self.consolidated_vcpu,
+            'vmemory': self.consolidated_vmemory,
+            'vdisk': self.consolidated_vdisk,
+            'vpartition': self.consolidated_vpartition,
+            'vdatastore': self.consolidated_vdatastore,
+            'vcluster': self.consolidated_vcluster
         }
     
-    def export_to_excel(self, output_path: Path) -> bool:
-        """Export consolidated data to Excel file."""
+    def export_to_excel(self, output_path: Path, progress_callback=None) -> bool:
+        """
+        Export consolidated data to Excel file.
+        
+        Args:
+            progress_callback: Called with (fraction of rows written, message)
+                before each sheet
+        """
         try:
+            sheets = [(self.config.output_sheets[key], frame) for key, frame in (
+                ('consolidated_vinfo', self.consolidated_vinfo),
+                ('consolidated_vhost', self.consolidated_vhost),
+                ('consolidated_metadata', self.consolidated_metadata),
+                ('consolidated_vcpu', self.consolidated_vcpu),
+                ('consolidated_vmemory', self.consolidated_vmemory),
+                ('consolidated_vdisk', self.consolidated_vdisk),
+                ('consolidated_vpartition', self.consolidated_vpartition),
+                ('consolidated_vdatastore', self.consolidated_vdatastore),
+                ('consolidated_vcluster', self.consolidated_vcluster),
+            ) if not frame.empty]
+            total_rows = sum(len(frame) for _, frame in sheets) or 1
+            written = 0
             with pd.ExcelWriter(output_path, engine='openpyxl') as writer:
                 # Write consolidated data to separate sheets
-                if not self.consolidated_vinfo.empty:
-                    self.consolidated_vinfo.to_excel(
-                        writer, 
-                        sheet_name=self.config.output_sheets['consolidated_vinfo'],
-                        index=False
-                    )
-                
-                if not self.consolidated_vhost.empty:
-                    self.consolidated_vhost.to_excel(
-                        writer,
-                        sheet_name=self.config.output_sheets['consolidated_vhost'], 
-                        index=False
-                    )
-                
-                if not self.consolidated_metadata.empty:
-                    self.consolidated_metadata.to_excel(
-                        writer,
-                        sheet_name=self.config.output_sheets['consolidated_metadata'],
-                        index=False
-                    )
+                for sheet_name, frame in sheets:
+                    if progress_callback:
+                        progress_callback(written / total_rows, f"Writing {sheet_name}")
+                    frame.to_excel(writer, sheet_name=sheet_name, index=False)
+                    written += len(frame)
             
             self.logger.info(f"Data exported to: {output_path}")
             return True
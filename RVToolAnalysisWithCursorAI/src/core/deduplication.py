@@ -0,0 +1,157 @@
+"""
+Cross-File Deduplication
+Detects VMs and hosts that appear in more than one source workbook, e.g. when
+the same vCenter is exported twice or exports overlap.
+
+Rows are grouped by identity key (VI SDK Server + VM for VMs, Host for hosts)
+plus an occurrence number within their own file, so two same-named VMs in
+one vCenter stay distinct and are only paired with their counterparts in
+another file. Grouping is a single hash-based groupby, linear in the number
+of rows. Rows with a missing key are never treated as duplicates.
+
+Policies:
+    latest  keep the copy from the workbook with the newest extract date
+            (vMetaData 'xlsx creation datetime'; undated workbooks rank oldest,
+            ties go to the later file)
+    first   keep the copy from the first workbook processed
+    flag    keep every row and mark the extra copies in 'Duplicate' /
+            'Duplicate Of'
+"""
+
+import logging
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from .snapshot_store import as_text
+
+DUPLICATE_POLICIES = ("latest", "first", "flag")
+
+
+@dataclass
+class DuplicateReport:
+    """Duplicate rows found per frame, and which workbook each duplicated."""
+    policy: str
+    counts: Dict[str, int] = field(default_factory=dict)
+    sources: List[Dict[str, Any]] = field(default_factory=list)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "policy": self.policy,
+            "removed": self.policy != "flag",
+            **self.counts,
+            "sources": self.sources,
+        }
+
+
+def source_ranks(sources: List[str], metadata: Optional[pd.DataFrame], policy: str) -> Dict[str, int]:
+    """
+    Preference rank of each source workbook (higher wins).
+
+    Args:
+        sources: Workbook names in processing order
+        metadata: Consolidated vMetaData (SourceFile_Meta, xlsx creation datetime)
+        policy: "latest" or "first" ("flag" ranks like "first")
+    """
+    if policy != "latest":
+        return {source: len(sources) - i for i, source in enumerate(sources)}
+    dates = pd.Series(pd.NaT, index=sources, dtype="datetime64[ns]")
+    if metadata is not None and {'SourceFile_Meta', 'xlsx creation datetime'} <= set(metadata.columns):
+        extracted = pd.to_datetime(metadata['xlsx creation datetime'], errors='coerce')
+        latest = extracted.groupby(metadata['SourceFile_Meta']).max()
+        dates.update(latest[latest.index.isin(sources)])
+    order = sorted(range(len(sources)),
+                   key=lambda i: (pd.notna(dates.iloc[i]), dates.iloc[i] if pd.notna(dates.iloc[i]) else 0, i))
+    return {sources[i]: rank for rank, i in enumerate(order, start=1)}
+
+
+def find_duplicates(frame: pd.DataFrame, keys: List[str], ranks: Dict[str, int],
+                    source_column: str = 'SourceFile') -> Tuple[np.ndarray, pd.Series]:
+    """
+    Mark rows duplicated by a preferred copy in another source.
+
+    Returns:
+        (duplicate mask, source of the kept copy for each duplicate row)
+    """
+    none = np.zeros(len(frame), dtype=bool), pd.Series(None, index=frame.index, dtype=object)
+    if frame.empty or source_column not in frame.columns or not set(keys) <= set(frame.columns):
+        return none
+
+    identity = pd.DataFrame({key: as_text(frame[key], normalize=True) for key in keys}, index=frame.index)
+    complete = identity.notna().all(axis=1).values
+    if not complete.any():
+        return none
+    identity = identity[complete]
+    source = frame[source_column][complete].astype(str)
+    # nth same-keyed row of one file pairs with the nth of another
+    identity['_occurrence'] = identity.groupby([source.values, *[identity[k] for k in keys]],
+                                               sort=False).cumcount().values
+    groups = [identity[column] for column in identity.columns]
+    rank = source.map(ranks).fillna(0)
+    best = rank.groupby(groups, sort=False).transform('max')
+    kept = rank == best
+    duplicate = np.zeros(len(frame), dtype=bool)
+    duplicate[complete] = ~kept.values
+
+    kept_source = source.where(kept).groupby(groups, sort=False).transform('first')
+    duplicate_of = pd.Series(None, index=frame.index, dtype=object)
+    duplicate_of[complete] = kept_source.where(~kept).values
+    return duplicate, duplicate_of
+
+
+def deduplicate(frames: Dict[str, pd.DataFrame], keys: Dict[str, List[str]], sources: List[str],
+                metadata: Optional[pd.DataFrame] = None,
+                policy: str = "latest") -> Tuple[Dict[str, pd.DataFrame], DuplicateReport]:
+    """
+    Remove or flag cross-file duplicates in consolidated frames.
+
+    Args:
+        frames: Frame name -> consolidated frame with a SourceFile column
+        keys: Frame name -> identity key columns (frames without an entry are left alone)
+        sources: Workbook names in processing order
+        metadata: Consolidated vMetaData, for the "latest" policy
+        policy: One of DUPLICATE_POLICIES
+
+    Returns:
+        (frames with duplicates removed or flagged, DuplicateReport)
+
+    Raises:
+        ValueError: On an unknown policy
+    """
+    if policy not in DUPLICATE_POLICIES:
+        raise ValueError(f"Unknown duplicate policy '{policy}'. Expected one of {list(DUPLICATE_POLICIES)}")
+    logger = logging.getLogger(__name__)
+    ranks = source_ranks(sources, metadata, policy)
+    report = DuplicateReport(policy=policy)
+    pairs: Dict[Tuple[str, str], Dict[str, int]] = {}
+
+    result = dict(frames)
+    for name, frame in frames.items():
+        if name not in keys:
+            continue
+        duplicate, duplicate_of = find_duplicates(frame, keys[name], ranks)
+        report.counts[name] = int(duplicate.sum())
+        if not duplicate.any():
+            if policy == "flag" and not frame.empty:
+                result[name] = frame.assign(**{'Duplicate': False, 'Duplicate Of': None})
+            continue
+
+        counts = pd.DataFrame({'source': frame['SourceFile'][duplicate].astype(str).values,
+                               'kept': duplicate_of[duplicate].values}).value_counts()
+        for (source, kept), count in counts.items():
+            pairs.setdefault((source, kept), {})[name] = int(count)
+
+        if policy == "flag":
+            result[name] = frame.assign(**{'Duplicate': duplicate, 'Duplicate Of': duplicate_of})
+        else:
+            result[name] = frame[~duplicate].reset_index(drop=True)
+
+    report.sources = [{"source_file": source, "duplicate_of": kept, **counts}
+                      for (source, kept), counts in sorted(pairs.items())]
+    if any(report.counts.values()):
+        action = "flagged" if policy == "flag" else "removed"
+        logger.warning(f"Cross-file duplicates {action} (policy '{policy}'): "
+                       + ", ".join(f"{count} {name}" for name, count in report.counts.items() if count))
+    return result, report
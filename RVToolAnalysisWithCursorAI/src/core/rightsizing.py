@@ -0,0 +1,213 @@
+"""
+Right-Sizing Engine
+Recommends per-VM vCPU and RAM sizes from allocation and observed usage.
+
+Usage comes from the optional vCPU / vMemory sheets where a workbook has them
+(Overall / Max MHz and Active / Size MiB per VM). Otherwise it is estimated
+from the VM's host: the host's busy cores and used memory are shared across
+its powered-on VMs in proportion to what each VM is allocated.
+
+Every step is a whole-column pandas/numpy operation, so the whole estate is
+sized in one pass. Recommendations only ever shrink a VM.
+"""
+
+import logging
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+NO_CLUSTER = "(no cluster)"
+
+
+@dataclass
+class RightsizingPolicy:
+    """Utilization targets and floors for recommended sizes."""
+    target_cpu_utilization: float = 0.7
+    target_memory_utilization: float = 0.8
+    min_vcpus: int = 1
+    min_memory_gb: float = 1
+    memory_granularity_mib: int = 1024
+
+    @classmethod
+    def from_config(cls, config) -> "RightsizingPolicy":
+        return cls(
+            target_cpu_utilization=config.rightsizing_target_cpu_utilization,
+            target_memory_utilization=config.rightsizing_target_memory_utilization,
+            min_vcpus=config.rightsizing_min_vcpus,
+            min_memory_gb=config.rightsizing_min_memory_gb,
+            memory_granularity_mib=config.rightsizing_memory_granularity_mib,
+        )
+
+
+@dataclass
+class RightsizingResult:
+    """Per-VM recommendations, per-cluster reclaimable totals and estate totals."""
+    vms: pd.DataFrame
+    clusters: pd.DataFrame
+    totals: Dict[str, Any]
+
+
+def _join_keys(left: pd.DataFrame, right: pd.DataFrame, keys: List[str]) -> List[str]:
+    """`keys` where both frames have every column, else just the first key."""
+    return keys if all(k in left.columns and k in right.columns for k in keys) else keys[:1]
+
+
+def _sheet_utilization(vms: pd.DataFrame, sheet: Optional[pd.DataFrame], used_col: str,
+                       size_col: str) -> pd.Series:
+    """Per-VM used/size ratio from an optional usage sheet, aligned to `vms` (NaN where unknown)."""
+    if sheet is None or sheet.empty or not {'VM', used_col, size_col} <= set(sheet.columns):
+        return pd.Series(np.nan, index=vms.index)
+    keys = _join_keys(vms, sheet, ['VM', 'VI SDK Server'])
+    usage = sheet[keys].copy()
+    used = pd.to_numeric(sheet[used_col], errors='coerce')
+    size = pd.to_numeric(sheet[size_col], errors='coerce')
+    usage['_util'] = (used / size.where(size > 0)).clip(0, 1)
+    # Names that repeat under the same key are ambiguous; leave those VMs to the host estimate
+    usage = usage.drop_duplicates(subset=keys, keep=False)
+    merged = vms[keys].merge(usage, on=keys, how='left')
+    return pd.Series(merged['_util'].values, index=vms.index)
+
+
+def _host_utilization(vms: pd.DataFrame, vhost: pd.DataFrame, cpus: pd.Series,
+                      memory_mib: pd.Series) -> pd.DataFrame:
+    """Host-estimated per-vCPU and per-MiB utilization for each VM (NaN where the host is unknown)."""
+    empty = pd.DataFrame({'cpu': np.nan, 'memory': np.nan}, index=vms.index)
+    if vhost is None or vhost.empty or 'Host' not in vhost.columns or 'Host' not in vms.columns:
+        return empty
+    keys = _join_keys(vms, vhost, ['Host', 'SourceFile'])
+    hosts = pd.DataFrame({
+        **{k: vhost[k] for k in keys},
+        '_cpu_busy_cores': pd.to_numeric(vhost.get('CPU usage %'), errors='coerce')
+        * pd.to_numeric(vhost.get('# Cores'), errors='coerce'),
+        '_memory_used_mib': pd.to_numeric(vhost.get('Memory usage %'), errors='coerce')
+        * pd.to_numeric(vhost.get('# Memory'), errors='coerce'),
+    }).dropna(subset=['Host']).drop_duplicates(subset=keys)
+
+    frame = vms[keys].copy()
+    frame['_cpus'] = cpus.values
+    frame['_memory'] = memory_mib.values
+    frame = frame.reset_index(drop=True).merge(hosts, on=keys, how='left')
+    allocated = frame.groupby(keys, dropna=False)[['_cpus', '_memory']].transform('sum')
+    cpu = (frame['_cpu_busy_cores'] / allocated['_cpus'].where(allocated['_cpus'] > 0)).clip(0, 1)
+    memory = (frame['_memory_used_mib'] / allocated['_memory'].where(allocated['_memory'] > 0)).clip(0, 1)
+    return pd.DataFrame({'cpu': cpu.values, 'memory': memory.values}, index=vms.index)
+
+
+def recommend_sizes(vinfo: pd.DataFrame, vhost: Optional[pd.DataFrame] = None,
+                    vcpu: Optional[pd.DataFrame] = None, vmemory: Optional[pd.DataFrame] = None,
+                    policy: Optional[RightsizingPolicy] = None) -> RightsizingResult:
+    """
+    Recommend vCPU and RAM for every powered-on VM.
+
+    Recommended vCPUs = ceil(vCPUs x utilization / target CPU utilization) and
+    recommended RAM = utilization x allocated RAM / target memory utilization,
+    rounded up to the memory granularity; both are clamped between the policy
+    minimum and the current allocation. VMs with no usage data keep their size.
+
+    Args:
+        vinfo: Consolidated vInfo
+        vhost: Consolidated vHost (host CPU/memory usage for the estimate)
+        vcpu: Consolidated vCPU sheet (Overall / Max MHz per VM), if available
+        vmemory: Consolidated vMemory sheet (Active / Size MiB per VM), if available
+        policy: Right-sizing targets (defaults to RightsizingPolicy())
+
+    Returns:
+        RightsizingResult; RightsizingResult.vms keeps the vInfo row index in 'vinfo_index'
+    """
+    logger = logging.getLogger(__name__)
+    policy = policy or RightsizingPolicy()
+
+    vms = vinfo
+    if 'Powerstate' in vms.columns:
+        vms = vms[vms['Powerstate'].astype(str).str.lower() == 'poweredon']
+    cpus = pd.to_numeric(vms.get('CPUs'), errors='coerce')
+    memory_mib = pd.to_numeric(vms.get('Memory'), errors='coerce')
+
+    host_util = _host_utilization(vms, vhost, cpus, memory_mib)
+    sheet_cpu = _sheet_utilization(vms, vcpu, 'Overall', 'Max')
+    sheet_memory = _sheet_utilization(vms, vmemory, 'Active', 'Size MiB')
+    cpu_util = sheet_cpu.fillna(host_util['cpu'])
+    memory_util = sheet_memory.fillna(host_util['memory'])
+
+    # 1e-9 keeps exact multiples (e.g. 2.0 vCPUs of demand) from rounding up a whole unit
+    demand_vcpus = cpus * cpu_util / policy.target_cpu_utilization
+    recommended_vcpus = np.ceil(demand_vcpus - 1e-9).clip(lower=policy.min_vcpus)
+    recommended_vcpus = recommended_vcpus.where(recommended_vcpus < cpus, cpus).where(cpu_util.notna(), cpus)
+
+    granularity = policy.memory_granularity_mib
+    demand_mib = memory_mib * memory_util / policy.target_memory_utilization
+    recommended_mib = (np.ceil(demand_mib / granularity - 1e-9) * granularity).clip(lower=policy.min_memory_gb * 1024)
+    recommended_mib = recommended_mib.where(recommended_mib < memory_mib, memory_mib).where(memory_util.notna(), memory_mib)
+
+    result = pd.DataFrame({
+        'vinfo_index': vms.index,
+        'VM': vms.get('VM', pd.Series(index=vms.index, dtype=object)).values,
+        'Cluster': (vms['Cluster'].fillna(NO_CLUSTER).astype(str).values
+                    if 'Cluster' in vms.columns else NO_CLUSTER),
+        'CPUs': cpus.values,
+        'Memory MiB': memory_mib.values,
+        'CPU utilization': cpu_util.values,
+        'Memory utilization': memory_util.values,
+        'CPU source': np.where(sheet_cpu.notna(), 'vCPU sheet', np.where(host_util['cpu'].notna(), 'host estimate', 'none')),
+        'Memory source': np.where(sheet_memory.notna(), 'vMemory sheet',
+                                  np.where(host_util['memory'].notna(), 'host estimate', 'none')),
+        'Recommended CPUs': recommended_vcpus.values,
+        'Recommended Memory MiB': recommended_mib.values,
+    })
+    result['Reclaimable vCPUs'] = (result['CPUs'] - result['Recommended CPUs']).fillna(0)
+    result['Reclaimable RAM GB'] = ((result['Memory MiB'] - result['Recommended Memory MiB']) / 1024).fillna(0)
+
+    clusters = result.groupby('Cluster', sort=True).agg(
+        vms=('VM', 'size'),
+        vcpus=('CPUs', 'sum'),
+        recommended_vcpus=('Recommended CPUs', 'sum'),
+        reclaimable_vcpus=('Reclaimable vCPUs', 'sum'),
+        ram_gb=('Memory MiB', lambda s: s.sum() / 1024),
+        recommended_ram_gb=('Recommended Memory MiB', lambda s: s.sum() / 1024),
+        reclaimable_ram_gb=('Reclaimable RAM GB', 'sum'),
+    ).reset_index()
+    clusters['vms_rightsized'] = result.assign(
+        _changed=(result['Reclaimable vCPUs'] > 0) | (result['Reclaimable RAM GB'] > 0)
+    ).groupby('Cluster', sort=True)['_changed'].sum().values
+
+    totals = {
+        "vms": int(len(result)),
+        "vms_rightsized": int(clusters['vms_rightsized'].sum()),
+        "vms_without_usage": int(((result['CPU source'] == 'none') & (result['Memory source'] == 'none')).sum()),
+        "vms_with_sheet_usage": int(((result['CPU source'] == 'vCPU sheet')
+                                     | (result['Memory source'] == 'vMemory sheet')).sum()),
+        "vcpus": float(result['CPUs'].sum()),
+        "recommended_vcpus": float(result['Recommended CPUs'].sum()),
+        "reclaimable_vcpus": float(result['Reclaimable vCPUs'].sum()),
+        "ram_gb": round(float(result['Memory MiB'].sum() / 1024), 2),
+        "recommended_ram_gb": round(float(result['Recommended Memory MiB'].sum() / 1024), 2),
+        "reclaimable_ram_gb": round(float(result['Reclaimable RAM GB'].sum()), 2),
+    }
+    logger.info(f"Right-sizing: {totals['vms_rightsized']} of {totals['vms']} VMs can shrink, "
+                f"{totals['reclaimable_vcpus']:,.0f} vCPUs and {totals['reclaimable_ram_gb']:,.0f} GB reclaimable")
+    return RightsizingResult(vms=result, clusters=clusters, totals=totals)
+
+
+def apply_recommendations(vinfo: pd.DataFrame, result: RightsizingResult) -> pd.DataFrame:
+    """Copy of `vinfo` with CPUs and Memory replaced by the recommended sizes."""
+    rightsized = vinfo.copy()
+    index = result.vms['vinfo_index'].values
+    rightsized['CPUs'] = pd.to_numeric(rightsized['CPUs'], errors='coerce')
+    rightsized['Memory'] = pd.to_numeric(rightsized['Memory'], errors='coerce')
+    rightsized.loc[index, 'CPUs'] = result.vms['Recommended CPUs'].values
+    rightsized.loc[index, 'Memory'] = result.vms['Recommended Memory MiB'].values
+    return rightsized
+
+
+def update_dashboard_metrics(metrics, result: RightsizingResult):
+    """Fill the right-sizing fields of a DashboardMetrics from a RightsizingResult."""
+    totals = result.totals
+    metrics.reclaimable_vcpus = totals["reclaimable_vcpus"]
+    metrics.reclaimable_ram_gb = totals["reclaimable_ram_gb"]
+    metrics.rightsized_vcpus = totals["recommended_vcpus"]
+    metrics.rightsized_ram_gb = totals["recommended_ram_gb"]
+    if metrics.total_physical_cores > 0:
+        metrics.rightsized_vcpu_to_pcore_ratio = totals["recommended_vcpus"] / metrics.total_physical_cores
+    return metrics
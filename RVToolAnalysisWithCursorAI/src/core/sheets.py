@@ -0,0 +1,465 @@
+"""
+Sheet Plugins
+Declares which RVTools worksheets are ingested, the columns kept from each,
+their dtypes and normalizers, and reads them from a workbook in one pass.
+
+Each SheetPlugin names its worksheet, the consolidated frame it feeds and the
+dashboard metric groups that need it. Only plugins for the enabled metric
+groups (AppConfig.enabled_metrics) are read; the core inventory sheets
+(vInfo, vHost, vMetaData) are always read.
+
+Reading opens the workbook once (openpyxl read-only) and streams each needed
+worksheet's rows exactly once: the header row is found within the first
+HEADER_SEARCH_ROWS rows (exports with title rows above the header are
+common), then only the declared columns are kept. Header names are matched
+case-, space- and underscore-insensitively, and through each column's aliases
+for older RVTools versions.
+
+RVTools CSV exports (one file per tab) go through read_csv: the same header
+search and column matching, then Pandas' C parser (pyarrow when installed)
+reads only the declared columns. Both readers finish frames the same way, so
+every source maps onto the same consolidated schema.
+
+Usage:
+    plugins = plugins_for(config)
+    frames = read_workbook(Path("export.xlsx"), plugins, config)
+    frames['vinfo'], frames.get('vdatastore')
+"""
+
+import csv
+import io
+import logging
+from dataclasses import dataclass
+from itertools import islice
+from operator import itemgetter
+from pathlib import Path
+from typing import Any, BinaryIO, Callable, Dict, Iterable, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+import pandas as pd
+
+try:
+    import pyarrow  # noqa: F401  (multi-threaded CSV parsing)
+    CSV_ENGINE = "pyarrow"
+except ImportError:
+    CSV_ENGINE = "c"
+
+# Rows searched for the header row (RVTools exports start at row 1; some
+# hand-edited or re-saved extracts carry title rows above it)
+HEADER_SEARCH_ROWS = 25
+
+# Rows between read progress reports (see read_rows' on_rows)
+PROGRESS_ROWS = 10_000
+
+# Metric groups (AppConfig.enabled_metrics) and the sheets they need
+METRIC_GROUPS = ("inventory", "rightsizing", "storage", "datastores", "cluster_capacity")
+
+CSV_DELIMITERS = (",", ";", "\t")
+
+_TRUE_STRINGS = {"true", "yes", "y", "1", "enabled", "on"}
+_FALSE_STRINGS = {"false", "no", "n", "0", "disabled", "off"}
+
+
+def canonical_name(name: Any) -> str:
+    """Header name compared case-, space- and underscore-insensitively."""
+    return "".join(str(name).split()).replace("_", "").lower()
+
+
+# --- Normalizers -----------------------------------------------------------
+
+def to_number(series: pd.Series) -> pd.Series:
+    """Numbers, numeric strings (with stray spaces or thousands separators) or NaN."""
+    if series.dtype == object or pd.api.types.is_string_dtype(series.dtype):
+        series = series.astype(object).where(series.notna(), None)
+        text = series.map(lambda value: value.replace(",", "").strip() if isinstance(value, str) else value)
+        return pd.to_numeric(text, errors="coerce").astype("float64")
+    return pd.to_numeric(series, errors="coerce").astype("float64")
+
+
+def to_percent(series: pd.Series) -> pd.Series:
+    """
+    Usage percentages as fractions, replicating the VBA import: strip '%',
+    values above 1 are percentages (27 -> 0.27), then clip to 0..1.
+    Accepts 27, "27%", "27 %", 0.27, "27.0" and " 27 ".
+    """
+    text = series.astype(object).map(
+        lambda value: value.replace("%", "").strip() if isinstance(value, str) else value
+    )
+    values = pd.to_numeric(text, errors="coerce").astype("float64")
+    values = values.where(np.isfinite(values))
+    return values.where(values <= 1, values / 100).clip(0, 1)
+
+
+def to_bool(series: pd.Series) -> pd.Series:
+    """True/False cells and their text forms ("True", "yes", "1") as a nullable boolean."""
+    def convert(value):
+        if isinstance(value, (bool, np.bool_)):
+            return bool(value)
+        if isinstance(value, (int, float, np.integer, np.floating)) and not pd.isna(value):
+            return bool(value)
+        if isinstance(value, str):
+            lowered = value.strip().lower()
+            if lowered in _TRUE_STRINGS:
+                return True
+            if lowered in _FALSE_STRINGS:
+                return False
+        return None
+    return series.astype(object).map(convert).astype("boolean")
+
+
+# --- Plugins ---------------------------------------------------------------
+
+@dataclass(frozen=True)
+class ColumnSpec:
+    """One column kept from a worksheet."""
+    name: str
+    dtype: Optional[str] = None                                  # pandas dtype after normalizing
+    normalizer: Optional[Callable[[pd.Series], pd.Series]] = None
+    aliases: Tuple[str, ...] = ()                                 # names used by other RVTools versions
+    required: bool = False                                        # added empty when the export lacks it
+
+
+@dataclass(frozen=True)
+class SheetPlugin:
+    """
+    A worksheet to ingest.
+
+    The first column is the sheet's key column: the header row is the first
+    row containing it, and a worksheet without it is skipped.
+    """
+    sheet: str                                     # worksheet name in the export
+    key: str                                       # consolidated frame (get_consolidated_data key)
+    columns: Tuple[ColumnSpec, ...] = ()
+    metrics: Tuple[str, ...] = ()                  # metric groups that need it (empty: always read)
+    all_columns: bool = False                      # keep every column as exported (vMetaData)
+    source_column: str = "SourceFile"
+    source_first: bool = False
+    warn_if_missing: bool = False
+    derive: Optional[Callable[[pd.DataFrame, Any], pd.DataFrame]] = None
+
+    def header_names(self) -> Dict[str, str]:
+        """Canonical header name (and aliases) -> declared column name."""
+        names = {}
+        for column in self.columns:
+            for name in (column.name, *column.aliases):
+                names.setdefault(canonical_name(name), column.name)
+        return names
+
+
+def _columns(names: Sequence[str], types: Optional[Dict[str, tuple]] = None, required: bool = False,
+             aliases: Optional[Dict[str, Tuple[str, ...]]] = None) -> Tuple[ColumnSpec, ...]:
+    """ColumnSpecs for configured column names; `types` maps a name to (dtype, normalizer)."""
+    types = types or {}
+    aliases = aliases or {}
+    return tuple(
+        ColumnSpec(name, *types.get(name, (None, None)), aliases=aliases.get(name, ()), required=required)
+        for name in names
+    )
+
+
+NUMBER = ("float64", to_number)
+PERCENT = ("float64", to_percent)
+BOOLEAN = ("boolean", to_bool)
+
+
+def classify_vinfo_os(frame: pd.DataFrame, config) -> pd.DataFrame:
+    """Fill 'OS Classification', classifying each distinct (config OS, Tools OS) pair once."""
+    if frame.empty:
+        return frame
+    os_config = frame.get('OS according to the configuration file', pd.Series(None, index=frame.index))
+    os_tools = frame.get('OS according to the VMware Tools', pd.Series(None, index=frame.index))
+    pairs = pd.DataFrame({'config': os_config.astype(object).where(os_config.notna(), ''),
+                          'tools': os_tools.astype(object).where(os_tools.notna(), '')})
+    codes, uniques = pd.factorize(pd.MultiIndex.from_frame(pairs))
+    labels = np.array([config.classify_os(config_os, tools_os) for config_os, tools_os in uniques], dtype=object)
+    frame['OS Classification'] = labels[codes]
+    return frame
+
+
+def default_plugins(config) -> List[SheetPlugin]:
+    """Every known sheet plugin, with column names taken from the configuration."""
+    return [
+        SheetPlugin(
+            'vInfo', 'vinfo',
+            _columns(config.required_vinfo_cols, required=True) + _columns(config.optional_vinfo_cols),
+            warn_if_missing=True, derive=classify_vinfo_os,
+        ),
+        SheetPlugin(
+            'vHost', 'vhost',
+            _columns(config.required_vhost_cols, {'CPU usage %': PERCENT, 'Memory usage %': PERCENT},
+                     required=True),
+            warn_if_missing=True,
+        ),
+        SheetPlugin('vMetaData', 'metadata', all_columns=True, source_column='SourceFile_Meta',
+                    source_first=True, warn_if_missing=True),
+        SheetPlugin('vCPU', 'vcpu', _columns(config.optional_vcpu_cols), metrics=('rightsizing',)),
+        SheetPlugin('vMemory', 'vmemory', _columns(config.optional_vmemory_cols), metrics=('rightsizing',)),
+        SheetPlugin(
+            'vDisk', 'vdisk',
+            _columns(config.optional_vdisk_cols, {'Capacity MiB': NUMBER, 'Thin': BOOLEAN},
+                     aliases={'Capacity MiB': ('Capacity MB',)}),
+            metrics=('storage',),
+        ),
+        SheetPlugin(
+            'vPartition', 'vpartition',
+            _columns(config.optional_vpartition_cols,
+                     {'Capacity MiB': NUMBER, 'Consumed MiB': NUMBER, 'Free MiB': NUMBER, 'Free %': NUMBER},
+                     aliases={'Capacity MiB': ('Capacity MB',), 'Consumed MiB': ('Consumed MB',),
+                              'Free MiB': ('Free MB',)}),
+            metrics=('storage',),
+        ),
+        SheetPlugin(
+            'vDatastore', 'vdatastore',
+            _columns(config.optional_vdatastore_cols,
+                     {'Capacity MiB': NUMBER, 'Provisioned MiB': NUMBER, 'In Use MiB': NUMBER,
+                      'Free MiB': NUMBER, 'Free %': NUMBER, '# VMs': NUMBER, '# Hosts': NUMBER},
+                     aliases={'Capacity MiB': ('Capacity MB',), 'Provisioned MiB': ('Provisioned MB',),
+                              'In Use MiB': ('In Use MB',), 'Free MiB': ('Free MB',)}),
+            metrics=('datastores',),
+        ),
+        SheetPlugin(
+            'vCluster', 'vcluster',
+            _columns(config.optional_vcluster_cols,
+                     {'NumHosts': NUMBER, 'numEffectiveHosts': NUMBER, 'NumCpuCores': NUMBER,
+                      'NumCpuThreads': NUMBER, 'TotalCpu': NUMBER, 'Effective Cpu': NUMBER,
+                      'HA enabled': BOOLEAN, 'Failover Level': NUMBER, 'AdmissionControlEnabled': BOOLEAN,
+                      'DRS enabled': BOOLEAN},
+                     aliases={'Name': ('Cluster',), 'HA enabled': ('HA Enabled', 'DAS enabled')}),
+            metrics=('cluster_capacity',),
+        ),
+    ]
+
+
+def plugins_for(config, enabled: Optional[Iterable[str]] = None) -> List[SheetPlugin]:
+    """
+    Plugins needed by the enabled metric groups (default: config.enabled_metrics).
+
+    Raises:
+        ValueError: On an unknown metric group
+    """
+    enabled = set(config.enabled_metrics if enabled is None else enabled)
+    unknown = enabled - set(METRIC_GROUPS)
+    if unknown:
+        raise ValueError(f"Unknown metric groups {sorted(unknown)}. Expected some of {list(METRIC_GROUPS)}")
+    return [plugin for plugin in default_plugins(config)
+            if not plugin.metrics or enabled.intersection(plugin.metrics)]
+
+
+# --- Reading ---------------------------------------------------------------
+
+def _find_header(head: List[tuple], plugin: SheetPlugin) -> Optional[int]:
+    """Index of the header row within the first rows, or None."""
+    if plugin.all_columns and not plugin.columns:
+        for i, row in enumerate(head):
+            if any(value is not None and str(value).strip() for value in row):
+                return i
+        return None
+    wanted = {canonical_name(name) for name in (plugin.columns[0].name, *plugin.columns[0].aliases)}
+    for i, row in enumerate(head):
+        if any(value is not None and canonical_name(value) in wanted for value in row):
+            return i
+    return None
+
+
+def _header_columns(header: Sequence[Any], plugin: SheetPlugin) -> Tuple[List[str], List[int]]:
+    """(declared column names, their positions in the header row) for the columns present."""
+    if plugin.all_columns:
+        positions = [i for i, name in enumerate(header) if name is not None and str(name).strip()]
+        return [str(header[i]).strip() for i in positions], positions
+    lookup = plugin.header_names()
+    found: Dict[str, int] = {}
+    for i, name in enumerate(header):
+        if name is None:
+            continue
+        column = lookup.get(canonical_name(name))
+        if column is not None and column not in found:
+            found[column] = i
+    names = [column.name for column in plugin.columns if column.name in found]
+    return names, [found[name] for name in names]
+
+
+def _missing_header(plugin: SheetPlugin, source: str, logger: logging.Logger) -> None:
+    logger.warning(f"{plugin.sheet} sheet in {source} has no header row"
+                   + (f" with a '{plugin.columns[0].name}' column" if plugin.columns else "") + "; skipped")
+
+
+def finish_frame(frame: pd.DataFrame, plugin: SheetPlugin, source: str, config=None) -> pd.DataFrame:
+    """Normalize a frame of the plugin's columns (as named in the export) and add the source column."""
+    frame = frame.dropna(how='all').reset_index(drop=True)
+    if not plugin.all_columns:
+        ordered = {}
+        for column in plugin.columns:
+            if column.name in frame.columns:
+                values = frame[column.name]
+                if column.normalizer is not None:
+                    values = column.normalizer(values)
+                if column.dtype is not None:
+                    values = values.astype(column.dtype)
+                ordered[column.name] = values
+            elif column.required:
+                ordered[column.name] = pd.Series(None, index=frame.index, dtype=column.dtype or object)
+        frame = pd.DataFrame(ordered, index=frame.index)
+        if plugin.derive is not None:
+            frame = plugin.derive(frame, config)
+
+    if plugin.source_first:
+        frame.insert(0, plugin.source_column, source)
+    else:
+        frame[plugin.source_column] = source
+    return frame
+
+
+def _counted(rows: Iterable[tuple], sheet: str, on_rows: Callable[[str, int], None]) -> Iterable[tuple]:
+    """Pass rows through, reporting every PROGRESS_ROWS rows (and the remainder) to on_rows."""
+    count = 0
+    for row in rows:
+        yield row
+        count += 1
+        if count == PROGRESS_ROWS:
+            on_rows(sheet, count)
+            count = 0
+    if count:
+        on_rows(sheet, count)
+
+
+def read_rows(rows: Iterable[tuple], plugin: SheetPlugin, source: str, config=None,
+              logger: Optional[logging.Logger] = None,
+              on_rows: Optional[Callable[[str, int], None]] = None) -> Optional[pd.DataFrame]:
+    """
+    Build a plugin's frame from a worksheet's rows (tuples of cell values).
+
+    Args:
+        on_rows: Called with (sheet, rows read) every PROGRESS_ROWS rows, for
+            progress reporting
+
+    Returns:
+        The frame (declared columns, normalized, plus the source column), or
+        None when the worksheet has no header row for the plugin
+    """
+    logger = logger or logging.getLogger(__name__)
+    rows = iter(rows if on_rows is None else _counted(rows, plugin.sheet, on_rows))
+    head = list(islice(rows, HEADER_SEARCH_ROWS))
+    header_index = _find_header(head, plugin)
+    if header_index is None:
+        _missing_header(plugin, source, logger)
+        return None
+    names, positions = _header_columns(head[header_index], plugin)
+
+    width = max(positions) + 1 if positions else 0
+    body = []
+    if positions:
+        pick = itemgetter(*positions)
+        single = len(positions) == 1
+        for row in _chain(head[header_index + 1:], rows):
+            if len(row) < width:
+                row = tuple(row) + (None,) * (width - len(row))
+            picked = pick(row)
+            body.append((picked,) if single else picked)
+    frame = pd.DataFrame.from_records(body, columns=names) if body else pd.DataFrame(columns=names)
+    return finish_frame(frame, plugin, source, config)
+
+
+def read_csv(open_stream: Callable[[], BinaryIO], plugin: SheetPlugin, source: str, config=None,
+             logger: Optional[logging.Logger] = None,
+             on_rows: Optional[Callable[[str, int], None]] = None) -> Optional[pd.DataFrame]:
+    """
+    Build a plugin's frame from an RVTools CSV export of its tab.
+
+    The first HEADER_SEARCH_ROWS lines are scanned for the header row and
+    the delimiter (comma, semicolon or tab); the file is then parsed once by
+    pandas (CSV_ENGINE), keeping only the declared columns.
+
+    Args:
+        open_stream: Returns a fresh binary stream of the CSV (called twice)
+        on_rows: Called with (tab, rows read) once the file is parsed
+    """
+    logger = logger or logging.getLogger(__name__)
+    with open_stream() as raw:
+        text = io.TextIOWrapper(raw, encoding='utf-8-sig', errors='replace', newline='')
+        lines = list(islice(text, HEADER_SEARCH_ROWS))
+    sample = next((line for line in lines if line.strip()), "")
+    delimiter = max(CSV_DELIMITERS, key=sample.count) if sample else ","
+    head = [tuple(cell if cell.strip() else None for cell in row)
+            for row in csv.reader(lines, delimiter=delimiter)]
+    header_index = _find_header(head, plugin)
+    if header_index is None:
+        _missing_header(plugin, source, logger)
+        return None
+    names, positions = _header_columns(head[header_index], plugin)
+    if not positions:
+        return finish_frame(pd.DataFrame(columns=names), plugin, source, config)
+
+    with open_stream() as raw:
+        frame = pd.read_csv(raw, sep=delimiter, header=None, skiprows=header_index + 1, usecols=positions,
+                            encoding='utf-8-sig', engine=CSV_ENGINE)
+    frame = frame.rename(columns=dict(zip(positions, names)))[names]
+    if on_rows is not None:
+        on_rows(plugin.sheet, len(frame))
+    return finish_frame(frame, plugin, source, config)
+
+
+def _chain(first: List[tuple], rest: Iterable[tuple]) -> Iterable[tuple]:
+    yield from first
+    yield from rest
+
+
+def _match_sheets(sheet_names: Sequence[str], plugins: Sequence[SheetPlugin]) -> Dict[str, str]:
+    """Plugin key -> worksheet name present in the workbook (matched case-insensitively)."""
+    present = {name.lower(): name for name in sheet_names}
+    return {plugin.key: present[plugin.sheet.lower()] for plugin in plugins if plugin.sheet.lower() in present}
+
+
+def read_workbook(path: Union[Path, BinaryIO], plugins: Sequence[SheetPlugin], config=None,
+                  logger: Optional[logging.Logger] = None, name: Optional[str] = None,
+                  on_rows: Optional[Callable[[str, int], None]] = None) -> Dict[str, pd.DataFrame]:
+    """
+    Read every plugin's worksheet from one workbook in a single pass.
+
+    .xlsx/.xlsm workbooks are streamed with openpyxl (read-only, cached
+    values); legacy .xls workbooks are read once through pandas.
+
+    Args:
+        path: Workbook file, or a seekable binary buffer (e.g. an archive member)
+        name: Source name for the SourceFile column and the format suffix
+            (default: the file name; required for buffers)
+        on_rows: Progress hook, see read_rows
+
+    Returns:
+        Plugin key -> frame, for the worksheets present with a header row
+    """
+    logger = logger or logging.getLogger(__name__)
+    if isinstance(path, (str, Path)):
+        path = Path(path)
+        name = name or path.name
+    elif not name:
+        raise ValueError("A name is required when reading a workbook from a buffer")
+    frames: Dict[str, pd.DataFrame] = {}
+
+    workbook = None
+    if Path(name).suffix.lower() == '.xls':
+        with pd.ExcelFile(path) as legacy:
+            matched = _match_sheets(legacy.sheet_names, plugins)
+            sheets = pd.read_excel(legacy, sheet_name=list(dict.fromkeys(matched.values())), header=None)
+        rows_for = lambda sheet: sheets[sheet].astype(object).where(sheets[sheet].notna(), None).itertuples(
+            index=False, name=None)
+    else:
+        from openpyxl import load_workbook
+        workbook = load_workbook(path, read_only=True, data_only=True)
+        matched = _match_sheets(workbook.sheetnames, plugins)
+        rows_for = lambda sheet: workbook[sheet].iter_rows(values_only=True)
+
+    try:
+        for plugin in plugins:
+            sheet = matched.get(plugin.key)
+            if sheet is None:
+                if plugin.warn_if_missing:
+                    logger.warning(f"{plugin.sheet} sheet not found in {name}")
+                continue
+            frame = read_rows(rows_for(sheet), plugin, name, config, logger, on_rows)
+            if frame is not None:
+                frames[plugin.key] = frame
+                logger.info(f"Processed {len(frame)} rows from {plugin.sheet} sheet")
+    finally:
+        if workbook is not None:
+            workbook.close()
+    return frames
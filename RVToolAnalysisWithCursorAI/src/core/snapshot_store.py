@@ -0,0 +1,412 @@
+"""
+Snapshot Store
+Keeps every processed RVTools run in a local SQLite database for trend queries.
+
+A snapshot is one customer's consolidated vInfo / vHost frames and dashboard
+metrics at one extract date (the vMetaData 'xlsx creation datetime'). Per-
+cluster rollups are computed once when a snapshot is saved, so growth and
+utilization trends are answered from small indexed tables without re-reading
+any workbook.
+
+Usage:
+    store = SnapshotStore("snapshots.db")
+    store.save_snapshot("acme", data['vinfo'], data['vhost'], manifest['metrics'],
+                        metadata=data['metadata'])
+    store.metric_trend("acme", "total_powered_on_vms")
+    store.cluster_trend("acme", "vms")
+"""
+
+import json
+import logging
+import sqlite3
+import threading
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+NO_CLUSTER = "(no cluster)"
+
+# Snapshot table column -> consolidated frame column
+VM_COLUMNS = {
+    "vm": "VM",
+    "uuid": "VM UUID",
+    "powerstate": "Powerstate",
+    "cpus": "CPUs",
+    "memory_mib": "Memory",
+    "provisioned_mib": "Provisioned MiB",
+    "datacenter": "Datacenter",
+    "cluster": "Cluster",
+    "host": "Host",
+    "vcenter": "VI SDK Server",
+    "os_class": "OS Classification",
+    "os": "OS according to the configuration file",
+    "os_tools": "OS according to the VMware Tools",
+    "source_file": "SourceFile",
+}
+HOST_COLUMNS = {
+    "host": "Host",
+    "datacenter": "Datacenter",
+    "cluster": "Cluster",
+    "sockets": "# CPU",
+    "cores": "# Cores",
+    "memory_mb": "# Memory",
+    "cpu_usage": "CPU usage %",
+    "memory_usage": "Memory usage %",
+    "esx_version": "ESX Version",
+    "vendor": "Vendor",
+    "model": "Model",
+    "source_file": "SourceFile",
+}
+_NUMERIC = {"cpus", "memory_mib", "provisioned_mib", "sockets", "cores", "memory_mb", "cpu_usage", "memory_usage"}
+
+# Per-cluster rollups stored with every snapshot
+CLUSTER_METRICS = (
+    "vms", "powered_on_vms", "vcpus", "ram_gb", "provisioned_gb",
+    "hosts", "cores", "host_ram_gb", "avg_cpu_usage", "avg_memory_usage",
+)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS snapshots (
+    id INTEGER PRIMARY KEY,
+    customer TEXT NOT NULL,
+    extract_date TEXT NOT NULL,
+    processing_date TEXT NOT NULL,
+    source TEXT,
+    vms INTEGER NOT NULL,
+    hosts INTEGER NOT NULL,
+    metrics_json TEXT NOT NULL,
+    UNIQUE (customer, extract_date)
+);
+CREATE TABLE IF NOT EXISTS metrics (
+    snapshot_id INTEGER NOT NULL REFERENCES snapshots(id) ON DELETE CASCADE,
+    name TEXT NOT NULL,
+    value REAL,
+    PRIMARY KEY (snapshot_id, name)
+);
+CREATE INDEX IF NOT EXISTS metrics_by_name ON metrics (name, snapshot_id);
+CREATE TABLE IF NOT EXISTS cluster_stats (
+    snapshot_id INTEGER NOT NULL REFERENCES snapshots(id) ON DELETE CASCADE,
+    cluster TEXT NOT NULL,
+    {cluster_columns},
+    PRIMARY KEY (snapshot_id, cluster)
+);
+CREATE INDEX IF NOT EXISTS cluster_stats_by_cluster ON cluster_stats (cluster, snapshot_id);
+CREATE TABLE IF NOT EXISTS vms (
+    snapshot_id INTEGER NOT NULL REFERENCES snapshots(id) ON DELETE CASCADE,
+    {vm_columns}
+);
+CREATE INDEX IF NOT EXISTS vms_by_snapshot ON vms (snapshot_id, cluster);
+CREATE TABLE IF NOT EXISTS hosts (
+    snapshot_id INTEGER NOT NULL REFERENCES snapshots(id) ON DELETE CASCADE,
+    {host_columns}
+);
+CREATE INDEX IF NOT EXISTS hosts_by_snapshot ON hosts (snapshot_id, cluster);
+"""
+
+
+def _column_defs(columns: Sequence[str]) -> str:
+    return ",\n    ".join(f"{name} {'REAL' if name in _NUMERIC else 'TEXT'}" for name in columns)
+
+
+SCHEMA = _SCHEMA.format(
+    cluster_columns=",\n    ".join(f"{name} REAL" for name in CLUSTER_METRICS),
+    vm_columns=_column_defs(VM_COLUMNS),
+    host_columns=_column_defs(HOST_COLUMNS),
+)
+
+
+def extract_date_from_metadata(metadata: Optional[pd.DataFrame]) -> Optional[str]:
+    """Latest vMetaData 'xlsx creation datetime' as an ISO timestamp, or None."""
+    if metadata is None or metadata.empty or 'xlsx creation datetime' not in metadata.columns:
+        return None
+    dates = pd.to_datetime(metadata['xlsx creation datetime'], errors='coerce').dropna()
+    return dates.max().isoformat() if not dates.empty else None
+
+
+def as_text(values: pd.Series, normalize: bool = False) -> np.ndarray:
+    """
+    Object array of str (None where missing), converting each distinct value once.
+
+    normalize strips and lower-cases, and treats blank strings as missing.
+    """
+    codes, uniques = pd.factorize(values)
+    if normalize:
+        text = np.array([str(v).strip().lower() or None for v in uniques], dtype=object)
+    else:
+        text = np.array([str(v) for v in uniques], dtype=object)
+    result = text[codes] if len(text) else np.full(len(codes), None, dtype=object)
+    result[codes < 0] = None
+    return result
+
+
+def table_frame(frame: Optional[pd.DataFrame], columns: Dict[str, str]) -> pd.DataFrame:
+    """Snapshot-table columns from a consolidated frame (missing columns become NULL)."""
+    frame = frame if frame is not None else pd.DataFrame()
+    table = pd.DataFrame(index=frame.index)
+    for name, source in columns.items():
+        values = frame[source] if source in frame.columns else pd.Series(None, index=frame.index, dtype=object)
+        if name in _NUMERIC:
+            table[name] = pd.to_numeric(values, errors='coerce')
+        else:
+            table[name] = pd.Series(as_text(values), index=frame.index, dtype=object)
+    return table
+
+
+def cluster_stats(vms: pd.DataFrame, hosts: pd.DataFrame) -> pd.DataFrame:
+    """Per-cluster VM growth and utilization rollups from snapshot-table frames."""
+    vms = vms.assign(cluster=vms['cluster'].fillna(NO_CLUSTER))
+    powered_on = vms[as_text(vms['powerstate'], normalize=True) == 'poweredon']
+    vm_stats = vms.groupby('cluster').size().rename('vms').to_frame()
+    vm_stats['powered_on_vms'] = powered_on.groupby('cluster').size()
+    vm_stats['vcpus'] = powered_on.groupby('cluster')['cpus'].sum()
+    vm_stats['ram_gb'] = powered_on.groupby('cluster')['memory_mib'].sum() / 1024
+    vm_stats['provisioned_gb'] = powered_on.groupby('cluster')['provisioned_mib'].sum() / 1024
+
+    hosts = hosts.assign(cluster=hosts['cluster'].fillna(NO_CLUSTER))
+    host_stats = hosts.groupby('cluster').agg(
+        hosts=('host', 'size'),
+        cores=('cores', 'sum'),
+        host_ram_gb=('memory_mb', lambda s: s.sum() / 1024),
+        avg_cpu_usage=('cpu_usage', 'mean'),
+        avg_memory_usage=('memory_usage', 'mean'),
+    )
+    stats = vm_stats.join(host_stats, how='outer')
+    for name in ('vms', 'powered_on_vms', 'vcpus', 'ram_gb', 'provisioned_gb', 'hosts', 'cores', 'host_ram_gb'):
+        stats[name] = stats[name].fillna(0)
+    return stats.reset_index()[['cluster', *CLUSTER_METRICS]]
+
+
+def _flatten_metrics(metrics: Dict[str, Any]) -> Dict[str, float]:
+    """Numeric dashboard metrics; booleans and non-finite values are left out."""
+    flat = {}
+    for name, value in (metrics or {}).items():
+        if isinstance(value, (int, float, np.number)) and not isinstance(value, bool) and np.isfinite(value):
+            flat[name] = float(value)
+    return flat
+
+
+def _rows(frame: pd.DataFrame) -> Iterator[tuple]:
+    """Frame rows as tuples with NaN converted to NULL."""
+    frame = frame.astype(object).where(frame.notna(), None)
+    return frame.itertuples(index=False, name=None)
+
+
+def _with_change(points: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Absolute and percentage change from the first to the last point of a trend."""
+    values = [p["value"] for p in points if p["value"] is not None]
+    if len(values) < 2:
+        return {"change": None, "change_pct": None}
+    change = values[-1] - values[0]
+    return {"change": change, "change_pct": change / abs(values[0]) * 100 if values[0] else None}
+
+
+class SnapshotStore:
+    """SQLite-backed history of processed RVTools runs, one snapshot per customer and extract date."""
+
+    def __init__(self, db_path):
+        self.db_path = Path(db_path)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self.logger = logging.getLogger(__name__)
+        self._write_lock = threading.Lock()
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(SCHEMA)
+            self._add_missing_columns(conn)
+
+    @staticmethod
+    def _add_missing_columns(conn: sqlite3.Connection) -> None:
+        """Bring databases created before a column was added up to the current schema."""
+        for table, columns in (("vms", VM_COLUMNS), ("hosts", HOST_COLUMNS)):
+            existing = {row[1] for row in conn.execute(f"PRAGMA table_info({table})")}
+            for name in columns:
+                if name not in existing:
+                    conn.execute(f"ALTER TABLE {table} ADD COLUMN {_column_defs([name])}")
+
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        """Short-lived connection per call, so one store can be shared across threads."""
+        conn = sqlite3.connect(self.db_path, timeout=30)
+        conn.row_factory = sqlite3.Row
+        conn.execute("PRAGMA foreign_keys=ON")
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def save_snapshot(self, customer: str, vinfo: pd.DataFrame, vhost: pd.DataFrame,
+                      metrics: Dict[str, Any], metadata: Optional[pd.DataFrame] = None,
+                      extract_date: Optional[str] = None, source: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Store one processed run, replacing any earlier snapshot with the same extract date.
+
+        Args:
+            customer: Customer the run belongs to
+            vinfo: Consolidated vInfo
+            vhost: Consolidated vHost
+            metrics: Dashboard metrics (the manifest's "metrics")
+            metadata: Consolidated vMetaData, used for the extract date
+            extract_date: Explicit extract date (default: from metadata, else now)
+            source: Free-text origin of the run, e.g. the input folder
+
+        Returns:
+            dict: The stored snapshot's summary (as from list_snapshots)
+        """
+        if not customer:
+            raise ValueError("A customer name is required to store a snapshot")
+        extract_date = extract_date or extract_date_from_metadata(metadata) or datetime.now().isoformat()
+        vms = table_frame(vinfo, VM_COLUMNS)
+        hosts = table_frame(vhost, HOST_COLUMNS)
+        clusters = cluster_stats(vms, hosts)
+        flat_metrics = _flatten_metrics(metrics)
+
+        with self._write_lock, self._connect() as conn:
+            conn.execute("DELETE FROM snapshots WHERE customer = ? AND extract_date = ?", (customer, extract_date))
+            snapshot_id = conn.execute(
+                "INSERT INTO snapshots (customer, extract_date, processing_date, source, vms, hosts, metrics_json) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (customer, extract_date, datetime.now().isoformat(), source, len(vms), len(hosts),
+                 json.dumps(flat_metrics)),
+            ).lastrowid
+            conn.executemany("INSERT INTO metrics (snapshot_id, name, value) VALUES (?, ?, ?)",
+                             [(snapshot_id, name, value) for name, value in flat_metrics.items()])
+            for table, frame in (("cluster_stats", clusters), ("vms", vms), ("hosts", hosts)):
+                columns = ", ".join(["snapshot_id", *frame.columns])
+                placeholders = ", ".join("?" * (len(frame.columns) + 1))
+                conn.executemany(f"INSERT INTO {table} ({columns}) VALUES ({placeholders})",
+                                 ((snapshot_id, *row) for row in _rows(frame)))
+
+        self.logger.info(f"Stored snapshot {snapshot_id} for {customer} at {extract_date} "
+                         f"({len(vms)} VMs, {len(hosts)} hosts)")
+        return self.get_snapshot(snapshot_id)
+
+    def get_snapshot(self, snapshot_id: int) -> Optional[Dict[str, Any]]:
+        """Summary of one snapshot, or None."""
+        with self._connect() as conn:
+            row = conn.execute("SELECT * FROM snapshots WHERE id = ?", (snapshot_id,)).fetchone()
+        return self._summary(row) if row else None
+
+    def list_snapshots(self, customer: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Snapshots oldest first, optionally for one customer."""
+        query = "SELECT * FROM snapshots"
+        params: tuple = ()
+        if customer:
+            query += " WHERE customer = ?"
+            params = (customer,)
+        with self._connect() as conn:
+            rows = conn.execute(query + " ORDER BY customer, extract_date", params).fetchall()
+        return [self._summary(row) for row in rows]
+
+    def customers(self) -> List[str]:
+        with self._connect() as conn:
+            return [row[0] for row in conn.execute("SELECT DISTINCT customer FROM snapshots ORDER BY customer")]
+
+    def delete_snapshot(self, snapshot_id: int) -> bool:
+        with self._write_lock, self._connect() as conn:
+            return conn.execute("DELETE FROM snapshots WHERE id = ?", (snapshot_id,)).rowcount > 0
+
+    def metric_trend(self, customer: str, metric: str, start: Optional[str] = None,
+                     end: Optional[str] = None) -> Dict[str, Any]:
+        """
+        One dashboard metric over time for a customer.
+
+        Args:
+            customer: Customer name
+            metric: Manifest metric name, e.g. "total_powered_on_vms"
+            start: Earliest extract date to include (ISO, inclusive)
+            end: Latest extract date to include (ISO, inclusive)
+
+        Returns:
+            dict: metric, points ({snapshot_id, extract_date, value}) and change
+        """
+        where, params = self._date_filter(customer, start, end)
+        with self._connect() as conn:
+            rows = conn.execute(
+                "SELECT s.id, s.extract_date, m.value FROM snapshots s "
+                "LEFT JOIN metrics m ON m.snapshot_id = s.id AND m.name = ? "
+                f"WHERE {where} ORDER BY s.extract_date",
+                (metric, *params),
+            ).fetchall()
+        points = [{"snapshot_id": r[0], "extract_date": r[1], "value": r[2]} for r in rows]
+        return {"customer": customer, "metric": metric, "points": points, **_with_change(points)}
+
+    def cluster_trend(self, customer: str, metric: str, clusters: Optional[Sequence[str]] = None,
+                      start: Optional[str] = None, end: Optional[str] = None) -> Dict[str, Any]:
+        """
+        One per-cluster rollup (see CLUSTER_METRICS) over time, per cluster.
+
+        Clusters absent from a snapshot have no point for it, so a cluster that
+        appears or is retired mid-history shows only the snapshots it was in.
+
+        Returns:
+            dict: metric and clusters ({cluster, points, change, change_pct}),
+                largest absolute change first
+        """
+        if metric not in CLUSTER_METRICS:
+            raise ValueError(f"Unknown cluster metric '{metric}'. Expected one of {list(CLUSTER_METRICS)}")
+        where, params = self._date_filter(customer, start, end)
+        if clusters:
+            where += f" AND c.cluster IN ({', '.join('?' * len(clusters))})"
+            params = (*params, *clusters)
+        with self._connect() as conn:
+            rows = conn.execute(
+                f"SELECT c.cluster, s.id, s.extract_date, c.{metric} FROM snapshots s "
+                f"JOIN cluster_stats c ON c.snapshot_id = s.id WHERE {where} "
+                "ORDER BY c.cluster, s.extract_date",
+                params,
+            ).fetchall()
+
+        by_cluster: Dict[str, List[Dict[str, Any]]] = {}
+        for cluster, snapshot_id, extract_date, value in rows:
+            by_cluster.setdefault(cluster, []).append(
+                {"snapshot_id": snapshot_id, "extract_date": extract_date, "value": value}
+            )
+        trends = [{"cluster": cluster, "points": points, **_with_change(points)}
+                  for cluster, points in by_cluster.items()]
+        trends.sort(key=lambda t: abs(t["change"] or 0), reverse=True)
+        return {"customer": customer, "metric": metric, "clusters": trends}
+
+    def load_frame(self, snapshot_id: int, table: str = "vms") -> pd.DataFrame:
+        """A stored snapshot's "vms", "hosts" or "cluster_stats" rows as a DataFrame."""
+        if table not in ("vms", "hosts", "cluster_stats"):
+            raise ValueError(f"Unknown snapshot table '{table}'")
+        with self._connect() as conn:
+            return pd.read_sql_query(f"SELECT * FROM {table} WHERE snapshot_id = ?", conn,
+                                     params=(snapshot_id,)).drop(columns=['snapshot_id'])
+
+    def load_consolidated(self, snapshot_id: int) -> Dict[str, pd.DataFrame]:
+        """A stored snapshot's VMs and hosts with consolidated vInfo / vHost column names."""
+        if self.get_snapshot(snapshot_id) is None:
+            raise KeyError(f"Unknown snapshot {snapshot_id}")
+        vms = self.load_frame(snapshot_id, "vms").rename(columns=VM_COLUMNS)
+        hosts = self.load_frame(snapshot_id, "hosts").rename(columns=HOST_COLUMNS)
+        return {"vinfo": vms, "vhost": hosts}
+
+    @staticmethod
+    def _date_filter(customer: str, start: Optional[str], end: Optional[str]):
+        where, params = "s.customer = ?", [customer]
+        if start:
+            where += " AND s.extract_date >= ?"
+            params.append(start)
+        if end:
+            # A bare date includes the whole day
+            where += " AND s.extract_date <= ?"
+            params.append(end + "T23:59:59.999999" if len(end) == 10 else end)
+        return where, tuple(params)
+
+    @staticmethod
+    def _summary(row: sqlite3.Row) -> Dict[str, Any]:
+        return {
+            "snapshot_id": row["id"],
+            "customer": row["customer"],
+            "extract_date": row["extract_date"],
+            "processing_date": row["processing_date"],
+            "source": row["source"],
+            "vms": row["vms"],
+            "hosts": row["hosts"],
+            "metrics": json.loads(row["metrics_json"]),
+        }
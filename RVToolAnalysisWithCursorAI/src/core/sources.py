@@ -0,0 +1,173 @@
+"""
+Input Sources
+Finds the RVTools extracts in an input folder and reads each one onto the
+consolidated schema declared by the sheet plugins (src/core/sheets.py).
+
+An extract (one Source) is either:
+    - an Excel workbook (.xlsx, .xlsm, .xls)
+    - a CSV bundle: RVTools' per-tab CSV export (RVTools_tabvInfo.csv,
+      RVTools_tabvHost.csv, ...), grouped by folder and file-name prefix;
+      found in the input folder or one folder below it
+
+Zip archives are opened in place: every workbook and CSV bundle inside is a
+Source of its own, read straight from the archive without extracting it to
+disk (CSV members are streamed; workbook members are buffered in memory,
+because openpyxl needs random access). Archives inside archives are skipped.
+
+Usage:
+    for source in discover_sources(Path("inputs"), config.supported_file_extensions):
+        frames = source.read(plugins_for(config), config)
+"""
+
+import io
+import logging
+import zipfile
+from dataclasses import dataclass, field
+from pathlib import Path, PurePosixPath
+from typing import BinaryIO, Callable, Dict, List, Optional, Sequence, Tuple
+
+import pandas as pd
+
+from .sheets import SheetPlugin, read_csv, read_workbook
+
+EXCEL_EXTENSIONS = ('.xlsx', '.xlsm', '.xls')
+ARCHIVE_EXTENSIONS = ('.zip',)
+CSV_EXTENSIONS = ('.csv',)
+
+# RVTools tab names a CSV export's file name can end with (longest first, so
+# "RVTools_tabdvPort.csv" is dvPort, not vPort)
+RVTOOLS_TABS = sorted(
+    ["vInfo", "vCPU", "vMemory", "vDisk", "vPartition", "vNetwork", "vCD", "vUSB", "vSnapshot", "vTools",
+     "vSource", "vRP", "vCluster", "vHost", "vHBA", "vNIC", "vSwitch", "vPort", "dvSwitch", "dvPort",
+     "vSC_VMK", "vDatastore", "vMultiPath", "vLicense", "vFileInfo", "vHealth", "vMetaData"],
+    key=len, reverse=True,
+)
+
+
+def csv_tab(file_name: str) -> Optional[Tuple[str, str]]:
+    """(file-name prefix, RVTools tab) for an RVTools CSV export, e.g. RVTools_tabvInfo.csv."""
+    stem = PurePosixPath(file_name).stem
+    for tab in RVTOOLS_TABS:
+        if stem.lower().endswith(tab.lower()):
+            return stem[:len(stem) - len(tab)], tab
+    return None
+
+
+@dataclass
+class Source:
+    """One RVTools extract: a workbook or a CSV bundle, on disk or inside a zip archive."""
+    name: str                                   # SourceFile value and processed-files entry
+    kind: str                                   # "workbook" or "csv"
+    path: Path                                  # workbook file, CSV folder, or the archive holding either
+    members: Dict[str, str] = field(default_factory=dict)  # workbook: {"": member}; csv: tab -> file
+    archive: bool = False
+
+    def _opener(self, archive: Optional[zipfile.ZipFile], member: str) -> Callable[[], BinaryIO]:
+        if archive is not None:
+            return lambda: archive.open(member)
+        return lambda: open(self.path / member, 'rb')
+
+    def read(self, plugins: Sequence[SheetPlugin], config=None, logger: Optional[logging.Logger] = None,
+             on_rows: Optional[Callable[[str, int], None]] = None) -> Dict[str, pd.DataFrame]:
+        """
+        Plugin key -> frame for each plugin's sheet (or tab) present in this extract.
+
+        Args:
+            on_rows: Progress hook called with (sheet, rows read), see sheets.read_rows
+        """
+        logger = logger or logging.getLogger(__name__)
+        archive = zipfile.ZipFile(self.path) if self.archive else None
+        try:
+            if self.kind == "workbook":
+                if archive is None:
+                    return read_workbook(self.path, plugins, config, logger, name=self.name, on_rows=on_rows)
+                buffer = io.BytesIO(archive.read(self.members[""]))
+                return read_workbook(buffer, plugins, config, logger, name=self.name, on_rows=on_rows)
+
+            frames = {}
+            tabs = {tab.lower(): member for tab, member in self.members.items()}
+            for plugin in plugins:
+                member = tabs.get(plugin.sheet.lower())
+                if member is None:
+                    if plugin.warn_if_missing:
+                        logger.warning(f"{plugin.sheet} CSV not found in {self.name}")
+                    continue
+                frame = read_csv(self._opener(archive, member), plugin, self.name, config, logger, on_rows)
+                if frame is not None:
+                    frames[plugin.key] = frame
+                    logger.info(f"Processed {len(frame)} rows from {plugin.sheet} CSV")
+            return frames
+        finally:
+            if archive is not None:
+                archive.close()
+
+
+def _group_files(names: Sequence[str], container: str, location: Path, archive: bool,
+                 logger: logging.Logger) -> List[Source]:
+    """
+    Workbooks and CSV bundles among the file names in a folder or an archive.
+
+    Args:
+        location: The folder (names are relative to it) or the archive file
+    """
+    sources: List[Source] = []
+    bundles: Dict[Tuple[str, str], Source] = {}
+    for member in sorted(names):
+        member_path = PurePosixPath(member)
+        suffix = member_path.suffix.lower()
+        if suffix in EXCEL_EXTENSIONS:
+            if member_path.name.startswith("~$"):      # Excel lock files
+                continue
+            label = f"{container}/{member}" if archive else member_path.name
+            sources.append(Source(label, "workbook", location if archive else location / member,
+                                  {"": member}, archive))
+        elif suffix in CSV_EXTENSIONS:
+            tab = csv_tab(member_path.name)
+            if tab is None:
+                logger.debug(f"Skipping {member}: not an RVTools tab export")
+                continue
+            prefix, tab_name = tab
+            folder = str(member_path.parent) if str(member_path.parent) != "." else ""
+            key = (folder, prefix.lower())
+            if key not in bundles:
+                label = "/".join(part for part in (container if archive else "", folder, f"{prefix}*.csv") if part)
+                bundles[key] = Source(label, "csv", location, {}, archive)
+            bundles[key].members.setdefault(tab_name, member)
+        elif suffix in ARCHIVE_EXTENSIONS and archive:
+            logger.warning(f"Skipping {member} in {container}: archives inside archives are not opened")
+    return sources + [bundles[key] for key in sorted(bundles)]
+
+
+def discover_sources(folder: Path, extensions: Sequence[str],
+                     logger: Optional[logging.Logger] = None) -> List[Source]:
+    """
+    Every extract in `folder` with one of `extensions`: workbooks and CSV
+    bundles in the folder itself, CSV bundles in its immediate subfolders, and
+    the workbooks and CSV bundles inside zip archives.
+    """
+    logger = logger or logging.getLogger(__name__)
+    folder = Path(folder)
+    extensions = {ext.lower() for ext in extensions}
+    files = sorted(p for p in folder.iterdir() if p.is_file() and p.suffix.lower() in extensions)
+    names = [p.name for p in files if p.suffix.lower() not in ARCHIVE_EXTENSIONS]
+    # RVTools writes each CSV export into a folder of its own, so look one level down for those
+    if any(ext in extensions for ext in CSV_EXTENSIONS):
+        for sub in sorted(p for p in folder.iterdir() if p.is_dir()):
+            names.extend(f"{sub.name}/{p.name}" for p in sorted(sub.iterdir())
+                         if p.is_file() and p.suffix.lower() in CSV_EXTENSIONS)
+
+    sources = _group_files(names, folder.name, folder, archive=False, logger=logger)
+    for archive_path in (p for p in files if p.suffix.lower() in ARCHIVE_EXTENSIONS):
+        try:
+            with zipfile.ZipFile(archive_path) as archive:
+                names = [info.filename for info in archive.infolist() if not info.is_dir()]
+        except zipfile.BadZipFile:
+            logger.error(f"{archive_path.name} is not a valid zip archive; skipped")
+            continue
+        found = _group_files([n for n in names if PurePosixPath(n).suffix.lower() in extensions
+                              and not n.startswith("__MACOSX/")],
+                             archive_path.name, archive_path, archive=True, logger=logger)
+        if not found:
+            logger.warning(f"No RVTools workbooks or CSV exports in {archive_path.name}")
+        sources.extend(found)
+    return sources
@@ -374,13 +374,22 @@ class RVToolsMainWindow:
                 filtered_data['vinfo'] = filtered_data['vinfo'][mask].copy()
                 mask = filtered_data['vhost']['Cluster'] == cluster_filter
                 filtered_data['vhost'] = filtered_data['vhost'][mask].copy()
+                for key, column in (('vdisk', 'Cluster'), ('vpartition', 'Cluster'),
+                                    ('vdatastore', 'Cluster name'), ('vcluster', 'Name')):
+                    frame = filtered_data.get(key)
+                    if frame is not None and column in frame.columns:
+                        filtered_data[key] = frame[frame[column] == cluster_filter].copy()
             
             # Generate new metrics with filtered data
             from src.core.dashboard_generator import DashboardGenerator
             dashboard_gen = DashboardGenerator(self.config)
             filtered_metrics = dashboard_gen.generate_pcmo_dashboard(
                 filtered_data['vinfo'],
-                filtered_data['vhost']
+                filtered_data['vhost'],
+                vdisk_data=filtered_data.get('vdisk'),
+                vpartition_data=filtered_data.get('vpartition'),
+                vdatastore_data=filtered_data.get('vdatastore'),
+                vcluster_data=filtered_data.get('vcluster')
             )
             
             # Update statistics display
@@ -448,7 +457,11 @@ class RVToolsMainWindow:
                 # Generate metrics
                 metrics = dashboard_gen.generate_pcmo_dashboard(
                     consolidated_data['vinfo'],
-                    consolidated_data['vhost']
+                    consolidated_data['vhost'],
+                    vdisk_data=consolidated_data['vdisk'],
+                    vpartition_data=consolidated_data['vpartition'],
+                    vdatastore_data=consolidated_data['vdatastore'],
+                    vcluster_data=consolidated_data['vcluster']
                 )
                 
                 # Store current metrics
@@ -591,7 +604,26 @@ class RVToolsMainWindow:
         self._insert_metric_line("🔄 vCPU to Physical Core Ratio", f"{metrics.vcpu_to_pcore_ratio:.2f}:1", "Consolidation density", value_color=ratio_color)
         self._insert_metric_line("📊 CPU Utilization (Host Avg)", f"{metrics.avg_cpu_utilization*100:.1f}%", "Processing load", value_color=cpu_color)
         self._insert_metric_line("🧮 RAM Utilization (Host Avg)", f"{metrics.avg_ram_utilization*100:.1f}%", "Memory pressure", value_color=ram_color)
-        self._insert_metric_line("🔧 Threads/Core (Cluster Avg)", "N/A", "vCluster data N/A")
+        if metrics.threads_per_core:
+            self._insert_metric_line("🔧 Threads/Core (Cluster Avg)", f"{metrics.threads_per_core:.2f}", "Hyper-threading density")
+        else:
+            self._insert_metric_line("🔧 Threads/Core (Cluster Avg)", "N/A", "vCluster data N/A")
+        
+        # Storage, datastore and cluster capacity (only when those sheets were ingested)
+        if metrics.total_guest_used_gb or metrics.total_datastores or metrics.total_clusters:
+            self._insert_colored_text("\n💽 STORAGE & CLUSTER CAPACITY\n", "section")
+            self._insert_colored_text("─────────────────────────────────────────────────────────────────────────────────────────\n", "neutral")
+        if metrics.total_guest_used_gb:
+            self._insert_metric_line("💿 Guest Used Storage GB", f"{metrics.total_guest_used_gb:,.0f}", "In-guest consumed (vPartition)")
+            self._insert_metric_line("📐 Used / Provisioned", f"{metrics.used_to_provisioned_ratio*100:.1f}%", "Of provisioned disk in use")
+        if metrics.total_datastores:
+            self._insert_metric_line("🗄️ Datastore Utilization", f"{metrics.datastore_utilization*100:.1f}%",
+                                     f"{metrics.datastores_over_threshold:,} of {metrics.total_datastores:,} over "
+                                     f"{self.config.datastore_utilization_threshold:.0%}")
+        if metrics.total_clusters:
+            self._insert_metric_line("🛡️ HA Usable Cores", f"{metrics.ha_usable_cores:,.0f}",
+                                     f"After {metrics.ha_failover_hosts:,.0f} failover hosts")
+            self._insert_metric_line("🔄 vCPU to HA Usable Core", f"{metrics.ha_vcpu_to_usable_pcore_ratio:.2f}:1", "Density with a host failed")
         
         # Processing Summary (only if we have result data)
         if result:
@@ -796,7 +828,7 @@ class RVToolsMainWindow:
 🔄 vCPU to Physical Core Ratio    │ {metrics.vcpu_to_pcore_ratio:>8.2f}:1 │ Consolidation density
 📊 CPU Utilization (Host Avg)     │ {metrics.avg_cpu_utilization*100:>8.1f}% │ Processing load
 🧮 RAM Utilization (Host Avg)     │ {metrics.avg_ram_utilization*100:>8.1f}% │ Memory pressure
-🔧 Threads/Core (Cluster Avg)     │ {"N/A":>8} │ vCluster data N/A
+🔧 Threads/Core (Cluster Avg)     │ {f"{metrics.threads_per_core:.2f}" if metrics.threads_per_core else "N/A":>8} │ {"Hyper-threading density" if metrics.threads_per_core else "vCluster data N/A"}
 
 📋 PROCESSING SUMMARY
 ─────────────────────────────────────────────────────────────────────────────────────────
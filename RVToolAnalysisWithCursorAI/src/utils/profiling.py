@@ -0,0 +1,262 @@
+"""
+Profiling Utilities
+Opt-in CPU and allocation profiling for pathologically slow workbooks.
+
+Two CPU modes are supported:
+    deterministic - cProfile; exact call counts, higher overhead
+    sampling      - periodic stack sampling of the profiled thread; low
+                    overhead, writes collapsed stacks for flame graphs
+Allocations are captured with tracemalloc in both modes. Only the allocating
+line is recorded by default; deeper tracebacks (allocation_frames) make
+tracemalloc several times slower on pandas-heavy runs.
+"""
+
+import cProfile
+import io
+import json
+import logging
+import pstats
+import sys
+import threading
+import time
+import tracemalloc
+from collections import Counter
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+PROFILE_MODES = ("deterministic", "sampling")
+
+_FrameKey = Tuple[str, int, str]
+
+
+def _code_key(code) -> _FrameKey:
+    return (code.co_filename, code.co_firstlineno, code.co_name)
+
+
+def _format_location(key: _FrameKey) -> str:
+    filename, lineno, name = key
+    return f"{filename}:{lineno}({name})"
+
+
+class _StackSampler(threading.Thread):
+    """Samples the call stack of one thread at a fixed interval."""
+
+    def __init__(self, target_thread_id: int, interval: float):
+        super().__init__(name="rvtools-stack-sampler", daemon=True)
+        self.target_thread_id = target_thread_id
+        self.interval = interval
+        self.stacks: Counter = Counter()
+        self.samples = 0
+        self._stop_event = threading.Event()
+
+    def run(self):
+        while not self._stop_event.wait(self.interval):
+            frame = sys._current_frames().get(self.target_thread_id)
+            if frame is None:
+                continue
+            # Code objects are hashable and cheap to collect; they are resolved
+            # to file/line/name only when the artifacts are written
+            stack = []
+            while frame is not None:
+                stack.append(frame.f_code)
+                frame = frame.f_back
+            stack.reverse()
+            self.stacks[tuple(stack)] += 1
+            self.samples += 1
+            del frame, stack
+
+    def stop(self):
+        self._stop_event.set()
+        self.join()
+
+
+class ProfileSession:
+    """
+    Context manager that profiles the enclosed block and writes artifacts.
+
+    Example:
+        >>> with ProfileSession(Path("outputs/profile"), mode="sampling") as session:
+        ...     run_pipeline()
+        >>> session.summary()["hotspots"][:3]
+    """
+
+    def __init__(self, output_dir: Path, mode: str = "deterministic", top_n: int = 20,
+                 trace_allocations: bool = True, sample_interval: float = 0.005,
+                 allocation_frames: int = 1):
+        if mode not in PROFILE_MODES:
+            raise ValueError(f"Unknown profile mode '{mode}'. Expected one of {PROFILE_MODES}")
+        self.output_dir = Path(output_dir)
+        self.mode = mode
+        self.top_n = top_n
+        self.trace_allocations = trace_allocations
+        self.sample_interval = sample_interval
+        self.allocation_frames = allocation_frames
+        self.logger = logging.getLogger(__name__)
+
+        self._profiler: Optional[cProfile.Profile] = None
+        self._sampler: Optional[_StackSampler] = None
+        self._started_tracemalloc = False
+        self._start = 0.0
+        self._summary: Dict[str, Any] = {}
+
+    def __enter__(self) -> "ProfileSession":
+        self.output_dir.mkdir(parents=True, exist_ok=True)
+        if self.trace_allocations and not tracemalloc.is_tracing():
+            tracemalloc.start(self.allocation_frames)
+            self._started_tracemalloc = True
+        self._start = time.perf_counter()
+        if self.mode == "deterministic":
+            self._profiler = cProfile.Profile()
+            self._profiler.enable()
+        else:
+            self._sampler = _StackSampler(threading.get_ident(), self.sample_interval)
+            self._sampler.start()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        wall_seconds = time.perf_counter() - self._start
+        if self._profiler is not None:
+            self._profiler.disable()
+        if self._sampler is not None:
+            self._sampler.stop()
+
+        snapshot = None
+        peak_bytes = None
+        if self.trace_allocations and tracemalloc.is_tracing():
+            snapshot = tracemalloc.take_snapshot()
+            peak_bytes = tracemalloc.get_traced_memory()[1]
+            if self._started_tracemalloc:
+                tracemalloc.stop()
+
+        try:
+            self._summary = self._write_artifacts(wall_seconds, snapshot, peak_bytes)
+        except Exception as e:
+            self.logger.error(f"Error writing profile artifacts: {str(e)}")
+            self._summary = {"mode": self.mode, "wall_seconds": wall_seconds, "error": str(e)}
+        return False
+
+    def summary(self) -> Dict[str, Any]:
+        """Top-N hotspot summary; available after the block exits."""
+        return self._summary
+
+    def _write_artifacts(self, wall_seconds: float, snapshot, peak_bytes: Optional[int]) -> Dict[str, Any]:
+        files: Dict[str, str] = {}
+        if self._profiler is not None:
+            hotspots = self._write_deterministic(files)
+        else:
+            hotspots = self._write_sampling(files, wall_seconds)
+
+        allocations: List[Dict[str, Any]] = []
+        if snapshot is not None:
+            allocations = self._write_allocations(snapshot, peak_bytes, files)
+
+        files["summary"] = "profile_summary.json"
+        summary = {
+            "mode": self.mode,
+            "wall_seconds": round(wall_seconds, 4),
+            "directory": str(self.output_dir.absolute()),
+            "files": files,
+            "hotspots": hotspots,
+            "allocations": allocations,
+            "peak_traced_mib": round(peak_bytes / (1024 * 1024), 2) if peak_bytes is not None else None,
+        }
+        with open(self.output_dir / "profile_summary.json", 'w') as f:
+            json.dump(summary, f, indent=2)
+        self.logger.info(f"Profile written to: {self.output_dir}")
+        return summary
+
+    def _write_deterministic(self, files: Dict[str, str]) -> List[Dict[str, Any]]:
+        prof_path = self.output_dir / "cpu_profile.prof"
+        self._profiler.dump_stats(str(prof_path))
+        files["cpu_profile"] = prof_path.name
+
+        stream = io.StringIO()
+        stats = pstats.Stats(self._profiler, stream=stream)
+        stats.sort_stats(pstats.SortKey.CUMULATIVE).print_stats(self.top_n)
+        stats.sort_stats(pstats.SortKey.TIME).print_stats(self.top_n)
+        (self.output_dir / "cpu_profile.txt").write_text(stream.getvalue())
+        files["cpu_report"] = "cpu_profile.txt"
+
+        # Rank by own time: cumulative time is dominated by the entry points
+        entries = sorted(stats.stats.items(), key=lambda item: item[1][2], reverse=True)
+        return [
+            {
+                "function": _format_location(key),
+                "calls": primitive_calls,
+                "self_seconds": round(total_time, 4),
+                "cumulative_seconds": round(cumulative_time, 4),
+            }
+            for key, (primitive_calls, _, total_time, cumulative_time, _) in entries[:self.top_n]
+        ]
+
+    def _write_sampling(self, files: Dict[str, str], wall_seconds: float) -> List[Dict[str, Any]]:
+        sampler = self._sampler
+        stacks = Counter()
+        for codes, count in sampler.stacks.items():
+            stacks[tuple(_code_key(code) for code in codes)] += count
+
+        folded_path = self.output_dir / "cpu_profile.folded"
+        with open(folded_path, 'w') as f:
+            for stack, count in stacks.most_common():
+                f.write(";".join(name for _, _, name in stack) + f" {count}\n")
+        files["cpu_profile"] = folded_path.name
+
+        self_samples: Counter = Counter()
+        cumulative_samples: Counter = Counter()
+        for stack, count in stacks.items():
+            self_samples[stack[-1]] += count
+            for key in set(stack):
+                cumulative_samples[key] += count
+
+        # The sampler wakes late under load, so scale by the observed interval
+        seconds_per_sample = wall_seconds / sampler.samples if sampler.samples else self.sample_interval
+        hotspots = [
+            {
+                "function": _format_location(key),
+                "samples": count,
+                "self_seconds": round(count * seconds_per_sample, 4),
+                "cumulative_seconds": round(cumulative_samples[key] * seconds_per_sample, 4),
+            }
+            for key, count in self_samples.most_common(self.top_n)
+        ]
+
+        lines = [f"{sampler.samples} samples at {self.sample_interval * 1000:.1f} ms", ""]
+        lines.append(f"{'self %':>7} {'cum %':>7}  function")
+        total = max(sampler.samples, 1)
+        for key, count in self_samples.most_common(self.top_n):
+            lines.append(f"{count / total * 100:7.1f} {cumulative_samples[key] / total * 100:7.1f}  "
+                         f"{_format_location(key)}")
+        (self.output_dir / "cpu_profile.txt").write_text("\n".join(lines) + "\n")
+        files["cpu_report"] = "cpu_profile.txt"
+        return hotspots
+
+    def _write_allocations(self, snapshot, peak_bytes: Optional[int],
+                           files: Dict[str, str]) -> List[Dict[str, Any]]:
+        snapshot = snapshot.filter_traces((
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+            tracemalloc.Filter(False, "<frozen importlib._bootstrap_external>"),
+        ))
+        snapshot_path = self.output_dir / "allocations.snapshot"
+        snapshot.dump(str(snapshot_path))
+        files["allocation_snapshot"] = snapshot_path.name
+
+        top = snapshot.statistics("lineno")[:self.top_n]
+        lines = []
+        if peak_bytes is not None:
+            lines.append(f"Peak traced memory: {peak_bytes / (1024 * 1024):.1f} MiB")
+        lines.append(f"Top {len(top)} allocation sites still alive at end of run:")
+        for stat in top:
+            frame = stat.traceback[0]
+            lines.append(f"{stat.size / 1024:12.1f} KiB {stat.count:9d} blocks  {frame.filename}:{frame.lineno}")
+        (self.output_dir / "allocations.txt").write_text("\n".join(lines) + "\n")
+        files["allocation_report"] = "allocations.txt"
+
+        return [
+            {
+                "location": f"{stat.traceback[0].filename}:{stat.traceback[0].lineno}",
+                "size_kib": round(stat.size / 1024, 1),
+                "blocks": stat.count,
+            }
+            for stat in top
+        ]
@@ -0,0 +1,120 @@
+"""
+Progress Reporting
+Throttled progress events for long pipeline runs (API jobs, batch runs).
+
+A ProgressReporter turns stage boundaries and row counts into events:
+
+    {"stage": "ingest", "percent": 23.5, "stage_percent": 39.2,
+     "message": "Reading vInfo", "rows": 120000, "rows_per_second": 48211.0,
+     "elapsed_seconds": 2.489}
+
+Stage starts and ends are always emitted; updates within a stage at most
+once per min_interval seconds. Readers report rows in batches (every
+sheets.PROGRESS_ROWS rows), so a throttled update costs a lock and a clock
+read, and the callback never runs more than a few times a second.
+"""
+
+import threading
+import time
+from typing import Any, Callable, Dict, Optional
+
+# Pipeline stages in run order and their share of the overall percent
+PIPELINE_STAGES = {
+    "ingest": 45,
+    "metrics": 3,
+    "rightsizing": 3,
+    "consolidation": 3,
+    "export": 20,
+    "summary": 1,
+    "charts": 24,
+    "snapshot": 1,
+}
+
+
+class ProgressReporter:
+    """Throttled stage/percent/rows/throughput events passed to a callback."""
+
+    def __init__(self, callback: Callable[[Dict[str, Any]], None], min_interval: float = 0.5,
+                 stages: Optional[Dict[str, float]] = None):
+        self.callback = callback
+        self.min_interval = min_interval
+        stages = stages or PIPELINE_STAGES
+        total = float(sum(stages.values())) or 1.0
+        self._offsets: Dict[str, float] = {}
+        self._weights: Dict[str, float] = {}
+        offset = 0.0
+        for name, weight in stages.items():
+            self._offsets[name] = offset
+            self._weights[name] = weight / total * 100
+            offset += self._weights[name]
+        self._lock = threading.Lock()
+        self._started = time.perf_counter()
+        self._last_emit = 0.0
+        self._rows_at = self._started
+        self.stage_name: Optional[str] = None
+        self.fraction = 0.0
+        self.rows = 0
+        self.message = ""
+
+    @property
+    def percent(self) -> float:
+        """Overall percent complete (stages not in the table count as 0)."""
+        if self.stage_name is None:
+            return 0.0
+        return self._offsets.get(self.stage_name, 0.0) + self._weights.get(self.stage_name, 0.0) * self.fraction
+
+    def start_stage(self, name: str, message: Optional[str] = None) -> None:
+        """Begin a stage (always emitted)."""
+        with self._lock:
+            self.stage_name = name
+            self.fraction = 0.0
+            self.message = message or f"Starting {name}"
+        self._emit()
+
+    def end_stage(self) -> None:
+        """Mark the current stage complete (always emitted)."""
+        with self._lock:
+            self.fraction = 1.0
+            self.message = f"Finished {self.stage_name}"
+        self._emit()
+
+    def update(self, fraction: Optional[float] = None, message: Optional[str] = None, rows: int = 0) -> None:
+        """
+        Record progress within the current stage; emitted when min_interval has passed.
+
+        Args:
+            fraction: Share of the current stage done (0-1), if known
+            message: What is happening now
+            rows: Rows parsed since the last update
+        """
+        with self._lock:
+            if fraction is not None:
+                self.fraction = min(max(fraction, 0.0), 1.0)
+            if message is not None:
+                self.message = message
+            if rows:
+                self.rows += rows
+                self._rows_at = time.perf_counter()
+            if time.perf_counter() - self._last_emit < self.min_interval:
+                return
+        self._emit()
+
+    def snapshot(self) -> Dict[str, Any]:
+        """The current progress as an event payload."""
+        elapsed = time.perf_counter() - self._started
+        reading = self._rows_at - self._started     # throughput while rows were arriving
+        return {
+            "stage": self.stage_name,
+            "percent": round(self.percent, 1),
+            "stage_percent": round(self.fraction * 100, 1),
+            "message": self.message,
+            "rows": self.rows,
+            "rows_per_second": round(self.rows / reading, 1) if reading > 0 else 0.0,
+            "elapsed_seconds": round(elapsed, 3),
+        }
+
+    def _emit(self) -> None:
+        with self._lock:
+            self._last_emit = time.perf_counter()
+            event = self.snapshot()
+        self.callback(event)
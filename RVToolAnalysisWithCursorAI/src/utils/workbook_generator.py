@@ -0,0 +1,572 @@
+"""
+Synthetic RVTools Workbook Generator
+Produces deterministic, realistic RVTools exports (vInfo, vHost, vMetaData and,
+unless disabled, vDisk, vPartition, vDatastore and vCluster) for scale testing
+the data processor and dashboard generator.
+
+Usage as a library:
+    from src.utils.workbook_generator import WorkbookSpec, generate_estate, write_workbooks
+
+    estate = generate_estate(WorkbookSpec(vms=100_000, vcenters=3, seed=7))
+    paths = write_workbooks(WorkbookSpec(vms=100_000, vcenters=3, seed=7), "inputs/synthetic")
+
+Usage from the command line:
+    python -m src.utils.workbook_generator --vms 100000 --vcenters 3 --output inputs/synthetic
+"""
+
+import argparse
+import io
+import logging
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Iterator, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+# Excel worksheets are limited to 1,048,576 rows (including header rows)
+EXCEL_MAX_ROWS = 1_048_576
+
+# (configuration-file OS string, relative weight) - mix observed in customer extracts
+OS_DISTRIBUTION = [
+    ("Microsoft Windows Server 2016 or later (64-bit)", 14),
+    ("Microsoft Windows Server 2022 (64-bit)", 12),
+    ("Microsoft Windows Server 2019 (64-bit)", 10),
+    ("Microsoft Windows Server 2016 (64-bit)", 8),
+    ("Microsoft Windows Server 2012 (64-bit)", 4),
+    ("Microsoft Windows Server 2008 R2 (64-bit)", 4),
+    ("Microsoft Windows Server 2003 Standard (32-bit)", 1),
+    ("Red Hat Enterprise Linux 8 (64-bit)", 10),
+    ("Red Hat Enterprise Linux 7 (64-bit)", 8),
+    ("Red Hat Enterprise Linux 9 (64-bit)", 3),
+    ("CentOS 7 (64-bit)", 4),
+    ("Debian GNU/Linux 11 (64-bit)", 2),
+    ("Ubuntu Linux (64-bit)", 4),
+    ("SUSE Linux Enterprise 15 (64-bit)", 2),
+    ("Other 3.x or later Linux (64-bit)", 3),
+    ("Other 2.6.x Linux (64-bit)", 1),
+    ("VMware Photon OS (64-bit)", 3),
+    ("Microsoft Windows 10 (64-bit)", 4),
+    ("Microsoft Windows 11 (64-bit)", 1),
+    ("Microsoft Windows 7 (64-bit)", 1),
+    ("Microsoft Windows Vista (64-bit)", 0.3),
+    ("Apple macOS 12 (64-bit)", 0.2),
+    ("FreeBSD 13 (64-bit)", 0.5),
+    ("Other (64-bit)", 0.8),
+    ("", 0.5),
+]
+
+# What VMware Tools reports when it disagrees with the configuration file
+OS_TOOLS_DRIFT = {
+    "Microsoft Windows Server 2016 or later (64-bit)": "Microsoft Windows Server 2019 (64-bit)",
+    "Red Hat Enterprise Linux 7 (64-bit)": "CentOS 7 (64-bit)",
+    "Other 3.x or later Linux (64-bit)": "Ubuntu Linux (64-bit)",
+    "Other 2.6.x Linux (64-bit)": "Red Hat Enterprise Linux 6 (64-bit)",
+    "Ubuntu Linux (64-bit)": "Other 3.x or later Linux (64-bit)",
+    "Other (64-bit)": "Microsoft Windows Server 2022 (64-bit)",
+}
+
+VM_NAME_PREFIXES = ["app", "web", "db", "sql", "dc", "file", "ctx", "k8s", "etl", "mq", "vdi", "log"]
+
+# (vCPUs, weight) and memory MiB choices per vCPU count
+VCPU_DISTRIBUTION = [(1, 8), (2, 38), (4, 34), (8, 13), (12, 2), (16, 3.5), (24, 0.5), (32, 1)]
+MEMORY_MIB_BY_VCPU = {
+    1: [2048, 4096],
+    2: [4096, 8192, 16384],
+    4: [8192, 16384, 32768],
+    8: [16384, 32768, 65536],
+    12: [32768, 49152, 65536],
+    16: [65536, 131072],
+    24: [98304, 131072, 196608],
+    32: [131072, 262144],
+}
+
+HOST_MODELS = [
+    ("Dell Inc.", "PowerEdge R640", 2, 16, 393216),
+    ("Dell Inc.", "PowerEdge R750", 2, 28, 786432),
+    ("HPE", "ProLiant DL360 Gen10", 2, 16, 524288),
+    ("HPE", "ProLiant DL380 Gen10 Plus", 2, 24, 1048576),
+    ("Cisco Systems Inc", "UCSC-C220-M5SX", 2, 20, 393216),
+    ("Lenovo", "ThinkSystem SR650", 2, 20, 786432),
+]
+
+ESX_VERSIONS = [
+    ("VMware ESXi 7.0.3 build-24585291", 4),
+    ("VMware ESXi 8.0.2 build-22380479", 3),
+    ("VMware ESXi 8.0.3 build-24585383", 5),
+    ("VMware ESXi 6.7.0 build-17700523", 1),
+]
+
+
+@dataclass
+class WorkbookSpec:
+    """Shape of a synthetic RVTools estate."""
+    vms: int = 1000
+    hosts: Optional[int] = None          # default: one host per ~25 VMs
+    clusters: Optional[int] = None       # default: ~8 hosts per cluster
+    vcenters: int = 1
+    seed: int = 42
+    powered_on_ratio: float = 0.8
+    messy_percentages: float = 0.3       # share of usage % cells written in non-canonical formats
+    header_offset: int = 0               # title rows written above each sheet's header row
+    split_by_vcenter: bool = True        # one workbook per vCenter (as customers export them)
+    extra_sheets: bool = True            # also write vDisk, vPartition, vDatastore and vCluster
+    output_format: str = "xlsx"          # or "csv": RVTools per-tab CSV export, one folder per extract
+    zip_output: bool = False             # pack every extract into one zip archive
+    extract_datetime: str = "2025-04-30 08:10:11"
+    rvtools_version: str = "4.6.1.3"
+
+    def resolved_hosts(self) -> int:
+        return max(self.vcenters, self.hosts if self.hosts is not None else max(1, self.vms // 25))
+
+    def resolved_clusters(self) -> int:
+        hosts = self.resolved_hosts()
+        clusters = self.clusters if self.clusters is not None else max(1, hosts // 8)
+        return max(self.vcenters, min(clusters, hosts))
+
+
+@dataclass
+class SyntheticEstate:
+    """Raw, export-shaped frames for a whole estate (all vCenters)."""
+    vinfo: pd.DataFrame
+    vhost: pd.DataFrame
+    metadata: pd.DataFrame
+    vdisk: Optional[pd.DataFrame] = None
+    vpartition: Optional[pd.DataFrame] = None
+    vdatastore: Optional[pd.DataFrame] = None
+    vcluster: Optional[pd.DataFrame] = None
+
+    def extra_sheets(self) -> List[Tuple[str, pd.DataFrame]]:
+        """(worksheet name, frame) for the optional sheets this estate has."""
+        sheets = [('vDisk', self.vdisk), ('vPartition', self.vpartition),
+                  ('vDatastore', self.vdatastore), ('vCluster', self.vcluster)]
+        return [(name, frame) for name, frame in sheets if frame is not None]
+
+    def split_by_vcenter(self) -> Iterator[Tuple[str, "SyntheticEstate"]]:
+        """Yield (vCenter server, estate restricted to that vCenter)."""
+        def part(frame: Optional[pd.DataFrame], server: str, column: str = 'VI SDK Server'):
+            return None if frame is None else frame[frame[column] == server].reset_index(drop=True)
+
+        for server in self.metadata['Server']:
+            yield server, SyntheticEstate(
+                vinfo=part(self.vinfo, server),
+                vhost=part(self.vhost, server),
+                metadata=part(self.metadata, server, 'Server'),
+                vdisk=part(self.vdisk, server),
+                vpartition=part(self.vpartition, server),
+                vdatastore=part(self.vdatastore, server),
+                vcluster=part(self.vcluster, server),
+            )
+
+
+def _weighted_choice(rng: np.random.Generator, weights: List[float], size: int) -> np.ndarray:
+    p = np.asarray(weights, dtype=float)
+    return rng.choice(len(p), size=size, p=p / p.sum())
+
+
+def _uuids(rng: np.random.Generator, count: int) -> List[str]:
+    raw = rng.bytes(16 * count).hex()
+    return [
+        f"{raw[i:i + 8]}-{raw[i + 8:i + 12]}-{raw[i + 12:i + 16]}-{raw[i + 16:i + 20]}-{raw[i + 20:i + 32]}"
+        for i in range(0, 32 * count, 32)
+    ]
+
+
+def _messy_percentages(rng: np.random.Generator, percent: np.ndarray, messy_share: float) -> np.ndarray:
+    """
+    Render integer usage percentages the way mixed RVTools versions and
+    hand-edited extracts do: 27, "27%", "27 %", 0.27, "27.0", " 27 ", blank.
+    """
+    values = percent.astype(object)
+    messy = rng.random(len(percent)) < messy_share
+    styles = rng.integers(0, 6, size=len(percent))
+    for idx in np.flatnonzero(messy):
+        pct = int(percent[idx])
+        style = styles[idx]
+        if style == 0:
+            values[idx] = f"{pct}%"
+        elif style == 1:
+            values[idx] = f"{pct} %"
+        elif style == 2:
+            values[idx] = round(pct / 100, 4)
+        elif style == 3:
+            values[idx] = f"{pct}.0"
+        elif style == 4:
+            values[idx] = f" {pct} "
+        else:
+            values[idx] = None
+    return values
+
+
+def generate_estate(spec: WorkbookSpec) -> SyntheticEstate:
+    """
+    Generate a deterministic synthetic estate for the given spec.
+
+    The same spec (including seed) always yields identical frames.
+    """
+    if spec.vms < 1:
+        raise ValueError("spec.vms must be at least 1")
+
+    rng = np.random.default_rng(spec.seed)
+    n_vcenters = spec.vcenters
+    n_hosts = spec.resolved_hosts()
+    n_clusters = spec.resolved_clusters()
+
+    servers = [f"vcenter{i + 1:02d}.corp.example.com" for i in range(n_vcenters)]
+
+    # Topology: clusters round-robin across vCenters, hosts round-robin across clusters
+    cluster_vcenter = np.arange(n_clusters) % n_vcenters
+    cluster_dc = (np.arange(n_clusters) // n_vcenters) % 2
+    cluster_names = np.array([f"CL-{cluster_vcenter[c] + 1:02d}-{c + 1:04d}" for c in range(n_clusters)], dtype=object)
+    dc_names = np.array(
+        [f"DC-{cluster_vcenter[c] + 1:02d}-{'AB'[cluster_dc[c]]}" for c in range(n_clusters)], dtype=object
+    )
+    host_cluster = np.sort(np.arange(n_hosts) % n_clusters)
+
+    # Host hardware
+    model_idx = rng.integers(0, len(HOST_MODELS), size=n_clusters)[host_cluster]  # homogeneous clusters
+    vendors = np.array([m[0] for m in HOST_MODELS], dtype=object)[model_idx]
+    models = np.array([m[1] for m in HOST_MODELS], dtype=object)[model_idx]
+    sockets = np.array([m[2] for m in HOST_MODELS])[model_idx]
+    cores_per_cpu = np.array([m[3] for m in HOST_MODELS])[model_idx]
+    host_memory_mb = np.array([m[4] for m in HOST_MODELS])[model_idx]
+    total_cores = sockets * cores_per_cpu
+    esx_versions = np.array([v[0] for v in ESX_VERSIONS], dtype=object)[
+        _weighted_choice(rng, [v[1] for v in ESX_VERSIONS], n_clusters)
+    ][host_cluster]
+    host_names = np.array(
+        [f"esx{h + 1:05d}.{cluster_names[host_cluster[h]].lower()}.corp.example.com" for h in range(n_hosts)],
+        dtype=object,
+    )
+    cpu_usage = np.clip(np.round(rng.beta(2.0, 4.5, size=n_hosts) * 100), 2, 99).astype(int)
+    mem_usage = np.clip(np.round(rng.beta(5.0, 4.0, size=n_hosts) * 100), 5, 99).astype(int)
+    ht_active = rng.random(n_hosts) < 0.9
+
+    # VM placement weighted by host core count
+    host_for_vm = rng.choice(n_hosts, size=spec.vms, p=total_cores / total_cores.sum())
+    vm_cluster = host_cluster[host_for_vm]
+
+    vcpu_choice = _weighted_choice(rng, [w for _, w in VCPU_DISTRIBUTION], spec.vms)
+    vcpus = np.array([v for v, _ in VCPU_DISTRIBUTION])[vcpu_choice]
+    memory = np.empty(spec.vms, dtype=np.int64)
+    for vcpu_value, options in MEMORY_MIB_BY_VCPU.items():
+        mask = vcpus == vcpu_value
+        memory[mask] = rng.choice(options, size=int(mask.sum()))
+    provisioned = np.round(rng.lognormal(mean=11.6, sigma=0.9, size=spec.vms)).astype(np.int64) + 20480
+    in_use = np.round(provisioned * rng.uniform(0.15, 1.0, size=spec.vms)).astype(np.int64)
+
+    power_draw = rng.random(spec.vms)
+    off_cut = spec.powered_on_ratio
+    powerstate = np.where(
+        power_draw < off_cut, "poweredOn", np.where(power_draw < off_cut + (1 - off_cut) * 0.9, "poweredOff", "suspended")
+    ).astype(object)
+
+    os_names = np.array([name for name, _ in OS_DISTRIBUTION], dtype=object)
+    os_config = os_names[_weighted_choice(rng, [w for _, w in OS_DISTRIBUTION], spec.vms)]
+    os_tools = os_config.copy()
+    tools_draw = rng.random(spec.vms)
+    drift = tools_draw < 0.12
+    os_tools[drift] = [OS_TOOLS_DRIFT.get(name, name) for name in os_config[drift]]
+    # VMware Tools reports nothing for most powered-off VMs and some running ones
+    no_tools = ((powerstate != "poweredOn") & (tools_draw > 0.3)) | (tools_draw > 0.95)
+    os_tools[no_tools] = ""
+
+    prefixes = np.array(VM_NAME_PREFIXES, dtype=object)[rng.integers(0, len(VM_NAME_PREFIXES), size=spec.vms)]
+    vm_names = [f"{prefix}-{i + 1:07d}" for i, prefix in enumerate(prefixes)]
+
+    vm_servers = np.array(servers, dtype=object)[cluster_vcenter[vm_cluster]]
+    vinfo = pd.DataFrame({
+        'VM': vm_names,
+        'Powerstate': powerstate,
+        'Template': False,
+        'Connection state': np.where(rng.random(spec.vms) < 0.995, "connected", "orphaned").astype(object),
+        'Guest state': np.where(powerstate == "poweredOn", "running", "notRunning").astype(object),
+        'CPUs': vcpus,
+        'Memory': memory,
+        'NICs': rng.integers(1, 4, size=spec.vms),
+        'Disks': rng.integers(1, 6, size=spec.vms),
+        'Resource pool': np.array(["Resources", "Production", "Dev-Test"], dtype=object)[
+            rng.integers(0, 3, size=spec.vms)
+        ],
+        'Provisioned MiB': provisioned,
+        'In Use MiB': in_use,
+        'Datacenter': dc_names[vm_cluster],
+        'Cluster': cluster_names[vm_cluster],
+        'Host': host_names[host_for_vm],
+        'OS according to the configuration file': os_config,
+        'OS according to the VMware Tools': os_tools,
+        'VM UUID': _uuids(rng, spec.vms),
+        'VI SDK Server': vm_servers,
+    })
+
+    vms_per_host = np.bincount(host_for_vm, minlength=n_hosts)
+    vhost = pd.DataFrame({
+        'Host': host_names,
+        'Datacenter': dc_names[host_cluster],
+        'Cluster': cluster_names[host_cluster],
+        'CPU Model': "Intel(R) Xeon(R) Gold 6248R CPU @ 3.00GHz",
+        'Speed': 3000,
+        'HT Available': True,
+        'HT Active': ht_active,
+        '# CPU': sockets,
+        'Cores per CPU': cores_per_cpu,
+        '# Cores': total_cores,
+        'CPU usage %': _messy_percentages(rng, cpu_usage, spec.messy_percentages),
+        '# Memory': host_memory_mb,
+        'Memory usage %': _messy_percentages(rng, mem_usage, spec.messy_percentages),
+        '# VMs': vms_per_host,
+        'ESX Version': esx_versions,
+        'Vendor': vendors,
+        'Model': models,
+        'VI SDK Server': np.array(servers, dtype=object)[cluster_vcenter[host_cluster]],
+    })
+
+    metadata = pd.DataFrame({
+        'RVTools major version': spec.rvtools_version.rsplit('.', 2)[0],
+        'RVTools version': spec.rvtools_version,
+        'xlsx creation datetime': spec.extract_datetime,
+        'Server': servers,
+    })
+
+    estate = SyntheticEstate(vinfo=vinfo, vhost=vhost, metadata=metadata)
+    if spec.extra_sheets:
+        _add_extra_sheets(rng, estate, cluster_names, cluster_vcenter, servers)
+    return estate
+
+
+def _add_extra_sheets(rng: np.random.Generator, estate: SyntheticEstate, cluster_names: np.ndarray,
+                      cluster_vcenter: np.ndarray, servers: List[str]) -> None:
+    """Derive vDisk, vPartition, vDatastore and vCluster from the generated VMs and hosts."""
+    vinfo, vhost = estate.vinfo, estate.vhost
+    n_vms = len(vinfo)
+    server_names = np.array(servers, dtype=object)
+
+    # vDisk: each VM's provisioned space split across its disks
+    disks = vinfo['Disks'].to_numpy()
+    disk_vm = np.repeat(np.arange(n_vms), disks)
+    weights = rng.uniform(0.2, 1.0, size=len(disk_vm))
+    weights /= np.bincount(disk_vm, weights=weights, minlength=n_vms)[disk_vm]
+    capacity = np.maximum(np.round(vinfo['Provisioned MiB'].to_numpy()[disk_vm] * weights), 1024).astype(np.int64)
+    disk_number = np.arange(len(disk_vm)) - np.repeat(np.cumsum(disks) - disks, disks)
+    vm_columns = ['VM', 'Powerstate', 'Datacenter', 'Cluster', 'Host', 'VI SDK Server']
+    estate.vdisk = pd.DataFrame({
+        'VM': vinfo['VM'].to_numpy()[disk_vm],
+        'Powerstate': vinfo['Powerstate'].to_numpy()[disk_vm],
+        'Disk': [f"Hard disk {n + 1}" for n in disk_number],
+        'Capacity MiB': capacity,
+        'Thin': rng.random(len(disk_vm)) < 0.6,
+        **{col: vinfo[col].to_numpy()[disk_vm] for col in vm_columns[2:]},
+    })
+
+    # vPartition: one guest partition per disk, for running VMs with VMware Tools
+    reporting = ((vinfo['Powerstate'].to_numpy() == "poweredOn")
+                 & (vinfo['OS according to the VMware Tools'].to_numpy() != ""))[disk_vm]
+    used_share = (vinfo['In Use MiB'].to_numpy() / vinfo['Provisioned MiB'].to_numpy())[disk_vm]
+    part_capacity = np.round(capacity * 0.98).astype(np.int64)[reporting]
+    consumed = np.round(part_capacity * np.clip(used_share[reporting] * rng.uniform(0.6, 1.0, reporting.sum()),
+                                                0.02, 0.99)).astype(np.int64)
+    windows = vinfo['OS according to the configuration file'].str.contains("Windows").to_numpy()[disk_vm]
+    mounts = [f"{chr(ord('C') + n)}:\\" if is_windows else ("/" if n == 0 else f"/data{n}")
+              for is_windows, n in zip(windows[reporting], disk_number[reporting])]
+    estate.vpartition = pd.DataFrame({
+        'VM': estate.vdisk['VM'].to_numpy()[reporting],
+        'Powerstate': estate.vdisk['Powerstate'].to_numpy()[reporting],
+        'Disk': mounts,
+        'Capacity MiB': part_capacity,
+        'Consumed MiB': consumed,
+        'Free MiB': part_capacity - consumed,
+        'Free %': np.round((part_capacity - consumed) / part_capacity * 100).astype(int),
+        **{col: estate.vdisk[col].to_numpy()[reporting] for col in vm_columns[2:]},
+    })
+
+    # vDatastore: 2-4 shared datastores per cluster, holding that cluster's VMs
+    n_clusters = len(cluster_names)
+    per_cluster = rng.integers(2, 5, size=n_clusters)
+    ds_cluster = np.repeat(np.arange(n_clusters), per_cluster)
+    cluster_index = pd.Series(np.arange(n_clusters), index=cluster_names)
+    vm_cluster = cluster_index[vinfo['Cluster']].to_numpy()
+    first_ds = np.cumsum(per_cluster) - per_cluster
+    vm_datastore = first_ds[vm_cluster] + (rng.random(n_vms) * per_cluster[vm_cluster]).astype(int)
+    provisioned = np.bincount(vm_datastore, weights=vinfo['Provisioned MiB'].to_numpy(), minlength=len(ds_cluster))
+    in_use = np.bincount(vm_datastore, weights=vinfo['In Use MiB'].to_numpy(), minlength=len(ds_cluster))
+    ds_capacity = np.round(np.maximum(in_use * rng.uniform(1.05, 2.5, size=len(ds_cluster)), 1_048_576))
+    estate.vdatastore = pd.DataFrame({
+        'Name': [f"DS-{cluster_names[c]}-{n + 1:02d}" for c, n in
+                 zip(ds_cluster, np.arange(len(ds_cluster)) - first_ds[ds_cluster])],
+        'Type': np.array(["VMFS", "NFS", "vsan"], dtype=object)[rng.integers(0, 3, size=len(ds_cluster))],
+        '# VMs': np.bincount(vm_datastore, minlength=len(ds_cluster)),
+        'Capacity MiB': ds_capacity.astype(np.int64),
+        'Provisioned MiB': np.round(provisioned).astype(np.int64),
+        'In Use MiB': np.round(in_use).astype(np.int64),
+        'Free MiB': (ds_capacity - np.round(in_use)).astype(np.int64),
+        'Free %': np.round((ds_capacity - in_use) / ds_capacity * 100).astype(int),
+        '# Hosts': np.bincount(cluster_index[vhost['Cluster']].to_numpy(), minlength=n_clusters)[ds_cluster],
+        'Cluster name': cluster_names[ds_cluster],
+        'VI SDK Server': server_names[cluster_vcenter[ds_cluster]],
+    })
+
+    # vCluster: totals of each cluster's hosts plus its HA / DRS settings
+    host_cluster = cluster_index[vhost['Cluster']].to_numpy()
+    cores = np.bincount(host_cluster, weights=vhost['# Cores'].to_numpy(), minlength=n_clusters)
+    threads = np.bincount(host_cluster, weights=vhost['# Cores'].to_numpy() * np.where(vhost['HT Active'], 2, 1),
+                          minlength=n_clusters)
+    hosts = np.bincount(host_cluster, minlength=n_clusters)
+    memory_mb = np.bincount(host_cluster, weights=vhost['# Memory'].to_numpy(), minlength=n_clusters)
+    ha_enabled = rng.random(n_clusters) < 0.85
+    estate.vcluster = pd.DataFrame({
+        'Name': cluster_names,
+        'NumHosts': hosts,
+        'numEffectiveHosts': hosts,
+        'TotalCpu': (cores * 3000).astype(np.int64),
+        'NumCpuCores': cores.astype(np.int64),
+        'NumCpuThreads': threads.astype(np.int64),
+        'Effective Cpu': np.round(cores * 3000 * 0.95).astype(np.int64),
+        'TotalMemory': (memory_mb * 1024 * 1024).astype(np.int64),
+        'Effective Memory': np.round(memory_mb * 0.95).astype(np.int64),
+        'HA enabled': ha_enabled,
+        'Failover Level': np.where(ha_enabled, np.where(rng.random(n_clusters) < 0.2, 2, 1), 0),
+        'AdmissionControlEnabled': ha_enabled,
+        'DRS enabled': rng.random(n_clusters) < 0.9,
+        'VI SDK Server': server_names[cluster_vcenter],
+    })
+
+
+def _write_sheet(workbook, title: str, frame: pd.DataFrame, header_offset: int, label: str):
+    """Stream a frame into a write-only worksheet, optionally below title rows."""
+    sheet = workbook.create_sheet(title)
+    for i in range(header_offset):
+        sheet.append([f"RVTools export - {label}" if i == 0 else None])
+    sheet.append(list(frame.columns))
+    columns = [frame[col].tolist() for col in frame.columns]
+    for row in zip(*columns):
+        sheet.append(row)
+
+
+def write_workbook(estate: SyntheticEstate, path, header_offset: int = 0):
+    """Write one estate (or one vCenter slice of it) as an RVTools-style .xlsx (to a path or buffer)."""
+    from openpyxl import Workbook
+
+    for title, frame in [('vInfo', estate.vinfo), *estate.extra_sheets()]:
+        if len(frame) + header_offset + 1 > EXCEL_MAX_ROWS:
+            raise ValueError(
+                f"{len(frame):,} {title} rows do not fit on one worksheet; "
+                "increase vcenters and split_by_vcenter"
+            )
+
+    if isinstance(path, (str, Path)):
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+    label = ", ".join(estate.metadata['Server'])
+    workbook = Workbook(write_only=True)
+    _write_sheet(workbook, 'vInfo', estate.vinfo, header_offset, label)
+    _write_sheet(workbook, 'vHost', estate.vhost, header_offset, label)
+    _write_sheet(workbook, 'vMetaData', estate.metadata, 0, label)
+    for title, frame in estate.extra_sheets():
+        _write_sheet(workbook, title, frame, header_offset, label)
+    workbook.save(path)
+    return path
+
+
+def csv_export(estate: SyntheticEstate, prefix: str = "RVTools_tab") -> Iterator[Tuple[str, str]]:
+    """(file name, CSV text) per tab, as RVTools' ExportAll2csv writes them."""
+    sheets = [('vInfo', estate.vinfo), ('vHost', estate.vhost), ('vMetaData', estate.metadata),
+              *estate.extra_sheets()]
+    for title, frame in sheets:
+        yield f"{prefix}{title}.csv", frame.to_csv(index=False)
+
+
+def write_workbooks(spec: WorkbookSpec, output_dir, estate: Optional[SyntheticEstate] = None) -> List[Path]:
+    """
+    Generate (unless an estate is given) and write the workbooks for a spec.
+
+    Returns:
+        List of written paths: one workbook (or CSV export folder) per vCenter
+        when split_by_vcenter, or the single zip archive when zip_output.
+    """
+    logger = logging.getLogger(__name__)
+    output_dir = Path(output_dir)
+    estate = estate if estate is not None else generate_estate(spec)
+    if spec.output_format not in ("xlsx", "csv"):
+        raise ValueError(f"Unknown output_format '{spec.output_format}'. Expected 'xlsx' or 'csv'")
+
+    if spec.split_by_vcenter:
+        targets = [(f"RVTools_export_{server.split('.')[0]}_seed{spec.seed}", part)
+                   for server, part in estate.split_by_vcenter()]
+    else:
+        targets = [(f"RVTools_export_all_seed{spec.seed}", estate)]
+
+    if spec.zip_output:
+        import zipfile
+
+        output_dir.mkdir(parents=True, exist_ok=True)
+        path = output_dir / f"RVTools_export_seed{spec.seed}_{spec.output_format}.zip"
+        with zipfile.ZipFile(path, "w", compression=zipfile.ZIP_DEFLATED) as archive:
+            for name, part in targets:
+                logger.info(f"Writing {len(part.vinfo):,} VMs / {len(part.vhost):,} hosts to {path}:{name}")
+                if spec.output_format == "csv":
+                    for file_name, text in csv_export(part):
+                        archive.writestr(f"{name}/{file_name}", text)
+                else:
+                    buffer = io.BytesIO()
+                    write_workbook(part, buffer, header_offset=spec.header_offset)
+                    archive.writestr(f"{name}.xlsx", buffer.getvalue())
+        return [path]
+
+    paths = []
+    for name, part in targets:
+        if spec.output_format == "csv":
+            path = output_dir / name
+            logger.info(f"Writing {len(part.vinfo):,} VMs / {len(part.vhost):,} hosts to {path}/")
+            path.mkdir(parents=True, exist_ok=True)
+            for file_name, text in csv_export(part):
+                (path / file_name).write_text(text, encoding="utf-8")
+            paths.append(path)
+        else:
+            path = output_dir / f"{name}.xlsx"
+            logger.info(f"Writing {len(part.vinfo):,} VMs / {len(part.vhost):,} hosts to {path}")
+            paths.append(write_workbook(part, path, header_offset=spec.header_offset))
+    return paths
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Generate synthetic RVTools workbooks for scale testing")
+    parser.add_argument("--vms", type=int, default=1000, help="Number of VMs (default: 1000)")
+    parser.add_argument("--hosts", type=int, default=None, help="Number of hosts (default: VMs / 25)")
+    parser.add_argument("--clusters", type=int, default=None, help="Number of clusters (default: hosts / 8)")
+    parser.add_argument("--vcenters", type=int, default=1, help="Number of vCenters (default: 1)")
+    parser.add_argument("--seed", type=int, default=42, help="Random seed (default: 42)")
+    parser.add_argument("--messy-percentages", type=float, default=0.3,
+                        help="Share of usage %% cells in non-canonical formats (default: 0.3)")
+    parser.add_argument("--header-offset", type=int, default=0,
+                        help="Title rows written above each header row (default: 0)")
+    parser.add_argument("--single-workbook", action="store_true",
+                        help="Write all vCenters into one workbook instead of one per vCenter")
+    parser.add_argument("--core-sheets-only", action="store_true",
+                        help="Only write vInfo, vHost and vMetaData")
+    parser.add_argument("--format", choices=["xlsx", "csv"], default="xlsx",
+                        help="Workbooks, or RVTools per-tab CSV exports (default: xlsx)")
+    parser.add_argument("--zip", action="store_true", help="Pack every extract into one zip archive")
+    parser.add_argument("--output", default="inputs/synthetic", help="Output directory")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    spec = WorkbookSpec(
+        vms=args.vms,
+        hosts=args.hosts,
+        clusters=args.clusters,
+        vcenters=args.vcenters,
+        seed=args.seed,
+        messy_percentages=args.messy_percentages,
+        header_offset=args.header_offset,
+        split_by_vcenter=not args.single_workbook,
+        extra_sheets=not args.core_sheets_only,
+        output_format=args.format,
+        zip_output=args.zip,
+    )
+    for path in write_workbooks(spec, args.output):
+        print(path)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,15 @@
+"""
+Documentation Chat Package
+Offline chat backend for ChatWidget.jsx: retrieval over the project's markdown
+knowledge base and planned queries over stored RVTools snapshots
+"""
+
+from .corpus import DEFAULT_DOCUMENTS, Passage, tokenize
+from .datasets import Dataset, QueryResult, execute
+from .index import ChatIndex, Hit, load_index, update_index
+from .planner import Filter, QueryPlan, plan_question
+
+__all__ = [
+    "DEFAULT_DOCUMENTS", "ChatIndex", "Dataset", "Filter", "Hit", "Passage", "QueryPlan", "QueryResult",
+    "execute", "load_index", "plan_question", "tokenize", "update_index",
+]
@@ -0,0 +1,68 @@
+"""
+Documentation chat command line (run from the api directory).
+
+Usage:
+    python -m chat build [--full]          build or incrementally update the index
+    python -m chat query "what is PUE?"    print the ranked passages and latency
+    python -m chat serve [--port 8000]     start the /chat API for ChatWidget.jsx
+"""
+
+import argparse
+import logging
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+from .corpus import document_patterns
+from .index import default_index_dir, update_index
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent.parent
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m chat", description="Offline documentation chat")
+    commands = parser.add_subparsers(dest="command", required=True)
+    build = commands.add_parser("build", help="Build or update the index")
+    build.add_argument("--full", action="store_true", help="Re-read every document")
+    query = commands.add_parser("query", help="Search the index")
+    query.add_argument("question")
+    query.add_argument("--top-k", type=int, default=5)
+    query.add_argument("--repeat", type=int, default=200, help="Searches to time (default: 200)")
+    serve = commands.add_parser("serve", help="Start the chat API")
+    serve.add_argument("--host", default="0.0.0.0")
+    serve.add_argument("--port", type=int, default=8000)
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO, format='%(levelname)s - %(message)s')
+
+    if args.command == "serve":
+        import uvicorn
+        uvicorn.run("chat.service:app", host=args.host, port=args.port)
+        return 0
+
+    started = time.perf_counter()
+    index, changes = update_index(PROJECT_ROOT, document_patterns(), default_index_dir(),
+                                  force=getattr(args, "full", False))
+    if args.command == "build":
+        print(f"Index: {default_index_dir()} ({time.perf_counter() - started:.2f}s)")
+        print(f"   {index.stats()}")
+        print(f"   added {len(changes['added'])}, changed {len(changes['changed'])}, "
+              f"removed {len(changes['removed'])}, unchanged {changes['unchanged']}")
+        return 0
+
+    timings = []
+    for _ in range(max(args.repeat, 1)):
+        started = time.perf_counter()
+        hits = index.search(args.question, args.top_k)
+        timings.append(time.perf_counter() - started)
+    for rank, hit in enumerate(hits, start=1):
+        print(f"{rank}. {hit.passage.reference}  (rrf {hit.score:.4f}, bm25 {hit.bm25:.2f}, "
+              f"cos {hit.similarity:.3f})")
+    p50, p95 = np.percentile(timings, [50, 95]) * 1000
+    print(f"Retrieval: p50 {p50:.3f} ms, p95 {p95:.3f} ms over {len(timings)} searches")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,151 @@
+"""
+Documentation Corpus
+Finds the project's knowledge-base documents and splits them into passages.
+
+Markdown files are split at headings, so every passage carries its heading
+path ("Guide > Section > Subsection"); sections longer than MAX_CHUNK_CHARS
+are split further at paragraph boundaries. src/data/citations.js yields one
+passage per citation key (rationale + source).
+"""
+
+import fnmatch
+import hashlib
+import json
+import os
+import re
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Iterable, List, Sequence, Tuple
+
+DEFAULT_DOCUMENTS = (
+    "VALUE_MODEL_ANALYSIS.md",
+    "PROJECT_DOCUMENTATION.md",
+    "RVTools_*.md",
+    "QUICK_START_RVTOOLS.md",
+    "RVToolAnalysisWithCursorAI/*.md",
+    "src/data/citations.js",
+)
+MAX_CHUNK_CHARS = 1500
+
+_HEADING = re.compile(r"^(#{1,6})\s+(.+?)\s*#*\s*$")
+_EMPHASIS = re.compile(r"[*_`]+")
+_FENCE = re.compile(r"^\s*(```|~~~)")
+_CITATION = re.compile(
+    r"(\w+)\s*:\s*\{\s*rationale\s*:\s*\"((?:[^\"\\]|\\.)*)\"\s*,\s*source\s*:\s*\"((?:[^\"\\]|\\.)*)\"\s*,?\s*\}",
+    re.S,
+)
+_CAMEL = re.compile(r"(?<=[a-z0-9])(?=[A-Z])")
+_TOKEN = re.compile(r"[a-z0-9]+(?:[.'][a-z0-9]+)*")
+STOPWORDS = frozenset("""
+a an and are as at be been but by can do does for from has have how i if in into is it its
+me my no not of on or our so such that the their then there these this those to was we what
+when where which who why will with you your
+""".split())
+
+
+@dataclass
+class Passage:
+    """One retrievable unit of a document."""
+    source: str  # document path relative to the project root
+    title: str   # heading path or citation key
+    text: str
+
+    @property
+    def reference(self) -> str:
+        """"document#innermost heading" (the form ChatWidget.jsx lists as a source)."""
+        return f"{self.source}#{self.title.split(' > ')[-1]}" if self.title else self.source
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercased word tokens without stopwords; camelCase identifiers are split."""
+    words = _TOKEN.findall(_CAMEL.sub(" ", text).lower())
+    return [w for w in words if w not in STOPWORDS]
+
+
+def discover_documents(root: Path, patterns: Sequence[str] = DEFAULT_DOCUMENTS) -> List[str]:
+    """Project-relative paths (sorted, POSIX separators) matching any of the glob patterns."""
+    root = Path(root)
+    found = set()
+    for pattern in patterns:
+        for path in root.glob(pattern):
+            if path.is_file():
+                found.add(path.relative_to(root).as_posix())
+    return sorted(found)
+
+
+def file_digest(path: Path) -> str:
+    """sha256 of a file's bytes."""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _split_long(text: str, limit: int = MAX_CHUNK_CHARS) -> Iterable[str]:
+    """Pack paragraphs into pieces of at most `limit` characters (a longer paragraph stays whole)."""
+    if len(text) <= limit:
+        yield text
+        return
+    piece = ""
+    for paragraph in re.split(r"\n\s*\n", text):
+        if piece and len(piece) + len(paragraph) + 2 > limit:
+            yield piece
+            piece = ""
+        piece = f"{piece}\n\n{paragraph}" if piece else paragraph
+    if piece:
+        yield piece
+
+
+def chunk_markdown(source: str, text: str) -> List[Passage]:
+    """Split a markdown document into heading-scoped passages."""
+    passages: List[Passage] = []
+    headings: List[Tuple[int, str]] = []  # (level, text) of the enclosing headings
+    lines: List[str] = []
+    in_fence = False
+
+    def flush():
+        body = "\n".join(lines).strip()
+        lines.clear()
+        if body:
+            title = " > ".join(heading for _, heading in headings)
+            passages.extend(Passage(source, title, piece) for piece in _split_long(body))
+
+    for line in text.splitlines():
+        if _FENCE.match(line):
+            in_fence = not in_fence
+        match = None if in_fence else _HEADING.match(line)
+        if match:
+            flush()
+            level = len(match.group(1))
+            while headings and headings[-1][0] >= level:
+                headings.pop()
+            headings.append((level, _EMPHASIS.sub("", match.group(2)).strip()))
+        else:
+            lines.append(line)
+    flush()
+    return passages
+
+
+def chunk_citations(source: str, text: str) -> List[Passage]:
+    """One passage per citations.js entry."""
+    passages = []
+    for key, rationale, origin in _CITATION.findall(text):
+        rationale, origin = json.loads(f'"{rationale}"'), json.loads(f'"{origin}"')
+        label = _CAMEL.sub(" ", key)
+        passages.append(Passage(source, key, f"{label[:1].upper()}{label[1:]}: {rationale} {origin}"))
+    return passages
+
+
+def chunk_document(root: Path, source: str) -> List[Passage]:
+    """Passages of one project-relative document."""
+    text = (Path(root) / source).read_text(encoding='utf-8', errors='replace')
+    if fnmatch.fnmatch(source, "*citations.js"):
+        return chunk_citations(source, text)
+    return chunk_markdown(source, text)
+
+
+def document_patterns() -> Sequence[str]:
+    """Glob patterns from CHAT_DOCUMENTS (os.pathsep separated), else DEFAULT_DOCUMENTS."""
+    configured = os.environ.get("CHAT_DOCUMENTS")
+    return [p for p in configured.split(os.pathsep) if p] if configured else DEFAULT_DOCUMENTS
@@ -0,0 +1,317 @@
+"""
+Chat Datasets
+Consolidated RVTools data prepared for the query planner, and per-session
+caches of intermediate results.
+
+A Dataset holds one snapshot's VMs and hosts as columns ready for vectorised
+filtering: measures as float arrays (RAM and storage in GB) and text fields
+factorised once into integer codes plus their distinct values, so equality
+is one integer comparison over the codes and a substring match only scans
+the distinct values. Datasets are built from consolidated vInfo / vHost
+frames (e.g. SnapshotStore.load_consolidated) and shared by all sessions.
+
+Each ChatSession keeps the filter masks and query results it computed
+(masks bit-packed, both LRU-bounded), so a follow-up question that adds a
+filter or changes the aggregate reuses the earlier work. It also remembers
+its last plan and snapshot for follow-ups.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from .planner import NUMERIC_FIELDS, TEXT_FIELDS, Filter, QueryPlan
+
+NO_VALUE = "(none)"
+
+# Logical field -> consolidated vInfo / vHost column (numeric: column, divisor)
+VM_TEXT_COLUMNS = {
+    "vm": "VM", "cluster": "Cluster", "host": "Host", "datacenter": "Datacenter", "vcenter": "VI SDK Server",
+    "powerstate": "Powerstate", "os": "OS according to the configuration file", "os_class": "OS Classification",
+}
+VM_NUMERIC_COLUMNS = {"vcpus": ("CPUs", 1), "memory_gb": ("Memory", 1024), "storage_gb": ("Provisioned MiB", 1024)}
+HOST_TEXT_COLUMNS = {
+    "host": "Host", "cluster": "Cluster", "datacenter": "Datacenter", "vendor": "Vendor", "model": "Model",
+    "esx_version": "ESX Version",
+}
+HOST_NUMERIC_COLUMNS = {
+    "cores": ("# Cores", 1), "sockets": ("# CPU", 1), "memory_gb": ("# Memory", 1024),
+    "cpu_usage": ("CPU usage %", 1), "memory_usage": ("Memory usage %", 1),
+}
+LIST_FIELDS = {
+    "vms": ("vm", "cluster", "host", "powerstate", "os", "vcpus", "memory_gb", "storage_gb"),
+    "hosts": ("host", "cluster", "datacenter", "model", "cores", "memory_gb", "cpu_usage", "memory_usage"),
+}
+_AGGREGATE_FUNCTIONS = {"sum": np.nansum, "mean": np.nanmean, "min": np.nanmin, "max": np.nanmax}
+
+
+@dataclass
+class TextColumn:
+    """A factorised text field: row codes (-1 = missing) and the distinct values."""
+    codes: np.ndarray
+    values: np.ndarray  # as stored
+    lowered: np.ndarray  # stripped and lowercased, for matching
+
+    @classmethod
+    def from_series(cls, series: Optional[pd.Series], rows: int) -> "TextColumn":
+        if series is None:
+            return cls(np.full(rows, -1, dtype=np.int64), np.empty(0, dtype=object), np.empty(0, dtype=object))
+        codes, uniques = pd.factorize(series.astype(object), use_na_sentinel=True)
+        values = np.array([str(u) for u in uniques], dtype=object)
+        lowered = np.array([v.strip().lower() for v in values], dtype=object)
+        return cls(codes, values, lowered)
+
+    def matching(self, op: str, value: str) -> np.ndarray:
+        """Codes of the distinct values satisfying an eq / ne / contains predicate."""
+        value = str(value).strip().lower()
+        if op == "contains":
+            return np.flatnonzero([value in v for v in self.lowered])
+        return np.flatnonzero(self.lowered == value)
+
+
+class Table:
+    """One table (vms or hosts) of a Dataset."""
+
+    def __init__(self, name: str, frame: Optional[pd.DataFrame], text_columns: Dict[str, str],
+                 numeric_columns: Dict[str, Tuple[str, float]]):
+        frame = frame if frame is not None else pd.DataFrame()
+        self.name = name
+        self.rows = len(frame)
+        self.text = {f: TextColumn.from_series(frame.get(column), self.rows) for f, column in text_columns.items()}
+        self.numeric = {}
+        for f, (column, divisor) in numeric_columns.items():
+            values = pd.to_numeric(frame[column], errors='coerce') if column in frame.columns else None
+            self.numeric[f] = (values.to_numpy(dtype=np.float64, na_value=np.nan) / divisor
+                               if values is not None else np.full(self.rows, np.nan))
+
+    def vocabulary(self) -> Dict[str, Dict[str, str]]:
+        """Text field -> {lowercased value: stored value}."""
+        return {f: dict(zip(column.lowered, column.values)) for f, column in self.text.items()}
+
+    def mask(self, predicate: Filter) -> np.ndarray:
+        """Boolean row mask of one filter (missing values never match)."""
+        if predicate.field in self.text:
+            column = self.text[predicate.field]
+            codes = column.matching(predicate.op, predicate.value)
+            matched = np.isin(column.codes, codes) if len(codes) != 1 else column.codes == codes[0]
+            return (~matched & (column.codes >= 0)) if predicate.op == "ne" else matched
+        if predicate.field in self.numeric:
+            values, target = self.numeric[predicate.field], float(predicate.value)
+            with np.errstate(invalid='ignore'):
+                return {"eq": np.equal, "ne": np.not_equal, "gt": np.greater, "ge": np.greater_equal,
+                        "lt": np.less, "le": np.less_equal}[predicate.op](values, target) & ~np.isnan(values)
+        raise ValueError(f"Field '{predicate.field}' is not available for {self.name}")
+
+    def display(self, field_name: str, rows: np.ndarray) -> List[Any]:
+        """Values of a field for some rows, as JSON-friendly Python values."""
+        if field_name in self.text:
+            column = self.text[field_name]
+            codes = column.codes[rows]
+            return [column.values[c] if c >= 0 else None for c in codes]
+        values = self.numeric[field_name][rows]
+        return [None if np.isnan(v) else round(float(v), 2) for v in values]
+
+
+class Dataset:
+    """One snapshot's VMs and hosts, prepared for vectorised queries."""
+
+    def __init__(self, vinfo: Optional[pd.DataFrame], vhost: Optional[pd.DataFrame],
+                 snapshot: Optional[Dict[str, Any]] = None):
+        self.snapshot = snapshot or {}
+        self.key = self.snapshot.get("snapshot_id")
+        if vinfo is not None and "OS according to the VMware Tools" in vinfo.columns:
+            os_config = vinfo.get("OS according to the configuration file")
+            tools = vinfo["OS according to the VMware Tools"]
+            vinfo = vinfo.assign(**{"OS according to the configuration file":
+                                    tools if os_config is None else os_config.where(os_config.notna(), tools)})
+        self.tables = {
+            "vms": Table("vms", vinfo, VM_TEXT_COLUMNS, VM_NUMERIC_COLUMNS),
+            "hosts": Table("hosts", vhost, HOST_TEXT_COLUMNS, HOST_NUMERIC_COLUMNS),
+        }
+        vocabulary = self.tables["vms"].vocabulary()
+        for name, values in self.tables["hosts"].vocabulary().items():
+            vocabulary.setdefault(name, {}).update(values)
+        vocabulary.pop("vm", None)  # VM names are only matched after an explicit "vm"
+        self.vocabulary = vocabulary
+
+
+@dataclass
+class QueryResult:
+    """Outcome of executing a QueryPlan."""
+    plan: QueryPlan
+    matched: int
+    value: Optional[float] = None
+    rows: List[Dict[str, Any]] = field(default_factory=list)
+    cached: bool = False
+    elapsed_ms: float = 0.0
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "plan": self.plan.to_dict(),
+            "matched": self.matched,
+            "value": self.value,
+            "rows": self.rows,
+            "cached": self.cached,
+            "elapsed_ms": round(self.elapsed_ms, 3),
+        }
+
+
+class ChatSession:
+    """Per-session query state: last plan and snapshot, cached masks and results."""
+
+    def __init__(self, mask_limit: int = 32, result_limit: int = 64):
+        self.plan: Optional[QueryPlan] = None
+        self.snapshot_id: Optional[int] = None
+        self.lock = threading.Lock()
+        self.touched = time.monotonic()
+        self._masks: "OrderedDict[Any, Tuple[np.ndarray, int]]" = OrderedDict()
+        self._results: "OrderedDict[Any, QueryResult]" = OrderedDict()
+        self._mask_limit, self._result_limit = mask_limit, result_limit
+
+    @staticmethod
+    def _remember(cache: OrderedDict, key, value, limit: int) -> None:
+        cache[key] = value
+        cache.move_to_end(key)
+        while len(cache) > limit:
+            cache.popitem(last=False)
+
+    def mask(self, key, rows: int, compute: Callable[[], np.ndarray]) -> np.ndarray:
+        """Cached boolean mask (stored bit-packed)."""
+        packed = self._masks.get(key)
+        if packed is not None:
+            self._masks.move_to_end(key)
+            return np.unpackbits(packed[0], count=packed[1]).astype(bool)
+        mask = compute()
+        self._remember(self._masks, key, (np.packbits(mask), rows), self._mask_limit)
+        return mask
+
+    def result(self, key) -> Optional[QueryResult]:
+        result = self._results.get(key)
+        if result is not None:
+            self._results.move_to_end(key)
+        return result
+
+    def store_result(self, key, result: QueryResult) -> None:
+        self._remember(self._results, key, result, self._result_limit)
+
+
+class SessionStore:
+    """ChatSessions by id, evicted when idle longer than `ttl` seconds or over `limit`."""
+
+    def __init__(self, limit: int = 256, ttl: float = 1800):
+        self.limit, self.ttl = limit, ttl
+        self._sessions: "OrderedDict[str, ChatSession]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, session_id: str) -> ChatSession:
+        now = time.monotonic()
+        with self._lock:
+            while self._sessions:
+                oldest_id, oldest = next(iter(self._sessions.items()))
+                if now - oldest.touched <= self.ttl and len(self._sessions) < self.limit:
+                    break
+                del self._sessions[oldest_id]
+            session = self._sessions.pop(session_id, None) or ChatSession()
+            session.touched = now
+            self._sessions[session_id] = session
+            return session
+
+
+class DatasetCache:
+    """Datasets by snapshot id, loaded on first use and kept for the `limit` most recent."""
+
+    def __init__(self, loader: Callable[[int], Dataset], limit: int = 2):
+        self.loader, self.limit = loader, limit
+        self._datasets: "OrderedDict[int, Dataset]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, snapshot_id: int) -> Dataset:
+        with self._lock:
+            dataset = self._datasets.get(snapshot_id)
+            if dataset is None:
+                dataset = self._datasets[snapshot_id] = self.loader(snapshot_id)
+            self._datasets.move_to_end(snapshot_id)
+            while len(self._datasets) > self.limit:
+                self._datasets.popitem(last=False)
+            return dataset
+
+
+def _filter_mask(plan: QueryPlan, table: Table, dataset: Dataset, session: Optional[ChatSession]) -> np.ndarray:
+    """Rows matching every filter of a plan, reusing the session's cached masks."""
+    def single(predicate: Filter) -> np.ndarray:
+        if session is None:
+            return table.mask(predicate)
+        return session.mask((dataset.key, table.name, predicate), table.rows, lambda: table.mask(predicate))
+
+    if not plan.filters:
+        return np.ones(table.rows, dtype=bool)
+    if len(plan.filters) == 1:
+        return single(plan.filters[0])
+
+    def combined() -> np.ndarray:
+        mask = single(plan.filters[0])
+        for predicate in plan.filters[1:]:
+            mask = mask & single(predicate)
+        return mask
+
+    if session is None:
+        return combined()
+    return session.mask((dataset.key, table.name, frozenset(plan.filters)), table.rows, combined)
+
+
+def execute(plan: QueryPlan, dataset: Dataset, session: Optional[ChatSession] = None) -> QueryResult:
+    """
+    Run a plan against a dataset.
+
+    Raises:
+        ValueError: If the plan uses a field the table does not have
+    """
+    started = time.perf_counter()
+    result_key = (dataset.key, plan)
+    cached = session.result(result_key) if session is not None else None
+    if cached is not None:
+        return QueryResult(cached.plan, cached.matched, cached.value, cached.rows, cached=True,
+                           elapsed_ms=(time.perf_counter() - started) * 1000)
+
+    table = dataset.tables[plan.table]
+    for name in [f.field for f in plan.filters] + [plan.measure, plan.group_by]:
+        if name and name not in TEXT_FIELDS[plan.table] + NUMERIC_FIELDS[plan.table]:
+            raise ValueError(f"Field '{name}' is not available for {plan.table}")
+    mask = _filter_mask(plan, table, dataset, session)
+    matched = int(mask.sum())
+    result = QueryResult(plan, matched)
+    values = table.numeric[plan.measure][mask] if plan.measure else None
+
+    if plan.group_by:
+        groups = table.text[plan.group_by]
+        codes = groups.codes[mask]
+        if plan.aggregate == "count":
+            totals = pd.Series(np.ones(len(codes))).groupby(codes).sum()
+        else:
+            totals = pd.Series(values).groupby(codes).agg(plan.aggregate).dropna()
+        totals = totals.sort_values(ascending=False, kind='stable').head(plan.limit)
+        result.rows = [{plan.group_by: groups.values[c] if c >= 0 else NO_VALUE,
+                        plan.aggregate: round(float(v), 2)} for c, v in totals.items()]
+    elif plan.aggregate == "list":
+        rows = np.flatnonzero(mask)
+        if plan.measure and len(rows) > plan.limit:
+            measure = np.nan_to_num(table.numeric[plan.measure][rows], nan=-np.inf)
+            rows = rows[np.argpartition(-measure, plan.limit)[:plan.limit]]
+        if plan.measure:
+            rows = rows[np.argsort(-np.nan_to_num(table.numeric[plan.measure][rows], nan=-np.inf), kind='stable')]
+        rows = rows[:plan.limit]
+        columns = {name: table.display(name, rows) for name in LIST_FIELDS[plan.table]}
+        result.rows = [dict(zip(columns, row)) for row in zip(*columns.values())]
+    elif plan.aggregate != "count":
+        finite = values[~np.isnan(values)]
+        result.value = round(float(_AGGREGATE_FUNCTIONS[plan.aggregate](finite)), 2) if len(finite) else None
+
+    result.elapsed_ms = (time.perf_counter() - started) * 1000
+    if session is not None:
+        session.store_result(result_key, result)
+    return result
@@ -0,0 +1,321 @@
+"""
+Retrieval Index
+Persistent lexical + vector index over the documentation passages.
+
+Lexical scoring is BM25 over a term -> passage postings list stored in CSR
+form. The vector side embeds each passage by feature hashing its words and
+word bigrams into DIMENSIONS signed buckets (sublinear tf, L2-normalised),
+so no model download is needed and a passage's vector depends on nothing
+but its own text. Vectors are stored dimension-major, so a query reads only
+the rows of the few dimensions its own words hash to. Results from both rankings are merged with reciprocal
+rank fusion.
+
+On disk (CHAT_INDEX_DIR, default api/data/chat_index):
+    manifest.json          generation, build parameters and per-document
+                           sha256 / size / mtime / passage range
+    <generation>/          passages.json, terms.json and the .npy arrays
+                           (offsets, postings, tf, lengths, idf, vectors)
+
+The arrays are opened with np.load(mmap_mode='r'), so loading an index
+costs no more than reading the JSON files. update_index() re-reads only the
+documents whose content hash changed and reuses the stored vectors of the
+rest; the postings are re-derived from the passage texts, which takes
+milliseconds. A rebuild writes a new generation directory and then swaps
+manifest.json atomically, so readers never see a partial index.
+"""
+
+import json
+import logging
+import os
+import shutil
+import time
+import zlib
+from collections import Counter
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from .corpus import Passage, chunk_document, discover_documents, file_digest, tokenize
+
+INDEX_VERSION = 1
+DIMENSIONS = 2048
+BM25_K1 = 1.2
+BM25_B = 0.75
+RRF_K = 60
+CANDIDATES = 50
+MIN_SIMILARITY = 0.1
+ARRAYS = ("offsets", "postings", "tf", "lengths", "idf", "vectors")
+
+
+@dataclass
+class Hit:
+    """A ranked passage with its lexical and vector scores."""
+    passage: Passage
+    score: float
+    bm25: float
+    similarity: float
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "source": self.passage.reference,
+            "document": self.passage.source,
+            "title": self.passage.title,
+            "text": self.passage.text,
+            "score": round(self.score, 6),
+            "bm25": round(self.bm25, 4),
+            "similarity": round(self.similarity, 4),
+        }
+
+
+def _features(tokens: Sequence[str]) -> Counter:
+    """Hashed unigram + bigram counts; the sign bit spreads collisions around zero."""
+    counts: Counter = Counter()
+    grams = list(tokens) + [f"{a} {b}" for a, b in zip(tokens, tokens[1:])]
+    for gram in grams:
+        h = zlib.crc32(gram.encode())
+        counts[h % DIMENSIONS] += 1 if h & 0x80000000 else -1
+    return counts
+
+
+def embed(tokens: Sequence[str]) -> Tuple[np.ndarray, np.ndarray]:
+    """Sparse hashed vector (dims, unit-norm weights) of a token sequence."""
+    counts = {d: c for d, c in _features(tokens).items() if c}
+    if not counts:
+        return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float32)
+    dims = np.fromiter(counts, dtype=np.int64, count=len(counts))
+    raw = np.fromiter(counts.values(), dtype=np.float32, count=len(counts))
+    weights = np.sign(raw) * (1 + np.log(np.abs(raw)))
+    return dims, weights / np.linalg.norm(weights)
+
+
+def embed_passages(passages: Sequence[Passage]) -> np.ndarray:
+    """Dense (DIMENSIONS x passages) matrix of passage vectors."""
+    vectors = np.zeros((DIMENSIONS, len(passages)), dtype=np.float32)
+    for column, passage in enumerate(passages):
+        dims, weights = embed(tokenize(f"{passage.title} {passage.text}"))
+        vectors[dims, column] = weights
+    return vectors
+
+
+def lexical_arrays(passages: Sequence[Passage]) -> Tuple[List[str], Dict[str, np.ndarray]]:
+    """Vocabulary and BM25 postings (CSR by term) of the passages."""
+    counts = [Counter(tokenize(f"{p.title} {p.text}")) for p in passages]
+    terms = sorted(set().union(*counts)) if counts else []
+    term_ids = {term: i for i, term in enumerate(terms)}
+
+    rows = np.fromiter((term_ids[t] for c in counts for t in c), dtype=np.int64)
+    postings = np.repeat(np.arange(len(counts), dtype=np.int32), [len(c) for c in counts])
+    tf = np.fromiter((n for c in counts for n in c.values()), dtype=np.float32)
+    order = np.argsort(rows, kind='stable')
+    df = np.bincount(rows, minlength=len(terms))
+    offsets = np.zeros(len(terms) + 1, dtype=np.int64)
+    np.cumsum(df, out=offsets[1:])
+
+    n = len(passages)
+    idf = np.log1p((n - df + 0.5) / (df + 0.5)).astype(np.float32)
+    lengths = np.array([sum(c.values()) for c in counts], dtype=np.float32)
+    return terms, {"offsets": offsets, "postings": postings[order], "tf": tf[order],
+                   "lengths": lengths, "idf": idf}
+
+
+class ChatIndex:
+    """A loaded (memory-mapped) index generation. Instances are read-only."""
+
+    def __init__(self, index_dir: Path, manifest: Dict[str, Any], passages: List[Passage],
+                 terms: List[str], arrays: Dict[str, np.ndarray]):
+        self.index_dir = Path(index_dir)
+        self.manifest = manifest
+        self.passages = passages
+        self.term_ids = {term: i for i, term in enumerate(terms)}
+        self.arrays = arrays
+        lengths = arrays["lengths"]
+        self.avg_length = float(lengths.mean()) if len(lengths) else 0.0
+
+    @property
+    def documents(self) -> Dict[str, Dict[str, Any]]:
+        return self.manifest["documents"]
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "generation": self.manifest["generation"],
+            "built_at": self.manifest["built_at"],
+            "documents": len(self.documents),
+            "passages": len(self.passages),
+            "terms": len(self.term_ids),
+            "dimensions": self.manifest["dimensions"],
+        }
+
+    def _bm25(self, tokens: Sequence[str]) -> np.ndarray:
+        a = self.arrays
+        scores = np.zeros(len(self.passages), dtype=np.float32)
+        for term in set(tokens):
+            term_id = self.term_ids.get(term)
+            if term_id is None:
+                continue
+            start, end = a["offsets"][term_id], a["offsets"][term_id + 1]
+            docs, tf = a["postings"][start:end], a["tf"][start:end]
+            norm = BM25_K1 * (1 - BM25_B + BM25_B * a["lengths"][docs] / self.avg_length)
+            scores[docs] += a["idf"][term_id] * tf * (BM25_K1 + 1) / (tf + norm)
+        return scores
+
+    def _similarity(self, tokens: Sequence[str]) -> np.ndarray:
+        dims, weights = embed(tokens)
+        if not len(dims):
+            return np.zeros(len(self.passages), dtype=np.float32)
+        return weights @ self.arrays["vectors"][dims]
+
+    def search(self, query: str, top_k: int = 5) -> List[Hit]:
+        """Top passages for a query, best first (empty when nothing is relevant)."""
+        tokens = tokenize(query)
+        if not tokens or not self.passages:
+            return []
+        bm25 = self._bm25(tokens)
+        if not bm25.any():
+            # No indexed word in common: similarity alone would only reflect hash collisions
+            return []
+        similarity = self._similarity(tokens)
+
+        fused: Dict[int, float] = {}
+        for scores, floor in ((bm25, 0.0), (similarity, MIN_SIMILARITY)):
+            candidates = np.flatnonzero(scores > floor)
+            if len(candidates) > CANDIDATES:
+                candidates = candidates[np.argpartition(-scores[candidates], CANDIDATES)[:CANDIDATES]]
+            ranked = candidates[np.argsort(-scores[candidates], kind='stable')]
+            for rank, row in enumerate(ranked.tolist(), start=1):
+                fused[row] = fused.get(row, 0.0) + 1.0 / (RRF_K + rank)
+
+        best = sorted(fused.items(), key=lambda item: (-item[1], item[0]))[:top_k]
+        return [Hit(self.passages[row], score, float(bm25[row]), float(similarity[row]))
+                for row, score in best]
+
+
+def default_index_dir() -> Path:
+    """CHAT_INDEX_DIR, else api/data/chat_index."""
+    configured = os.environ.get("CHAT_INDEX_DIR")
+    return Path(configured) if configured else Path(__file__).resolve().parent.parent / "data" / "chat_index"
+
+
+def load_index(index_dir: Optional[Path] = None) -> Optional[ChatIndex]:
+    """Open the current generation of an index, or None if there is no (compatible) index."""
+    index_dir = Path(index_dir or default_index_dir())
+    try:
+        with open(index_dir / "manifest.json") as f:
+            manifest = json.load(f)
+        if manifest.get("version") != INDEX_VERSION or manifest.get("dimensions") != DIMENSIONS:
+            return None
+        generation = index_dir / manifest["generation"]
+        with open(generation / "passages.json") as f:
+            passages = [Passage(**p) for p in json.load(f)]
+        with open(generation / "terms.json") as f:
+            terms = json.load(f)
+        arrays = {name: np.load(generation / f"{name}.npy", mmap_mode='r') for name in ARRAYS}
+    except (OSError, ValueError, KeyError, TypeError):
+        return None
+    return ChatIndex(index_dir, manifest, passages, terms, arrays)
+
+
+def _write_generation(index_dir: Path, documents: Dict[str, Dict[str, Any]], passages: List[Passage],
+                      vectors: np.ndarray) -> None:
+    """Write a new generation directory and point manifest.json at it."""
+    terms, arrays = lexical_arrays(passages)
+    arrays["vectors"] = vectors
+    generation = f"g{time.time_ns()}-{os.getpid()}"
+    target = index_dir / generation
+    target.mkdir(parents=True)
+    with open(target / "passages.json", 'w', encoding='utf-8') as f:
+        json.dump([p.__dict__ for p in passages], f, ensure_ascii=False)
+    with open(target / "terms.json", 'w', encoding='utf-8') as f:
+        json.dump(terms, f, ensure_ascii=False)
+    for name, array in arrays.items():
+        np.save(target / f"{name}.npy", array)
+
+    manifest = {
+        "version": INDEX_VERSION,
+        "generation": generation,
+        "built_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "dimensions": DIMENSIONS,
+        "documents": documents,
+    }
+    staged = index_dir / f"manifest.json.{generation}"
+    with open(staged, 'w') as f:
+        json.dump(manifest, f, indent=2)
+    os.replace(staged, index_dir / "manifest.json")
+
+    # Older generations may still be memory-mapped by a running server; on
+    # POSIX unlinking is safe, elsewhere they are retried on the next build.
+    for old in index_dir.iterdir():
+        if old.is_dir() and old.name != generation:
+            shutil.rmtree(old, ignore_errors=True)
+
+
+def update_index(root: Path, patterns: Sequence[str], index_dir: Optional[Path] = None,
+                 force: bool = False) -> Tuple[ChatIndex, Dict[str, Any]]:
+    """
+    Bring the index in line with the documents under `root`.
+
+    Documents whose size and mtime match the manifest are trusted without
+    hashing; the rest are hashed and only re-chunked when the content changed.
+
+    Args:
+        root: Project root the patterns are relative to
+        patterns: Glob patterns of the documents to index
+        index_dir: Index directory (defaults to default_index_dir())
+        force: Re-read every document
+
+    Returns:
+        (current ChatIndex, {"added", "changed", "removed": [paths], "unchanged": count, "rebuilt": bool})
+    """
+    logger = logging.getLogger(__name__)
+    root, index_dir = Path(root), Path(index_dir or default_index_dir())
+    index = None if force else load_index(index_dir)
+    previous = index.documents if index else {}
+
+    documents: Dict[str, Dict[str, Any]] = {}
+    changes: Dict[str, Any] = {"added": [], "changed": [], "removed": [], "unchanged": 0}
+    reread, restat = set(), False
+    for source in discover_documents(root, patterns):
+        stat = (root / source).stat()
+        entry = {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns}
+        old = previous.get(source)
+        if old and old["size"] == entry["size"] and old["mtime_ns"] == entry["mtime_ns"]:
+            documents[source] = dict(old)
+            changes["unchanged"] += 1
+            continue
+        entry["sha256"] = file_digest(root / source)
+        if old and old["sha256"] == entry["sha256"]:
+            documents[source] = {**old, **entry}
+            changes["unchanged"] += 1
+            restat = True
+            continue
+        documents[source] = entry
+        changes["changed" if old else "added"].append(source)
+        reread.add(source)
+    changes["removed"] = sorted(set(previous) - set(documents))
+
+    changes["rebuilt"] = bool(index is None or reread or changes["removed"] or restat)
+    if not changes["rebuilt"]:
+        return index, changes
+
+    passages: List[Passage] = []
+    blocks: List[np.ndarray] = []
+    for source, entry in documents.items():
+        if source in reread:
+            chunked = chunk_document(root, source)
+            block = embed_passages(chunked)
+        else:
+            start, end = entry["passages"]
+            chunked = index.passages[start:end]
+            block = np.asarray(index.arrays["vectors"][:, start:end])
+        entry["passages"] = [len(passages), len(passages) + len(chunked)]
+        passages.extend(chunked)
+        blocks.append(block)
+    vectors = np.hstack(blocks) if blocks else np.zeros((DIMENSIONS, 0), dtype=np.float32)
+
+    index_dir.mkdir(parents=True, exist_ok=True)
+    _write_generation(index_dir, documents, passages, vectors)
+    logger.info(f"Chat index: {len(passages)} passages from {len(documents)} documents "
+                f"({len(changes['added'])} added, {len(changes['changed'])} changed, "
+                f"{len(changes['removed'])} removed)")
+    return load_index(index_dir), changes
@@ -0,0 +1,320 @@
+"""
+Query Planner
+Turns dataset questions ("how many Windows Server VMs in cluster prod-01 have
+more than 8 vCPUs?") into structured QueryPlans over a stored snapshot.
+
+Parsing is rule based: the question picks a table (VMs or hosts), an
+aggregate (count / sum / mean / min / max / list), an optional measure and
+group-by field, and filters from comparison phrases ("more than 8 vCPUs",
+"at least 64 GB of RAM"), power state and OS phrases, and names of clusters,
+hosts, datacenters and vCenters that occur in the snapshot (its vocabulary).
+Questions that start like a follow-up ("and in cluster B?", "of those, how
+many are powered off?") refine the session's previous plan.
+
+Questions that do not look like a dataset query yield None and are answered
+from the documentation index instead.
+"""
+
+import re
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Tuple
+
+AGGREGATES = ("count", "sum", "mean", "min", "max", "list")
+OPERATORS = {"eq": "=", "ne": "!=", "gt": ">", "ge": ">=", "lt": "<", "le": "<=", "contains": "~"}
+
+# Logical fields per table: text fields are filtered by value, numeric ones compared
+TEXT_FIELDS = {
+    "vms": ("vm", "cluster", "host", "datacenter", "vcenter", "powerstate", "os", "os_class"),
+    "hosts": ("host", "cluster", "datacenter", "vendor", "model", "esx_version"),
+}
+NUMERIC_FIELDS = {
+    "vms": ("vcpus", "memory_gb", "storage_gb"),
+    "hosts": ("cores", "sockets", "memory_gb", "cpu_usage", "memory_usage"),
+}
+FIELD_LABELS = {
+    "vm": "VM", "cluster": "cluster", "host": "host", "datacenter": "datacenter", "vcenter": "vCenter",
+    "powerstate": "power state", "os": "OS", "os_class": "OS class", "vendor": "vendor", "model": "model",
+    "esx_version": "ESX version", "vcpus": "vCPUs", "memory_gb": "RAM GB", "storage_gb": "storage GB",
+    "cores": "cores", "sockets": "sockets", "cpu_usage": "CPU usage %", "memory_usage": "memory usage %",
+}
+# Vocabulary fields whose values may be named in a question without a keyword
+NAMED_FIELDS = ("cluster", "datacenter", "vcenter", "host")
+
+_TABLE_VMS = re.compile(r"\b(vms?|virtual machines?|guests?|workloads?)\b")
+_TABLE_HOSTS = re.compile(r"\b(hosts?|esxi|servers? hardware|physical servers?)\b")
+# Measures that only make sense for hosts pick the table when neither is named
+_HOST_MEASURES = re.compile(r"\b(p?cores?|sockets?|(cpu|memory|ram) (usage|utili[sz]ation))\b")
+_FOLLOW_UP = re.compile(r"^(and|what about|how about|of (those|these|them)|among (those|these|them))\b"
+                        r"|\b(of|among) (those|these|them)\b")
+_AGGREGATE_PATTERNS = (
+    ("count", re.compile(r"\b(how many|number of|count)\b")),
+    ("mean", re.compile(r"\b(average|avg|mean)\b")),
+    ("sum", re.compile(r"\b(total|sum|how much|combined)\b")),
+    ("max", re.compile(r"\b(maximum|max|largest|biggest|highest)\b")),
+    ("min", re.compile(r"\b(minimum|min|smallest|lowest)\b")),
+    ("list", re.compile(r"^(list|show)\b|^(which|what) (vms?|hosts?|virtual machines?)\b|\btop \d+\b")),
+)
+_MEASURES = (
+    ("cpu_usage", re.compile(r"\bcpu (usage|utili[sz]ation)\b")),
+    ("memory_usage", re.compile(r"\b(memory|ram) (usage|utili[sz]ation)\b")),
+    ("vcpus", re.compile(r"\b(v?cpus?|virtual cpus?|processors?)\b")),
+    ("cores", re.compile(r"\b(cores?|pcores?)\b")),
+    ("sockets", re.compile(r"\bsockets?\b")),
+    ("memory_gb", re.compile(r"\b(ram|memory)\b")),
+    ("storage_gb", re.compile(r"\b(storage|disk|provisioned|capacity)\b")),
+)
+_COMPARISON = re.compile(
+    r"(?:(?<!\w)(?P<op>more than|greater than|over|above|at least|no less than|>=|>|less than|fewer than|under"
+    r"|below|at most|no more than|<=|<|exactly|with|having|have|has|=)\s*)?(?<![\w.])"
+    r"(?P<number>\d+(?:\.\d+)?)\s*(?P<or>\+|or (?:more|greater|higher|above|less|fewer|lower|below))?\s*"
+    r"(?P<unit>tb|gb|mb|tib|gib|mib|%)?\s*(?:of\s+)?"
+    r"(?P<measure>v?cpus?|virtual cpus?|cores?|sockets?|ram|memory|storage|disk|cpu usage|memory usage)\b"
+)
+_OPERATOR_WORDS = {
+    "more than": "gt", "greater than": "gt", "over": "gt", "above": "gt", ">": "gt",
+    "at least": "ge", "no less than": "ge", ">=": "ge",
+    "less than": "lt", "fewer than": "lt", "under": "lt", "below": "lt", "<": "lt",
+    "at most": "le", "no more than": "le", "<=": "le",
+    "exactly": "eq", "with": "eq", "having": "eq", "have": "eq", "has": "eq", "=": "eq",
+}
+_GROUP_BY = re.compile(r"\b(?:by|per|for each|each|in each|across)\s+(?P<field>cluster|host|datacenter|vcenter"
+                       r"|operating system|os|power ?state|vendor|model|esx version)s?\b"
+                       r"|\bwhich (?P<which>cluster|host|datacenter|vcenter)s?\b")
+_GROUP_FIELDS = {"operating system": "os", "power state": "powerstate", "powerstate": "powerstate",
+                 "esx version": "esx_version"}
+_NAMED = re.compile(r"\b(?P<field>cluster|host|datacenter|vcenter|vm)\s+(?:named\s+|called\s+)?"
+                    r"[\"']?(?P<value>[\w][\w.\-]*)")
+# "by cluster", "per host", "which datacenter": a field to group by, not one to name
+_GROUPING_PREFIX = re.compile(r"\b(?:by|per|each|across|which)\s+$")
+# Words that follow a field keyword without naming a value ("vm in cluster X", "host with ...")
+_NOT_NAMES = frozenset(("is", "are", "has", "have", "with", "in", "on", "of", "for", "at", "by", "per", "from",
+                        "to", "and", "or", "the", "a", "an", "that", "which", "where", "whose", "named", "called"))
+_POWER = (("poweredon", re.compile(r"\b(powered on|power(ed)?-on|running)\b")),
+          ("poweredoff", re.compile(r"\b(powered off|power(ed)?-off|stopped|shut ?down)\b")),
+          ("suspended", re.compile(r"\bsuspended\b")))
+_OS = re.compile(r"\b(windows server(?: \d{4}(?: r2)?)?|windows(?: \d{1,2})?|red hat|rhel|ubuntu|centos|suse|sles"
+                 r"|debian|oracle linux|rocky|alma ?linux|photon|linux|freebsd)\b")
+_OS_ALIASES = {"rhel": "red hat", "sles": "suse", "almalinux": "alma linux"}
+_TOP = re.compile(r"\btop (\d+)\b")
+_QUESTION_TOKEN = re.compile(r"[\w][\w.\-]*")
+_NUMBER = re.compile(r"\d+(?:\.\d+)?")
+
+
+@dataclass(frozen=True)
+class Filter:
+    """One predicate on a logical field."""
+    field: str
+    op: str
+    value: Any
+
+    def describe(self) -> str:
+        value = f"'{self.value}'" if isinstance(self.value, str) else f"{self.value:g}"
+        return f"{self.field} {OPERATORS[self.op]} {value}"
+
+
+@dataclass(frozen=True)
+class QueryPlan:
+    """A filter / aggregate query over one snapshot table."""
+    table: str
+    aggregate: str
+    measure: Optional[str] = None
+    filters: Tuple[Filter, ...] = ()
+    group_by: Optional[str] = None
+    limit: int = 10
+    warnings: Tuple[str, ...] = field(default=(), compare=False)
+
+    def describe(self) -> str:
+        """SQL-like text of the plan, used as the answer's source."""
+        if self.aggregate == "list":
+            select = "*"
+        elif self.aggregate == "count":
+            select = "COUNT(*)"
+        else:
+            select = f"{self.aggregate.upper()}({self.measure})"
+        if self.group_by:
+            select = f"{self.group_by}, {select}"
+        text = f"SELECT {select} FROM {self.table}"
+        if self.filters:
+            text += " WHERE " + " AND ".join(f.describe() for f in self.filters)
+        if self.group_by:
+            text += f" GROUP BY {self.group_by} ORDER BY 2 DESC LIMIT {self.limit}"
+        elif self.aggregate == "list":
+            text += (f" ORDER BY {self.measure} DESC" if self.measure else "") + f" LIMIT {self.limit}"
+        return text
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "table": self.table,
+            "aggregate": self.aggregate,
+            "measure": self.measure,
+            "filters": [{"field": f.field, "op": f.op, "value": f.value} for f in self.filters],
+            "group_by": self.group_by,
+            "limit": self.limit,
+            "sql": self.describe(),
+        }
+
+
+def _measure(text: str, table: str) -> Optional[str]:
+    for name, pattern in _MEASURES:
+        if pattern.search(text):
+            if name == "vcpus" and table == "hosts":
+                return "cores"
+            if name == "cores" and table == "vms":
+                return "vcpus"
+            return name if name in NUMERIC_FIELDS[table] else None
+    return None
+
+
+def _comparison(match: "re.Match", table: str) -> Optional[Filter]:
+    measure = _measure(match.group("measure"), table)
+    op = _OPERATOR_WORDS.get(match.group("op") or "", None)
+    suffix = match.group("or") or ""
+    if suffix:
+        op = "ge" if suffix == "+" or any(w in suffix for w in ("more", "greater", "higher", "above")) else "le"
+    if measure is None or op is None:
+        return None
+    value = float(match.group("number"))
+    unit = match.group("unit") or ""
+    if measure in ("memory_gb", "storage_gb"):
+        value *= {"tb": 1024, "tib": 1024, "mb": 1 / 1024, "mib": 1 / 1024}.get(unit, 1)
+    return Filter(measure, op, value)
+
+
+def _comparisons(text: str, table: str) -> Tuple[List[Filter], str]:
+    """Numeric filters, and the question with those phrases removed (unattached ones are kept)."""
+    filters = []
+
+    def attach(match: "re.Match") -> str:
+        predicate = _comparison(match, table)
+        if predicate is None:
+            return match.group(0)
+        filters.append(predicate)
+        return " "
+
+    remainder = _COMPARISON.sub(attach, text)
+    return filters, remainder if filters else text
+
+
+def _named_values(text: str, table: str,
+                  vocabulary: Dict[str, Dict[str, str]]) -> Tuple[List[Filter], List[str]]:
+    """
+    Filters for vocabulary values named in the question, explicitly ("cluster
+    prod-01") or by their name alone, and warnings for explicit names that are
+    not in the snapshot.
+    """
+    filters: Dict[str, Filter] = {}
+    warnings = []
+    fields = TEXT_FIELDS[table]
+    for match in _NAMED.finditer(text):
+        name, value = match.group("field"), match.group("value").rstrip(".")
+        if name not in fields or value in FIELD_LABELS or value in _NOT_NAMES:
+            continue
+        if _GROUPING_PREFIX.search(text, 0, match.start()):
+            continue
+        known = vocabulary.get(name)
+        if known is None:
+            filters[name] = Filter(name, "eq", value)
+        elif value in known:
+            filters[name] = Filter(name, "eq", known[value])
+        else:
+            # Keep the filter: an answer over nothing beats one silently widened to the whole estate
+            filters[name] = Filter(name, "eq", value)
+            warnings.append(f"No {FIELD_LABELS[name]} named '{value}' in this snapshot")
+
+    tokens = _QUESTION_TOKEN.findall(text)
+    for size in (4, 3, 2, 1):
+        for start in range(len(tokens) - size + 1):
+            phrase = " ".join(tokens[start:start + size]).rstrip(".")
+            for name in NAMED_FIELDS:
+                if name in fields and name not in filters and phrase in vocabulary.get(name, {}):
+                    filters[name] = Filter(name, "eq", vocabulary[name][phrase])
+    return list(filters.values()), warnings
+
+
+def _unattached_numbers(remainder: str, filters: List[Filter]) -> List[str]:
+    """Numbers left in the question that no filter, OS version or top-N used."""
+    values = {f.value.lower() for f in filters if isinstance(f.value, str)}
+    text = _OS.sub(" ", _TOP.sub(" ", remainder))
+    return [token for token in _QUESTION_TOKEN.findall(text)
+            if _NUMBER.fullmatch(token) and token not in values]
+
+
+def plan_question(question: str, vocabulary: Optional[Dict[str, Dict[str, str]]] = None,
+                  previous: Optional[QueryPlan] = None) -> Optional[QueryPlan]:
+    """
+    Plan a dataset question.
+
+    Args:
+        question: The user's question
+        vocabulary: Text field -> {lowercased value: stored value} of the target snapshot
+        previous: The session's last plan, refined by follow-up questions
+
+    Returns:
+        QueryPlan, or None when the question is not a dataset query
+    """
+    vocabulary = vocabulary or {}
+    text = " ".join(question.lower().split()).rstrip("?!. ")
+    follow_up = previous is not None and bool(_FOLLOW_UP.search(text))
+
+    mentions_vms, mentions_hosts = bool(_TABLE_VMS.search(text)), bool(_TABLE_HOSTS.search(text))
+    if mentions_vms or mentions_hosts:
+        table = "hosts" if mentions_hosts and not mentions_vms else "vms"
+    elif follow_up:
+        table = previous.table
+    else:
+        table = "hosts" if _HOST_MEASURES.search(text) else "vms"
+
+    filters, remainder = _comparisons(text, table)
+    aggregate = next((name for name, pattern in _AGGREGATE_PATTERNS if pattern.search(remainder)), None)
+    measure = _measure(remainder, table)
+    grouping = _GROUP_BY.search(remainder)
+    group_by = None
+    if grouping:
+        group = grouping.group("field") or grouping.group("which")
+        group_by = _GROUP_FIELDS.get(group, group)
+        group_by = group_by if group_by in TEXT_FIELDS[table] else None
+
+    if not follow_up and not (mentions_vms or mentions_hosts or measure or filters):
+        return None
+    if aggregate is None and not follow_up and not group_by:
+        return None
+
+    for value, pattern in _POWER:
+        if table == "vms" and pattern.search(text):
+            filters.append(Filter("powerstate", "eq", value))
+            break
+    os_match = _OS.search(text)
+    if table == "vms" and os_match:
+        name = os_match.group(1)
+        filters.append(Filter("os", "contains", _OS_ALIASES.get(name.replace(" ", ""), name)))
+    named, warnings = _named_values(text, table, vocabulary)
+    filters.extend(named)
+    warnings.extend(f"Ignored the number {number}: it does not follow a recognised comparison and measure"
+                    f" (e.g. 'more than 8 vCPUs')" for number in _unattached_numbers(remainder, filters))
+
+    if follow_up and previous.table == table:
+        replaced = {f.field for f in filters}
+        filters = [f for f in previous.filters if f.field not in replaced] + filters
+        aggregate = aggregate or previous.aggregate
+        measure = measure or (previous.measure if aggregate == previous.aggregate else None)
+        group_by = group_by or (previous.group_by if not replaced else None)
+    aggregate = aggregate or ("count" if group_by else "list")
+
+    if aggregate == "max" and measure is None and not group_by:
+        # "the largest VMs": list them by size
+        aggregate, measure = "list", NUMERIC_FIELDS[table][0]
+    if aggregate in ("sum", "mean", "min", "max") and measure is None:
+        if group_by is None:
+            warnings.append(f"No measure recognised for '{aggregate}'; counting {table} instead")
+        aggregate = "count"
+    if aggregate == "count" and measure is not None and not group_by:
+        # "how many vCPUs ..." asks for a total, "how many VMs with 8 vCPUs" for a count
+        if not (mentions_vms or mentions_hosts) and measure not in {f.field for f in filters}:
+            aggregate = "sum"
+    if group_by and aggregate == "list":
+        aggregate = "count"
+    top = _TOP.search(text)
+    limit = int(top.group(1)) if top else (1 if grouping and grouping.group("which") else 10)
+    return QueryPlan(table=table, aggregate=aggregate, measure=None if aggregate == "count" else measure,
+                     filters=tuple(dict.fromkeys(filters)), group_by=group_by, limit=limit,
+                     warnings=tuple(warnings))
@@ -0,0 +1,337 @@
+"""
+Documentation Chat API
+Offline retrieval-augmented chat over the project documentation, the backend
+src/components/ChatWidget.jsx talks to (http://localhost:8000).
+
+POST /chat first asks the query planner (chat.planner) whether the question
+is about the RVTools data ("how many Windows Server VMs in cluster X have
+more than 8 vCPUs?"). Such questions run as vectorised filter / aggregate
+queries over a stored snapshot's consolidated vInfo / vHost data (the
+RVTOOLS_SNAPSHOT_DB snapshot store, never the Excel files). The answer gives
+the numbers, and `sources` gives the executed query. Every other question
+ranks passages from the persistent index (see chat.index). Its answer is the
+sentences of the best passages that share the most words with the question.
+There, `sources` lists the ranked passages as "document#heading" strings and
+`passages` carries their text and scores.
+
+Dataset questions use the request's snapshot_id or customer, a customer
+named in the question, the session's previous snapshot, or the only stored
+customer's latest extract. Sessions (session_id, else the client address)
+keep their last plan for follow-ups and cache intermediate results.
+
+The index is loaded (memory-mapped) at startup and built first if it does
+not exist. Documents are re-checked at most every CHAT_REFRESH_SECONDS
+(default 5) and changed ones re-indexed incrementally.
+"""
+
+import os
+import re
+import sys
+import threading
+import time
+from contextlib import asynccontextmanager
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from fastapi import FastAPI, HTTPException, Request
+from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import Response
+from pydantic import BaseModel, Field
+
+api_dir = Path(__file__).resolve().parent.parent  # api/
+project_root = api_dir.parent
+if str(api_dir) not in sys.path:
+    sys.path.insert(0, str(api_dir))
+sys.path.insert(0, str(project_root / "RVToolAnalysisWithCursorAI"))
+
+from chat.corpus import document_patterns, tokenize
+from chat.datasets import ChatSession, Dataset, DatasetCache, QueryResult, SessionStore, execute
+from chat.index import ChatIndex, Hit, default_index_dir, update_index
+from chat.planner import FIELD_LABELS, plan_question
+from rvtools.metrics import CONTENT_TYPE_LATEST, Counter, Histogram, MetricsRegistry
+
+try:
+    from src.core.snapshot_store import SnapshotStore
+except ImportError:
+    SnapshotStore = None
+
+REFRESH_SECONDS = float(os.environ.get("CHAT_REFRESH_SECONDS", "5"))
+MAX_TOP_K = 20
+ANSWER_PASSAGES = 3
+ANSWER_SENTENCES = 4
+NO_ANSWER = "I couldn't find anything about that in the project documentation."
+SNAPSHOT_DB_PATH = Path(os.environ.get("RVTOOLS_SNAPSHOT_DB", api_dir / "data" / "rvtools_snapshots.db"))
+
+REGISTRY = MetricsRegistry()
+RETRIEVAL_SECONDS = REGISTRY.register(Histogram(
+    "chat_retrieval_duration_seconds",
+    "Index search latency in seconds.",
+    buckets=(0.0005, 0.001, 0.002, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 1.0)
+))
+QUESTIONS = REGISTRY.register(Counter(
+    "chat_questions_total",
+    "Questions answered, by whether any passage matched.",
+    ["result"]
+))
+REINDEXES = REGISTRY.register(Counter(
+    "chat_index_rebuilds_total",
+    "Index rebuilds triggered by document changes or /chat/reindex."
+))
+QUERY_SECONDS = REGISTRY.register(Histogram(
+    "chat_query_duration_seconds",
+    "Dataset query execution latency in seconds, by whether the session cache answered it.",
+    ["cached"],
+    buckets=(0.0005, 0.001, 0.002, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 1.0)
+))
+
+_SENTENCE = re.compile(r"(?<=[.!?])\s+|\n+")
+_CODE = re.compile(r"```.*?(?:```|$)|~~~.*?(?:~~~|$)", re.S)
+_MARKUP = re.compile(r"[`*_#>|]+|^\s*(?:[-+]|\d+\.)\s+|\[([^\]]*)\]\([^)]*\)", re.M)
+
+
+class _IndexHolder:
+    """Current index plus a throttled, single-flight refresh."""
+
+    def __init__(self):
+        self.index: Optional[ChatIndex] = None
+        self.checked = 0.0
+        self.lock = threading.Lock()
+
+    def _refresh(self, force: bool) -> dict:
+        index, changes = update_index(project_root, document_patterns(), default_index_dir(), force=force)
+        if changes["rebuilt"]:
+            REINDEXES.inc()
+        self.index, self.checked = index, time.monotonic()
+        return changes
+
+    def refresh(self, force: bool = False) -> dict:
+        with self.lock:
+            return self._refresh(force)
+
+    def get(self) -> ChatIndex:
+        if self.index is None:
+            self.refresh()
+        elif time.monotonic() - self.checked > REFRESH_SECONDS and self.lock.acquire(blocking=False):
+            # While one request refreshes, the others keep serving the current index
+            try:
+                self._refresh(False)
+            finally:
+                self.lock.release()
+        return self.index
+
+
+_holder = _IndexHolder()
+_sessions = SessionStore()
+_store: Optional["SnapshotStore"] = None
+
+
+def _snapshot_store() -> Optional["SnapshotStore"]:
+    """The RVTools snapshot database, or None if it (or the RVTools module) is missing."""
+    global _store
+    if _store is None and SnapshotStore is not None and SNAPSHOT_DB_PATH.exists():
+        _store = SnapshotStore(SNAPSHOT_DB_PATH)
+    return _store
+
+
+def _load_dataset(snapshot_id: int) -> Dataset:
+    store = _snapshot_store()
+    return Dataset(**store.load_consolidated(snapshot_id), snapshot=store.get_snapshot(snapshot_id))
+
+
+_datasets = DatasetCache(_load_dataset, limit=int(os.environ.get("CHAT_DATASETS", "2")))
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    _holder.refresh()
+    yield
+
+
+app = FastAPI(title="Project Documentation Chat", lifespan=lifespan)
+
+app.add_middleware(
+    CORSMiddleware,
+    allow_origins=[
+        "http://localhost:5173",
+        "http://localhost:3000",
+        "http://127.0.0.1:5173",
+        "http://127.0.0.1:3000",
+        "http://0.0.0.0:5173"
+    ],
+    allow_credentials=True,
+    allow_methods=["GET", "POST", "OPTIONS"],
+    allow_headers=["*"],
+)
+
+
+class ChatRequest(BaseModel):
+    question: str
+    top_k: int = Field(5, ge=1, le=MAX_TOP_K)
+    session_id: Optional[str] = None
+    customer: Optional[str] = None
+    snapshot_id: Optional[int] = None
+
+
+def _plain(text: str) -> str:
+    """Markdown passage text without code blocks or formatting characters."""
+    return _MARKUP.sub(lambda m: m.group(1) or " ", _CODE.sub(" ", text))
+
+
+def compose_answer(question: str, hits: List[Hit]) -> str:
+    """
+    Extractive answer: the sentences of the top passages sharing the most
+    question words, in document order; the best passage's opening if none do.
+    """
+    if not hits:
+        return NO_ANSWER
+    terms = set(tokenize(question))
+    scored = []
+    for rank, hit in enumerate(hits[:ANSWER_PASSAGES]):
+        for position, sentence in enumerate(_SENTENCE.split(_plain(hit.passage.text))):
+            sentence = " ".join(sentence.split())
+            overlap = len(terms & set(tokenize(sentence)))
+            if overlap and len(sentence) >= 20:
+                scored.append((overlap, rank, position, sentence))
+    best = sorted(scored, key=lambda s: (-s[0], s[1], s[2]))[:ANSWER_SENTENCES]
+    if not best:
+        return " ".join(_plain(hits[0].passage.text).split())[:400]
+    return " ".join(s[3] for s in sorted(best, key=lambda s: (s[1], s[2])))
+
+
+def _number(value: float) -> str:
+    return f"{value:,.0f}" if float(value).is_integer() else f"{value:,.2f}"
+
+
+def describe_result(result: QueryResult, snapshot: Dict[str, Any]) -> str:
+    """One-paragraph answer for an executed query."""
+    plan = result.plan
+    noun = "VMs" if plan.table == "vms" else "hosts"
+    scope = f" matching {' AND '.join(f.describe() for f in plan.filters)}" if plan.filters else ""
+    label = FIELD_LABELS.get(plan.measure, plan.measure)
+    if plan.group_by:
+        what = f"{noun} count" if plan.aggregate == "count" else f"{plan.aggregate} of {label}"
+        groups = "; ".join(f"{row[plan.group_by]}: {_number(row[plan.aggregate])}" for row in result.rows)
+        text = f"{what[:1].upper()}{what[1:]} by {FIELD_LABELS[plan.group_by]} for {result.matched:,} {noun}{scope}: " \
+               f"{groups or 'no rows'}."
+    elif plan.aggregate == "count":
+        text = f"{result.matched:,} {noun}{scope}."
+    elif plan.aggregate == "list":
+        key = "vm" if plan.table == "vms" else "host"
+        names = ", ".join(str(row[key]) for row in result.rows)
+        shown = f"the {len(result.rows)} largest by {label}" if plan.measure else f"the first {len(result.rows)}"
+        text = f"{result.matched:,} {noun}{scope}" + (f"; {shown}: {names}." if result.rows else ".")
+    elif result.value is None:
+        text = f"No {label} values for the {result.matched:,} {noun}{scope}."
+    else:
+        names = {"sum": "Total", "mean": "Average", "min": "Minimum", "max": "Maximum"}
+        text = f"{names[plan.aggregate]} {label}: {_number(result.value)} across {result.matched:,} {noun}{scope}."
+    extract = snapshot.get("extract_date") or snapshot.get("processing_date") or ""
+    text += f" (Snapshot {snapshot.get('snapshot_id')}, {snapshot.get('customer')}, extract {extract[:10]}.)"
+    return " ".join([text, *plan.warnings])
+
+
+def _select_snapshot(store: "SnapshotStore", request: ChatRequest, session: ChatSession,
+                     question: str) -> Tuple[Optional[Dict[str, Any]], Optional[str]]:
+    """(snapshot to query, or a clarifying question when the customer is ambiguous)."""
+    if request.snapshot_id is not None:
+        snapshot = store.get_snapshot(request.snapshot_id)
+        if snapshot is None:
+            raise HTTPException(status_code=404, detail=f"Unknown snapshot {request.snapshot_id}")
+        return snapshot, None
+    customers = store.customers()
+    customer = request.customer
+    if customer is None:
+        lowered = question.lower()
+        customer = next((c for c in customers if re.search(rf"\b{re.escape(c.lower())}\b", lowered)), None)
+    if customer is None and session.snapshot_id is not None:
+        snapshot = store.get_snapshot(session.snapshot_id)
+        if snapshot is not None:
+            return snapshot, None
+    if customer is None and len(customers) == 1:
+        customer = customers[0]
+    if customer is None:
+        return None, (f"Which customer do you mean? Snapshots are stored for: {', '.join(customers)}."
+                      if customers else None)
+    snapshots = store.list_snapshots(customer)
+    if not snapshots:
+        raise HTTPException(status_code=404, detail=f"No snapshots for customer '{customer}'")
+    return snapshots[-1], None
+
+
+def _answer_from_dataset(question: str, request: ChatRequest, session: ChatSession) -> Optional[Dict[str, Any]]:
+    """Dataset answer for a planner question; None to fall back to the documentation."""
+    store = _snapshot_store()
+    if store is None:
+        return None
+    with session.lock:
+        if plan_question(question, None, session.plan) is None:
+            return None
+        snapshot, clarification = _select_snapshot(store, request, session, question)
+        if clarification:
+            return {"answer": clarification, "sources": [], "query": None}
+        if snapshot is None:
+            return None
+        dataset = _datasets.get(snapshot["snapshot_id"])
+        previous = session.plan if session.snapshot_id == dataset.key else None
+        plan = plan_question(question, dataset.vocabulary, previous)
+        try:
+            result = execute(plan, dataset, session)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        session.plan, session.snapshot_id = plan, dataset.key
+
+    QUERY_SECONDS.observe(result.elapsed_ms / 1000, cached=str(result.cached).lower())
+    QUESTIONS.inc(result="dataset")
+    summary = {k: v for k, v in snapshot.items() if k != "metrics"}
+    return {
+        "answer": describe_result(result, snapshot),
+        "sources": [f"snapshot {snapshot['snapshot_id']} ({snapshot['customer']}): {plan.describe()}"],
+        "query": {**result.to_dict(), "snapshot": summary},
+        "table": result.rows,
+    }
+
+
+@app.get("/health")
+def health_check():
+    """Health check with index statistics."""
+    index = _holder.get()
+    return {"status": "healthy", "index": index.stats()}
+
+
+@app.get("/metrics")
+def metrics_endpoint():
+    """Prometheus metrics in text exposition format."""
+    return Response(content=REGISTRY.render(), media_type=CONTENT_TYPE_LATEST)
+
+
+@app.post("/chat")
+def chat(request: ChatRequest, http_request: Request):
+    """Answer a question from the RVTools data or the project documentation."""
+    question = request.question.strip()
+    if not question:
+        raise HTTPException(status_code=400, detail="Question must not be empty")
+    client = http_request.client.host if http_request.client else "default"
+    answer = _answer_from_dataset(question, request, _sessions.get(request.session_id or client))
+    if answer is not None:
+        return answer
+    index = _holder.get()
+
+    started = time.perf_counter()
+    hits = index.search(question, request.top_k)
+    elapsed = time.perf_counter() - started
+    RETRIEVAL_SECONDS.observe(elapsed)
+    QUESTIONS.inc(result="answered" if hits else "no_match")
+
+    return {
+        "answer": compose_answer(question, hits),
+        "sources": [hit.passage.reference for hit in hits],
+        "passages": [hit.to_dict() for hit in hits],
+        "retrieval_ms": round(elapsed * 1000, 3),
+    }
+
+
+@app.post("/chat/reindex")
+def reindex(full: bool = False):
+    """Re-check the documents now; `full` re-reads every document."""
+    changes = _holder.refresh(force=full)
+    return {"changes": changes, "index": _holder.index.stats()}
@@ -0,0 +1,83 @@
+"""
+Shared Result Cache
+JSON results cached in a local directory, so every API worker process (see
+start_server.py --workers) serves what any of them computed. No external
+service is needed: entries are one file each, written to a temporary name
+and renamed into place (atomic on POSIX and Windows), so readers never see a
+partial entry and concurrent writers of the same key simply race to the same
+content.
+
+Entries expire after ttl_seconds; beyond max_entries the least recently used
+(oldest modification time; hits refresh it) are removed.
+"""
+
+import hashlib
+import json
+import os
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+
+def content_key(*parts: Any) -> str:
+    """sha256 of JSON-serializable parts (e.g. upload digests and options)."""
+    return hashlib.sha256(json.dumps(parts, sort_keys=True, default=str).encode()).hexdigest()
+
+
+class ResultCache:
+    """Cross-process cache of JSON results in a directory (get/put/clear by key)."""
+
+    def __init__(self, directory, max_entries: int = 256, ttl_seconds: float = 86400.0):
+        self.directory = Path(directory)
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.directory.mkdir(parents=True, exist_ok=True)
+
+    def _path(self, key: str) -> Path:
+        return self.directory / f"{key}.json"
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        path = self._path(key)
+        try:
+            if time.time() - path.stat().st_mtime > self.ttl_seconds:
+                path.unlink()
+                return None
+            with open(path, encoding="utf-8") as f:
+                value = json.load(f)
+            os.utime(path)      # recently used
+            return value
+        except (FileNotFoundError, json.JSONDecodeError):
+            return None
+
+    def put(self, key: str, value: Dict[str, Any]) -> None:
+        fd, temp_path = tempfile.mkstemp(dir=self.directory, prefix=".", suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump(value, f)
+            os.replace(temp_path, self._path(key))
+        except BaseException:
+            Path(temp_path).unlink(missing_ok=True)
+            raise
+        self._evict()
+
+    def clear(self) -> None:
+        for path in self.directory.glob("*.json"):
+            path.unlink(missing_ok=True)
+
+    def __len__(self) -> int:
+        return sum(1 for _ in self.directory.glob("*.json"))
+
+    def _evict(self) -> None:
+        entries = []
+        for path in self.directory.glob("*.json"):
+            try:
+                entries.append((path.stat().st_mtime, path))
+            except FileNotFoundError:
+                continue
+        entries.sort()
+        cutoff = time.time() - self.ttl_seconds
+        excess = len(entries) - self.max_entries
+        for i, (mtime, path) in enumerate(entries):
+            if i < excess or mtime < cutoff:
+                path.unlink(missing_ok=True)
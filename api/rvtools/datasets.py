@@ -0,0 +1,285 @@
+"""
+RVTools Dataset Registry
+Keeps the consolidated frames of processed uploads under a dataset id, so
+follow-up requests (filtered metrics, queries, chart series, exports) run on
+data already parsed instead of a re-upload.
+
+Each dataset is written once to <directory>/<id>/ in the columnar layout of
+src/core/columnar.py (one memory-mappable file per column) and kept in
+memory as well. Beyond memory_budget_bytes the least recently used datasets
+are dropped from memory only; the next request for one reads it back from
+its column files. Datasets unused for ttl_seconds, or beyond max_datasets on
+disk, are removed. Because the files live in a shared directory, any API
+worker process can serve a dataset another worker registered.
+
+Filters are {"column", "op", "value"} dicts (ops in FILTER_OPS) and apply to
+every table having the column, so a Cluster filter narrows VMs and hosts alike.
+"""
+
+import json
+import os
+import shutil
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence
+
+import pandas as pd
+
+from src.core.columnar import frame_nbytes, read_frames, write_frames
+
+INFO_FILE = "dataset.json"
+FILTER_OPS = ("eq", "ne", "in", "not_in", "contains", "gt", "ge", "lt", "le")
+AGGREGATES = ("count", "sum", "mean", "min", "max", "median", "nunique")
+NUMERIC_AGGREGATES = ("sum", "mean", "min", "max", "median")
+
+DataFrames = Dict[str, Optional[pd.DataFrame]]
+
+
+@dataclass
+class _Resident:
+    frames: DataFrames
+    nbytes: int
+
+
+class DatasetRegistry:
+    """Consolidated frames by dataset id: in memory within a budget, on disk for ttl_seconds."""
+
+    def __init__(self, directory, memory_budget_bytes: int = 512 * 1024 * 1024, max_datasets: int = 32,
+                 ttl_seconds: float = 3600.0):
+        self.directory = Path(directory)
+        self.memory_budget_bytes = memory_budget_bytes
+        self.max_datasets = max_datasets
+        self.ttl_seconds = ttl_seconds
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self._resident: "OrderedDict[str, _Resident]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def put(self, dataset_id: str, frames: DataFrames, summary: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """
+        Register frames under dataset_id (written to disk, kept in memory).
+
+        Args:
+            summary: Extra fields stored with the dataset (files, VM counts, ...)
+
+        Returns:
+            The dataset's info (see info())
+        """
+        path = self.directory / dataset_id
+        if not path.exists():
+            temp_dir = Path(tempfile.mkdtemp(dir=self.directory, prefix=".tmp-"))
+            try:
+                disk_bytes = write_frames(frames, temp_dir)
+                tables = {key: {"rows": len(frame), "columns": [str(c) for c in frame.columns]}
+                          for key, frame in frames.items() if frame is not None}
+                info = {"dataset_id": dataset_id, "created_at": time.time(), "tables": tables,
+                        "disk_bytes": disk_bytes, **(summary or {})}
+                with open(temp_dir / INFO_FILE, "w", encoding="utf-8") as f:
+                    json.dump(info, f)
+                os.replace(temp_dir, path)
+            except OSError:
+                # Another worker registered the same content first
+                shutil.rmtree(temp_dir, ignore_errors=True)
+                if not path.exists():
+                    raise
+        self._touch(path)
+        self._keep(dataset_id, frames)
+        self._prune()
+        return self.info(dataset_id)
+
+    def get(self, dataset_id: str) -> Optional[DataFrames]:
+        """The dataset's frames (read back from disk if not in memory), or None."""
+        with self._lock:
+            resident = self._resident.get(dataset_id)
+            if resident is not None:
+                self._resident.move_to_end(dataset_id)
+        path = self._path(dataset_id)
+        if path is None or self._expired(path):
+            self.delete(dataset_id)
+            return None
+        self._touch(path)
+        if resident is not None:
+            return resident.frames
+        try:
+            frames = read_frames(path)
+        except FileNotFoundError:
+            return None
+        self._keep(dataset_id, frames)
+        return frames
+
+    def info(self, dataset_id: str) -> Optional[Dict[str, Any]]:
+        """What the dataset holds, where it is, and when it expires; None if unknown."""
+        path = self._path(dataset_id)
+        if path is None:
+            return None
+        try:
+            with open(path / INFO_FILE, encoding="utf-8") as f:
+                info = json.load(f)
+            last_used = (path / INFO_FILE).stat().st_mtime
+        except FileNotFoundError:
+            return None
+        with self._lock:
+            resident = self._resident.get(dataset_id)
+        info.update(
+            in_memory=resident is not None,
+            memory_bytes=resident.nbytes if resident is not None else 0,
+            last_used_at=last_used,
+            expires_at=last_used + self.ttl_seconds,
+        )
+        return info
+
+    def list_datasets(self) -> List[Dict[str, Any]]:
+        self._prune()
+        infos = [self.info(path.name) for path in self.directory.iterdir() if self._path(path.name) is not None]
+        return sorted((info for info in infos if info is not None), key=lambda info: info["created_at"])
+
+    def delete(self, dataset_id: str) -> bool:
+        with self._lock:
+            self._resident.pop(dataset_id, None)
+        path = self._path(dataset_id)
+        if path is None:
+            return False
+        shutil.rmtree(path, ignore_errors=True)
+        return True
+
+    def memory_bytes(self) -> int:
+        with self._lock:
+            return sum(resident.nbytes for resident in self._resident.values())
+
+    def _path(self, dataset_id: str) -> Optional[Path]:
+        if not dataset_id or dataset_id.startswith(".") or "/" in dataset_id or "\\" in dataset_id:
+            return None
+        path = self.directory / dataset_id
+        return path if (path / INFO_FILE).exists() else None
+
+    def _expired(self, path: Path) -> bool:
+        try:
+            return time.time() - (path / INFO_FILE).stat().st_mtime > self.ttl_seconds
+        except FileNotFoundError:
+            return True
+
+    @staticmethod
+    def _touch(path: Path) -> None:
+        try:
+            os.utime(path / INFO_FILE)      # last used, for TTL and LRU across workers
+        except FileNotFoundError:
+            pass
+
+    def _keep(self, dataset_id: str, frames: DataFrames) -> None:
+        """Hold frames in memory, dropping least recently used ones beyond the budget (they stay on disk)."""
+        nbytes = sum(frame_nbytes(frame) for frame in frames.values())
+        with self._lock:
+            self._resident[dataset_id] = _Resident(frames, nbytes)
+            self._resident.move_to_end(dataset_id)
+            total = sum(resident.nbytes for resident in self._resident.values())
+            while total > self.memory_budget_bytes and len(self._resident) > 1:
+                _, evicted = self._resident.popitem(last=False)
+                total -= evicted.nbytes
+
+    def _prune(self) -> None:
+        """Remove expired datasets and the least recently used beyond max_datasets."""
+        entries = []
+        for path in self.directory.iterdir():
+            try:
+                if path.name.startswith(".tmp-"):
+                    if time.time() - path.stat().st_mtime > self.ttl_seconds:
+                        shutil.rmtree(path, ignore_errors=True)
+                    continue
+                entries.append(((path / INFO_FILE).stat().st_mtime, path.name))
+            except FileNotFoundError:
+                continue
+        entries.sort()
+        cutoff = time.time() - self.ttl_seconds
+        excess = len(entries) - self.max_datasets
+        for i, (last_used, dataset_id) in enumerate(entries):
+            if i < excess or last_used < cutoff:
+                self.delete(dataset_id)
+
+
+def _matches(column: pd.Series, op: str, value: Any) -> pd.Series:
+    if op in ("in", "not_in"):
+        values = value if isinstance(value, (list, tuple)) else [value]
+        mask = column.isin(values)
+        return ~mask if op == "not_in" else mask
+    if op == "contains":
+        return column.astype(str).str.contains(str(value), case=False, regex=False)
+    if op == "eq":
+        return column == value
+    if op == "ne":
+        return column != value
+    comparisons = {"gt": column.gt, "ge": column.ge, "lt": column.lt, "le": column.le}
+    return comparisons[op](value)
+
+
+def apply_filters(frame: pd.DataFrame, filters: Sequence[Dict[str, Any]], strict: bool = True) -> pd.DataFrame:
+    """
+    Rows of `frame` matching every filter.
+
+    Args:
+        strict: Raise for filters on columns the frame lacks (else skip them)
+
+    Raises:
+        ValueError: Unknown operator, or unknown column when strict
+    """
+    mask = pd.Series(True, index=frame.index)
+    for spec in filters:
+        column, op = spec.get("column"), spec.get("op", "eq")
+        if op not in FILTER_OPS:
+            raise ValueError(f"Unknown filter op '{op}'; expected one of {', '.join(FILTER_OPS)}")
+        if column not in frame.columns:
+            if strict:
+                raise ValueError(f"Unknown column '{column}'")
+            continue
+        try:
+            mask &= _matches(frame[column], op, spec.get("value")).fillna(False).astype(bool)
+        except TypeError as e:
+            raise ValueError(f"Cannot compare column '{column}' with {spec.get('value')!r}: {e}")
+    return frame[mask]
+
+
+def filter_dataset(frames: DataFrames, filters: Sequence[Dict[str, Any]]) -> DataFrames:
+    """Every table filtered by the filters on columns it has."""
+    for spec in filters:
+        if not any(frame is not None and spec.get("column") in frame.columns for frame in frames.values()):
+            raise ValueError(f"Unknown column '{spec.get('column')}'")
+    return {key: apply_filters(frame, filters, strict=False) if frame is not None else None
+            for key, frame in frames.items()}
+
+
+def query_table(frame: pd.DataFrame, filters: Sequence[Dict[str, Any]] = (), columns: Optional[List[str]] = None,
+                group_by: Optional[List[str]] = None, aggregates: Optional[Dict[str, str]] = None,
+                sort_by: Optional[str] = None, descending: bool = False) -> pd.DataFrame:
+    """
+    Filter, then either aggregate by group_by ({column: aggregate}; rows
+    counted as "count" when none are given) or select columns; then sort.
+
+    Raises:
+        ValueError: Unknown column or aggregate, or a numeric aggregate of a text column
+    """
+    frame = apply_filters(frame, filters)
+    for column in [*(columns or []), *(group_by or []), *(aggregates or {})]:
+        if column not in frame.columns:
+            raise ValueError(f"Unknown column '{column}'")
+    if group_by:
+        for column, func in (aggregates or {}).items():
+            if func not in AGGREGATES:
+                raise ValueError(f"Unknown aggregate '{func}'; expected one of {', '.join(AGGREGATES)}")
+            if func in NUMERIC_AGGREGATES and not pd.api.types.is_numeric_dtype(frame[column]):
+                raise ValueError(f"Aggregate '{func}' needs a numeric column; '{column}' is not numeric")
+        grouped = frame.groupby(group_by, dropna=False)
+        try:
+            result = grouped.agg(aggregates) if aggregates else grouped.size().to_frame("count")
+        except TypeError as e:
+            raise ValueError(f"Cannot aggregate {aggregates}: {e}")
+        frame = result.reset_index()
+    elif columns:
+        frame = frame[columns]
+    if sort_by is not None:
+        if sort_by not in frame.columns:
+            raise ValueError(f"Unknown sort column '{sort_by}'")
+        frame = frame.sort_values(sort_by, ascending=not descending, kind="stable")
+    return frame
+
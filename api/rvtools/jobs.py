@@ -0,0 +1,223 @@
+"""
+RVTools Processing Jobs
+Background processing runs with a replayable event log, so a client can
+follow a long upload over server-sent events (or poll its status) instead of
+holding one request open behind a spinner.
+
+Each job records its events in order: "status" when it starts, throttled
+"progress" events from the pipeline (see src/utils/progress.py in the RVTools
+module), then one terminal "result" or "error". Subscribers replay the log
+from any position (the SSE Last-Event-ID) and then wait for new events.
+Finished jobs are kept for retention_seconds, then dropped.
+
+With a log_dir, every event is also appended to <log_dir>/<job id>.jsonl, so
+any API worker process can report and stream a job another worker runs (the
+owner notifies its local subscribers; others poll the log).
+"""
+
+import json
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+TERMINAL_EVENTS = ("result", "error")
+
+
+@dataclass
+class Job:
+    """One processing run and the events it has published."""
+    id: str
+    files: List[str]
+    status: str = "queued"          # queued, running, success, error
+    created_at: float = field(default_factory=time.time)
+    finished_at: Optional[float] = None
+    events: List[Tuple[str, Dict[str, Any]]] = field(default_factory=list)
+    result: Optional[Dict[str, Any]] = None
+    error: Optional[str] = None
+    local: bool = True              # run by this process (False: read from another worker's log)
+
+    @property
+    def done(self) -> bool:
+        return self.status in ("success", "error")
+
+    def progress(self) -> Optional[Dict[str, Any]]:
+        """The latest progress event's payload."""
+        return next((data for event, data in reversed(self.events) if event == "progress"), None)
+
+    def to_dict(self, include_result: bool = True) -> Dict[str, Any]:
+        payload = {
+            "job_id": self.id,
+            "status": self.status,
+            "files": self.files,
+            "created_at": self.created_at,
+            "finished_at": self.finished_at,
+            "progress": self.progress(),
+            "events": len(self.events),
+        }
+        if self.error is not None:
+            payload["error"] = self.error
+        if include_result and self.result is not None:
+            payload["result"] = self.result
+        return payload
+
+
+class JobRegistry:
+    """Runs jobs on a small thread pool and fans their events out to subscribers."""
+
+    def __init__(self, workers: int = 1, retention_seconds: float = 3600.0, log_dir=None,
+                 poll_seconds: float = 0.25):
+        self.retention_seconds = retention_seconds
+        self.log_dir = Path(log_dir) if log_dir is not None else None
+        self.poll_seconds = poll_seconds
+        if self.log_dir is not None:
+            self.log_dir.mkdir(parents=True, exist_ok=True)
+        self._executor = ThreadPoolExecutor(max_workers=max(1, workers), thread_name_prefix="rvtools-job")
+        self._jobs: Dict[str, Job] = {}
+        self._changed = threading.Condition()
+
+    def submit(self, files: List[str], run: Callable[[Callable[[Dict[str, Any]], None]], Dict[str, Any]]) -> Job:
+        """
+        Queue `run(progress)`; its return value becomes the "result" event.
+
+        Args:
+            files: Uploaded file names, for status listings
+            run: Called on a worker thread with a progress callback taking
+                progress payloads; an exception becomes the "error" event
+                (its `detail` attribute, if any, else its message)
+        """
+        self._prune()
+        job = Job(id=uuid.uuid4().hex, files=list(files))
+        with self._changed:
+            self._jobs[job.id] = job
+        self._append_log(job, "queued", {"files": job.files, "created_at": job.created_at})
+        self._executor.submit(self._run, job, run)
+        return job
+
+    def get(self, job_id: str) -> Optional[Job]:
+        with self._changed:
+            job = self._jobs.get(job_id)
+        if job is None and self.log_dir is not None and all(c in "0123456789abcdef" for c in job_id):
+            job = self._load(job_id)
+        return job
+
+    def list_jobs(self) -> List[Job]:
+        with self._changed:
+            jobs = dict(self._jobs)
+        if self.log_dir is not None:
+            for path in self.log_dir.glob("*.jsonl"):
+                if path.stem not in jobs:
+                    job = self._load(path.stem)
+                    if job is not None:
+                        jobs[job.id] = job
+        return sorted(jobs.values(), key=lambda job: job.created_at)
+
+    def publish(self, job: Job, event: str, data: Dict[str, Any]) -> None:
+        with self._changed:
+            job.events.append((event, data))
+            self._changed.notify_all()
+        self._append_log(job, event, data)
+
+    def subscribe(self, job: Job, after: int = 0,
+                  keepalive: float = 15.0) -> Iterator[Optional[Tuple[int, str, Dict[str, Any]]]]:
+        """
+        (event id, event, data) for each event after `after`, then each new
+        one until a terminal event; None every `keepalive` seconds of silence.
+        Event ids count from 1.
+        """
+        position = max(after, 0)
+        while True:
+            if job.local:
+                with self._changed:
+                    if position >= len(job.events) and not job.done:
+                        self._changed.wait(timeout=keepalive)
+                    pending = job.events[position:]
+                    finished = job.done
+            else:
+                # Another worker runs it: poll its log
+                waited = 0.0
+                while True:
+                    job = self._load(job.id) or job
+                    pending, finished = job.events[position:], job.done
+                    if pending or finished or waited >= keepalive:
+                        break
+                    time.sleep(self.poll_seconds)
+                    waited += self.poll_seconds
+            if not pending:
+                if finished:
+                    return
+                yield None
+                continue
+            for event, data in pending:
+                position += 1
+                yield position, event, data
+                if event in TERMINAL_EVENTS:
+                    return
+
+    def _run(self, job: Job, run: Callable[[Callable[[Dict[str, Any]], None]], Dict[str, Any]]) -> None:
+        job.status = "running"
+        self.publish(job, "status", {"status": "running", "files": job.files})
+        try:
+            result = run(lambda data: self.publish(job, "progress", data))
+        except Exception as e:
+            job.error = str(getattr(e, "detail", e))
+            job.finished_at = time.time()
+            job.status = "error"
+            self.publish(job, "error", {"detail": job.error})
+        else:
+            job.result = result
+            job.finished_at = time.time()
+            job.status = "success"
+            self.publish(job, "result", result)
+
+    def _append_log(self, job: Job, event: str, data: Dict[str, Any]) -> None:
+        if self.log_dir is None:
+            return
+        line = json.dumps({"event": event, "data": data, "at": time.time()}) + "\n"
+        with open(self.log_dir / f"{job.id}.jsonl", "a", encoding="utf-8") as f:
+            f.write(line)       # one write per event, so readers see whole lines
+
+    def _load(self, job_id: str) -> Optional[Job]:
+        """A job rebuilt from its log (as another worker sees it), or None."""
+        try:
+            with open(self.log_dir / f"{job_id}.jsonl", encoding="utf-8") as f:
+                lines = f.readlines()
+        except FileNotFoundError:
+            return None
+        job = Job(id=job_id, files=[], local=False)
+        for line in lines:
+            if not line.endswith("\n"):
+                break       # being written
+            record = json.loads(line)
+            event, data = record["event"], record["data"]
+            if event == "queued":
+                job.files, job.created_at = data["files"], data["created_at"]
+                continue
+            job.events.append((event, data))
+            if event == "status":
+                job.status = data["status"]
+            elif event in TERMINAL_EVENTS:
+                job.status = "success" if event == "result" else "error"
+                job.finished_at = record["at"]
+                if event == "result":
+                    job.result = data
+                else:
+                    job.error = data.get("detail")
+        return job
+
+    def _prune(self) -> None:
+        """Drop jobs that finished more than retention_seconds ago."""
+        cutoff = time.time() - self.retention_seconds
+        with self._changed:
+            for job_id in [job.id for job in self._jobs.values() if job.done and job.finished_at < cutoff]:
+                del self._jobs[job_id]
+        if self.log_dir is not None:
+            for path in self.log_dir.glob("*.jsonl"):
+                try:
+                    if path.stat().st_mtime < cutoff:
+                        path.unlink()
+                except FileNotFoundError:
+                    continue
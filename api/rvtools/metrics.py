@@ -0,0 +1,429 @@
+"""
+RVTools API Metrics
+In-process counters, gauges and histograms rendered in the Prometheus text
+exposition format (version 0.0.4). No external client library or service is
+required; the registry lives in the API process and is served by /metrics.
+
+With several API workers, MetricsRegistry.share() has each worker write its
+samples to a file under a shared directory, and a scrape of any worker
+merges them (as prometheus_client's multiprocess mode does): counters and
+histograms are summed over every worker of the server, gauges over the live
+ones.
+"""
+
+import json
+import logging
+import math
+import os
+import shutil
+import threading
+import time
+from abc import ABC, abstractmethod
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+logger = logging.getLogger(__name__)
+
+CONTENT_TYPE_LATEST = "text/plain; version=0.0.4; charset=utf-8"
+
+# Latency buckets (seconds) sized for workbook parsing: sub-second up to 10 minutes
+DEFAULT_LATENCY_BUCKETS = (
+    0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0,
+    10.0, 30.0, 60.0, 120.0, 300.0, 600.0
+)
+
+
+def _format_value(value: float) -> str:
+    """Format a sample value the way Prometheus expects."""
+    if value == math.inf:
+        return "+Inf"
+    if value == -math.inf:
+        return "-Inf"
+    if math.isnan(value):
+        return "NaN"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+def _escape_label_value(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(labelnames: Sequence[str], labelvalues: Sequence[str],
+                   extra: Optional[Tuple[str, str]] = None) -> str:
+    pairs = [f'{name}="{_escape_label_value(value)}"' for name, value in zip(labelnames, labelvalues)]
+    if extra is not None:
+        pairs.append(f'{extra[0]}="{_escape_label_value(extra[1])}"')
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _pid_alive(pid: int) -> bool:
+    if os.name != "posix":     # os.kill(pid, 0) terminates the process on Windows
+        return True
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+class _Metric(ABC):
+    """Base class for a labelled metric family."""
+
+    metric_type = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        self._values: Dict[Tuple[str, ...], Any] = {}
+        self._registry: Optional["MetricsRegistry"] = None
+
+    def _changed(self) -> None:
+        if self._registry is not None:
+            self._registry._changed()
+
+    def _label_key(self, labels: Dict[str, str]) -> Tuple[str, ...]:
+        if set(labels) != set(self.labelnames):
+            raise ValueError(
+                f"Metric {self.name} expects labels {list(self.labelnames)}, got {sorted(labels)}"
+            )
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def export(self) -> List[List[Any]]:
+        """This process's samples as JSON-friendly [label values, value] pairs."""
+        with self._lock:
+            return [[list(key), list(value) if isinstance(value, list) else value]
+                    for key, value in self._values.items()]
+
+    @abstractmethod
+    def _samples(self, values: Dict[Tuple[str, ...], Any]) -> List[str]:
+        """Sample lines of the family, in exposition format."""
+
+    def render(self, shared: Iterable[Tuple[bool, List[List[Any]]]] = ()) -> str:
+        """The family's exposition text, including other workers' exported (alive, samples)."""
+        with self._lock:
+            values = {key: list(value) if isinstance(value, list) else value
+                      for key, value in self._values.items()}
+        for alive, items in shared:
+            if self.metric_type == "gauge" and not alive:
+                continue
+            for key, value in items:
+                key = tuple(key)
+                if key not in values:
+                    values[key] = value
+                elif isinstance(value, list):
+                    values[key] = [a + b for a, b in zip(values[key], value)]
+                else:
+                    values[key] += value
+        lines = [
+            f"# HELP {self.name} {self.documentation}",
+            f"# TYPE {self.name} {self.metric_type}",
+        ]
+        lines.extend(self._samples(values))
+        return "\n".join(lines)
+
+
+class Counter(_Metric):
+    """Monotonically increasing counter."""
+
+    metric_type = "counter"
+
+    def inc(self, amount: float = 1, **labels) -> None:
+        if amount < 0:
+            raise ValueError("Counters can only be incremented by non-negative amounts")
+        key = self._label_key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+        self._changed()
+
+    def get(self, **labels) -> float:
+        """This process's value."""
+        with self._lock:
+            return self._values.get(self._label_key(labels), 0.0)
+
+    def _samples(self, values: Dict[Tuple[str, ...], float]) -> List[str]:
+        items = sorted(values.items())
+        if not items and not self.labelnames:
+            items = [((), 0.0)]
+        return [
+            f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}"
+            for key, value in items
+        ]
+
+
+class Gauge(_Metric):
+    """Value that can go up and down (e.g. in-flight requests)."""
+
+    metric_type = "gauge"
+
+    def set(self, value: float, **labels) -> None:
+        key = self._label_key(labels)
+        with self._lock:
+            self._values[key] = float(value)
+        self._changed()
+
+    def inc(self, amount: float = 1, **labels) -> None:
+        key = self._label_key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+        self._changed()
+
+    def dec(self, amount: float = 1, **labels) -> None:
+        self.inc(-amount, **labels)
+
+    def get(self, **labels) -> float:
+        """This process's value."""
+        with self._lock:
+            return self._values.get(self._label_key(labels), 0.0)
+
+    @contextmanager
+    def track_inprogress(self, **labels):
+        """Increment the gauge for the duration of the block."""
+        self.inc(1, **labels)
+        try:
+            yield
+        finally:
+            self.dec(1, **labels)
+
+    def _samples(self, values: Dict[Tuple[str, ...], float]) -> List[str]:
+        items = sorted(values.items())
+        if not items and not self.labelnames:
+            items = [((), 0.0)]
+        return [
+            f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}"
+            for key, value in items
+        ]
+
+
+class Histogram(_Metric):
+    """Cumulative histogram with fixed upper bounds."""
+
+    metric_type = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = DEFAULT_LATENCY_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        bounds = sorted(float(b) for b in buckets)
+        if not bounds or bounds[-1] != math.inf:
+            bounds.append(math.inf)
+        self.buckets = tuple(bounds)
+        # label key -> [bucket counts..., sum, count]
+
+    def observe(self, value: float, **labels) -> None:
+        key = self._label_key(labels)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                state = [0.0] * (len(self.buckets) + 2)
+                self._values[key] = state
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    state[i] += 1
+                    break
+            state[-2] += value
+            state[-1] += 1
+        self._changed()
+
+    @contextmanager
+    def time(self, **labels):
+        """Observe the wall-clock duration of the block in seconds."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def get_count(self, **labels) -> float:
+        """This process's observation count."""
+        with self._lock:
+            state = self._values.get(self._label_key(labels))
+            return state[-1] if state else 0.0
+
+    def _samples(self, values: Dict[Tuple[str, ...], List[float]]) -> List[str]:
+        items = sorted(values.items())
+        lines = []
+        for key, state in items:
+            cumulative = 0.0
+            for bound, count in zip(self.buckets, state):
+                cumulative += count
+                labels = _format_labels(self.labelnames, key, ("le", _format_value(bound)))
+                lines.append(f"{self.name}_bucket{labels} {_format_value(cumulative)}")
+            labels = _format_labels(self.labelnames, key)
+            lines.append(f"{self.name}_sum{labels} {_format_value(state[-2])}")
+            lines.append(f"{self.name}_count{labels} {_format_value(state[-1])}")
+        return lines
+
+
+class MetricsRegistry:
+    """Collection of metric families rendered together."""
+
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+        self._lock = threading.Lock()
+        self._shared_dir: Optional[Path] = None
+        self._flush_interval = 1.0
+        self._flusher_pid: Optional[int] = None
+        self._dirty = threading.Event()
+
+    def register(self, metric: _Metric) -> _Metric:
+        with self._lock:
+            if metric.name in self._metrics:
+                raise ValueError(f"Metric already registered: {metric.name}")
+            self._metrics[metric.name] = metric
+        metric._registry = self
+        return metric
+
+    def share(self, directory: Path, flush_interval: float = 1.0) -> None:
+        """
+        Merge the samples of every worker process of this server into each scrape.
+
+        Each process writes its samples to <directory>/<parent pid>/<pid>.json
+        at most every `flush_interval` seconds, so a scrape may miss the last
+        second of other workers' updates. Workers are grouped by their parent
+        (the server that forked them). Groups of servers that are gone, and
+        files of exited processes in this process's own group (an earlier run
+        of a single-process server), are removed here.
+        """
+        self._shared_dir = Path(directory)
+        self._flush_interval = flush_interval
+        self._shared_dir.mkdir(parents=True, exist_ok=True)
+        for group in self._shared_dir.iterdir():
+            if group.is_dir() and group.name.isdigit() and not _pid_alive(int(group.name)):
+                shutil.rmtree(group, ignore_errors=True)
+        for path in self._group_dir().glob("*.json"):
+            if path.stem.isdigit() and not _pid_alive(int(path.stem)):
+                path.unlink(missing_ok=True)
+
+    def _changed(self) -> None:
+        if self._shared_dir is None:
+            return
+        if self._flusher_pid != os.getpid():
+            with self._lock:
+                if self._flusher_pid != os.getpid():   # first update in this (possibly forked) process
+                    self._flusher_pid = os.getpid()
+                    self._dirty = threading.Event()
+                    threading.Thread(target=self._flush_loop, name="metrics-flush", daemon=True).start()
+        self._dirty.set()
+
+    def _group_dir(self) -> Path:
+        return self._shared_dir / str(os.getppid())
+
+    def _flush_loop(self) -> None:
+        while True:
+            self._dirty.wait()
+            self._dirty.clear()
+            try:
+                self.flush()
+            except OSError as e:
+                logger.warning(f"Could not write shared metrics: {e}")
+            time.sleep(self._flush_interval)
+
+    def flush(self) -> None:
+        """Write this process's samples to the shared directory (no-op unless shared)."""
+        if self._shared_dir is None:
+            return
+        with self._lock:
+            metrics = list(self._metrics.values())
+        group = self._group_dir()
+        group.mkdir(parents=True, exist_ok=True)
+        path = group / f"{os.getpid()}.json"
+        tmp_path = path.with_suffix(".tmp")
+        with open(tmp_path, "w") as f:
+            json.dump({metric.name: metric.export() for metric in metrics}, f)
+        tmp_path.replace(path)
+
+    def _other_workers(self) -> Dict[str, List[Tuple[bool, List[List[Any]]]]]:
+        """Metric name -> [(worker alive, exported samples)] of the other workers."""
+        shared: Dict[str, List[Tuple[bool, List[List[Any]]]]] = {}
+        if self._shared_dir is None:
+            return shared
+        for path in self._group_dir().glob("*.json"):
+            pid = int(path.stem) if path.stem.isdigit() else None
+            if pid is None or pid == os.getpid():
+                continue
+            try:
+                with open(path) as f:
+                    exported = json.load(f)
+            except (OSError, ValueError):
+                continue
+            alive = _pid_alive(pid)
+            for name, items in exported.items():
+                shared.setdefault(name, []).append((alive, items))
+        return shared
+
+    def render(self) -> str:
+        with self._lock:
+            metrics = list(self._metrics.values())
+        shared = self._other_workers()
+        return "\n".join(metric.render(shared.get(metric.name, ())) for metric in metrics) + "\n"
+
+
+REGISTRY = MetricsRegistry()
+
+HTTP_REQUESTS = REGISTRY.register(Counter(
+    "rvtools_http_requests_total",
+    "HTTP requests handled by the RVTools API.",
+    ["method", "endpoint", "status"]
+))
+HTTP_REQUEST_SECONDS = REGISTRY.register(Histogram(
+    "rvtools_http_request_duration_seconds",
+    "HTTP request latency in seconds.",
+    ["method", "endpoint"]
+))
+UPLOADS_IN_FLIGHT = REGISTRY.register(Gauge(
+    "rvtools_uploads_in_flight",
+    "RVTools uploads currently being received or processed."
+))
+UPLOAD_BYTES = REGISTRY.register(Counter(
+    "rvtools_upload_bytes_total",
+    "Bytes of RVTools workbooks received."
+))
+STAGE_SECONDS = REGISTRY.register(Histogram(
+    "rvtools_processing_stage_seconds",
+    "Time spent in each RVTools processing pipeline stage.",
+    ["stage"]
+))
+FILES_PROCESSED = REGISTRY.register(Counter(
+    "rvtools_files_processed_total",
+    "RVTools workbooks successfully processed."
+))
+VMS_PROCESSED = REGISTRY.register(Counter(
+    "rvtools_vms_processed_total",
+    "VM rows ingested from vInfo sheets."
+))
+HOSTS_PROCESSED = REGISTRY.register(Counter(
+    "rvtools_hosts_processed_total",
+    "Host rows ingested from vHost sheets."
+))
+CACHE_LOOKUPS = REGISTRY.register(Counter(
+    "rvtools_cache_lookups_total",
+    "Cache lookups by cache name and result (hit or miss).",
+    ["cache", "result"]
+))
+ERRORS = REGISTRY.register(Counter(
+    "rvtools_errors_total",
+    "Errors raised while handling RVTools requests.",
+    ["endpoint", "kind"]
+))
+
+
+def record_cache_lookup(cache: str, hit: bool) -> None:
+    """Count a cache hit or miss; hit ratio = hits / (hits + misses)."""
+    CACHE_LOOKUPS.inc(cache=cache, result="hit" if hit else "miss")
+
+
+def record_processing_result(result: Dict) -> None:
+    """Feed counters and stage histograms from a process_rvtools_data manifest."""
+    for stage, seconds in (result.get("stage_timings") or {}).items():
+        STAGE_SECONDS.observe(float(seconds), stage=stage)
+
+    if result.get("status") == "success":
+        FILES_PROCESSED.inc(result.get("files_processed", 0) or 0)
+        VMS_PROCESSED.inc(result.get("vms_processed", 0) or 0)
+        HOSTS_PROCESSED.inc(result.get("hosts_processed", 0) or 0)
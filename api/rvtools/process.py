@@ -5,12 +5,20 @@ Provides REST API for processing RVTools Excel files and extracting model inputs
 
 import os
 import json
+import time
+import hashlib
+import io
+import uuid
+import shutil
 import tempfile
+from datetime import datetime
 from pathlib import Path
-from typing import Dict, Any, Optional
-from fastapi import FastAPI, UploadFile, File, HTTPException
+from typing import Dict, Any, List, Optional
+from fastapi import FastAPI, UploadFile, File, HTTPException, Request, Query, Header
+from fastapi.concurrency import run_in_threadpool
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import Response, StreamingResponse
+from pydantic import BaseModel, Field
 import sys
 
 # Add RVToolAnalysisWithCursorAI to path
@@ -35,14 +43,40 @@ if not rvtools_module_path.exists():
         project_root = project_root_alt
 
 sys.path.insert(0, str(rvtools_module_path))
+if str(api_dir) not in sys.path:
+    sys.path.insert(0, str(api_dir))
+
+from rvtools import metrics as api_metrics
+from rvtools.cache import ResultCache, content_key
+from rvtools.jobs import Job, JobRegistry
+from rvtools.responses import (
+    ARROW_AVAILABLE, ARROW_MEDIA_TYPE, CompressionMiddleware, FastJSONResponse, accepts_arrow, arrow_stream,
+    json_with_raw, table_columns, table_records
+)
+from rvtools.slots import RunSlots, SlotsBusy
+from value_model import engine as value_model_engine
+from value_model import goal_seek
+from value_model import monte_carlo
+from value_model import sensitivity
 
 try:
-    from rvtool_processor import process_rvtools_data
+    from rvtool_processor import compute_metrics, process_rvtools_data
+    import rvtool_diff
+    from src.core.snapshot_store import CLUSTER_METRICS, SnapshotStore
+    from rvtools.datasets import DatasetRegistry, filter_dataset, query_table
 except ImportError:
     # Fallback if module not found
     process_rvtools_data = None
+    DatasetRegistry = None
+    rvtool_diff = None
+    SnapshotStore = None
+    CLUSTER_METRICS = ()
 
-app = FastAPI(title="RVTools Processing API")
+app = FastAPI(title="RVTools Processing API", default_response_class=FastJSONResponse)
+
+# Compress complete responses of at least this many bytes (gzip, or brotli
+# when installed) for clients sending Accept-Encoding; event streams are not
+app.add_middleware(CompressionMiddleware, minimum_size=int(os.environ.get("RVTOOLS_COMPRESS_MIN_BYTES", "1024")))
 
 # CORS middleware
 app.add_middleware(
@@ -60,6 +94,24 @@ app.add_middleware(
     expose_headers=["*"],
 )
 
+
+@app.middleware("http")
+async def record_request_metrics(request: Request, call_next):
+    """Count requests and observe latency per route for /metrics."""
+    start = time.perf_counter()
+    status = 500
+    try:
+        response = await call_next(request)
+        status = response.status_code
+        return response
+    finally:
+        route = request.scope.get("route")
+        endpoint = getattr(route, "path", None) or "unmatched"
+        api_metrics.HTTP_REQUESTS.inc(method=request.method, endpoint=endpoint, status=str(status))
+        api_metrics.HTTP_REQUEST_SECONDS.observe(
+            time.perf_counter() - start, method=request.method, endpoint=endpoint
+        )
+
 # Field mapping from RVTools metrics to model inputs
 FIELD_MAPPING = {
     "totalVMs": {
@@ -219,22 +271,174 @@ async def health_check():
         "rvtools_module_available": process_rvtools_data is not None
     }
 
+@app.get("/metrics")
+async def metrics_endpoint():
+    """Prometheus metrics in text exposition format."""
+    return Response(content=api_metrics.REGISTRY.render(), media_type=api_metrics.CONTENT_TYPE_LATEST)
+
 @app.options("/api/rvtools/process")
+@app.options("/api/rvtools/process/batch")
 async def options_process():
     """Handle CORS preflight requests."""
-    return JSONResponse(content={}, status_code=200)
+    return FastJSONResponse(content={}, status_code=200)
+
+PROFILE_MODES = ("deterministic", "sampling")
+
+
+def _resolve_profile_mode(query_value: Optional[str], header_value: Optional[str]) -> Optional[str]:
+    """
+    Map the ?profile= query parameter or X-RVTools-Profile header to a mode.
+    
+    "1"/"true"/"yes" select deterministic profiling; a mode name selects it
+    directly; anything else (or neither) disables profiling.
+    """
+    value = (query_value or header_value or "").strip().lower()
+    if value in PROFILE_MODES:
+        return value
+    if value in ("1", "true", "yes", "on"):
+        return "deterministic"
+    return None
+
+
+def _persist_profile(profile: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Copy profile artifacts out of the request's temporary directory.
+    
+    Artifacts are kept under RVTOOLS_PROFILE_DIR (default: <tmp>/rvtools_profiles).
+    """
+    source = Path(profile.get("directory", ""))
+    if not source.is_dir():
+        return profile
+    root = Path(os.environ.get("RVTOOLS_PROFILE_DIR", Path(tempfile.gettempdir()) / "rvtools_profiles"))
+    target = root / datetime.now().strftime("%Y%m%d_%H%M%S_%f")
+    shutil.copytree(source, target)
+    return {**profile, "directory": str(target)}
+
+
+# Workbooks, RVTools CSV tab exports, and zip archives of either (read in place)
+UPLOAD_EXTENSIONS = ('.xlsx', '.xls', '.xlsm', '.csv', '.zip')
+UPLOAD_EXTENSIONS_TEXT = ", ".join(UPLOAD_EXTENSIONS[:-1]) + f", or {UPLOAD_EXTENSIONS[-1]}"
+
+# Batch uploads: most files per request, and worker processes parsing them
+# (0 = one per CPU, capped at the file count)
+MAX_BATCH_FILES = int(os.environ.get("RVTOOLS_MAX_BATCH_FILES", "100"))
+BATCH_INGEST_WORKERS = int(os.environ.get("RVTOOLS_INGEST_WORKERS", "0"))
+UPLOAD_CHUNK_BYTES = 1024 * 1024
+
+# State shared by every API worker process on this host (start_server.py
+# --workers): processed results and sensitivity runs keyed by content, run
+# slots, and job event logs. Local disk only, no external services.
+CACHE_DIR = Path(os.environ.get("RVTOOLS_CACHE_DIR", Path(tempfile.gettempdir()) / "rvtools_api_cache"))
+RESULT_CACHE = ResultCache(
+    CACHE_DIR / "results",
+    max_entries=int(os.environ.get("RVTOOLS_CACHE_ENTRIES", "256")),
+    ttl_seconds=float(os.environ.get("RVTOOLS_CACHE_TTL_SECONDS", "86400"))
+)
+SENSITIVITY_CACHE = ResultCache(CACHE_DIR / "sensitivity")
+# /metrics of any worker reports all of this server's workers (see metrics.MetricsRegistry.share)
+api_metrics.REGISTRY.share(CACHE_DIR / "metrics",
+                           flush_interval=float(os.environ.get("RVTOOLS_METRICS_FLUSH_SECONDS", "1")))
+
+# Consolidated frames of processed uploads, by dataset_id, for follow-up
+# requests (/api/rvtools/datasets/...): memory budget per worker, and how
+# long / how many datasets are kept on disk
+DATASETS = DatasetRegistry(
+    CACHE_DIR / "datasets",
+    memory_budget_bytes=int(os.environ.get("RVTOOLS_DATASET_MEMORY_MB", "512")) * 1024 * 1024,
+    max_datasets=int(os.environ.get("RVTOOLS_MAX_DATASETS", "32")),
+    ttl_seconds=float(os.environ.get("RVTOOLS_DATASET_TTL_SECONDS", "3600"))
+) if DatasetRegistry is not None else None
+MAX_DATASET_ROWS = 100000
+
+# Pipeline runs executing at once across all workers (each is CPU-bound),
+# and how long a request waits for a slot before a 503
+RUN_SLOTS = RunSlots(CACHE_DIR / "slots", slots=int(os.environ.get("RVTOOLS_MAX_CONCURRENT_RUNS", os.cpu_count() or 1)))
+RUN_SLOT_TIMEOUT = float(os.environ.get("RVTOOLS_RUN_SLOT_TIMEOUT", "600"))
+
+# Background jobs (/api/rvtools/jobs): concurrent runs (chart rendering goes
+# through pyplot's global state, so 1 unless charts are moved out of process),
+# how long finished jobs are kept, and the progress event cadence
+JOBS = JobRegistry(
+    workers=int(os.environ.get("RVTOOLS_JOB_WORKERS", "1")),
+    retention_seconds=float(os.environ.get("RVTOOLS_JOB_RETENTION_SECONDS", "3600")),
+    log_dir=CACHE_DIR / "jobs"
+)
+JOB_PROGRESS_INTERVAL = float(os.environ.get("RVTOOLS_PROGRESS_INTERVAL", "0.5"))
+JOB_KEEPALIVE_SECONDS = 15.0
+
+# Processed runs uploaded with ?customer= are kept here for trend queries
+SNAPSHOT_DB_PATH = Path(os.environ.get("RVTOOLS_SNAPSHOT_DB", api_dir / "data" / "rvtools_snapshots.db"))
+
 
 @app.post("/api/rvtools/process")
-async def process_rvtools_file(file: UploadFile = File(...)):
+async def process_rvtools_file(
+    file: UploadFile = File(...),
+    profile: Optional[str] = Query(None, description="Profile this request: true, deterministic or sampling"),
+    customer: Optional[str] = Query(None, description="Store the run as a snapshot for this customer"),
+    x_rvtools_profile: Optional[str] = Header(None)
+):
     """
     Process RVTools Excel file and extract model inputs.
     
     Args:
-        file: Uploaded RVTools Excel file (.xlsx, .xls, .xlsm)
+        file: Uploaded RVTools Excel file (.xlsx, .xls, .xlsm), RVTools CSV
+            tab export (.csv) or zip archive of workbooks and/or CSV exports
+        profile: Optional profiling mode (also accepted as the X-RVTools-Profile header)
+        customer: Optional customer name; the run is stored in the snapshot
+            database (RVTOOLS_SNAPSHOT_DB) for /api/rvtools/trends
         
     Returns:
         JSON response with extracted fields, assumptions, and metadata
     """
+    profile_mode = _resolve_profile_mode(profile, x_rvtools_profile)
+    with api_metrics.UPLOADS_IN_FLIGHT.track_inprogress():
+        try:
+            return await _process_rvtools_upload(file, profile_mode, customer)
+        except HTTPException as e:
+            kind = "client" if e.status_code < 500 else "server"
+            api_metrics.ERRORS.inc(endpoint="/api/rvtools/process", kind=kind)
+            raise
+
+
+def _build_process_response(result: Dict[str, Any]) -> Dict[str, Any]:
+    """Map a process_rvtools_data manifest to the /process response (500 if it failed)."""
+    if result.get("status") != "success":
+        raise HTTPException(
+            status_code=500,
+            detail=f"RVTools processing failed: {result.get('message', 'Unknown error')}"
+        )
+
+    # Map to model inputs
+    extracted_fields = map_rvtools_to_model_inputs(result)
+
+    # Build response
+    response = {
+        "status": "success",
+        "processing_date": result.get("processing_date"),
+        "files_processed": result.get("files_processed", 0),
+        "vms_processed": result.get("vms_processed", 0),
+        "hosts_processed": result.get("hosts_processed", 0),
+        "duplicates": result.get("duplicates"),
+        "files": result.get("files", []),
+        "errors": result.get("errors", []),
+        "extracted_fields": extracted_fields,
+        "summary": {
+            "auto_extracted": sum(1 for f in extracted_fields.values() if f.get("status") == "auto-extracted"),
+            "default_assumptions": sum(1 for f in extracted_fields.values() if f.get("status") == "default-assumption"),
+            "user_overrides": 0  # Will be tracked on frontend
+        },
+        "raw_metrics": result.get("metrics", {})
+    }
+    if "profile" in result:
+        response["profile"] = _persist_profile(result["profile"])
+    if "snapshot" in result:
+        response["snapshot"] = result["snapshot"]
+    return response
+
+
+async def _process_rvtools_upload(file: UploadFile, profile_mode: Optional[str] = None,
+                                  customer: Optional[str] = None) -> FastJSONResponse:
+    """Validate, save and process a single uploaded workbook, CSV tab or zip archive."""
     # Log request for debugging
     import logging
     logger = logging.getLogger(__name__)
@@ -257,10 +461,10 @@ async def process_rvtools_file(file: UploadFile = File(...)):
         raise HTTPException(status_code=400, detail="No file provided")
     
     file_ext = Path(file.filename).suffix.lower()
-    if file_ext not in ['.xlsx', '.xls', '.xlsm']:
+    if file_ext not in UPLOAD_EXTENSIONS:
         raise HTTPException(
             status_code=400,
-            detail=f"Invalid file type. Expected .xlsx, .xls, or .xlsm, got {file_ext}"
+            detail=f"Invalid file type. Expected {UPLOAD_EXTENSIONS_TEXT}, got {file_ext}"
         )
     
     # Create temporary directories
@@ -272,50 +476,18 @@ async def process_rvtools_file(file: UploadFile = File(...)):
         output_dir.mkdir()
         
         # Save uploaded file
-        file_path = input_dir / file.filename
-        try:
-            content = await file.read()
-            with open(file_path, "wb") as f:
-                f.write(content)
-        except Exception as e:
-            raise HTTPException(
-                status_code=500,
-                detail=f"Error saving uploaded file: {str(e)}"
-            )
+        uploads = await _save_uploads([file], input_dir)
         
         # Process RVTools file
         try:
-            result = process_rvtools_data(
-                str(input_dir),
-                str(output_dir)
-            )
-            
-            if result.get("status") != "success":
-                raise HTTPException(
-                    status_code=500,
-                    detail=f"RVTools processing failed: {result.get('message', 'Unknown error')}"
-                )
+            options: Dict[str, Any] = {}
+            if profile_mode:
+                options.update(profile=True, profile_mode=profile_mode)
+            if customer:
+                options.update(snapshot_db=str(SNAPSHOT_DB_PATH), customer=customer)
+            response = await run_in_threadpool(_run_pipeline, input_dir, output_dir, uploads, options)
             
-            # Map to model inputs
-            extracted_fields = map_rvtools_to_model_inputs(result)
-            
-            # Build response
-            response = {
-                "status": "success",
-                "processing_date": result.get("processing_date"),
-                "files_processed": result.get("files_processed", 0),
-                "vms_processed": result.get("vms_processed", 0),
-                "hosts_processed": result.get("hosts_processed", 0),
-                "extracted_fields": extracted_fields,
-                "summary": {
-                    "auto_extracted": sum(1 for f in extracted_fields.values() if f.get("status") == "auto-extracted"),
-                    "default_assumptions": sum(1 for f in extracted_fields.values() if f.get("status") == "default-assumption"),
-                    "user_overrides": 0  # Will be tracked on frontend
-                },
-                "raw_metrics": result.get("metrics", {})
-            }
-            
-            return JSONResponse(content=response)
+            return FastJSONResponse(content=response)
             
         except HTTPException:
             raise
@@ -326,6 +498,738 @@ async def process_rvtools_file(file: UploadFile = File(...)):
             )
 
 
+@app.post("/api/rvtools/process/batch")
+async def process_rvtools_batch(
+    files: List[UploadFile] = File(...),
+    profile: Optional[str] = Query(None, description="Profile this request: true, deterministic or sampling"),
+    customer: Optional[str] = Query(None, description="Store the run as a snapshot for this customer"),
+    x_rvtools_profile: Optional[str] = Header(None)
+):
+    """
+    Process several RVTools extracts (e.g. one per vCenter) as one estate.
+    
+    Each upload is streamed to disk, the extracts are parsed concurrently
+    in worker processes (RVTOOLS_INGEST_WORKERS) and consolidated, with
+    cross-file duplicates handled as in a folder run.
+    
+    Args:
+        files: Uploaded workbooks, CSV tab exports and/or zip archives
+        profile: Optional profiling mode (also accepted as the X-RVTools-Profile header)
+        customer: Optional customer name to store the run as a snapshot
+        
+    Returns:
+        The /api/rvtools/process response for the consolidated estate, with
+        "uploads" (saved name and size per upload) and "files" (status, row
+        counts, parse seconds and error per extract)
+    """
+    profile_mode = _resolve_profile_mode(profile, x_rvtools_profile)
+    with api_metrics.UPLOADS_IN_FLIGHT.track_inprogress():
+        try:
+            return await _process_rvtools_batch(files, profile_mode, customer)
+        except HTTPException as e:
+            kind = "client" if e.status_code < 500 else "server"
+            api_metrics.ERRORS.inc(endpoint="/api/rvtools/process/batch", kind=kind)
+            raise
+
+
+async def _stream_upload(file: UploadFile, path: Path) -> Dict[str, Any]:
+    """Copy an upload to `path` in chunks; return the bytes written and their sha256."""
+    written = 0
+    digest = hashlib.sha256()
+    with open(path, "wb") as f:
+        while True:
+            chunk = await file.read(UPLOAD_CHUNK_BYTES)
+            if not chunk:
+                break
+            f.write(chunk)
+            digest.update(chunk)
+            written += len(chunk)
+    api_metrics.UPLOAD_BYTES.inc(written)
+    return {"bytes": written, "sha256": digest.hexdigest()}
+
+
+def _validate_uploads(files: List[UploadFile]) -> None:
+    """400 unless there are 1..MAX_BATCH_FILES uploads of supported types (503 without the module)."""
+    if process_rvtools_data is None:
+        raise HTTPException(status_code=503, detail="RVTools processing module not available")
+    if not files:
+        raise HTTPException(status_code=400, detail="No files provided")
+    if len(files) > MAX_BATCH_FILES:
+        raise HTTPException(status_code=400, detail=f"At most {MAX_BATCH_FILES} files per batch, got {len(files)}")
+    for file in files:
+        file_ext = Path(file.filename or "").suffix.lower()
+        if file_ext not in UPLOAD_EXTENSIONS:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Invalid file type for {file.filename!r}. Expected {UPLOAD_EXTENSIONS_TEXT}"
+            )
+
+
+async def _save_uploads(files: List[UploadFile], input_dir: Path) -> List[Dict[str, Any]]:
+    """Stream each upload into `input_dir`; return its original name, saved name, size and sha256."""
+    # RVTools names every export the same way, so number repeated names
+    # (as a prefix: CSV tab exports are grouped by what precedes the tab name)
+    uploads = []
+    taken = set()
+    try:
+        for file in files:
+            name = Path(file.filename).name
+            path = input_dir / name
+            n = 1
+            while path.name.lower() in taken:
+                n += 1
+                path = input_dir / f"{n}_{name}"
+            taken.add(path.name.lower())
+            uploads.append({"filename": file.filename, "saved_as": path.name,
+                            **(await _stream_upload(file, path))})
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error saving uploaded file: {str(e)}")
+    return uploads
+
+
+def _run_pipeline(input_dir: Path, output_dir: Path, uploads: List[Dict[str, Any]],
+                  options: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    The /process response for a folder of saved uploads: from the shared
+    result cache if the same files were already processed (by any worker),
+    otherwise from process_rvtools_data on a run slot. Profiled and snapshot
+    runs have side effects, so they always run.
+    
+    The consolidated frames are registered under the response's dataset_id
+    (the cache key, so a cached response names a dataset with the same
+    data). The response carries cache_hit, as /api/value-model/sensitivity does.
+    """
+    key = None
+    if not options.get("profile") and not options.get("customer"):
+        # Saved names matter too: they become SourceFile values and file entries
+        key = content_key("process", sorted((upload["saved_as"], upload["sha256"]) for upload in uploads))
+        cached = RESULT_CACHE.get(key)
+        if cached is not None and DATASETS.info(cached["dataset_id"]) is None:
+            cached = None       # its dataset expired: process again to restore it
+        api_metrics.record_cache_lookup("process", cached is not None)
+        if cached is not None:
+            return {**cached, "cache_hit": True}
+    consolidated: Dict[str, Any] = {}
+    try:
+        with RUN_SLOTS.acquire(timeout=RUN_SLOT_TIMEOUT):
+            result = process_rvtools_data(str(input_dir), str(output_dir), data_callback=consolidated.update,
+                                          **options)
+    except SlotsBusy as e:
+        raise HTTPException(status_code=503, detail=f"RVTools processing is busy: {e}")
+    api_metrics.record_processing_result(result)
+    response = _build_process_response(result)
+    dataset = DATASETS.put(key or uuid.uuid4().hex, consolidated, {
+        "files": [upload["filename"] for upload in uploads],
+        "vms_processed": response["vms_processed"],
+        "hosts_processed": response["hosts_processed"],
+    })
+    response["dataset_id"] = dataset["dataset_id"]
+    if key is not None:
+        RESULT_CACHE.put(key, response)
+    return {**response, "cache_hit": False}
+
+
+def _process_saved_uploads(input_dir: Path, output_dir: Path, uploads: List[Dict[str, Any]],
+                           profile_mode: Optional[str] = None, customer: Optional[str] = None,
+                           progress_callback=None) -> Dict[str, Any]:
+    """Process a folder of saved uploads as one run; return the batch response (HTTPException on failure)."""
+    try:
+        options: Dict[str, Any] = {"ingest_workers": BATCH_INGEST_WORKERS}
+        if profile_mode:
+            options.update(profile=True, profile_mode=profile_mode)
+        if customer:
+            options.update(snapshot_db=str(SNAPSHOT_DB_PATH), customer=customer)
+        if progress_callback:
+            options.update(progress_callback=progress_callback, progress_interval=JOB_PROGRESS_INTERVAL)
+        return {**_run_pipeline(input_dir, output_dir, uploads, options), "uploads": uploads}
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error processing RVTools files: {str(e)}")
+
+
+async def _process_rvtools_batch(files: List[UploadFile], profile_mode: Optional[str] = None,
+                                 customer: Optional[str] = None) -> FastJSONResponse:
+    """Validate, save and process a batch of uploads as one consolidated run."""
+    _validate_uploads(files)
+    with tempfile.TemporaryDirectory() as temp_dir:
+        input_dir = Path(temp_dir) / "inputs"
+        output_dir = Path(temp_dir) / "outputs"
+        input_dir.mkdir()
+        output_dir.mkdir()
+        uploads = await _save_uploads(files, input_dir)
+        response = await run_in_threadpool(_process_saved_uploads, input_dir, output_dir, uploads,
+                                           profile_mode, customer)
+        return FastJSONResponse(content=response)
+
+
+@app.post("/api/rvtools/jobs", status_code=202)
+async def create_rvtools_job(
+    files: List[UploadFile] = File(...),
+    profile: Optional[str] = Query(None, description="Profile this request: true, deterministic or sampling"),
+    customer: Optional[str] = Query(None, description="Store the run as a snapshot for this customer"),
+    x_rvtools_profile: Optional[str] = Header(None)
+):
+    """
+    Start processing one or more uploads in the background.
+    
+    The uploads are saved before this returns; processing then runs on the
+    job pool (RVTOOLS_JOB_WORKERS). Follow it at events_url (server-sent
+    events: status, progress, then result or error) or poll status_url. The
+    result is the /api/rvtools/process/batch response.
+    
+    Returns:
+        202 with job_id, status_url and events_url
+    """
+    profile_mode = _resolve_profile_mode(profile, x_rvtools_profile)
+    try:
+        _validate_uploads(files)
+        temp_dir = Path(tempfile.mkdtemp(prefix="rvtools_job_"))
+        input_dir, output_dir = temp_dir / "inputs", temp_dir / "outputs"
+        input_dir.mkdir()
+        output_dir.mkdir()
+        try:
+            uploads = await _save_uploads(files, input_dir)
+        except HTTPException:
+            shutil.rmtree(temp_dir, ignore_errors=True)
+            raise
+    except HTTPException as e:
+        kind = "client" if e.status_code < 500 else "server"
+        api_metrics.ERRORS.inc(endpoint="/api/rvtools/jobs", kind=kind)
+        raise
+    
+    def run(progress_callback):
+        try:
+            with api_metrics.UPLOADS_IN_FLIGHT.track_inprogress():
+                return _process_saved_uploads(input_dir, output_dir, uploads, profile_mode, customer,
+                                              progress_callback)
+        except HTTPException:
+            api_metrics.ERRORS.inc(endpoint="/api/rvtools/jobs", kind="server")
+            raise
+        finally:
+            shutil.rmtree(temp_dir, ignore_errors=True)
+    
+    job = JOBS.submit([upload["filename"] for upload in uploads], run)
+    return FastJSONResponse(status_code=202, content={
+        "job_id": job.id,
+        "status": job.status,
+        "status_url": f"/api/rvtools/jobs/{job.id}",
+        "events_url": f"/api/rvtools/jobs/{job.id}/events",
+    })
+
+
+def _get_job(job_id: str) -> Job:
+    job = JOBS.get(job_id)
+    if job is None:
+        api_metrics.ERRORS.inc(endpoint="/api/rvtools/jobs", kind="client")
+        raise HTTPException(status_code=404, detail=f"Unknown or expired job '{job_id}'")
+    return job
+
+
+@app.get("/api/rvtools/jobs")
+def list_rvtools_jobs():
+    """Queued, running and recently finished jobs (without their results)."""
+    return {"jobs": [job.to_dict(include_result=False) for job in JOBS.list_jobs()]}
+
+
+@app.get("/api/rvtools/jobs/{job_id}")
+def get_rvtools_job(job_id: str):
+    """A job's status and latest progress, and its result or error once finished."""
+    return _get_job(job_id).to_dict()
+
+
+@app.get("/api/rvtools/jobs/{job_id}/events")
+def stream_rvtools_job_events(job_id: str, last_event_id: Optional[str] = Header(None)):
+    """
+    Server-sent events for a job, replayed from the start (or after the
+    Last-Event-ID header on reconnect): "status", "progress" (stage,
+    percent, stage_percent, message, rows, rows_per_second,
+    elapsed_seconds), then "result" or "error", after which the stream ends.
+    """
+    job = _get_job(job_id)
+    after = int(last_event_id) if last_event_id and last_event_id.isdigit() else 0
+    
+    def event_stream():
+        for item in JOBS.subscribe(job, after=after, keepalive=JOB_KEEPALIVE_SECONDS):
+            if item is None:
+                yield ": keepalive\n\n"
+            else:
+                event_id, event, data = item
+                yield _sse_event(event, data, event_id)
+    
+    return StreamingResponse(event_stream(), media_type="text/event-stream",
+                             headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+
+class DatasetFilter(BaseModel):
+    """A row filter: column, op (eq, ne, in, not_in, contains, gt, ge, lt, le) and value."""
+    column: str
+    op: str = "eq"
+    value: Any = None
+
+
+class DatasetMetricsRequest(BaseModel):
+    """Filters applied to every table with the filtered column before metrics are computed."""
+    filters: List[DatasetFilter] = Field(default_factory=list)
+
+
+class DatasetQueryRequest(BaseModel):
+    """Rows or grouped aggregates (e.g. chart series) from one table of a dataset."""
+    table: str = "vinfo"
+    filters: List[DatasetFilter] = Field(default_factory=list)
+    columns: Optional[List[str]] = None
+    group_by: Optional[List[str]] = None
+    aggregates: Optional[Dict[str, str]] = None
+    sort_by: Optional[str] = None
+    descending: bool = False
+    limit: int = Field(1000, ge=1, le=MAX_DATASET_ROWS)
+    offset: int = Field(0, ge=0)
+    layout: str = Field("records", pattern="^(records|columns)$")
+
+
+def _get_dataset(dataset_id: str, endpoint: str) -> Dict[str, Any]:
+    """A dataset's frames, 404 if unknown or expired (503 without the RVTools module)."""
+    if DATASETS is None:
+        raise HTTPException(status_code=503, detail="RVTools processing module not available")
+    frames = DATASETS.get(dataset_id)
+    if frames is None:
+        api_metrics.ERRORS.inc(endpoint=endpoint, kind="client")
+        raise HTTPException(status_code=404, detail=f"Unknown or expired dataset '{dataset_id}'; upload the files again")
+    return frames
+
+
+def _query_dataset(dataset_id: str, request: DatasetQueryRequest, endpoint: str):
+    """The filtered / aggregated table of a dataset query (400 on a bad query)."""
+    frames = _get_dataset(dataset_id, endpoint)
+    frame = frames.get(request.table)
+    if frame is None:
+        api_metrics.ERRORS.inc(endpoint=endpoint, kind="client")
+        available = ", ".join(key for key, value in frames.items() if value is not None)
+        raise HTTPException(status_code=400, detail=f"Unknown table '{request.table}'; available: {available}")
+    try:
+        return query_table(frame, [f.model_dump() for f in request.filters], columns=request.columns,
+                           group_by=request.group_by, aggregates=request.aggregates,
+                           sort_by=request.sort_by, descending=request.descending)
+    except ValueError as e:
+        api_metrics.ERRORS.inc(endpoint=endpoint, kind="client")
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+@app.get("/api/rvtools/datasets")
+def list_rvtools_datasets():
+    """Datasets of recent uploads: tables, row counts, memory/disk state and expiry."""
+    if DATASETS is None:
+        raise HTTPException(status_code=503, detail="RVTools processing module not available")
+    return {"datasets": DATASETS.list_datasets(), "memory_bytes": DATASETS.memory_bytes()}
+
+
+@app.get("/api/rvtools/datasets/{dataset_id}")
+def get_rvtools_dataset(dataset_id: str):
+    """One dataset's tables (rows, columns), source files and expiry."""
+    _get_dataset(dataset_id, "/api/rvtools/datasets")
+    return DATASETS.info(dataset_id)
+
+
+@app.delete("/api/rvtools/datasets/{dataset_id}")
+def delete_rvtools_dataset(dataset_id: str):
+    """Drop a dataset from memory and disk."""
+    if DATASETS is None or not DATASETS.delete(dataset_id):
+        api_metrics.ERRORS.inc(endpoint="/api/rvtools/datasets", kind="client")
+        raise HTTPException(status_code=404, detail=f"Unknown or expired dataset '{dataset_id}'")
+    return {"status": "deleted", "dataset_id": dataset_id}
+
+
+@app.post("/api/rvtools/datasets/{dataset_id}/metrics")
+def compute_rvtools_dataset_metrics(dataset_id: str, request: DatasetMetricsRequest):
+    """
+    Metrics and mapped model inputs for a dataset, optionally filtered (e.g.
+    one cluster, powered-on VMs only), without re-uploading the files.
+    
+    Returns:
+        vms_processed, hosts_processed, extracted_fields and raw_metrics, as
+        in the /api/rvtools/process response, for the filtered rows
+    """
+    endpoint = "/api/rvtools/datasets/metrics"
+    frames = _get_dataset(dataset_id, endpoint)
+    try:
+        frames = filter_dataset(frames, [f.model_dump() for f in request.filters])
+    except ValueError as e:
+        api_metrics.ERRORS.inc(endpoint=endpoint, kind="client")
+        raise HTTPException(status_code=400, detail=str(e))
+    if frames["vinfo"] is None or frames["vinfo"].empty:
+        api_metrics.ERRORS.inc(endpoint=endpoint, kind="client")
+        raise HTTPException(status_code=400, detail="No VMs match the filters")
+    metrics = compute_metrics(frames)
+    return FastJSONResponse(content={
+        "status": "success",
+        "dataset_id": dataset_id,
+        "vms_processed": len(frames["vinfo"]),
+        "hosts_processed": len(frames["vhost"]) if frames["vhost"] is not None else 0,
+        "extracted_fields": map_rvtools_to_model_inputs({"metrics": metrics}),
+        "raw_metrics": metrics
+    })
+
+
+@app.post("/api/rvtools/datasets/{dataset_id}/query")
+def query_rvtools_dataset(dataset_id: str, request: DatasetQueryRequest, accept: Optional[str] = Header(None)):
+    """
+    Rows of one table (vinfo, vhost, vdisk, ...) of a dataset, filtered,
+    optionally grouped with aggregates (count, sum, mean, min, max, median,
+    nunique) for chart series, sorted and paged by offset / limit.
+    
+    Rows are encoded straight from the columns: layout "records" gives
+    "rows" as row objects, "columns" gives "data" as one value list per
+    column (smaller and faster for wide pages). With Accept:
+    application/vnd.apache.arrow.stream the page is an Arrow IPC stream
+    (requires pyarrow; 406 without it), total rows in X-Total-Rows.
+    """
+    endpoint = "/api/rvtools/datasets/query"
+    frame = _query_dataset(dataset_id, request, endpoint)
+    page = frame.iloc[request.offset:request.offset + request.limit]
+    if accepts_arrow(accept):
+        if not ARROW_AVAILABLE:
+            api_metrics.ERRORS.inc(endpoint=endpoint, kind="client")
+            raise HTTPException(status_code=406, detail="Arrow responses require pyarrow on the server")
+        return Response(content=arrow_stream(page), media_type=ARROW_MEDIA_TYPE,
+                        headers={"X-Total-Rows": str(len(frame))})
+    content = {
+        "dataset_id": dataset_id,
+        "table": request.table,
+        "total_rows": len(frame),
+        "offset": request.offset,
+        "columns": [str(c) for c in page.columns],
+    }
+    if request.layout == "columns":
+        return FastJSONResponse(content={**content, "data": table_columns(page)["data"]})
+    return Response(content=json_with_raw({**content, "rows": table_records(page)}), media_type="application/json")
+
+
+@app.post("/api/rvtools/datasets/{dataset_id}/export")
+def export_rvtools_dataset(dataset_id: str, request: DatasetQueryRequest,
+                           format: str = Query("csv", description="csv, xlsx or arrow")):
+    """
+    The whole result of a dataset query (offset / limit ignored) as a CSV,
+    Excel or Arrow IPC (requires pyarrow) download.
+    """
+    endpoint = "/api/rvtools/datasets/export"
+    formats = ("csv", "xlsx", "arrow") if ARROW_AVAILABLE else ("csv", "xlsx")
+    if format not in formats:
+        api_metrics.ERRORS.inc(endpoint=endpoint, kind="client")
+        raise HTTPException(status_code=400,
+                            detail=f"Unknown export format '{format}'; expected {' or '.join(formats)}")
+    frame = _query_dataset(dataset_id, request, endpoint)
+    filename = f"{request.table}_{dataset_id[:12]}.{format}"
+    headers = {"Content-Disposition": f'attachment; filename="{filename}"'}
+    if format == "csv":
+        return Response(content=frame.to_csv(index=False), media_type="text/csv", headers=headers)
+    if format == "arrow":
+        return Response(content=arrow_stream(frame), media_type=ARROW_MEDIA_TYPE, headers=headers)
+    buffer = io.BytesIO()
+    frame.to_excel(buffer, index=False, sheet_name=request.table[:31])
+    return Response(content=buffer.getvalue(), headers=headers,
+                    media_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet")
+
+
+def _snapshot_store() -> "SnapshotStore":
+    """The snapshot database, or 503 when the RVTools module is unavailable."""
+    if SnapshotStore is None:
+        raise HTTPException(status_code=503, detail="RVTools processing module not available")
+    return SnapshotStore(SNAPSHOT_DB_PATH)
+
+
+@app.get("/api/rvtools/snapshots")
+def list_rvtools_snapshots(customer: Optional[str] = None):
+    """Stored RVTools snapshots, oldest first, optionally for one customer."""
+    store = _snapshot_store()
+    return {"customers": store.customers(), "snapshots": store.list_snapshots(customer)}
+
+
+@app.get("/api/rvtools/trends")
+def get_rvtools_trend(
+    customer: str,
+    metric: str = "total_powered_on_vms",
+    by_cluster: bool = Query(False, description="Trend a per-cluster rollup instead of an estate metric"),
+    cluster: Optional[List[str]] = Query(None, description="Limit a per-cluster trend to these clusters"),
+    start: Optional[str] = Query(None, description="Earliest extract date (ISO)"),
+    end: Optional[str] = Query(None, description="Latest extract date (ISO)")
+):
+    """
+    Trend of one metric across a customer's stored snapshots.
+    
+    Estate metrics are the manifest metrics (e.g. total_powered_on_vms,
+    avg_cpu_utilization). With by_cluster=true the metric is one of the
+    per-cluster rollups (vms, powered_on_vms, vcpus, ram_gb, hosts,
+    avg_cpu_usage, ...), returned per cluster with its change over the range.
+    """
+    store = _snapshot_store()
+    if customer not in store.customers():
+        api_metrics.ERRORS.inc(endpoint="/api/rvtools/trends", kind="client")
+        raise HTTPException(status_code=404, detail=f"No snapshots stored for customer '{customer}'")
+    try:
+        if by_cluster:
+            result = store.cluster_trend(customer, metric, clusters=cluster, start=start, end=end)
+        else:
+            result = store.metric_trend(customer, metric, start=start, end=end)
+    except ValueError as e:
+        api_metrics.ERRORS.inc(endpoint="/api/rvtools/trends", kind="client")
+        raise HTTPException(status_code=400, detail=str(e))
+    return {**result, "available_cluster_metrics": list(CLUSTER_METRICS)}
+
+
+@app.get("/api/rvtools/snapshots/diff")
+def diff_rvtools_snapshots(
+    customer: str,
+    from_id: Optional[int] = Query(None, description="Earlier snapshot (default: second latest)"),
+    to_id: Optional[int] = Query(None, description="Later snapshot (default: latest)"),
+    limit: int = Query(100, ge=0, description="Rows returned per change category")
+):
+    """Categorized changes between two stored snapshots of a customer."""
+    store = _snapshot_store()
+    try:
+        stored = rvtool_diff.diff_stored(store, customer, from_id, to_id)
+    except ValueError as e:
+        api_metrics.ERRORS.inc(endpoint="/api/rvtools/snapshots/diff", kind="client")
+        raise HTTPException(status_code=400, detail=str(e))
+    stored["from"].pop("metrics")
+    stored["to"].pop("metrics")
+    return {"from": stored["from"], "to": stored["to"], **stored["diff"].to_dict(limit=limit)}
+
+
+@app.post("/api/rvtools/diff")
+async def diff_rvtools_files(
+    old_file: UploadFile = File(...),
+    new_file: UploadFile = File(...),
+    limit: int = Query(100, ge=0, description="Rows returned per change category")
+):
+    """
+    Categorized changes between two uploaded extracts of the same estate.
+    
+    VMs are matched on VM name + VI SDK Server, then VM UUID, then VM name
+    alone; the response holds category counts, estate and per-cluster deltas,
+    and up to `limit` changed VMs and hosts per category.
+    """
+    if rvtool_diff is None:
+        raise HTTPException(status_code=503, detail="RVTools processing module not available")
+    try:
+        _validate_uploads([old_file, new_file])
+        with tempfile.TemporaryDirectory() as temp_dir:
+            old_dir, new_dir = Path(temp_dir) / "old", Path(temp_dir) / "new"
+            old_dir.mkdir()
+            new_dir.mkdir()
+            await _save_uploads([old_file], old_dir)
+            await _save_uploads([new_file], new_dir)
+            try:
+                diff = rvtool_diff.diff_inputs(old_dir, new_dir)
+            except ValueError as e:
+                raise HTTPException(status_code=400, detail=f"Could not read extract: {e}")
+        return diff.to_dict(limit=limit)
+    except HTTPException as e:
+        kind = "client" if e.status_code < 500 else "server"
+        api_metrics.ERRORS.inc(endpoint="/api/rvtools/diff", kind=kind)
+        raise
+
+
+MAX_VALUE_MODEL_SCENARIOS = int(os.environ.get("VALUE_MODEL_MAX_SCENARIOS", "10000"))
+
+
+class ValueModelRequest(BaseModel):
+    """Batch of value-model scenarios sharing one set of RVTools extracted fields."""
+    extracted_fields: Dict[str, Any] = Field(default_factory=dict)
+    scenarios: List[Dict[str, Any]] = Field(default_factory=lambda: [{}])
+    include_breakdown: bool = True
+
+
+@app.post("/api/value-model/evaluate")
+def evaluate_value_model(request: ValueModelRequest):
+    """
+    Evaluate value-model scenarios server-side.
+    
+    Each scenario overrides ValueModel inputs (camelCase names as in the UI);
+    anything not given comes from extracted_fields, then the UI defaults.
+    
+    Returns:
+        JSON response with one generateValueReport()-shaped result per scenario
+    """
+    if len(request.scenarios) > MAX_VALUE_MODEL_SCENARIOS:
+        api_metrics.ERRORS.inc(endpoint="/api/value-model/evaluate", kind="client")
+        raise HTTPException(
+            status_code=413,
+            detail=f"Too many scenarios ({len(request.scenarios)}); the limit is {MAX_VALUE_MODEL_SCENARIOS}"
+        )
+    try:
+        results = value_model_engine.evaluate_scenarios(
+            request.scenarios,
+            request.extracted_fields,
+            include_breakdown=request.include_breakdown
+        )
+    except ValueError as e:
+        api_metrics.ERRORS.inc(endpoint="/api/value-model/evaluate", kind="client")
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    return FastJSONResponse(content={
+        "status": "success",
+        "scenarios_evaluated": len(results),
+        "results": results
+    })
+
+
+MAX_MONTE_CARLO_TRIALS = int(os.environ.get("VALUE_MODEL_MAX_TRIALS", "5000000"))
+
+
+class MonteCarloRequest(BaseModel):
+    """Monte Carlo run: a base scenario plus distributions for uncertain inputs."""
+    extracted_fields: Dict[str, Any] = Field(default_factory=dict)
+    base_scenario: Dict[str, Any] = Field(default_factory=dict)
+    distributions: Dict[str, Dict[str, Any]]
+    trials: int = 100000
+    seed: Optional[int] = None
+    bins: int = Field(50, ge=1, le=1000)
+    percentiles: List[float] = Field(default_factory=lambda: list(monte_carlo.DEFAULT_PERCENTILES))
+
+
+def _sse_event(event: str, data: Any, event_id: Optional[int] = None) -> str:
+    """Format one server-sent event."""
+    prefix = f"id: {event_id}\n" if event_id is not None else ""
+    return f"{prefix}event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+@app.post("/api/value-model/monte-carlo")
+def run_value_model_monte_carlo(request: MonteCarloRequest, http_request: Request, stream: bool = False):
+    """
+    Monte Carlo analysis of NPV, ROI and payback.
+    
+    With ?stream=true (or Accept: text/event-stream) the response is a
+    server-sent event stream of "progress" events followed by a "result" event.
+    
+    Returns:
+        Percentiles, histograms and P(NPV > 0) over all trials
+    """
+    if not 1 <= request.trials <= MAX_MONTE_CARLO_TRIALS:
+        api_metrics.ERRORS.inc(endpoint="/api/value-model/monte-carlo", kind="client")
+        raise HTTPException(status_code=400, detail=f"trials must be between 1 and {MAX_MONTE_CARLO_TRIALS}")
+    if any(not 0 <= q <= 100 for q in request.percentiles):
+        api_metrics.ERRORS.inc(endpoint="/api/value-model/monte-carlo", kind="client")
+        raise HTTPException(status_code=400, detail="percentiles must be between 0 and 100")
+    try:
+        events = monte_carlo.iter_monte_carlo(
+            request.base_scenario,
+            request.distributions,
+            trials=request.trials,
+            seed=request.seed,
+            extracted_fields=request.extracted_fields,
+            percentiles=request.percentiles,
+            bins=request.bins
+        )
+    except ValueError as e:
+        api_metrics.ERRORS.inc(endpoint="/api/value-model/monte-carlo", kind="client")
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    if stream or "text/event-stream" in http_request.headers.get("accept", ""):
+        def event_stream():
+            try:
+                for event in events:
+                    if event["event"] == "result":
+                        payload = event["result"]
+                    else:
+                        payload = {"completed": event["completed"], "total": event["total"]}
+                    yield _sse_event(event["event"], payload)
+            except Exception as e:
+                api_metrics.ERRORS.inc(endpoint="/api/value-model/monte-carlo", kind="server")
+                yield _sse_event("error", {"detail": str(e)})
+        
+        return StreamingResponse(event_stream(), media_type="text/event-stream",
+                                 headers={"Cache-Control": "no-cache"})
+    
+    result = None
+    try:
+        for event in events:
+            if event["event"] == "result":
+                result = event["result"]
+    except Exception as e:
+        api_metrics.ERRORS.inc(endpoint="/api/value-model/monte-carlo", kind="server")
+        raise HTTPException(status_code=500, detail=f"Monte Carlo run failed: {str(e)}")
+    return FastJSONResponse(content={"status": "success", **result})
+
+
+class SensitivityRequest(BaseModel):
+    """Tornado analysis: perturb inputs of a base scenario by ±delta_pct."""
+    extracted_fields: Dict[str, Any] = Field(default_factory=dict)
+    base_scenario: Dict[str, Any] = Field(default_factory=dict)
+    delta_pct: float = 10.0
+    inputs: Optional[List[str]] = None
+    rank_by: str = "npv3Year"
+
+
+@app.post("/api/value-model/sensitivity")
+def run_value_model_sensitivity(request: SensitivityRequest):
+    """
+    Sensitivity (tornado) analysis of the value model.
+    
+    Every input is evaluated at -delta_pct and +delta_pct of its base value in
+    one batch. Results are cached by a hash of the resolved base scenario.
+    
+    Returns:
+        Drivers ranked by their swing in rank_by, with low/high outputs and elasticities
+    """
+    try:
+        result = sensitivity.run_sensitivity(
+            request.base_scenario,
+            request.extracted_fields,
+            delta_pct=request.delta_pct,
+            inputs=request.inputs,
+            rank_by=request.rank_by,
+            cache=SENSITIVITY_CACHE
+        )
+    except ValueError as e:
+        api_metrics.ERRORS.inc(endpoint="/api/value-model/sensitivity", kind="client")
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    api_metrics.record_cache_lookup("sensitivity", result["cache_hit"])
+    return FastJSONResponse(content={"status": "success", **result})
+
+
+class GoalSeekRequest(BaseModel):
+    """Goals to solve for each customer (a base scenario plus extracted fields)."""
+    customers: List[Dict[str, Any]] = Field(default_factory=lambda: [{}])
+    goals: List[Dict[str, Any]]
+    max_iterations: int = Field(goal_seek.DEFAULT_MAX_ITERATIONS, ge=1, le=1000)
+    tolerance: float = Field(goal_seek.DEFAULT_TOLERANCE, gt=0)
+    include_trace: bool = True
+
+
+@app.post("/api/value-model/goal-seek")
+def run_value_model_goal_seek(request: GoalSeekRequest):
+    """
+    Goal seek / break-even solver.
+    
+    Finds, for every customer and goal, the value of the goal's input at which
+    its output reaches the target (e.g. the consolidationRatio for NPV = 0).
+    
+    Returns:
+        One result per (customer, goal) with the solution, status and convergence trace
+    """
+    problems = len(request.customers) * len(request.goals)
+    if problems > MAX_VALUE_MODEL_SCENARIOS:
+        api_metrics.ERRORS.inc(endpoint="/api/value-model/goal-seek", kind="client")
+        raise HTTPException(
+            status_code=413,
+            detail=f"Too many customer/goal pairs ({problems}); the limit is {MAX_VALUE_MODEL_SCENARIOS}"
+        )
+    try:
+        result = goal_seek.solve_goals(
+            request.customers,
+            request.goals,
+            max_iterations=request.max_iterations,
+            tolerance=request.tolerance,
+            include_trace=request.include_trace
+        )
+    except ValueError as e:
+        api_metrics.ERRORS.inc(endpoint="/api/value-model/goal-seek", kind="client")
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    return FastJSONResponse(content={"status": "success", **result})
+
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(app, host="0.0.0.0", port=8001)
@@ -0,0 +1,90 @@
+"""
+Cross-Worker Run Slots
+Limits how many RVTools pipeline runs execute at once across all API worker
+processes, using one lock file per slot. A run holds an exclusive fcntl lock
+on a free slot file; the kernel releases it if the worker dies, so a crashed
+run never leaks a slot and no lock server is needed.
+
+Within a process, runs are also serialized: chart rendering goes through
+matplotlib.pyplot's process-global state. Without fcntl (Windows) only that
+per-process limit applies.
+"""
+
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Iterator, Optional
+
+try:
+    import fcntl
+except ImportError:  # Windows: per-process limit only
+    fcntl = None
+
+
+class SlotsBusy(Exception):
+    """No slot became free within the timeout."""
+
+
+class RunSlots:
+    """At most `slots` concurrent holders across processes sharing `directory`."""
+
+    def __init__(self, directory, slots: int = 1, poll_seconds: float = 0.25):
+        self.directory = Path(directory)
+        self.slots = max(1, slots)
+        self.poll_seconds = poll_seconds
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self._local = threading.Lock()
+
+    @contextmanager
+    def acquire(self, timeout: Optional[float] = None) -> Iterator[Optional[int]]:
+        """
+        Hold a slot for the duration of the block.
+
+        Yields:
+            The slot number (None without fcntl)
+
+        Raises:
+            SlotsBusy: When no slot is free within `timeout` seconds
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        if not self._local.acquire(timeout=-1 if timeout is None else timeout):
+            raise SlotsBusy(f"No pipeline slot free within {timeout} seconds")
+        try:
+            if fcntl is None:
+                yield None
+                return
+            while True:
+                for slot in range(self.slots):
+                    handle = open(self.directory / f"slot-{slot}.lock", "a+")
+                    try:
+                        fcntl.flock(handle, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                    except OSError:
+                        handle.close()
+                        continue
+                    try:
+                        yield slot
+                    finally:
+                        fcntl.flock(handle, fcntl.LOCK_UN)
+                        handle.close()
+                    return
+                if deadline is not None and time.monotonic() >= deadline:
+                    raise SlotsBusy(f"No pipeline slot free within {timeout} seconds")
+                time.sleep(self.poll_seconds)
+        finally:
+            self._local.release()
+
+    def in_use(self) -> int:
+        """Slots currently held by any process (a probe, not a reservation)."""
+        if fcntl is None:
+            return int(self._local.locked())
+        held = 0
+        for slot in range(self.slots):
+            with open(self.directory / f"slot-{slot}.lock", "a+") as handle:
+                try:
+                    fcntl.flock(handle, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                except OSError:
+                    held += 1
+                else:
+                    fcntl.flock(handle, fcntl.LOCK_UN)
+        return held
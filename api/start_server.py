@@ -1,10 +1,25 @@
 """
 Simple Python script to start the RVTools API server
 Run this from the api directory: python start_server.py
+
+Development (default): one process with auto-reload on port 8001.
+
+Production: python start_server.py --workers 4 [--host 0.0.0.0] [--port 8001]
+The app is imported once in a supervisor process, which binds the port and
+forks the workers, so they share the loaded modules copy-on-write and accept
+from one socket. Dead workers are restarted; SIGTERM/SIGINT stops them all.
+Workers share processed results, run slots and job event logs through
+RVTOOLS_CACHE_DIR (see rvtools/process.py), so no external services are
+needed. Without fork (Windows) this falls back to uvicorn --workers, which
+imports the app in each worker.
 """
 import sys
 import os
+import argparse
+import signal
+import socket
 import subprocess
+import time
 from pathlib import Path
 
 # Ensure we're in the api directory
@@ -19,30 +34,124 @@ except ImportError:
     print("Installing dependencies...")
     subprocess.check_call([sys.executable, "-m", "pip", "install", "fastapi", "uvicorn", "python-multipart", "--quiet"])
     print("Dependencies installed!")
+    import uvicorn
 
 # Set Python path to include parent directory
-import os
 parent_dir = api_dir.parent
 os.environ['PYTHONPATH'] = str(parent_dir) + os.pathsep + os.environ.get('PYTHONPATH', '')
 
-print()
-print("=" * 50)
-print("Starting RVTools API Server")
-print("=" * 50)
-print()
-print("Server will start on http://localhost:8001")
-print("Health check: http://localhost:8001/health")
-print()
-print("Press Ctrl+C to stop the server")
-print("=" * 50)
-print()
-
-# Start the server
-subprocess.run([
-    sys.executable, "-m", "uvicorn",
-    "rvtools.process:app",
-    "--host", "0.0.0.0",
-    "--port", "8001",
-    "--reload"
-])
+# A worker that exits sooner than this after starting is restarted after a pause
+RESTART_BACKOFF_SECONDS = 1.0
+
+
+def print_banner(host: str, port: int, workers: int) -> None:
+    mode = f"{workers} worker processes" if workers else "development mode, auto-reload"
+    print()
+    print("=" * 50)
+    print(f"Starting RVTools API Server ({mode})")
+    print("=" * 50)
+    print()
+    print(f"Server will start on http://localhost:{port}")
+    print(f"Health check: http://localhost:{port}/health")
+    print()
+    print("Press Ctrl+C to stop the server")
+    print("=" * 50)
+    print()
+
+
+def run_development(host: str, port: int) -> None:
+    subprocess.run([
+        sys.executable, "-m", "uvicorn",
+        "rvtools.process:app",
+        "--host", host,
+        "--port", str(port),
+        "--reload"
+    ])
+
+
+def run_workers(host: str, port: int, workers: int) -> None:
+    """Preload the app, bind once, fork `workers` uvicorn servers and supervise them."""
+    if not hasattr(os, "fork"):
+        subprocess.run([
+            sys.executable, "-m", "uvicorn",
+            "rvtools.process:app",
+            "--host", host,
+            "--port", str(port),
+            "--workers", str(workers)
+        ])
+        return
+
+    from rvtools.process import app  # loaded before fork: shared copy-on-write
+
+    sock = socket.socket(socket.AF_INET6 if ":" in host else socket.AF_INET, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((host, port))
+    sock.listen(2048)
+    sock.set_inheritable(True)
+
+    children = {}       # pid -> start time
+    stopping = False
+
+    def spawn() -> None:
+        pid = os.fork()
+        if pid == 0:
+            signal.signal(signal.SIGTERM, signal.SIG_DFL)
+            signal.signal(signal.SIGINT, signal.SIG_DFL)
+            code = 0
+            try:
+                uvicorn.Server(uvicorn.Config(app, log_level="info")).run(sockets=[sock])
+            except BaseException:
+                code = 1
+            finally:
+                os._exit(code)
+        children[pid] = time.monotonic()
+        print(f"Started worker {pid}")
+
+    def stop(signum, frame) -> None:
+        nonlocal stopping
+        stopping = True
+        for pid in list(children):
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    signal.signal(signal.SIGTERM, stop)
+    signal.signal(signal.SIGINT, stop)
+    for _ in range(workers):
+        spawn()
+
+    while children:
+        try:
+            pid, status = os.wait()
+        except ChildProcessError:
+            break
+        started = children.pop(pid, None)
+        if started is None or stopping:
+            continue
+        print(f"Worker {pid} exited (status {status}); restarting")
+        if time.monotonic() - started < RESTART_BACKOFF_SECONDS:
+            time.sleep(RESTART_BACKOFF_SECONDS)
+        if not stopping:
+            spawn()
+    sock.close()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Start the RVTools API server")
+    parser.add_argument("--host", default="0.0.0.0", help="Interface to bind (default: 0.0.0.0)")
+    parser.add_argument("--port", type=int, default=8001, help="Port to bind (default: 8001)")
+    parser.add_argument("--workers", type=int, default=int(os.environ.get("RVTOOLS_API_WORKERS", "0")),
+                        help="Production mode with this many worker processes "
+                             "(default: RVTOOLS_API_WORKERS, or 0 for development mode with auto-reload)")
+    args = parser.parse_args()
+
+    print_banner(args.host, args.port, args.workers)
+    if args.workers > 0:
+        run_workers(args.host, args.port, args.workers)
+    else:
+        run_development(args.host, args.port)
+
 
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,14 @@
+"""
+Value Model Package
+Server-side TCO / value-model engine mirroring src/pages/ValueModel.jsx
+"""
+
+from .engine import INPUT_DEFAULTS, build_inputs, evaluate, evaluate_scenarios, to_reports
+from .goal_seek import solve_goals
+from .ramp import RAMP_SHAPES, monthly_schedule, parallel_run_totals
+from .sensitivity import run_sensitivity
+
+__all__ = [
+    "INPUT_DEFAULTS", "RAMP_SHAPES", "build_inputs", "evaluate", "evaluate_scenarios",
+    "monthly_schedule", "parallel_run_totals", "run_sensitivity", "solve_goals", "to_reports",
+]
@@ -0,0 +1,463 @@
+"""
+Value Model Engine
+Vectorized port of the TCO / value-model math in src/pages/ValueModel.jsx.
+
+Every input is a 1-D array with one element per scenario, so thousands of
+scenarios are evaluated with a handful of array operations. The arithmetic
+follows the JSX expression for expression (including operation order), so
+results agree with the browser to the cent. The parallel-run month loop is
+replaced by the closed-form ramp sums in ramp.py, which also add step and
+custom ramp-down curves.
+"""
+
+from typing import Any, Dict, Iterable, List, Mapping, Optional
+
+import numpy as np
+
+from . import ramp
+
+# Model inputs and their defaults, as in the JSX useState initialisers. A
+# missing or null input selects the default; 0 is a real value, as in the
+# UI's live calculation, except for ZERO_MEANS_DEFAULT.
+INPUT_DEFAULTS: Dict[str, float] = {
+    # Global configuration
+    "analysisTerm": 5,
+    "totalVMs": 0,
+    "totalHosts": 0,
+    # ESG
+    "pue": 1.5,
+    "gridCarbonIntensity": 0.385,
+    # Cloud economics
+    "avgPublicCloudCostPerMonth": 280,
+    # Migration
+    "parallelRunPeriod": 6,
+    "migrationCostPerVM": 1000,
+    "trainingCostPerFTE": 5000,
+    # Facilities
+    "costPerHostPerYear": 5000,
+    # Software licensing
+    "currentStateSoftwareCost": 0,
+    # Financial
+    "discountRate": 10,
+    # Compute & licensing
+    "avgCostPerHost": 25000,
+    "supportPercentage": 15,
+    "consolidationRatio": 3.0,
+    # Storage
+    "currentStorageCostPerGB": 0.10,
+    "totalStorageGB": 0,
+    # Network
+    "physicalFirewallCount": 0,
+    "loadBalancerCount": 0,
+    # Operational efficiency
+    "ftes": 0,
+    "burdenedCostPerFTE": 0,
+    "productivityGainServerAdmin": 40,
+    "productivityGainNetworkAdmin": 40,
+    "productivityGainDBAdmin": 0,
+    # Risk mitigation
+    "annualRevenue": 0,
+    "marginPercentage": 0,
+    # Power
+    "currentHostWatts": 500,
+    "vcfHostWatts": 400,
+}
+
+# Inputs where 0 also selects the default, as in the UI
+# (GlobalConfiguration.jsx: globalConfig?.analysisTerm || 5)
+ZERO_MEANS_DEFAULT = ("analysisTerm",)
+# Inputs the model divides by or multiplies every annual figure with
+POSITIVE_INPUTS = ("analysisTerm", "consolidationRatio")
+
+# Fixed model constants (not user-editable in the UI)
+NETWORK_HARDWARE_COST_PER_UNIT = 87000
+DOWNTIME_REDUCTION = 70          # %
+BREACH_PROBABILITY = 33          # % per year
+AVG_BREACH_COST = 9360000        # $9.36M
+RISK_REDUCTION = 35              # %
+VCF_SUBSCRIPTION_RATE = 0.25     # of VCF hardware cost
+STORAGE_MAINTENANCE_RATE = 0.15  # of current storage cost
+VSAN_SUPPORT_RATE = 0.05         # of current storage cost
+MONTHS_PER_YEAR = 12
+LABOR_SPLIT = {"serverAdmin": 0.4, "networkAdmin": 0.3, "dbAdmin": 0.3}
+
+# Non-numeric or zero-allowed inputs describing the ramp-down after the parallel
+# run; see ramp.py. Defaults reproduce the UI's 6-month linear ramp.
+RAMP_INPUTS = ("rampShape", "rampDownMonths", "rampCurve")
+
+# extracted_fields (from map_rvtools_to_model_inputs) that feed the model,
+# and whether the UI rounds them (GlobalConfiguration.handleRVToolsExtraction)
+EXTRACTED_FIELD_INPUTS = {
+    "totalVMs": True,
+    "totalHosts": True,
+    "consolidationRatio": False,
+    "totalStorageGB": False,
+    "avgCostPerHost": False,
+    "avgPublicCloudCostPerMonth": False,
+}
+
+# Headline outputs by name -> path into evaluate() results
+OUTPUT_PATHS = {
+    "npv3Year": ("financials", "npv3Year"),
+    "roi": ("financials", "roi"),
+    "paybackPeriodMonths": ("financials", "paybackPeriodMonths"),
+    "currentStateTCO": ("tcoBreakdown", "currentState"),
+    "vcfTCO": ("tcoBreakdown", "futureState"),
+    "totalSavings": ("totalSavings",),
+}
+
+
+def _js_round(values: np.ndarray) -> np.ndarray:
+    """Math.round: halves round towards +infinity (numpy rounds half to even)."""
+    return np.floor(values + 0.5)
+
+
+def build_inputs(scenarios: Iterable[Mapping[str, Any]],
+                 extracted_fields: Optional[Mapping[str, Any]] = None) -> Dict[str, np.ndarray]:
+    """
+    Assemble scenario input arrays.
+
+    Precedence per field: scenario value, then the RVTools extracted field,
+    then the model default (a null value counts as missing; 0 is kept except
+    for ZERO_MEANS_DEFAULT). Scenarios may also set the ramp-down curve with
+    rampShape ("linear", "step" or "custom"), rampDownMonths and rampCurve
+    (monthly fractions of the current-state cost after the parallel run).
+
+    Args:
+        scenarios: One mapping of input overrides per scenario (may be empty)
+        extracted_fields: Output of map_rvtools_to_model_inputs, shared by all scenarios
+
+    Returns:
+        dict: Input name -> float64 array of length len(scenarios)
+
+    Raises:
+        ValueError: On unknown input names, non-numeric values or a
+            non-positive POSITIVE_INPUTS value
+    """
+    scenarios = list(scenarios)
+    if not scenarios:
+        raise ValueError("At least one scenario is required")
+
+    base: Dict[str, float] = dict(INPUT_DEFAULTS)
+    for field, rounded in EXTRACTED_FIELD_INPUTS.items():
+        entry = (extracted_fields or {}).get(field)
+        value = entry.get("value") if isinstance(entry, Mapping) else entry
+        if value is not None:
+            value = float(value)
+            base[field] = float(_js_round(np.float64(value))) if rounded else value
+
+    for index, scenario in enumerate(scenarios):
+        unknown = set(scenario) - set(INPUT_DEFAULTS) - set(RAMP_INPUTS)
+        if unknown:
+            raise ValueError(f"Scenario {index}: unknown inputs {sorted(unknown)}")
+
+    inputs = {}
+    for name, default in INPUT_DEFAULTS.items():
+        column = []
+        for index, scenario in enumerate(scenarios):
+            value = scenario.get(name)
+            try:
+                column.append(float(value) if value is not None else base[name])
+            except (TypeError, ValueError):
+                raise ValueError(f"Scenario {index}: '{name}' must be numeric, got {value!r}")
+        inputs[name] = apply_input_default(name, np.asarray(column, dtype=np.float64))
+        if name in POSITIVE_INPUTS and (inputs[name] <= 0).any():
+            index = int(np.argmax(inputs[name] <= 0))
+            raise ValueError(f"Scenario {index}: '{name}' must be positive, got {inputs[name][index]:g}")
+    inputs.update(ramp.build_ramp_inputs(scenarios))
+    return inputs
+
+
+def apply_input_default(name: str, values: np.ndarray) -> np.ndarray:
+    """Missing values (NaN), and 0 for ZERO_MEANS_DEFAULT, fall back to the input's default."""
+    missing = np.isnan(values)
+    if name in ZERO_MEANS_DEFAULT:
+        missing |= values == 0
+    return np.where(missing, float(INPUT_DEFAULTS[name]), values)
+
+
+def broadcast_inputs(p: Dict[str, np.ndarray], size: int) -> Dict[str, np.ndarray]:
+    """Repeat a single-scenario input set `size` times (for sampling or perturbing)."""
+    return {name: np.repeat(values, size, axis=0) for name, values in p.items()}
+
+
+def stack_inputs(parts: List[Dict[str, np.ndarray]]) -> Dict[str, np.ndarray]:
+    """Concatenate input sets from separate build_inputs() calls into one batch."""
+    width = max(part["rampCurvePrefix"].shape[1] for part in parts)
+    stacked = {}
+    for name in parts[0]:
+        columns = [part[name] for part in parts]
+        if name == "rampCurvePrefix":
+            # Pad with each row's total so shorter curves keep reading their full sum
+            columns = [np.pad(c, ((0, 0), (0, width - c.shape[1])), mode="edge") for c in columns]
+        stacked[name] = np.concatenate(columns, axis=0)
+    return stacked
+
+
+def output_values(results: Dict[str, Any], name: str) -> np.ndarray:
+    """One headline output (a key of OUTPUT_PATHS) from evaluate() results."""
+    value = results
+    for key in OUTPUT_PATHS[name]:
+        value = value[key]
+    return value
+
+
+def calculate_compute_and_licensing(p: Dict[str, np.ndarray]) -> Dict[str, np.ndarray]:
+    current_state_cost = (p["totalHosts"] * p["avgCostPerHost"]) * (1 + p["supportPercentage"] / 100)
+    vcf_hosts = np.ceil(p["totalVMs"] / p["consolidationRatio"])
+    vcf_hardware_cost = vcf_hosts * p["avgCostPerHost"]
+    vcf_subscription_cost = vcf_hardware_cost * VCF_SUBSCRIPTION_RATE
+    vcf_future_state_cost = vcf_hardware_cost + vcf_subscription_cost
+
+    totals = ramp.parallel_run_totals(p, current_state_cost / MONTHS_PER_YEAR,
+                                      vcf_future_state_cost / MONTHS_PER_YEAR)
+
+    return {
+        "currentStateAnnual": current_state_cost,
+        "vcfFutureStateAnnual": vcf_future_state_cost,
+        "currentStateTotal": totals["currentStateTotal"],
+        "vcfTotal": totals["vcfTotal"],
+        "vcfHosts": vcf_hosts,
+    }
+
+
+def calculate_storage(p: Dict[str, np.ndarray]) -> Dict[str, np.ndarray]:
+    storage_cost = p["totalStorageGB"] * p["currentStorageCostPerGB"]
+    current_storage_cost = storage_cost + (p["totalStorageGB"] * p["currentStorageCostPerGB"]
+                                           * STORAGE_MAINTENANCE_RATE)
+    vcf_storage_support = storage_cost * VSAN_SUPPORT_RATE
+    return {
+        "currentStateAnnual": current_storage_cost,
+        "vcfFutureStateAnnual": vcf_storage_support,
+        "currentStateTotal": current_storage_cost * p["analysisTerm"],
+        "vcfTotal": vcf_storage_support * p["analysisTerm"],
+    }
+
+
+def calculate_network(p: Dict[str, np.ndarray]) -> Dict[str, np.ndarray]:
+    network_hardware_cost = (p["physicalFirewallCount"] + p["loadBalancerCount"]) * NETWORK_HARDWARE_COST_PER_UNIT
+    current_network_cost = network_hardware_cost * (1 + p["supportPercentage"] / 100)
+    vcf_network_cost = np.zeros_like(current_network_cost)
+    return {
+        "currentStateAnnual": current_network_cost,
+        "vcfFutureStateAnnual": vcf_network_cost,
+        "currentStateTotal": current_network_cost * p["analysisTerm"],
+        "vcfTotal": vcf_network_cost * p["analysisTerm"],
+    }
+
+
+def calculate_migration_costs(p: Dict[str, np.ndarray]) -> Dict[str, np.ndarray]:
+    migration_cost = p["totalVMs"] * p["migrationCostPerVM"]
+    training_cost = p["ftes"] * p["trainingCostPerFTE"]
+    one_time_cost = migration_cost + training_cost
+    return {
+        "migrationCost": migration_cost,
+        "trainingCost": training_cost,
+        "totalOneTimeCost": one_time_cost,
+        "annualCost": np.zeros_like(one_time_cost),
+        "totalCost": one_time_cost,
+    }
+
+
+def calculate_facilities(p: Dict[str, np.ndarray]) -> Dict[str, np.ndarray]:
+    vcf_hosts = np.ceil(p["totalVMs"] / p["consolidationRatio"])
+    current_annual = p["totalHosts"] * p["costPerHostPerYear"]
+    vcf_annual = vcf_hosts * p["costPerHostPerYear"]
+    return {
+        "currentStateAnnual": current_annual,
+        "vcfFutureStateAnnual": vcf_annual,
+        "currentStateTotal": current_annual * p["analysisTerm"],
+        "vcfTotal": vcf_annual * p["analysisTerm"],
+    }
+
+
+def calculate_software_licensing(p: Dict[str, np.ndarray]) -> Dict[str, np.ndarray]:
+    current_annual = p["currentStateSoftwareCost"]
+    vcf_annual = np.zeros_like(current_annual)
+    return {
+        "currentStateAnnual": current_annual,
+        "vcfFutureStateAnnual": vcf_annual,
+        "currentStateTotal": current_annual * p["analysisTerm"],
+        "vcfTotal": vcf_annual * p["analysisTerm"],
+    }
+
+
+def calculate_esg(p: Dict[str, np.ndarray]) -> Dict[str, np.ndarray]:
+    vcf_hosts = np.ceil(p["totalVMs"] / p["consolidationRatio"])
+    current_kwh = (p["totalHosts"] * p["currentHostWatts"] * 24 * 365) / 1000 * p["pue"]
+    vcf_kwh = (vcf_hosts * p["vcfHostWatts"] * 24 * 365) / 1000 * p["pue"]
+    kwh_saved = current_kwh - vcf_kwh
+    carbon_avoided_per_year = kwh_saved * p["gridCarbonIntensity"] / 1000
+    total_co2e = carbon_avoided_per_year * p["analysisTerm"]
+    return {
+        "kwhSaved": kwh_saved * p["analysisTerm"],
+        "co2eReduced": total_co2e,
+        "treesEquivalent": total_co2e * 1000 * 0.06,
+    }
+
+
+def calculate_operational_efficiency(p: Dict[str, np.ndarray]) -> Dict[str, np.ndarray]:
+    total_labor_cost = p["ftes"] * p["burdenedCostPerFTE"]
+    server_admin = total_labor_cost * LABOR_SPLIT["serverAdmin"] * (p["productivityGainServerAdmin"] / 100)
+    network_admin = total_labor_cost * LABOR_SPLIT["networkAdmin"] * (p["productivityGainNetworkAdmin"] / 100)
+    db_admin = np.where(
+        p["productivityGainDBAdmin"] > 0,
+        total_labor_cost * LABOR_SPLIT["dbAdmin"] * (p["productivityGainDBAdmin"] / 100),
+        0.0,
+    )
+    annual = server_admin + network_admin + db_admin
+    return {
+        "annualSavings": annual,
+        "totalSavings": annual * p["analysisTerm"],
+        "breakdown": {
+            "serverAdmin": server_admin,
+            "networkAdmin": network_admin,
+            "dbAdmin": db_admin,
+        },
+    }
+
+
+def calculate_risk_mitigation(p: Dict[str, np.ndarray]) -> Dict[str, np.ndarray]:
+    downtime = p["annualRevenue"] * (p["marginPercentage"] / 100) * (DOWNTIME_REDUCTION / 100)
+    breach = np.full_like(downtime, BREACH_PROBABILITY / 100 * AVG_BREACH_COST * (RISK_REDUCTION / 100))
+    return {
+        "downtimeProtection": downtime,
+        "securityProtection": breach,
+        "totalRiskMitigation": (downtime + breach) * p["analysisTerm"],
+    }
+
+
+def evaluate(p: Dict[str, np.ndarray]) -> Dict[str, Any]:
+    """
+    Evaluate every scenario in `p` (see build_inputs).
+
+    Returns:
+        dict: Arrays laid out like generateValueReport(): financials,
+            tcoBreakdown, esgImpact, cashflow and detailedBreakdown
+    """
+    compute = calculate_compute_and_licensing(p)
+    storage = calculate_storage(p)
+    network = calculate_network(p)
+    facilities = calculate_facilities(p)
+    software = calculate_software_licensing(p)
+    migration = calculate_migration_costs(p)
+    esg = calculate_esg(p)
+    labor = calculate_operational_efficiency(p)
+    risk = calculate_risk_mitigation(p)
+    term = p["analysisTerm"]
+
+    vcf_tco = (compute["vcfTotal"] + storage["vcfTotal"] + network["vcfTotal"] + facilities["vcfTotal"]
+               + software["vcfTotal"] + migration["totalCost"] - labor["totalSavings"])
+    current_tco = (compute["currentStateTotal"] + storage["currentStateTotal"] + network["currentStateTotal"]
+                   + facilities["currentStateTotal"] + software["currentStateTotal"])
+
+    public_cloud_tco = p["totalVMs"] * p["avgPublicCloudCostPerMonth"] * (term * 12)
+    public_cloud = {
+        "publicCloudTCO": public_cloud_tco,
+        "vcfTCO": vcf_tco,
+        "cloudCostAvoidance": public_cloud_tco - vcf_tco,
+    }
+
+    # Financial metrics
+    total_savings = current_tco - vcf_tco + labor["totalSavings"] + risk["totalRiskMitigation"]
+    total_investment = vcf_tco
+    with np.errstate(divide="ignore", invalid="ignore"):
+        roi = np.where(total_investment > 0, (total_savings / total_investment) * 100, 0.0)
+
+    discount = p["discountRate"] / 100
+    vcf_hardware_cost = compute["vcfHosts"] * p["avgCostPerHost"]
+    year1_one_time = vcf_hardware_cost + migration["totalCost"]
+
+    vcf_annual_opex = (compute["vcfFutureStateAnnual"] + storage["vcfFutureStateAnnual"]
+                       + network["vcfFutureStateAnnual"] + facilities["vcfFutureStateAnnual"]
+                       + software["vcfFutureStateAnnual"])
+    current_annual_opex = (compute["currentStateAnnual"] + storage["currentStateAnnual"]
+                           + network["currentStateAnnual"] + facilities["currentStateTotal"] / term
+                           + software["currentStateTotal"] / term)
+
+    year1_parallel = np.minimum(p["parallelRunPeriod"], MONTHS_PER_YEAR)
+    year1_vcf_opex = (vcf_annual_opex / MONTHS_PER_YEAR) * year1_parallel
+    year1_current_opex = (current_annual_opex / MONTHS_PER_YEAR) * year1_parallel
+
+    # The UI's year-1 ramp indexes the curve from month 0 of the year rather than
+    # from the end of the parallel run; kept as-is so the NPV matches
+    year1_ramp_months = np.maximum(0, np.minimum(ramp.ramp_length(p), MONTHS_PER_YEAR - year1_parallel))
+    year1_ramp_current_opex = (current_annual_opex / MONTHS_PER_YEAR) * ramp.ramp_sum(
+        p, year1_parallel, np.ceil(year1_ramp_months)
+    )
+
+    year1_normal_months = MONTHS_PER_YEAR - year1_parallel - year1_ramp_months
+    year1_vcf_normal_opex = (vcf_annual_opex / MONTHS_PER_YEAR) * year1_normal_months
+    annual_benefits = labor["annualSavings"] + risk["downtimeProtection"] + risk["securityProtection"]
+    year1_benefits = annual_benefits * (year1_normal_months / MONTHS_PER_YEAR)
+
+    year1_cashflow = (-year1_one_time - year1_vcf_opex - year1_current_opex - year1_ramp_current_opex
+                      - year1_vcf_normal_opex + year1_benefits)
+    year2_cashflow = -vcf_annual_opex + annual_benefits
+    year3_cashflow = -vcf_annual_opex + annual_benefits
+
+    npv = (year1_cashflow / (1 + discount) + year2_cashflow / np.power(1 + discount, 2)
+           + year3_cashflow / np.power(1 + discount, 3))
+
+    average_annual_savings = ((current_tco / term - vcf_tco / term) + labor["annualSavings"]
+                              + risk["downtimeProtection"] + risk["securityProtection"])
+    monthly_savings = average_annual_savings / 12
+    initial_investment = vcf_hardware_cost + migration["totalCost"]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        payback = np.where(monthly_savings > 0, initial_investment / monthly_savings, 0.0)
+
+    return {
+        "financials": {
+            "npv3Year": npv,
+            "roi": roi,
+            "paybackPeriodMonths": payback,
+        },
+        "tcoBreakdown": {
+            "currentState": current_tco,
+            "futureState": vcf_tco,
+            "publicCloud": public_cloud_tco,
+        },
+        "esgImpact": esg,
+        "cashflow": {
+            "year1": year1_cashflow,
+            "year2": year2_cashflow,
+            "year3": year3_cashflow,
+        },
+        "detailedBreakdown": {
+            "compute": compute,
+            "storage": storage,
+            "network": network,
+            "facilities": facilities,
+            "software": software,
+            "migration": migration,
+            "operationalEfficiency": labor,
+            "riskMitigation": risk,
+            "publicCloud": public_cloud,
+        },
+        "totalSavings": total_savings,
+    }
+
+
+def _select(tree: Any, index: int) -> Any:
+    if isinstance(tree, dict):
+        return {key: _select(value, index) for key, value in tree.items()}
+    return float(tree[index])
+
+
+def to_reports(results: Dict[str, Any], include_breakdown: bool = True) -> List[Dict[str, Any]]:
+    """Split evaluate() arrays into one generateValueReport()-shaped dict per scenario."""
+    count = len(results["financials"]["npv3Year"])
+    reports = []
+    for index in range(count):
+        report = _select({key: value for key, value in results.items() if key != "totalSavings"}, index)
+        if not include_breakdown:
+            report.pop("detailedBreakdown")
+        reports.append(report)
+    return reports
+
+
+def evaluate_scenarios(scenarios: Iterable[Mapping[str, Any]],
+                       extracted_fields: Optional[Mapping[str, Any]] = None,
+                       include_breakdown: bool = True) -> List[Dict[str, Any]]:
+    """Build inputs, evaluate and return one value report per scenario."""
+    return to_reports(evaluate(build_inputs(scenarios, extracted_fields)), include_breakdown)
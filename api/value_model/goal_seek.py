@@ -0,0 +1,257 @@
+"""
+Goal Seek
+Find the value of one model input that makes an output hit a target.
+
+Every (customer, goal) pair is one root-finding problem on
+g(x) = output(x) - target. All problems advance together: each iteration
+evaluates one vectorized batch holding the current point of every unfinished
+problem, so a batch of customers with several goals costs one engine call per
+iteration rather than one per problem.
+
+Each problem is first bracketed (the search interval around the base value is
+widened geometrically until g changes sign) and then solved with the Illinois
+variant of regula falsi, which keeps the bracket and converges superlinearly.
+Steps fall back to bisection when an endpoint is not finite.
+"""
+
+from typing import Any, Dict, List, Mapping, Sequence
+
+import numpy as np
+
+from . import engine
+
+COMPARISONS = ("eq", "le", "ge")
+DEFAULT_MAX_ITERATIONS = 100
+DEFAULT_MAX_EXPANSIONS = 20  # widens the base interval by up to 4**20 each way
+DEFAULT_TOLERANCE = 1e-6
+
+
+def validate_goals(goals: Sequence[Mapping[str, Any]]) -> List[Dict[str, Any]]:
+    """Normalize goal specs; raise ValueError on unknown inputs/outputs or bad bounds."""
+    if not goals:
+        raise ValueError("At least one goal is required")
+    normalized = []
+    for index, goal in enumerate(goals):
+        name = goal.get("input")
+        output = goal.get("output", "npv3Year")
+        comparison = goal.get("comparison", "eq")
+        if name not in engine.INPUT_DEFAULTS:
+            raise ValueError(f"Goal {index}: unknown input '{name}'")
+        if output not in engine.OUTPUT_PATHS:
+            raise ValueError(f"Goal {index}: unknown output '{output}'. Expected one of {sorted(engine.OUTPUT_PATHS)}")
+        if comparison not in COMPARISONS:
+            raise ValueError(f"Goal {index}: comparison must be one of {COMPARISONS}")
+        try:
+            target = float(goal.get("target", 0))
+            lower = float(goal["lower"]) if goal.get("lower") is not None else None
+            upper = float(goal["upper"]) if goal.get("upper") is not None else None
+        except (TypeError, ValueError):
+            raise ValueError(f"Goal {index}: target and bounds must be numeric")
+        if lower is not None and lower < 0:
+            raise ValueError(f"Goal {index}: lower must not be negative")
+        if upper is not None and (lower or 0.0) >= upper:
+            raise ValueError(f"Goal {index}: upper must be above lower (default 0)")
+        normalized.append({"input": name, "output": output, "target": target,
+                           "comparison": comparison, "lower": lower, "upper": upper})
+    return normalized
+
+
+class _Problems:
+    """Batch of root-finding problems sharing one vectorized evaluation."""
+
+    def __init__(self, base: Dict[str, np.ndarray], goals: List[Dict[str, Any]], goal_index: np.ndarray):
+        self.base = base
+        self.goals = goals
+        self.goal_index = goal_index
+        self.targets = np.asarray([goals[g]["target"] for g in goal_index])
+        self.evaluations = 0
+
+    def residual(self, x: np.ndarray, rows: np.ndarray) -> Dict[str, np.ndarray]:
+        """Evaluate problems `rows` with their input set to `x`; returns output and g."""
+        p = {name: values[rows] for name, values in self.base.items()}
+        goal_index = self.goal_index[rows]
+        for g, goal in enumerate(self.goals):
+            mask = goal_index == g
+            if mask.any():
+                p[goal["input"]] = p[goal["input"]].copy()
+                p[goal["input"]][mask] = x[mask]
+        results = engine.evaluate(p)
+        self.evaluations += 1
+
+        output = np.empty(len(rows))
+        for g, goal in enumerate(self.goals):
+            mask = goal_index == g
+            if mask.any():
+                output[mask] = engine.output_values(results, goal["output"])[mask]
+        g_value = output - self.targets[rows]
+        # The model reports a payback of 0 when the project never pays back;
+        # for solving, that is infinitely far above any target
+        never = np.isin(goal_index, [i for i, goal in enumerate(self.goals)
+                                     if goal["output"] == "paybackPeriodMonths"]) & (output == 0)
+        g_value = np.where(never, np.inf, g_value)
+        return {"output": output, "g": g_value}
+
+
+def solve_goals(customers: Sequence[Mapping[str, Any]],
+                goals: Sequence[Mapping[str, Any]],
+                max_iterations: int = DEFAULT_MAX_ITERATIONS,
+                tolerance: float = DEFAULT_TOLERANCE,
+                include_trace: bool = True) -> Dict[str, Any]:
+    """
+    Solve every goal for every customer.
+
+    A goal is {"input", "output", "target", "comparison", "lower", "upper"}:
+    find the input value where output == target. With comparison "le" or "ge"
+    the result also says on which side of that value output <= / >= target
+    holds (e.g. payback <= 24 months, savings >= $1M).
+
+    Args:
+        customers: Mappings with optional "name", "extracted_fields" and "base_scenario"
+        goals: Goal specs (see validate_goals)
+        max_iterations: Iteration limit for the solve phase
+        tolerance: Converged when |output - target| <= tolerance * max(1, |target|)
+        include_trace: Include every iterate in the result
+
+    Returns:
+        dict: One result per (customer, goal) with status, solution, base value
+            and, when requested, the convergence trace
+
+    Raises:
+        ValueError: On invalid goals or scenario inputs
+    """
+    goals = validate_goals(goals)
+    customers = list(customers) or [{}]
+    bases = [engine.build_inputs([dict(c.get("base_scenario") or {})], c.get("extracted_fields"))
+             for c in customers]
+
+    # Problem k solves goal k % len(goals) for customer k // len(goals)
+    count = len(customers) * len(goals)
+    customer_index = np.repeat(np.arange(len(customers)), len(goals))
+    goal_index = np.tile(np.arange(len(goals)), len(customers))
+    base = engine.stack_inputs([bases[c] for c in customer_index])
+    problems = _Problems(base, goals, goal_index)
+    rows = np.arange(count)
+
+    x0 = np.asarray([base[goals[g]["input"]][k] for k, g in enumerate(goal_index)])
+    start = problems.residual(x0, rows)
+    floor = np.asarray([goals[g]["lower"] if goals[g]["lower"] is not None else 0.0 for g in goal_index])
+    ceiling = np.asarray([np.inf if goals[g]["upper"] is None else goals[g]["upper"] for g in goal_index])
+    fixed_lower = np.asarray([goals[g]["lower"] is not None for g in goal_index])
+    fixed_upper = np.asarray([goals[g]["upper"] is not None for g in goal_index])
+    tol = tolerance * np.maximum(1.0, np.abs(problems.targets))
+
+    traces: List[List[Dict[str, Any]]] = [[] for _ in range(count)]
+
+    def record(indices, phase, iteration, x, output, lo, hi):
+        if include_trace:
+            for i, k in enumerate(indices):
+                traces[k].append({"phase": phase, "iteration": iteration, "x": float(x[i]),
+                                  "output": float(output[i]), "lower": float(lo[i]), "upper": float(hi[i])})
+
+    # Bracket: start from the bounds given, else half and double the base value
+    lo = np.where(fixed_lower, floor, np.maximum(np.where(x0 > 0, x0 / 2, 0.0), floor))
+    hi = np.where(fixed_upper, ceiling, np.minimum(np.where(x0 > 0, x0 * 2, 1.0), ceiling))
+    lo_eval, hi_eval = problems.residual(lo, rows), problems.residual(hi, rows)
+    g_lo, g_hi = lo_eval["g"], hi_eval["g"]
+    out_lo, out_hi = lo_eval["output"], hi_eval["output"]
+    record(rows, "bracket", 0, lo, out_lo, lo, hi)
+    record(rows, "bracket", 0, hi, out_hi, lo, hi)
+
+    for expansion in range(1, DEFAULT_MAX_EXPANSIONS + 1):
+        open_rows = np.flatnonzero((np.sign(g_lo) == np.sign(g_hi)) & (g_lo != 0) & (g_hi != 0)
+                                   & ((lo > floor) | (hi < ceiling)))
+        if open_rows.size == 0:
+            break
+        lo[open_rows] = np.maximum(lo[open_rows] / 4, floor[open_rows])
+        hi[open_rows] = np.minimum(hi[open_rows] * 4, ceiling[open_rows])
+        lo_eval, hi_eval = problems.residual(lo[open_rows], open_rows), problems.residual(hi[open_rows], open_rows)
+        g_lo[open_rows], out_lo[open_rows] = lo_eval["g"], lo_eval["output"]
+        g_hi[open_rows], out_hi[open_rows] = hi_eval["g"], hi_eval["output"]
+        record(open_rows, "bracket", expansion, lo[open_rows], out_lo[open_rows], lo[open_rows], hi[open_rows])
+        record(open_rows, "bracket", expansion, hi[open_rows], out_hi[open_rows], lo[open_rows], hi[open_rows])
+
+    bracketed = (((np.sign(g_lo) != np.sign(g_hi)) | (g_lo == 0) | (g_hi == 0))
+                 & ~np.isnan(g_lo) & ~np.isnan(g_hi))
+    x = np.where(np.abs(g_lo) <= np.abs(g_hi), lo, hi)
+    g_x = np.where(np.abs(g_lo) <= np.abs(g_hi), g_lo, g_hi)
+    out_x = np.where(np.abs(g_lo) <= np.abs(g_hi), out_lo, out_hi)
+    iterations = np.zeros(count, dtype=np.int64)
+    # Which endpoint the last step replaced (-1 lower, +1 upper); drives the Illinois halving
+    last_side = np.zeros(count, dtype=np.int8)
+    g_lo_scaled, g_hi_scaled = g_lo.copy(), g_hi.copy()
+
+    for iteration in range(1, max_iterations + 1):
+        active = np.flatnonzero(bracketed & (np.abs(g_x) > tol)
+                                & (hi - lo > 1e-12 * np.maximum(1.0, np.abs(x))))
+        if active.size == 0:
+            break
+        a, b = lo[active], hi[active]
+        ga, gb = g_lo_scaled[active], g_hi_scaled[active]
+        with np.errstate(divide="ignore", invalid="ignore"):
+            secant = (a * gb - b * ga) / (gb - ga)
+        usable = np.isfinite(secant) & (secant > a) & (secant < b)
+        step = np.where(usable, secant, (a + b) / 2)
+        evaluated = problems.residual(step, active)
+        g_step, out_step = evaluated["g"], evaluated["output"]
+
+        x[active], g_x[active], out_x[active] = step, g_step, out_step
+        iterations[active] = iteration
+        replace_lower = np.sign(g_step) == np.sign(g_lo[active])
+        for side, mask in ((-1, replace_lower), (1, ~replace_lower)):
+            k = active[mask]
+            if side < 0:
+                lo[k], g_lo[k], g_lo_scaled[k] = step[mask], g_step[mask], g_step[mask]
+                # Same endpoint replaced twice: halve the other one's weight (Illinois)
+                repeat = k[last_side[k] == -1]
+                g_hi_scaled[repeat] = g_hi_scaled[repeat] / 2
+            else:
+                hi[k], g_hi[k], g_hi_scaled[k] = step[mask], g_step[mask], g_step[mask]
+                repeat = k[last_side[k] == 1]
+                g_lo_scaled[repeat] = g_lo_scaled[repeat] / 2
+            last_side[k] = side
+        record(active, "solve", iteration, step, out_step, lo[active], hi[active])
+
+    results = []
+    for k in range(count):
+        goal = goals[goal_index[k]]
+        customer = customers[customer_index[k]]
+        if not bracketed[k]:
+            status = "no_bracket"
+        elif abs(g_x[k]) <= tol[k]:
+            status = "converged"
+        elif hi[k] - lo[k] <= 1e-12 * max(1.0, abs(x[k])):
+            status = "discontinuity"  # the output jumps across the target here
+        else:
+            status = "max_iterations"
+        entry = {
+            "customer": customer.get("name", int(customer_index[k])),
+            "goal": goal,
+            "status": status,
+            "solution": float(x[k]) if bracketed[k] else None,
+            "output": float(out_x[k]) if bracketed[k] else None,
+            "base_value": float(x0[k]),
+            "base_output": float(start["output"][k]),
+            "iterations": int(iterations[k]),
+        }
+        if goal["comparison"] != "eq":
+            entry.update(_satisfied_region(goal["comparison"], bracketed[k], start["g"][k],
+                                           g_lo[k], g_hi[k], float(lo[k]), float(hi[k])))
+        if include_trace:
+            entry["trace"] = traces[k]
+        results.append(entry)
+
+    return {
+        "problems": count,
+        "evaluations": problems.evaluations,
+        "results": results,
+    }
+
+
+def _satisfied_region(comparison: str, bracketed: bool, g_base: float,
+                      g_lo: float, g_hi: float, lo: float, hi: float) -> Dict[str, Any]:
+    """Where output <= / >= target holds relative to the solution."""
+    holds = (lambda g: g <= 0) if comparison == "le" else (lambda g: g >= 0)
+    region = {"base_satisfies": bool(holds(g_base))}
+    if bracketed:
+        region["satisfied_when"] = "input <= solution" if holds(g_lo) else "input >= solution"
+    return region
@@ -0,0 +1,298 @@
+"""
+Monte Carlo Analysis
+Uncertainty in NPV, ROI and payback from assumption distributions.
+
+Trials are drawn and evaluated in chunks of whole arrays. Each chunk has its
+own random stream spawned from one SeedSequence, so a given seed produces
+the same trials whether chunks run in this process or across a process pool.
+
+Supported distributions (all accept optional "min"/"max" clipping):
+    normal      mean, sd
+    lognormal   median, sigma (of the underlying normal)
+    uniform     low, high
+    triangular  low, mode, high
+    pert        low, mode, high (beta-PERT, lambda = 4)
+    discrete    values, optional weights
+"""
+
+import math
+import multiprocessing
+import os
+import secrets
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Any, Callable, Dict, Iterator, List, Mapping, Optional
+
+import numpy as np
+
+from . import engine
+
+OUTPUT_METRICS = ("npv3Year", "roi", "paybackPeriodMonths")
+DEFAULT_PERCENTILES = (5, 10, 25, 50, 75, 90, 95)
+DEFAULT_CHUNK_SIZE = 50000
+PARALLEL_MIN_TRIALS = 1000000
+
+_REQUIRED_PARAMS = {
+    "normal": ("mean", "sd"),
+    "lognormal": ("median", "sigma"),
+    "uniform": ("low", "high"),
+    "triangular": ("low", "mode", "high"),
+    "pert": ("low", "mode", "high"),
+    "discrete": ("values",),
+}
+
+
+def validate_distributions(distributions: Mapping[str, Mapping[str, Any]]) -> None:
+    """Raise ValueError for unknown inputs, distributions or invalid parameters."""
+    if not distributions:
+        raise ValueError("At least one input distribution is required")
+    for name, spec in distributions.items():
+        try:
+            _validate_distribution(name, spec)
+        except TypeError:
+            raise ValueError(f"{name}: distribution parameters must be numeric")
+
+
+def _validate_distribution(name: str, spec: Mapping[str, Any]) -> None:
+    if name not in engine.INPUT_DEFAULTS:
+        raise ValueError(f"Unknown model input '{name}'")
+    dist = spec.get("dist")
+    if dist not in _REQUIRED_PARAMS:
+        raise ValueError(f"{name}: unknown distribution '{dist}'. Expected one of {sorted(_REQUIRED_PARAMS)}")
+    missing = [param for param in _REQUIRED_PARAMS[dist] if spec.get(param) is None]
+    if missing:
+        raise ValueError(f"{name}: {dist} distribution requires {', '.join(missing)}")
+    # Check types up front: strings compare without error here and only fail inside draw()
+    for param in ("mean", "sd", "median", "sigma", "low", "mode", "high", "min", "max"):
+        if spec.get(param) is not None and not _is_real(spec[param]):
+            raise ValueError(f"{name}: '{param}' must be a finite number, got {spec[param]!r}")
+    for param in ("values", "weights"):
+        if spec.get(param) is not None and (isinstance(spec[param], (str, bytes, Mapping))
+                                            or not all(_is_real(v) for v in spec[param])):
+            raise ValueError(f"{name}: '{param}' must be a list of finite numbers")
+    if spec.get("min") is not None and spec.get("max") is not None and spec["min"] > spec["max"]:
+        raise ValueError(f"{name}: min must not exceed max")
+    if dist in ("uniform", "triangular", "pert") and not spec["low"] <= spec.get("mode", spec["low"]) <= spec["high"]:
+        raise ValueError(f"{name}: expected low <= mode <= high")
+    if dist in ("uniform", "triangular", "pert") and spec["low"] == spec["high"]:
+        raise ValueError(f"{name}: low and high must differ")
+    if (dist == "normal" and spec["sd"] < 0) or (dist == "lognormal" and spec["sigma"] < 0):
+        raise ValueError(f"{name}: spread must not be negative")
+    if dist == "lognormal" and spec["median"] <= 0:
+        raise ValueError(f"{name}: lognormal median must be positive")
+    if dist == "discrete":
+        weights = spec.get("weights")
+        if not spec["values"] or (weights is not None and len(weights) != len(spec["values"])):
+            raise ValueError(f"{name}: discrete values and weights must be non-empty and the same length")
+        if weights is not None and (any(w < 0 for w in weights) or not sum(weights) > 0):
+            raise ValueError(f"{name}: discrete weights must not be negative and must have a positive sum")
+    if name in engine.POSITIVE_INPUTS and not _lowest_draw(dist, spec) > 0:
+        raise ValueError(f"{name}: every draw must be positive; raise the distribution's low end or set min above 0")
+
+
+def _is_real(value: Any) -> bool:
+    """A finite int or float (JSON numbers; booleans and numeric strings excluded)."""
+    return isinstance(value, (int, float)) and not isinstance(value, bool) and math.isfinite(value)
+
+
+def _lowest_draw(dist: str, spec: Mapping[str, Any]) -> float:
+    """Smallest value a spec can draw, after min/max clipping (lognormal draws are always positive)."""
+    lowest = {"normal": -math.inf, "lognormal": math.ulp(0.0)}.get(dist)
+    if lowest is None:
+        lowest = min(spec["values"]) if dist == "discrete" else spec["low"]
+    if spec.get("min") is not None:
+        lowest = max(lowest, spec["min"])
+    if spec.get("max") is not None:
+        lowest = min(lowest, spec["max"])
+    return lowest
+
+
+def draw(spec: Mapping[str, Any], rng: np.random.Generator, size: int) -> np.ndarray:
+    """Draw `size` samples from one distribution spec."""
+    dist = spec["dist"]
+    if dist == "normal":
+        values = rng.normal(spec["mean"], spec["sd"], size)
+    elif dist == "lognormal":
+        values = rng.lognormal(math.log(spec["median"]), spec["sigma"], size)
+    elif dist == "uniform":
+        values = rng.uniform(spec["low"], spec["high"], size)
+    elif dist == "triangular":
+        values = rng.triangular(spec["low"], spec["mode"], spec["high"], size)
+    elif dist == "pert":
+        low, mode, high = spec["low"], spec["mode"], spec["high"]
+        alpha = 1 + 4 * (mode - low) / (high - low)
+        beta = 1 + 4 * (high - mode) / (high - low)
+        values = low + rng.beta(alpha, beta, size) * (high - low)
+    else:  # discrete
+        weights = spec.get("weights")
+        if weights is not None:
+            weights = np.asarray(weights, dtype=np.float64)
+            weights = weights / weights.sum()
+        values = rng.choice(np.asarray(spec["values"], dtype=np.float64), size=size, p=weights)
+
+    if spec.get("min") is not None or spec.get("max") is not None:
+        values = np.clip(values, spec.get("min"), spec.get("max"))
+    return values
+
+
+def run_chunk(base: Dict[str, np.ndarray], distributions: Mapping[str, Mapping[str, Any]],
+              seed_sequence: np.random.SeedSequence, size: int) -> Dict[str, np.ndarray]:
+    """Draw and evaluate one chunk of trials; returns output and sampled input arrays."""
+    rng = np.random.default_rng(seed_sequence)
+    p = engine.broadcast_inputs(base, size)
+    samples = {}
+    for name in sorted(distributions):  # fixed order keeps streams reproducible
+        samples[name] = draw(distributions[name], rng, size)
+        p[name] = engine.apply_input_default(name, samples[name])   # as build_inputs treats a 0
+    financials = engine.evaluate(p)["financials"]
+    return {"outputs": {metric: financials[metric] for metric in OUTPUT_METRICS}, "inputs": samples}
+
+
+def _start_method(requested: Optional[str] = None) -> str:
+    """
+    Start method for the chunk pool: `requested` if given, else fork from a
+    single-threaded process. Forking a threaded one (the API server) can
+    deadlock the child on a lock another thread held, so there workers come
+    from a forkserver, or spawn where that is missing.
+    """
+    available = multiprocessing.get_all_start_methods()
+    if requested:
+        if requested not in available:
+            raise ValueError(f"Start method '{requested}' is not available here; expected one of {available}")
+        return requested
+    if "fork" in available and threading.active_count() == 1:
+        return "fork"
+    return "forkserver" if "forkserver" in available else "spawn"
+
+
+def _chunk_sizes(trials: int, chunk_size: int) -> List[int]:
+    full, rest = divmod(trials, chunk_size)
+    return [chunk_size] * full + ([rest] if rest else [])
+
+
+def _summarize(values: np.ndarray, percentiles, bins: int) -> Dict[str, Any]:
+    finite = values[np.isfinite(values)]
+    if finite.size == 0:
+        return {"count": 0}
+    counts, edges = np.histogram(finite, bins=bins)
+    return {
+        "count": int(finite.size),
+        "mean": float(finite.mean()),
+        "std": float(finite.std()),
+        "min": float(finite.min()),
+        "max": float(finite.max()),
+        "percentiles": {f"p{q:g}": float(v) for q, v in zip(percentiles, np.percentile(finite, percentiles))},
+        "histogram": {"bin_edges": edges.tolist(), "counts": counts.tolist()},
+    }
+
+
+def iter_monte_carlo(base_scenario: Optional[Mapping[str, Any]],
+                     distributions: Mapping[str, Mapping[str, Any]],
+                     trials: int = 100000,
+                     seed: Optional[int] = None,
+                     extracted_fields: Optional[Mapping[str, Any]] = None,
+                     percentiles=DEFAULT_PERCENTILES,
+                     bins: int = 50,
+                     chunk_size: int = DEFAULT_CHUNK_SIZE,
+                     workers: Optional[int] = None,
+                     start_method: Optional[str] = None) -> Iterator[Dict[str, Any]]:
+    """
+    Run a Monte Carlo analysis, yielding progress events and then the result.
+
+    Yields {"event": "progress", "completed": n, "total": trials} after each
+    chunk and finally {"event": "result", "result": {...}}.
+
+    Args:
+        base_scenario: Point-estimate inputs (as for build_inputs)
+        distributions: Input name -> distribution spec
+        trials: Number of trials
+        seed: Seed for reproducible draws (random, and reported, if None). The
+            same seed and chunk_size reproduce the same trials for any worker count
+        extracted_fields: RVTools extracted fields for the base scenario
+        percentiles: Percentiles to report for each output
+        bins: Histogram bins per output
+        chunk_size: Trials evaluated per array batch
+        workers: Processes for runs of PARALLEL_MIN_TRIALS or more (default: CPU count)
+        start_method: How those processes start ("fork", "forkserver" or
+            "spawn"; default: fork unless this process runs other threads)
+
+    Raises:
+        ValueError: On invalid distributions, trial counts or start method
+    """
+    if trials < 1:
+        raise ValueError("trials must be at least 1")
+    validate_distributions(distributions)
+    if seed is None:
+        seed = secrets.randbits(53)  # reported back; stays exact as a JSON number in the browser
+    base = engine.build_inputs([dict(base_scenario or {})], extracted_fields)
+    method = _start_method(start_method)
+    # Validation above runs eagerly so callers see errors before any streaming starts
+    return _iterate(base, distributions, trials, seed, tuple(percentiles), bins, max(1, chunk_size), workers,
+                    method)
+
+
+def _iterate(base: Dict[str, np.ndarray], distributions: Mapping[str, Mapping[str, Any]], trials: int,
+             seed: int, percentiles, bins: int, chunk_size: int,
+             workers: Optional[int], method: str) -> Iterator[Dict[str, Any]]:
+    start = time.perf_counter()
+    seed_sequence = np.random.SeedSequence(seed)
+    sizes = _chunk_sizes(trials, chunk_size)
+    children = seed_sequence.spawn(len(sizes))
+    workers = max(1, min(workers or os.cpu_count() or 1, len(sizes)))
+    parallel = workers > 1 and trials >= PARALLEL_MIN_TRIALS
+
+    chunks: List[Optional[Dict[str, Any]]] = [None] * len(sizes)
+    completed = 0
+    if parallel:
+        context = multiprocessing.get_context(method)
+        if method == "forkserver":
+            context.set_forkserver_preload([__name__])     # workers fork with numpy and the engine imported
+        with ProcessPoolExecutor(max_workers=workers, mp_context=context) as executor:
+            futures = {
+                executor.submit(run_chunk, base, dict(distributions), child, size): index
+                for index, (child, size) in enumerate(zip(children, sizes))
+            }
+            for future in as_completed(futures):
+                index = futures[future]
+                chunks[index] = future.result()
+                completed += sizes[index]
+                yield {"event": "progress", "completed": completed, "total": trials}
+    else:
+        for index, (child, size) in enumerate(zip(children, sizes)):
+            chunks[index] = run_chunk(base, distributions, child, size)
+            completed += size
+            yield {"event": "progress", "completed": completed, "total": trials}
+
+    outputs = {metric: np.concatenate([c["outputs"][metric] for c in chunks]) for metric in OUTPUT_METRICS}
+    inputs = {name: np.concatenate([c["inputs"][name] for c in chunks]) for name in distributions}
+    result = {
+        "trials": trials,
+        "seed": seed,
+        "chunks": len(sizes),
+        "workers": workers if parallel else 1,
+        "elapsed_seconds": round(time.perf_counter() - start, 4),
+        "probability_npv_positive": float(np.mean(outputs["npv3Year"] > 0)),
+        "metrics": {metric: _summarize(values, percentiles, bins) for metric, values in outputs.items()},
+        "inputs": {
+            name: {
+                "mean": float(values.mean()),
+                "percentiles": {f"p{q:g}": float(v) for q, v in zip(percentiles, np.percentile(values, percentiles))},
+            }
+            for name, values in inputs.items()
+        },
+    }
+    yield {"event": "result", "result": result}
+
+
+def run_monte_carlo(base_scenario: Optional[Mapping[str, Any]],
+                    distributions: Mapping[str, Mapping[str, Any]],
+                    progress_callback: Optional[Callable[[int, int], None]] = None,
+                    **kwargs) -> Dict[str, Any]:
+    """Run iter_monte_carlo to completion and return its result."""
+    for event in iter_monte_carlo(base_scenario, distributions, **kwargs):
+        if event["event"] == "progress":
+            if progress_callback:
+                progress_callback(event["completed"], event["total"])
+        else:
+            return event["result"]
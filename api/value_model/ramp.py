@@ -0,0 +1,193 @@
+"""
+Ramp-Down Curves
+Closed-form parallel-run ("double bubble") costs for the value model.
+
+After the parallel run the current state is decommissioned along a ramp
+curve f(k), where k is the number of months since the parallel run ended:
+
+    linear  f(k) = max(0, 1 - k / R)                (the ValueModel.jsx ramp, R = 6)
+    step    f(k) = 1 while k <= R, then 0           (hard cutover R months after the parallel run)
+    custom  f(k) = curve[ceil(k) - 1] for 1 <= ceil(k) <= len(curve), else 0
+
+Sums of f over a run of consecutive months are evaluated analytically
+(arithmetic series for linear, counting for step, prefix sums for custom
+curves), so cumulative costs take O(1) work per scenario regardless of the
+analysis term. monthly_schedule() keeps the month-by-month form for charts
+and cross-checks.
+"""
+
+from typing import Any, Dict, List, Optional, Sequence
+
+import numpy as np
+
+RAMP_SHAPES = ("linear", "step", "custom")
+LINEAR, STEP, CUSTOM = range(len(RAMP_SHAPES))
+DEFAULT_RAMP_MONTHS = 6
+MONTHS_PER_YEAR = 12
+
+
+def shape_codes(shapes: Sequence[Optional[str]]) -> np.ndarray:
+    """Map shape names to integer codes; None selects linear."""
+    codes = []
+    for index, shape in enumerate(shapes):
+        name = (shape or "linear").lower()
+        if name not in RAMP_SHAPES:
+            raise ValueError(f"Scenario {index}: unknown rampShape '{shape}'. Expected one of {RAMP_SHAPES}")
+        codes.append(RAMP_SHAPES.index(name))
+    return np.asarray(codes, dtype=np.int8)
+
+
+def curve_prefix_sums(curves: Sequence[Optional[Sequence[float]]]) -> np.ndarray:
+    """
+    Prefix sums of custom ramp curves, padded to a rectangle.
+
+    Row i holds [0, c0, c0+c1, ...]; shorter curves repeat their total so any
+    index past the end of a curve reads the full sum.
+    """
+    lengths = [len(curve) if curve else 0 for curve in curves]
+    width = max(lengths, default=0) + 1
+    prefix = np.zeros((len(curves), width))
+    for row, curve in enumerate(curves):
+        if curve:
+            values = np.asarray(curve, dtype=np.float64)
+            if values.ndim != 1 or not np.all(np.isfinite(values)):
+                raise ValueError(f"Scenario {row}: rampCurve must be a list of numbers")
+            sums = np.cumsum(values)
+            prefix[row, 1:len(sums) + 1] = sums
+            prefix[row, len(sums) + 1:] = sums[-1]
+    return prefix
+
+
+def ramp_length(p: Dict[str, np.ndarray]) -> np.ndarray:
+    """Months over which the current state is ramped down, per scenario."""
+    curve_lengths = np.asarray(p["rampCurveLength"], dtype=np.float64)
+    return np.where(p["rampShape"] == CUSTOM, curve_lengths, p["rampDownMonths"])
+
+
+def ramp_sum(p: Dict[str, np.ndarray], first_offset: np.ndarray, count: np.ndarray) -> np.ndarray:
+    """
+    Sum of f(first_offset + i) for i in [0, count), per scenario.
+
+    Args:
+        p: Scenario inputs with rampShape, rampDownMonths and rampCurvePrefix
+        first_offset: Months-since-parallel-run of the first term
+        count: Number of whole months in the run (non-negative integers)
+    """
+    months = p["rampDownMonths"]
+    k0 = np.asarray(first_offset, dtype=np.float64)
+    count = np.maximum(np.asarray(count, dtype=np.float64), 0)
+
+    # Linear: terms are positive while k < R; an arithmetic series over those
+    with np.errstate(divide="ignore", invalid="ignore"):
+        n_linear = np.clip(np.ceil(months - k0), 0, count)
+        linear = np.where(
+            months > 0,
+            n_linear - (n_linear * k0 + n_linear * (n_linear - 1) / 2) / months,
+            0.0,
+        )
+
+    # Step: full cost while k <= R
+    step = np.clip(np.floor(months - k0) + 1, 0, count)
+
+    # Custom: term i reads curve index ceil(k0) + i; indices <= 0 are still
+    # inside the parallel run (full cost), indices past the curve read 0
+    # because the padded prefix sums stop growing there
+    prefix = p["rampCurvePrefix"]
+    width = prefix.shape[1] - 1
+    first_index = np.ceil(k0)
+    last_index = first_index + count - 1
+    before_curve = np.clip(1 - first_index, 0, count)
+    rows = np.arange(prefix.shape[0])
+    upper = np.clip(last_index, 0, width).astype(np.int64)
+    lower = np.clip(first_index - 1, 0, width).astype(np.int64)
+    custom = np.where(count > 0, before_curve + prefix[rows, upper] - prefix[rows, lower], 0.0)
+
+    shape = p["rampShape"]
+    return np.where(shape == LINEAR, linear, np.where(shape == STEP, step, custom))
+
+
+def ramp_fraction(p: Dict[str, np.ndarray], offset: np.ndarray) -> np.ndarray:
+    """f(k) evaluated elementwise; `offset` broadcasts against (scenarios, ...)."""
+    shape = p["rampShape"].reshape((-1,) + (1,) * (np.ndim(offset) - 1))
+    months = p["rampDownMonths"].reshape(shape.shape)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        linear = np.where(months > 0, np.maximum(0, 1 - (offset / months)), 0.0)
+    step = np.where(offset <= months, 1.0, 0.0)
+
+    prefix = p["rampCurvePrefix"]
+    curve = np.diff(prefix, axis=1)
+    index = np.ceil(offset).astype(np.int64)
+    valid = (index >= 1) & (index <= curve.shape[1])
+    rows = np.arange(curve.shape[0]).reshape(shape.shape)
+    picked = curve[rows, np.clip(index - 1, 0, max(curve.shape[1] - 1, 0))] if curve.shape[1] else 0.0
+    custom = np.where(index <= 0, 1.0, np.where(valid, picked, 0.0))
+    return np.where(shape == LINEAR, linear, np.where(shape == STEP, step, custom))
+
+
+def parallel_run_totals(p: Dict[str, np.ndarray], monthly_current: np.ndarray,
+                        monthly_vcf: np.ndarray) -> Dict[str, np.ndarray]:
+    """
+    Cumulative current-state and VCF cost over the analysis term.
+
+    Equivalent to walking months 1..analysisTerm*12 and charging the full
+    current-state cost during the parallel run and f(month - parallelRunPeriod)
+    of it afterwards, with VCF charged every month.
+    """
+    total_months = np.floor(p["analysisTerm"] * MONTHS_PER_YEAR)
+    parallel = p["parallelRunPeriod"]
+    parallel_months = np.clip(np.floor(parallel), 0, total_months)
+    first_ramp_month = np.maximum(np.floor(parallel) + 1, 1)
+    ramp_months = np.maximum(total_months - first_ramp_month + 1, 0)
+
+    fraction_months = parallel_months + ramp_sum(p, first_ramp_month - parallel, ramp_months)
+    return {
+        "currentStateTotal": monthly_current * fraction_months,
+        "vcfTotal": monthly_vcf * total_months,
+    }
+
+
+def monthly_schedule(p: Dict[str, np.ndarray], monthly_current: np.ndarray,
+                     monthly_vcf: np.ndarray) -> Dict[str, Any]:
+    """
+    Month-by-month current-state and VCF cost, shape (scenarios, months).
+
+    Months beyond a scenario's analysis term are zero.
+    """
+    total_months = (p["analysisTerm"] * MONTHS_PER_YEAR)[:, None]
+    max_months = int(np.floor(np.max(total_months))) if total_months.size else 0
+    month = np.arange(1, max_months + 1, dtype=np.float64)[None, :]
+    in_term = month <= total_months
+    parallel = p["parallelRunPeriod"][:, None]
+
+    fraction = np.where(month <= parallel, 1.0, ramp_fraction(p, month - parallel))
+    current = np.where(in_term, monthly_current[:, None] * fraction, 0.0)
+    vcf = np.where(in_term, np.broadcast_to(monthly_vcf[:, None], in_term.shape), 0.0)
+    return {"month": month[0], "currentState": current, "vcf": vcf}
+
+
+def build_ramp_inputs(scenarios: List[Dict[str, Any]], base: Optional[Dict[str, Any]] = None) -> Dict[str, np.ndarray]:
+    """Ramp arrays for build_inputs: rampShape, rampDownMonths, rampCurvePrefix, rampCurveLength."""
+    base = base or {}
+    shapes, months, curves = [], [], []
+    for index, scenario in enumerate(scenarios):
+        curve = scenario.get("rampCurve", base.get("rampCurve"))
+        shape = scenario.get("rampShape", base.get("rampShape") or ("custom" if curve else "linear"))
+        value = scenario.get("rampDownMonths", base.get("rampDownMonths", DEFAULT_RAMP_MONTHS))
+        try:
+            value = float(value)
+        except (TypeError, ValueError):
+            raise ValueError(f"Scenario {index}: 'rampDownMonths' must be numeric, got {value!r}")
+        if value < 0:
+            raise ValueError(f"Scenario {index}: 'rampDownMonths' must not be negative")
+        if (shape or "").lower() == "custom" and not curve:
+            raise ValueError(f"Scenario {index}: rampShape 'custom' requires a rampCurve")
+        shapes.append(shape)
+        months.append(value)
+        curves.append(list(curve) if curve else None)
+
+    return {
+        "rampShape": shape_codes(shapes),
+        "rampDownMonths": np.asarray(months, dtype=np.float64),
+        "rampCurvePrefix": curve_prefix_sums(curves),
+        "rampCurveLength": np.asarray([len(c) if c else 0 for c in curves], dtype=np.float64),
+    }
@@ -0,0 +1,166 @@
+"""
+Sensitivity Analysis
+One-at-a-time ±X% perturbation of value-model inputs for tornado charts.
+
+The base scenario and both perturbations of every input are stacked into a
+single batch of 2N+1 scenarios and evaluated in one engine call. Results can
+be cached by a hash of the fully resolved base scenario (the API passes its
+shared rvtools.cache.ResultCache), so repeated requests for the same customer
+and assumptions are served without recomputation.
+"""
+
+import hashlib
+import json
+from typing import Any, Dict, Iterable, List, Mapping, Optional, Set
+
+import numpy as np
+
+from . import engine
+
+# Dependency map from ValueModel.jsx: quantity -> quantities it is derived from
+DEPENDENCIES: Dict[str, List[str]] = {
+    "currentStateCost": ["avgCostPerHost", "supportPercentage", "totalHosts"],
+    "vcfHosts": ["totalVMs", "consolidationRatio"],
+    "vcfHardwareCost": ["vcfHosts", "avgCostPerHost"],
+    "vcfSubscriptionCost": ["vcfHardwareCost"],
+    "vcfFutureStateCost": ["vcfHardwareCost", "vcfSubscriptionCost"],
+    "currentStorageCost": ["totalStorageGB", "currentStorageCostPerGB"],
+    "totalLaborCost": ["ftes", "burdenedCostPerFTE"],
+    "operationalEfficiency": ["totalLaborCost", "productivityGainServerAdmin",
+                              "productivityGainNetworkAdmin", "productivityGainDBAdmin"],
+    "riskMitigation": ["annualRevenue", "marginPercentage"],
+    "npv": ["vcfTCO", "currentStateTCO", "operationalEfficiency", "riskMitigation"],
+    "roi": ["totalSavings", "totalInvestment"],
+    "paybackPeriod": ["vcfTCO", "monthlySavings"],
+}
+
+# Whole-year term drives month counts; perturbing it by a percentage is not meaningful
+EXCLUDED_BY_DEFAULT = {"analysisTerm"}
+
+
+def dependents(input_name: str) -> List[str]:
+    """Derived quantities in the dependency map that `input_name` flows into."""
+    reverse: Dict[str, Set[str]] = {}
+    for derived, sources in DEPENDENCIES.items():
+        for source in sources:
+            reverse.setdefault(source, set()).add(derived)
+    found: List[str] = []
+    stack = [input_name]
+    while stack:
+        for derived in sorted(reverse.get(stack.pop(), ())):
+            if derived not in found:
+                found.append(derived)
+                stack.append(derived)
+    return found
+
+
+def scenario_hash(base: Dict[str, np.ndarray], **params) -> str:
+    """sha256 of the resolved base inputs and analysis parameters."""
+    payload = {
+        "inputs": {name: np.asarray(values).tolist() for name, values in sorted(base.items())},
+        "params": params,
+    }
+    return hashlib.sha256(json.dumps(payload, sort_keys=True).encode()).hexdigest()
+
+
+def run_sensitivity(base_scenario: Optional[Mapping[str, Any]] = None,
+                    extracted_fields: Optional[Mapping[str, Any]] = None,
+                    delta_pct: float = 10.0,
+                    inputs: Optional[Iterable[str]] = None,
+                    rank_by: str = "npv3Year",
+                    cache: Optional[Any] = None) -> Dict[str, Any]:
+    """
+    Perturb each input by ±delta_pct and rank the drivers of the outputs.
+
+    A percentage of zero is zero, so inputs that are zero in the base case are
+    moved up by delta_pct of their default instead (low stays at zero, and
+    elasticity is undefined). Zero inputs whose default is zero too have no
+    scale to move by and are skipped.
+
+    Args:
+        base_scenario: Input overrides for the base case
+        extracted_fields: RVTools extracted fields for the base case
+        delta_pct: Perturbation in percent of each base value
+        inputs: Inputs to perturb (default: every input except analysisTerm)
+        rank_by: Output used to order the tornado
+        cache: Result cache with get(key) / put(key, result), such as
+            rvtools.cache.ResultCache (default None: no caching)
+
+    Returns:
+        dict: base outputs, drivers sorted by swing in `rank_by`, skipped
+            inputs, the scenario hash and whether it was served from cache
+
+    Raises:
+        ValueError: On unknown inputs/outputs or an out-of-range delta
+    """
+    if not 0 < delta_pct < 100:
+        raise ValueError("delta_pct must be between 0 and 100 (exclusive)")
+    if rank_by not in engine.OUTPUT_PATHS:
+        raise ValueError(f"Unknown rank_by '{rank_by}'. Expected one of {sorted(engine.OUTPUT_PATHS)}")
+    requested = list(inputs) if inputs is not None else None
+    unknown = sorted(set(requested or ()) - set(engine.INPUT_DEFAULTS))
+    if unknown:
+        raise ValueError(f"Unknown inputs {unknown}")
+
+    base = engine.build_inputs([dict(base_scenario or {})], extracted_fields)
+    key = scenario_hash(base, delta_pct=delta_pct, inputs=requested, rank_by=rank_by)
+    if cache is not None:
+        cached = cache.get(key)
+        if cached is not None:
+            return {**cached, "cache_hit": True}
+
+    candidates = requested if requested is not None else [
+        name for name in engine.INPUT_DEFAULTS if name not in EXCLUDED_BY_DEFAULT
+    ]
+    perturbed = [name for name in candidates if base[name][0] != 0 or engine.INPUT_DEFAULTS[name] != 0]
+    skipped = [name for name in candidates if name not in perturbed]
+
+    # Row 0 is the base case; rows 2i+1 / 2i+2 are input i at -delta / +delta
+    batch = engine.broadcast_inputs(base, 2 * len(perturbed) + 1)
+    factor = delta_pct / 100
+    for i, name in enumerate(perturbed):
+        value = base[name][0]
+        if value != 0:
+            batch[name][2 * i + 1] = value * (1 - factor)
+            batch[name][2 * i + 2] = value * (1 + factor)
+        else:
+            batch[name][2 * i + 2] = abs(engine.INPUT_DEFAULTS[name]) * factor
+    results = engine.evaluate(batch)
+    outputs = {name: engine.output_values(results, name) for name in engine.OUTPUT_PATHS}
+
+    drivers = []
+    for i, name in enumerate(perturbed):
+        low_row, high_row = 2 * i + 1, 2 * i + 2
+        effects = {}
+        for output, values in outputs.items():
+            low, high, base_value = float(values[low_row]), float(values[high_row]), float(values[0])
+            effects[output] = {
+                "low": low,
+                "high": high,
+                "swing": abs(high - low),
+                # % change in the output per % change in the input
+                "elasticity": (((high - low) / abs(base_value)) / (2 * delta_pct / 100)
+                               if base_value and base[name][0] else None),
+            }
+        drivers.append({
+            "input": name,
+            "base_value": float(base[name][0]),
+            "low_value": float(batch[name][low_row]),
+            "high_value": float(batch[name][high_row]),
+            "outputs": effects,
+            "affects": dependents(name),
+        })
+    drivers.sort(key=lambda d: d["outputs"][rank_by]["swing"], reverse=True)
+
+    result = {
+        "scenario_hash": key,
+        "delta_pct": delta_pct,
+        "rank_by": rank_by,
+        "scenarios_evaluated": 2 * len(perturbed) + 1,
+        "base": {output: float(values[0]) for output, values in outputs.items()},
+        "drivers": drivers,
+        "skipped": skipped,
+    }
+    if cache is not None:
+        cache.put(key, result)
+    return {**result, "cache_hit": False}
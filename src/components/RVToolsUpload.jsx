@@ -2,37 +2,61 @@ import { useState, useRef } from 'react'
 import { Upload, FileText, CheckCircle2, XCircle, Loader2, AlertCircle, Info } from 'lucide-react'
 import FieldExtractionDisplay from './FieldExtractionDisplay'
 
+const API_BASE = 'http://localhost:8001'
+
+// Follow a processing job's server-sent events until its result (or error)
+const followJob = (eventsUrl, onProgress) => new Promise((resolve, reject) => {
+  const source = new EventSource(`${API_BASE}${eventsUrl}`)
+  source.addEventListener('progress', event => onProgress(JSON.parse(event.data)))
+  source.addEventListener('result', event => {
+    source.close()
+    resolve(JSON.parse(event.data))
+  })
+  source.addEventListener('error', event => {
+    // Job errors carry data; connection errors don't (EventSource reconnects on its own)
+    if (event.data) {
+      source.close()
+      reject(new Error(JSON.parse(event.data).detail))
+    } else if (source.readyState === EventSource.CLOSED) {
+      reject(new Error('Lost connection to the processing job'))
+    }
+  })
+})
+
 const RVToolsUpload = ({ onExtractionComplete, extractedFields: externalExtractedFields, onFieldOverride }) => {
   const [isUploading, setIsUploading] = useState(false)
   const [uploadError, setUploadError] = useState(null)
   const [extractedFields, setExtractedFields] = useState(externalExtractedFields || {})
   const [extractionSummary, setExtractionSummary] = useState(null)
   const [showExtraction, setShowExtraction] = useState(false)
+  const [fileResults, setFileResults] = useState([])
+  const [progress, setProgress] = useState(null)
   const fileInputRef = useRef(null)
 
   const handleFileSelect = async (event) => {
-    const file = event.target.files?.[0]
-    if (!file) return
+    const files = Array.from(event.target.files || [])
+    if (files.length === 0) return
 
-    // Validate file type
-    const validExtensions = ['.xlsx', '.xls', '.xlsm']
-    const fileExt = '.' + file.name.split('.').pop().toLowerCase()
+    // Validate file types
+    const validExtensions = ['.xlsx', '.xls', '.xlsm', '.csv', '.zip']
+    const invalid = files.find(file => !validExtensions.includes('.' + file.name.split('.').pop().toLowerCase()))
     
-    if (!validExtensions.includes(fileExt)) {
-      setUploadError(`Invalid file type. Please upload an Excel file (.xlsx, .xls, or .xlsm)`)
+    if (invalid) {
+      setUploadError(`Invalid file type for ${invalid.name}. Please upload RVTools Excel files (.xlsx, .xls, .xlsm), CSV exports (.csv) or zip archives (.zip)`)
       return
     }
 
     setIsUploading(true)
     setUploadError(null)
     setShowExtraction(false)
+    setProgress(null)
 
     try {
+      // Start a background job (several files, e.g. one per vCenter, are consolidated into one estate)
       const formData = new FormData()
-      formData.append('file', file)
+      files.forEach(file => formData.append('files', file))
 
-      // Upload file directly (health check removed to simplify)
-      const response = await fetch('http://localhost:8001/api/rvtools/process', {
+      const response = await fetch(`${API_BASE}/api/rvtools/jobs`, {
         method: 'POST',
         mode: 'cors',
         body: formData,
@@ -47,7 +71,8 @@ const RVToolsUpload = ({ onExtractionComplete, extractedFields: externalExtracte
         throw new Error(errorData.detail || `Server error: ${response.status}`)
       }
 
-      const data = await response.json()
+      const job = await response.json()
+      const data = await followJob(job.events_url, setProgress)
 
       if (data.status === 'success') {
         // Initialize extracted fields with override tracking
@@ -62,6 +87,7 @@ const RVToolsUpload = ({ onExtractionComplete, extractedFields: externalExtracte
 
         setExtractedFields(fieldsWithOverrides)
         setExtractionSummary(data.summary)
+        setFileResults(data.files || [])
         setShowExtraction(true)
 
         // Notify parent component
@@ -76,6 +102,7 @@ const RVToolsUpload = ({ onExtractionComplete, extractedFields: externalExtracte
       setUploadError(error.message || 'Failed to process RVTools file. Please check that the backend API is running on port 8001.')
     } finally {
       setIsUploading(false)
+      setProgress(null)
     }
   }
 
@@ -110,6 +137,7 @@ const RVToolsUpload = ({ onExtractionComplete, extractedFields: externalExtracte
   const handleClearUpload = () => {
     setExtractedFields({})
     setExtractionSummary(null)
+    setFileResults([])
     setShowExtraction(false)
     setUploadError(null)
     if (fileInputRef.current) {
@@ -149,7 +177,8 @@ const RVToolsUpload = ({ onExtractionComplete, extractedFields: externalExtracte
           <input
             ref={fileInputRef}
             type="file"
-            accept=".xlsx,.xls,.xlsm"
+            accept=".xlsx,.xls,.xlsm,.csv,.zip"
+            multiple
             onChange={handleFileSelect}
             className="hidden"
             id="rvtools-file-input"
@@ -164,7 +193,21 @@ const RVToolsUpload = ({ onExtractionComplete, extractedFields: externalExtracte
             {isUploading ? (
               <>
                 <Loader2 className="w-8 h-8 text-indigo-600 animate-spin" />
-                <span className="text-sm text-gray-600">Processing RVTools file...</span>
+                <span className="text-sm text-gray-600">
+                  {progress ? `${progress.message} (${Math.round(progress.percent)}%)` : 'Uploading RVTools file...'}
+                </span>
+                {progress && (
+                  <>
+                    <div className="w-full max-w-xs bg-gray-200 rounded-full h-1.5">
+                      <div className="bg-indigo-600 h-1.5 rounded-full" style={{ width: `${progress.percent}%` }} />
+                    </div>
+                    <span className="text-xs text-gray-500">
+                      {progress.rows.toLocaleString()} rows parsed
+                      {progress.rows_per_second > 0 && ` at ${Math.round(progress.rows_per_second).toLocaleString()} rows/s`}
+                      {` · ${Math.round(progress.elapsed_seconds)}s`}
+                    </span>
+                  </>
+                )}
               </>
             ) : (
               <>
@@ -175,7 +218,7 @@ const RVToolsUpload = ({ onExtractionComplete, extractedFields: externalExtracte
                   </span>
                   <span className="text-sm text-gray-500"> or drag and drop</span>
                 </div>
-                <p className="text-xs text-gray-500">Excel files (.xlsx, .xls, .xlsm)</p>
+                <p className="text-xs text-gray-500">Excel files (.xlsx, .xls, .xlsm), CSV exports or zip archives; select several to combine vCenters</p>
               </>
             )}
           </label>
@@ -204,6 +247,17 @@ const RVToolsUpload = ({ onExtractionComplete, extractedFields: externalExtracte
                 Extracted {extractionSummary.auto_extracted} fields from RVTools, 
                 {extractionSummary.default_assumptions} default assumptions applied
               </p>
+              {fileResults.length > 1 && (
+                <ul className="text-xs text-green-700 mt-2 space-y-0.5">
+                  {fileResults.map(result => (
+                    <li key={result.file} className={result.status === 'error' ? 'text-red-700' : ''}>
+                      {result.file}: {result.status === 'error'
+                        ? result.error
+                        : `${result.vms.toLocaleString()} VMs, ${result.hosts.toLocaleString()} hosts`}
+                    </li>
+                  ))}
+                </ul>
+              )}
             </div>
           </div>
 